@@ -248,6 +248,14 @@ CLI_OPTIONS = {
     "disk_space_ranges": {
         "get-disk-space-ranges": True,
     },
+    "os_counts_and_supported_os": {
+        "get-os-counts": True,
+        "get-supported-os": True,
+        "minimum-count": 500,
+    },
+    "resource_quantiles": {
+        "get-resource-quantiles": True,
+    },
 }
 
 EXPECTED_CLI_OUTPUT = {
@@ -1036,24 +1044,66 @@ EXPECTED_CLI_OUTPUT = {
     ),
 }
 
+EXPECTED_CLI_OUTPUT["os_counts_and_supported_os"] = (
+    EXPECTED_CLI_OUTPUT["os_min_counts"] + "\n" + EXPECTED_CLI_OUTPUT["supported_os_min_count"]
+)
+
+EXPECTED_CLI_OUTPUT["resource_quantiles"] = (
+    "Resource        Count    p50     p90     p95      p99       Max\n"
+    "------------  -------  -----  ------  ------  -------  --------\n"
+    "Memory (GiB)    55074   16.0    63.4   127.8    159.2    4096.0\n"
+    "Disk (GiB)      55069  415.8  1939.5  3262.4  10407.3  114256.4\n"
+    "CPU             55074    6.0    16.0    19.9     32.1     128.0"
+)
+
 EXPECTED_ARGPARSE_TO_YAML = {
+    "adaptive_disk_bins": None,
+    "approximate": False,
+    "backend": None,
     "breakdown_by_terabyte": False,
+    "cache_dir": None,
+    "cache_max_size": None,
+    "cache_ttl": None,
+    "chunk_size": None,
+    "data_quality": False,
+    "diff_against": None,
+    "diff_key": None,
     "disk_space_by_granular_os": False,
     "directory": None,
     "file": "testfile.yaml",
     "generate_graphs": False,
     "get_disk_space_ranges": False,
     "get_os_counts": False,
+    "get_resource_quantiles": False,
     "get_supported_os": False,
     "get_unsupported_os": False,
+    "group_by": None,
+    "measure": None,
     "minimum_count": 0,
     "os_name": None,
     "output_os_by_version": False,
     "over_under_tb": False,
+    "partition_size": None,
+    "plan_capacity": None,
+    "plan_waves": None,
     "prod_env_labels": None,
+    "queue_dir": None,
+    "save_summary": None,
     "show_disk_space_by_os": False,
+    "site": None,
     "sort_by_env": None,
     "sort_by_site": False,
+    "summary": None,
+    "support_matrix": None,
+    "top_n": None,
+    "trend": None,
+    "wave_across_sites": False,
+    "wave_max_disk": None,
+    "wave_max_memory": None,
+    "wave_max_vms": None,
+    "where": None,
+    "worker": False,
+    "workers": None,
 }
 TEST_DATAFRAMES = [
     {
@@ -1110,11 +1160,12 @@ TEST_DATAFRAMES = [
 ]
 
 MAIN_FUNCTION_CALLS = {
-    "sort_by_site": ["vm_data", "cli_output"],
+    "sort_by_site": ["vm_data", "cli_output", "support_matrix"],
     "show_disk_space_by_os": ["config", "analyzer", "cli_output", "visualizer"],
     "get_disk_space_ranges": ["config", "analyzer", "cli_output", "visualizer"],
     "get_os_counts": ["config", "analyzer", "cli_output", "visualizer"],
     "output_os_by_version": ["analyzer", "cli_output", "visualizer"],
     "get_supported_os": ["config", "analyzer", "cli_output", "visualizer"],
     "get_unsupported_os": ["analyzer", "cli_output", "visualizer"],
+    "get_resource_quantiles": ["analyzer", "cli_output"],
 }
@@ -114,12 +114,42 @@ def mock_config(mocker: MockFixture) -> Generator[MockType, None, None]:
         ("output_os_by_version", False),
         ("get_supported_os", False),
         ("get_unsupported_os", False),
+        ("support_matrix", None),
         ("file", None),
+        ("summary", None),
+        ("trend", None),
+        ("save_summary", None),
+        ("get_resource_quantiles", False),
+        ("data_quality", False),
+        ("approximate", False),
+        ("diff_against", None),
+        ("diff_key", None),
+        ("plan_capacity", None),
+        ("plan_waves", None),
+        ("wave_across_sites", False),
+        ("wave_max_vms", None),
+        ("wave_max_memory", None),
+        ("wave_max_disk", None),
+        ("backend", None),
+        ("chunk_size", None),
+        ("workers", None),
+        ("partition_size", None),
+        ("queue_dir", None),
+        ("worker", False),
+        ("cache_dir", None),
+        ("cache_ttl", None),
+        ("cache_max_size", None),
         ("minimum_count", 0),
         ("os_name", None),
+        ("site", None),
+        ("group_by", None),
+        ("where", None),
+        ("measure", None),
+        ("top_n", None),
         ("over_under_tb", False),
         ("breakdown_by_terabyte", False),
         ("disk_space_by_granular_os", False),
+        ("adaptive_disk_bins", None),
         ("prod_env_labels", None),
         ("sort_by_env", None),
     ]:
@@ -1,11 +1,17 @@
+import typing as t
 from collections.abc import Generator
 
 import pandas as pd
 import pytest
 from pytest_mock import MockFixture, MockType
 
+import vminfo_parser.analyzer as analyzer_module
 import vminfo_parser.const as vm_const
 from vminfo_parser.analyzer import Analyzer
+from vminfo_parser.cube import Cube
+from vminfo_parser.pivot import Measure
+from vminfo_parser.support import SupportMatrix, SupportRule
+from vminfo_parser.vmdata import VMData
 
 
 @pytest.fixture
@@ -13,6 +19,26 @@ def analyzer(mock_config: MockType, mock_vmdata: MockType) -> Generator[Analyzer
     yield Analyzer(mock_vmdata, mock_config)
 
 
+@pytest.fixture
+def inventory_analyzer(mock_config: MockType) -> Generator[Analyzer, None, None]:
+    df = pd.DataFrame(
+        {
+            "OS Name": ["CentOS", "CentOS", "CentOS", "Ubuntu Linux", "Ubuntu Linux", "Windows Server"],
+            "OS Version": ["7", "8", None, "22.04", "22.04", "2019"],
+            "Environment": ["prod", "dev", "prod", "dev", "prod", "dev"],
+            "Memory": [1, 2, 3, 4, 5, 6],
+            "Disk": [100, 450, 2500, 300, 150, 12000],
+            "CPUs": [1, 1, 1, 1, 1, 1],
+        }
+    )
+    vm_data = VMData(df, normalize=False)
+    vm_data.column_headers = {"environment": "Environment", "vmMemory": "Memory", "vmDisk": "Disk", "vCPU": "CPUs"}
+    mock_config.environments = ["prod"]
+    mock_config.environment_filter = "all"
+    mock_config.count_filter = None
+    yield Analyzer(vm_data, mock_config)
+
+
 @pytest.mark.parametrize("os_names", [["os1"], ["os1,os2"]], ids=["single", "multiple"])
 def test_by_os(analyzer: Analyzer, mocker: MockFixture, os_names: list[str]) -> None:
     test_func: MockType = mocker.MagicMock()
@@ -46,7 +72,7 @@ def test_by_os(analyzer: Analyzer, mocker: MockFixture, os_names: list[str]) ->
     ],
 )
 def test_get_unique_os_names(analyzer: Analyzer, df_data: dict, os_name: str | None, expected: list[str]) -> None:
-    analyzer.vm_data.df = pd.DataFrame(data=df_data)
+    analyzer.vm_data.cube = Cube(pd.DataFrame(data=df_data))
     analyzer.config.os_name = os_name
 
     response = analyzer.get_unique_os_names()
@@ -54,100 +80,248 @@ def test_get_unique_os_names(analyzer: Analyzer, df_data: dict, os_name: str | N
     assert response == expected
 
 
-def test_get_os_counts(analyzer: Analyzer, mocker: MockFixture) -> None:
-    mock_df = analyzer.vm_data.create_environment_filtered_dataframe.return_value
-    mock_calculate = mocker.patch.object(analyzer, "_calculate_os_counts")
+@pytest.mark.parametrize(
+    "environment_filter,os_name,site,expected",
+    [
+        ("all", None, None, {"CentOS": 3, "Ubuntu Linux": 2, "Windows Server": 1}),
+        ("prod", None, None, {"CentOS": 2, "Ubuntu Linux": 1}),
+        ("all", "CentOS", None, {"CentOS": 3}),
+        ("prod", "CentOS", None, {"CentOS": 2}),
+        ("all", None, "DC1", {"CentOS": 2, "Ubuntu Linux": 1}),
+        ("non-prod", None, "DC1", {"CentOS": 1}),
+        ("non-prod", "Ubuntu Linux", "DC1", {}),
+    ],
+    ids=["all", "environment", "os_name", "environment_os_name", "site", "environment_site", "no_cells"],
+)
+def test_get_operating_system_counts(
+    inventory_analyzer: Analyzer, environment_filter: str, os_name: str | None, site: str | None, expected: dict
+) -> None:
+    inventory_analyzer.vm_data.df["Site Name"] = ["DC1", "DC1", "DC2", "DC2", "DC1", "DC2"]
+    inventory_analyzer.vm_data.invalidate()
+    inventory_analyzer.config.environment_filter = environment_filter
+    inventory_analyzer.config.os_name = os_name
+    inventory_analyzer.config.site = site
+
+    response = inventory_analyzer.get_operating_system_counts()
 
-    response = analyzer.get_operating_system_counts()
+    assert response.to_dict() == expected
 
-    analyzer.vm_data.create_environment_filtered_dataframe.assert_called_once_with(
-        analyzer.config.environments, env_filter=analyzer.config.environment_filter
+
+@pytest.mark.parametrize(
+    "environment_filter,expected_supported,expected_unsupported",
+    [
+        ("all", {"Microsoft Windows Server": 1}, {"CentOS": 3, "Ubuntu Linux": 2}),
+        ("prod", {}, {"CentOS": 2, "Ubuntu Linux": 1}),
+        ("non-prod", {"Microsoft Windows Server": 1}, {"CentOS": 1, "Ubuntu Linux": 1}),
+    ],
+)
+def test_get_supported_and_unsupported_os_counts(
+    inventory_analyzer: Analyzer, environment_filter: str, expected_supported: dict, expected_unsupported: dict
+) -> None:
+    inventory_analyzer.vm_data.df["OS Name"] = inventory_analyzer.vm_data.df["OS Name"].replace(
+        "Windows Server", "Microsoft Windows Server"
     )
-    mock_calculate.assert_called_once_with(mock_df)
+    inventory_analyzer.vm_data.invalidate()
+    inventory_analyzer.config.environment_filter = environment_filter
+
+    assert inventory_analyzer.get_supported_os_counts().to_dict() == expected_supported
+    assert inventory_analyzer.get_unsupported_os_counts().to_dict() == expected_unsupported
+
+
+@pytest.mark.parametrize(
+    "environment_filter,expected_supported,expected_unsupported",
+    [
+        ("all", {"CentOS": 1}, {"CentOS": 2, "Ubuntu Linux": 2, "Windows Server": 1}),
+        (
+            "both",
+            {"CentOS": {"non-prod": 1}},
+            {
+                "CentOS": {"non-prod": 0, "prod": 2},
+                "Ubuntu Linux": {"non-prod": 1, "prod": 1},
+                "Windows Server": {"non-prod": 1, "prod": 0},
+            },
+        ),
+    ],
+)
+def test_get_os_counts_support_matrix(
+    inventory_analyzer: Analyzer, environment_filter: str, expected_supported: dict, expected_unsupported: dict
+) -> None:
+    # CentOS 8 and later are supported, CentOS 7 and CentOS without a version aren't
+    inventory_analyzer.support_matrix = SupportMatrix((SupportRule("CentOS", True, min_version=8),))
+    inventory_analyzer.config.environment_filter = environment_filter
 
-    assert response == mock_calculate.return_value
+    supported = inventory_analyzer.get_supported_os_counts()
+    unsupported = inventory_analyzer.get_unsupported_os_counts()
 
+    assert (supported.T if environment_filter == "both" else supported).to_dict() == expected_supported
+    assert (unsupported.T if environment_filter == "both" else unsupported).to_dict() == expected_unsupported
 
-def test_get_os_counts_for_os_name(analyzer: Analyzer, mocker: MockFixture) -> None:
-    mock_df: MockType = analyzer.vm_data.create_environment_filtered_dataframe.return_value
-    mock_calculate: MockType = mocker.patch.object(analyzer, "_calculate_os_counts")
-    analyzer.config.os_name = "os1"
-    mock_filtered_df: MockType = mock_df.__getitem__.return_value
 
-    response = analyzer.get_operating_system_counts()
+def test_get_os_version_distribution_site(inventory_analyzer: Analyzer) -> None:
+    inventory_analyzer.vm_data.df["Site Name"] = ["DC1", "DC2", "DC1", "DC2", "DC1", "DC2"]
+    inventory_analyzer.vm_data.invalidate()
+    inventory_analyzer.config.site = "DC1"
 
-    mock_df.__getitem__.assert_has_calls(
-        [
-            ("", ("OS Name",)),
-            ("", (False,)),
-        ],
-        any_order=True,
-    )
-    mock_filtered_df.__eq__.assert_called_once_with(analyzer.config.os_name)
+    response = inventory_analyzer.get_os_version_distribution("CentOS")
 
-    analyzer.vm_data.create_environment_filtered_dataframe.assert_called_once_with(
-        analyzer.config.environments, env_filter=analyzer.config.environment_filter
-    )
-    mock_calculate.assert_called_once_with(mock_filtered_df)
+    assert response.to_dict("list") == {"OS Version": ["7", "unknown"], "Count": [1, 1]}
+    pd.testing.assert_frame_equal(response, inventory_analyzer.get_os_version_distributions()["CentOS"])
 
-    assert response == mock_calculate.return_value
 
+@pytest.mark.parametrize("count_filter", [None, 2], ids=["no_filter", "count_filter"])
+def test_get_os_version_distributions(inventory_analyzer: Analyzer, count_filter: int | None) -> None:
+    inventory_analyzer.config.count_filter = count_filter
 
-def test_get_supported_os_counts(analyzer: Analyzer, mocker: MockFixture) -> None:
-    mock_calculate = mocker.patch.object(analyzer, "_calculate_os_counts")
-    mock_count_df = mock_calculate.return_value
-    mock_env_df = analyzer.vm_data.create_environment_filtered_dataframe.return_value
-    mock_filtered_df = mock_env_df.__getitem__.return_value
+    response = inventory_analyzer.get_os_version_distributions()
 
-    response = analyzer.get_supported_os_counts()
+    assert list(response) == inventory_analyzer.get_unique_os_names()
+    for os_name, counts in response.items():
+        pd.testing.assert_frame_equal(counts, inventory_analyzer.get_os_version_distribution(os_name))
 
-    # Assert create_environment_filtered_dataframe called correctly
-    analyzer.vm_data.create_environment_filtered_dataframe.assert_called_once_with(
-        analyzer.config.environments, env_filter=analyzer.config.environment_filter
-    )
 
-    # Assert counts filtered by supported os set from const
-    mock_filtered_df.isin.assert_called_once_with(vm_const.SUPPORTED_OSES)
-    mock_env_df.__getitem__.assert_has_calls(
-        [
-            ("", ("OS Name",), {}),
-            ("", (mock_filtered_df.isin.return_value,), {}),
-        ],
-        any_order=True,
-    )
+@pytest.mark.parametrize(
+    "environment_filter,expected",
+    [
+        ("all", pd.Series([3, 3], index=pd.Index(["CentOS", "Other"], name="OS Name"), name="count")),
+        (
+            "both",
+            pd.DataFrame(
+                {"non-prod": [1, 2], "prod": [2, 1]},
+                index=pd.Index(["CentOS", "Other"], name="OS Name"),
+            ).rename_axis(columns="Environment"),
+        ),
+    ],
+)
+def test_get_operating_system_counts_top_n(
+    inventory_analyzer: Analyzer, environment_filter: str, expected: pd.Series | pd.DataFrame
+) -> None:
+    inventory_analyzer.config.environment_filter = environment_filter
+    inventory_analyzer.config.top_n = 1
 
-    # Assert _calculate_os_counts called correctly
-    mock_calculate.assert_called_once_with(mock_filtered_df)
+    response = inventory_analyzer.get_operating_system_counts()
 
-    # Assert correct value is returned
-    assert response == mock_count_df
+    if environment_filter == "both":
+        pd.testing.assert_frame_equal(response, expected)
+    else:
+        pd.testing.assert_series_equal(response, expected)
 
 
-def test_get_unsupported_os_counts(analyzer: Analyzer, mocker: MockFixture) -> None:
-    mock_calculate = mocker.patch.object(analyzer, "_calculate_os_counts")
-    mock_count_df = mock_calculate.return_value
-    mock_env_df = analyzer.vm_data.create_environment_filtered_dataframe.return_value
-    mock_filtered_df = mock_env_df.__getitem__.return_value
+def test_get_os_version_distribution_top_n(inventory_analyzer: Analyzer) -> None:
+    inventory_analyzer.config.top_n = 1
 
-    response = analyzer.get_supported_os_counts()
+    response = inventory_analyzer.get_os_version_distribution("CentOS")
 
-    # Assert create_environment_filtered_dataframe called correctly
-    analyzer.vm_data.create_environment_filtered_dataframe.assert_called_once_with(
-        analyzer.config.environments, env_filter=analyzer.config.environment_filter
-    )
+    assert response.to_dict("list") == {"OS Version": ["7"], "Count": [1]}
+
+
+@pytest.mark.parametrize("environment_filter", ["all", "both", "prod"])
+def test_get_disk_space_by_os(inventory_analyzer: Analyzer, environment_filter: str) -> None:
+    inventory_analyzer.config.environment_filter = environment_filter
+
+    response = inventory_analyzer.get_disk_space_by_os()
+
+    assert list(response) == inventory_analyzer.get_unique_os_names()
+    for os_name, disk_space in response.items():
+        pd.testing.assert_frame_equal(disk_space, inventory_analyzer.get_disk_space(os_name))
+
+
+@pytest.mark.parametrize("environment_filter", ["all", "both", "prod"])
+def test_get_disk_space_adaptive(inventory_analyzer: Analyzer, environment_filter: str) -> None:
+    inventory_analyzer.config.environment_filter = environment_filter
+    inventory_analyzer.config.adaptive_disk_bins = 3
+
+    response = inventory_analyzer.get_disk_space(None)
+
+    # two VMs in each range, with edges shared by every environment filter
+    assert inventory_analyzer.get_adaptive_disk_edges() == (0, 150, 450, 12000)
+    if environment_filter == "prod":
+        assert response.index.tolist() == ["0 - 150 GiB", "451 GiB - 12 TiB"]
+        assert response.to_numpy().sum() == 3
+    else:
+        assert response.index.tolist() == ["0 - 150 GiB", "151 - 450 GiB", "451 GiB - 12 TiB"]
+        assert response.to_numpy().sum() == 6
+
+
+def test_get_disk_space_by_os_adaptive_edges_computed_once(inventory_analyzer: Analyzer, mocker: MockFixture) -> None:
+    inventory_analyzer.config.adaptive_disk_bins = 3
+    spy = mocker.spy(analyzer_module, "adaptive_disk_edges")
+
+    response = inventory_analyzer.get_disk_space_by_os()
+
+    spy.assert_called_once()
+    assert sum(disk_space.to_numpy().sum() for disk_space in response.values()) == 6
+
+
+def test_results_cached(inventory_analyzer: Analyzer, mocker: MockFixture) -> None:
+    spy = mocker.spy(inventory_analyzer, "_environment_filtered_cube")
+
+    first = inventory_analyzer.get_operating_system_counts()
+    second = inventory_analyzer.get_operating_system_counts()
+
+    assert first is second
+    spy.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "field,value",
+    [
+        ("environment_filter", "prod"),
+        ("environments", ["dev"]),
+        ("os_name", "CentOS"),
+        ("site", "DC1"),
+        ("count_filter", 2),
+        ("top_n", 1),
+    ],
+)
+def test_results_cached_per_config(inventory_analyzer: Analyzer, field: str, value: t.Any) -> None:
+    first = inventory_analyzer.get_operating_system_counts()
+    setattr(inventory_analyzer.config, field, value)
+
+    second = inventory_analyzer.get_operating_system_counts()
+
+    assert first is not second
+    assert len(inventory_analyzer.results) == 2
+
+
+def test_get_pivot_cached(inventory_analyzer: Analyzer) -> None:
+    measures = (Measure("count"), Measure("sum", "vmDisk"))
+
+    first = inventory_analyzer.get_pivot(("OS Name",), measures)
+    second = inventory_analyzer.get_pivot(("OS Name",), measures)
+
+    assert first is second
+    assert first.to_dict("list") == {
+        "OS Name": ["CentOS", "Ubuntu Linux", "Windows Server"],
+        "count": [3, 2, 1],
+        "sum:vmDisk": [3050, 450, 12000],
+    }
+
+
+def test_results_cache_data_version(inventory_analyzer: Analyzer) -> None:
+    first = inventory_analyzer.get_os_version_distributions()
+    inventory_analyzer.vm_data.df.loc[0, "OS Version"] = "9"
+    inventory_analyzer.vm_data.invalidate()
+
+    second = inventory_analyzer.get_os_version_distributions()
+
+    assert "9" not in first["CentOS"]["OS Version"].values
+    assert "9" in second["CentOS"]["OS Version"].values
+
+
+def test_invalidate_cache(inventory_analyzer: Analyzer) -> None:
+    first = inventory_analyzer.get_supported_os_counts()
+
+    inventory_analyzer.invalidate_cache()
+
+    assert len(inventory_analyzer.results) == 0
+    assert inventory_analyzer.get_supported_os_counts() is not first
 
-    # Assert counts filtered by supported os set from const
-    mock_filtered_df.isin.assert_called_once_with(vm_const.SUPPORTED_OSES)
-    mock_env_df.__getitem__.assert_has_calls(
-        [
-            ("", ("OS Name",), {}),
-            ("", (mock_filtered_df.isin.return_value,), {}),  # mock ignores the ~ negation that is performed by pandas
-        ],
-        any_order=True,
-    )
 
-    # Assert _calculate_os_counts called correctly
-    mock_calculate.assert_called_once_with(mock_filtered_df)
+def test_get_resource_quantiles(inventory_analyzer: Analyzer) -> None:
+    response = inventory_analyzer.get_resource_quantiles()
 
-    # Assert correct value is returned
-    assert response == mock_count_df
+    assert list(response.index) == ["Memory (GiB)", "Disk (GiB)", "CPU"]
+    assert list(response.columns) == ["Count", "p50", "p90", "p95", "p99", "Max"]
+    assert response.loc["Disk (GiB)", "Count"] == 6
+    assert response.loc["Disk (GiB)", "Max"] == 12000
+    assert response.loc["CPU", "p50"] == pytest.approx(1, rel=vm_const.SKETCH_RELATIVE_ACCURACY)
@@ -0,0 +1,103 @@
+from collections.abc import Generator
+
+import pandas as pd
+import pytest
+from pytest_mock import MockType
+
+from vminfo_parser.analyzer import Analyzer
+from vminfo_parser.approximate import ApproximateAnalyzer, InventorySketch
+from vminfo_parser.vmdata import VMData
+
+
+@pytest.fixture
+def inventory() -> Generator[VMData, None, None]:
+    df = pd.DataFrame(
+        {
+            "OS Name": ["CentOS", "CentOS", "CentOS", "Ubuntu Linux", "Ubuntu Linux", "Windows Server"],
+            "OS Version": ["7", "8", None, "22.04", "22.04", "2019"],
+            "Environment": ["prod", "dev", "prod", "dev", "prod", "dev"],
+            "Memory": [1, 2, 3, 4, 5, 6],
+            "Disk": [100, 450, 2500, 300, 150, 12000],
+            "CPUs": [1, 1, 1, 1, 1, 1],
+        }
+    )
+    vm_data = VMData(df, normalize=False)
+    vm_data.column_headers = {"environment": "Environment", "vmMemory": "Memory", "vmDisk": "Disk", "vCPU": "CPUs"}
+    yield vm_data
+
+
+@pytest.fixture
+def approximate_config(mock_config: MockType) -> Generator[MockType, None, None]:
+    mock_config.environments = ["prod"]
+    mock_config.environment_filter = "all"
+    mock_config.count_filter = None
+    yield mock_config
+
+
+@pytest.mark.parametrize("environment_filter", ["all", "prod", "non-prod"])
+@pytest.mark.parametrize("count_filter", [None, 2])
+def test_get_operating_system_counts(
+    inventory: VMData, approximate_config: MockType, environment_filter: str, count_filter: int | None
+) -> None:
+    approximate_config.environment_filter = environment_filter
+    approximate_config.count_filter = count_filter
+    sketch = InventorySketch.from_vmdata([inventory], ["prod"], env_filter=environment_filter, chunksize=2)
+
+    counts = ApproximateAnalyzer(sketch, approximate_config).get_operating_system_counts()
+
+    expected = Analyzer(inventory, approximate_config).get_operating_system_counts()
+    assert counts["count"].to_dict() == expected.to_dict()
+    assert (counts["error"] == 0).all()
+
+
+def test_get_operating_system_counts_error_bounds(inventory: VMData, approximate_config: MockType) -> None:
+    sketch = InventorySketch(["prod"], capacity=2)
+    for start in range(0, len(inventory.df), 2):
+        sketch.update(inventory.df.iloc[start : start + 2], inventory.column_headers)
+
+    counts = ApproximateAnalyzer(sketch, approximate_config).get_operating_system_counts()
+
+    true_counts = inventory.df["OS Name"].value_counts()
+    assert len(counts) == 2
+    for os_name, row in counts.iterrows():
+        assert row["count"] - row["error"] <= true_counts[os_name] <= row["count"]
+
+
+def test_get_operating_system_counts_os_name(inventory: VMData, approximate_config: MockType) -> None:
+    sketch = InventorySketch.from_vmdata([inventory], ["prod"], os_name="CentOS")
+
+    counts = ApproximateAnalyzer(sketch, approximate_config).get_operating_system_counts()
+
+    assert counts["count"].to_dict() == {"CentOS": 3}
+
+
+def test_get_resource_quantiles(inventory: VMData, approximate_config: MockType) -> None:
+    sketch = InventorySketch.from_vmdata([inventory], ["prod"], chunksize=4)
+
+    quantiles = ApproximateAnalyzer(sketch, approximate_config).get_resource_quantiles()
+
+    expected = Analyzer(inventory, approximate_config).get_resource_quantiles()
+    pd.testing.assert_frame_equal(quantiles.drop(columns="Error (%)"), expected)
+    assert (quantiles["Error (%)"] == 1.0).all()
+
+
+def test_merge(inventory: VMData) -> None:
+    whole = InventorySketch.from_vmdata([inventory], ["prod"])
+
+    merged = InventorySketch(["prod"])
+    merged.update(inventory.df.iloc[:3], inventory.column_headers)
+    merged.merge(InventorySketch(["prod"]).update(inventory.df.iloc[3:], inventory.column_headers))
+
+    assert merged.rows == whole.rows
+    assert merged.os_names.top() == whole.os_names.top()
+    assert merged.resources["Disk"].to_dict() == whole.resources["Disk"].to_dict()
+
+
+def test_merge_different_filters() -> None:
+    with pytest.raises(ValueError):
+        InventorySketch(["prod"]).merge(InventorySketch(["prod"], env_filter="prod"))
+
+
+def test_both_environment_filter() -> None:
+    with pytest.raises(ValueError):
+        InventorySketch(["prod"], env_filter="both")
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vminfo_parser.bitmap import Bitmap, BitmapIndex, RowIndex
+
+
+@pytest.fixture
+def values() -> pd.Series:
+    return pd.Series(["DC1", "DC2", None, "DC1", "DC3", "DC2", "DC1", np.nan, "DC2", "DC1", "DC3"])
+
+
+@pytest.mark.parametrize("size", [0, 1, 8, 11, 16, 17])
+def test_full(size: int) -> None:
+    bitmap = Bitmap.full(size)
+
+    assert bitmap.count() == size
+    np.testing.assert_array_equal(bitmap.rows(), np.arange(size))
+    assert (~bitmap).count() == 0
+
+
+def test_from_mask() -> None:
+    mask = np.array([True, False, False, True, True, False, False, False, False, True])
+
+    bitmap = Bitmap.from_mask(mask)
+
+    assert bitmap.count() == 4
+    np.testing.assert_array_equal(bitmap.rows(), np.flatnonzero(mask))
+    np.testing.assert_array_equal((~bitmap).rows(), np.flatnonzero(~mask))
+
+
+def test_index_get(values: pd.Series) -> None:
+    index = BitmapIndex(values)
+
+    for value in ["DC1", "DC2", "DC3"]:
+        np.testing.assert_array_equal(index.get(value).rows(), np.flatnonzero(values == value))
+    np.testing.assert_array_equal(index.get(None).rows(), [2, 7])
+    np.testing.assert_array_equal(index.get(float("nan")).rows(), [2, 7])
+    assert index.get("DC4").count() == 0
+    assert index.values == ["DC1", "DC2", None, "DC3"]
+
+
+def test_index_combinations(values: pd.Series) -> None:
+    index = BitmapIndex(values)
+    other = BitmapIndex(pd.Series(["a", "b"] * 5 + ["a"]))
+
+    either = index.any_of(["DC1", "DC3", "DC4"])
+    both = either & other.get("a")
+
+    np.testing.assert_array_equal(either.rows(), np.flatnonzero(values.isin(["DC1", "DC3"])))
+    np.testing.assert_array_equal(both.rows(), [0, 4, 6, 10])
+    np.testing.assert_array_equal((~either).rows(), [1, 2, 5, 7, 8])
+    np.testing.assert_array_equal((either | index.get(None)).rows(), np.flatnonzero(values.ne("DC2")))
+    assert index.any_of([]).count() == 0
+
+
+def test_index_get_copies(values: pd.Series) -> None:
+    index = BitmapIndex(values)
+
+    bitmap = index.get("DC1")
+    bitmap.bits[:] = 0
+
+    assert index.get("DC1").count() == 4
+
+
+def test_row_index(values: pd.Series) -> None:
+    index = RowIndex(values)
+
+    for value in ["DC1", "DC2", "DC3"]:
+        np.testing.assert_array_equal(index.rows(value), np.flatnonzero(values == value))
+    assert index.rows("DC4").size == 0
+    assert index.values == ["DC1", "DC2", "DC3"]
+    np.testing.assert_array_equal(index.rows_of(["DC3", "DC1", "DC4"]), np.flatnonzero(values.isin(["DC1", "DC3"])))
+    assert index.rows_of([]).size == 0
+    assert not index.rows("DC1").flags.writeable
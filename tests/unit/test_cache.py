@@ -0,0 +1,331 @@
+import json
+import logging
+import os
+import pickle
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pytest_mock import MockFixture, MockType
+
+from vminfo_parser.cache import GraphRecorder, ReportCache, ResultCache, cached_result, skip_output_csv
+from vminfo_parser.config import Config
+
+
+def test_result_cache_get_set() -> None:
+    cache = ResultCache(maxsize=2)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+
+    assert "a" in cache
+    assert cache.get("a") == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_result_cache_evicts_least_recently_used() -> None:
+    cache = ResultCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_result_cache_clear() -> None:
+    cache = ResultCache()
+    cache.set("a", 1)
+
+    cache.clear()
+
+    assert len(cache) == 0
+
+
+def test_result_cache_invalid_size() -> None:
+    with pytest.raises(ValueError):
+        ResultCache(maxsize=0)
+
+
+def test_cached_result(mocker: MockFixture) -> None:
+    compute = mocker.MagicMock(side_effect=lambda value: value * 2)
+
+    class Report:
+        def __init__(self) -> None:
+            self.results = ResultCache()
+            self.state = "a"
+
+        def cache_key(self) -> str:
+            return self.state
+
+        @cached_result
+        def double(self, value: int) -> int:
+            return compute(value)
+
+    report = Report()
+
+    assert report.double(1) == 2
+    assert report.double(1) == 2
+    assert report.double(value=2) == 4
+    assert report.double(value=2) == 4
+    report.state = "b"
+    assert report.double(1) == 2
+
+    compute.assert_has_calls([((1,), {}), ((2,), {}), ((1,), {})])
+    assert compute.call_count == 3
+
+
+@pytest.fixture
+def report_cache(tmp_path: Path) -> ReportCache:
+    return ReportCache(tmp_path / "cache", max_size=1024 * 1024, ttl=60)
+
+
+@pytest.fixture
+def inventory_file(tmp_path: Path) -> Path:
+    inventory = tmp_path / "inventory.csv"
+    inventory.write_text("VM OS,Environment\nCentOS 7,prod\n")
+    return inventory
+
+
+def test_report_cache_from_config(tmp_path: Path) -> None:
+    assert ReportCache.from_config(Config.from_args("--file", "inventory.csv")) is None
+
+    report_cache = ReportCache.from_config(
+        Config.from_args("--file", "inventory.csv", "--cache-dir", str(tmp_path), "--cache-max-size", "2")
+    )
+
+    assert report_cache.directory == tmp_path
+    assert report_cache.max_size == 2 * 1024 * 1024
+
+
+def test_report_cache_key(report_cache: ReportCache, inventory_file: Path) -> None:
+    key = report_cache.key(Config.from_args("--file", str(inventory_file), "--get-os-counts"))
+
+    # cache options don't change the reports
+    assert key == report_cache.key(
+        Config.from_args("--file", str(inventory_file), "--get-os-counts", "--cache-ttl", "10")
+    )
+    assert key != report_cache.key(Config.from_args("--file", str(inventory_file), "--get-supported-os"))
+
+    inventory_file.write_text("VM OS,Environment\nCentOS 8,prod\n")
+    assert key != report_cache.key(Config.from_args("--file", str(inventory_file), "--get-os-counts"))
+
+
+def test_report_cache_prunes_digests(report_cache: ReportCache, inventory_file: Path, tmp_path: Path) -> None:
+    other_file = tmp_path / "other.csv"
+    other_file.write_text("VM OS,Environment\nCentOS 8,prod\n")
+    report_cache.key(Config.from_args("--file", str(inventory_file), "--get-os-counts"))
+    report_cache.key(Config.from_args("--file", str(other_file), "--get-os-counts"))
+    assert len(json.loads((report_cache.directory / "digests.json").read_text())) == 2
+
+    # The digests of the changed and the removed file are dropped when the new digest is stored
+    inventory_file.write_text("VM OS,Environment\nCentOS 9,prod\n")
+    other_file.unlink()
+    report_cache.key(Config.from_args("--file", str(inventory_file), "--get-os-counts"))
+    digests = json.loads((report_cache.directory / "digests.json").read_text())
+    assert [file_key.rsplit(":", 2)[0] for file_key in digests] == [str(inventory_file.resolve())]
+
+
+def test_report_cache_key_directory(report_cache: ReportCache, inventory_file: Path) -> None:
+    args = ("--directory", str(inventory_file.parent), "--get-os-counts")
+    key = report_cache.key(Config.from_args(*args))
+
+    (inventory_file.parent / "notes.txt").write_text("not an inventory")
+    assert key == report_cache.key(Config.from_args(*args))
+
+    (inventory_file.parent / "more.csv").write_text("VM OS,Environment\nCentOS 8,prod\n")
+    assert key != report_cache.key(Config.from_args(*args))
+
+
+def test_report_cache_key_diff_against(report_cache: ReportCache, inventory_file: Path, tmp_path: Path) -> None:
+    previous = tmp_path / "previous.csv"
+    previous.write_text("VM OS,Environment\nCentOS 7,prod\n")
+    args = ("--file", str(inventory_file), "--diff-against", str(previous))
+    key = report_cache.key(Config.from_args(*args))
+
+    previous.write_text("VM OS,Environment\nCentOS 6,prod\n")
+    assert key != report_cache.key(Config.from_args(*args))
+
+
+def test_report_cache_key_trend(report_cache: ReportCache, tmp_path: Path) -> None:
+    snapshots = tmp_path / "snapshots"
+    snapshots.mkdir()
+    (snapshots / "inventory-2024-01-01.csv").write_text("VM OS,Environment\nCentOS 7,prod\n")
+    args = ("--trend", str(snapshots))
+    key = report_cache.key(Config.from_args(*args))
+
+    (snapshots / "inventory-2024-01-08.csv").write_text("VM OS,Environment\nCentOS 8,prod\n")
+    assert key != report_cache.key(Config.from_args(*args))
+
+
+def test_report_cache_key_support_matrix(report_cache: ReportCache, inventory_file: Path, tmp_path: Path) -> None:
+    matrix = tmp_path / "matrix.csv"
+    matrix.write_text("OS Name,Min Version,Max Version,Architecture,Supported\nCentOS,,,,true\n")
+    args = ("--file", str(inventory_file), "--get-supported-os", "--support-matrix", str(matrix))
+    key = report_cache.key(Config.from_args(*args))
+
+    assert key == report_cache.key(Config.from_args(*args))
+    matrix.write_text("OS Name,Min Version,Max Version,Architecture,Supported\nCentOS,8,,,true\n")
+    assert key != report_cache.key(Config.from_args(*args))
+
+
+def test_report_cache_get_set(report_cache: ReportCache) -> None:
+    assert report_cache.get("key") is None
+
+    report_cache.set("key", "output", [])
+
+    assert report_cache.get("key")["output"] == "output"
+
+
+def test_report_cache_ttl(report_cache: ReportCache, mocker: MockFixture) -> None:
+    report_cache.set("key", "output", [])
+    mocker.patch("vminfo_parser.cache.time.time", return_value=time.time() + report_cache.ttl + 1)
+
+    assert report_cache.get("key") is None
+    assert not list(report_cache.directory.glob("key*"))
+
+
+def test_report_cache_max_size(report_cache: ReportCache) -> None:
+    report_cache.set("old", "x" * 100, [])
+    report_cache.set("recent", "x" * 100, [])
+    entry_size = (report_cache.directory / "old.report").stat().st_size
+    # Entries differ by a few bytes, with the length of their creation time in JSON
+    report_cache.max_size = entry_size * 2 + 32
+    # using an entry makes it the most recently used
+    os.utime(report_cache.directory / "recent.report", (0, 0))
+    report_cache.get("old")
+
+    report_cache.set("new", "x" * 100, [])
+
+    assert report_cache.get("old") is not None
+    assert report_cache.get("recent") is None
+    assert report_cache.get("new") is not None
+
+
+def test_report_cache_cube(report_cache: ReportCache, inventory_file: Path) -> None:
+    key = report_cache.cube_key(Config.from_args("--file", str(inventory_file), "--get-os-counts"))
+
+    # the cube doesn't depend on the report options
+    assert key == report_cache.cube_key(Config.from_args("--file", str(inventory_file), "--site", "DC1"))
+    assert report_cache.get_cube(key) is None
+
+    report_cache.set_cube(key, '{"format": 1}')
+
+    assert report_cache.get_cube(key) == '{"format": 1}'
+    inventory_file.write_text("VM OS,Environment\nCentOS 8,prod\n")
+    assert key != report_cache.cube_key(Config.from_args("--file", str(inventory_file)))
+
+
+def test_report_cache_evicts_cubes(report_cache: ReportCache) -> None:
+    report_cache.set_cube("cube", "x" * 100)
+    report_cache.set("new", "x" * 100, [])
+    report_cache.max_size = (report_cache.directory / "new.report").stat().st_size
+    # the cube was used less recently than the report, without expiring
+    os.utime(report_cache.directory / "cube.cube", (time.time() - 10, time.time() - 10))
+
+    report_cache.evict()
+
+    assert report_cache.get_cube("cube") is None
+    assert report_cache.get("new") is not None
+
+
+def test_report_cache_replay(report_cache: ReportCache, mocker: MockFixture, capsys: pytest.CaptureFixture) -> None:
+    mock_visualizer = mocker.patch("vminfo_parser.visualizer.Visualizer").return_value
+    counts = pd.Series({"CentOS": 1})
+    report_cache.set("key", "output\n", [("visualize_os_distribution", (counts, None), {})])
+
+    assert report_cache.replay("key")
+    assert not report_cache.replay("missing")
+
+    assert capsys.readouterr().out == "output\n"
+    mock_visualizer.visualize_os_distribution.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "file_output",
+    [("--plan-waves", "waves.csv", "--wave-max-vms", "10"), ("--save-summary", "summary.json")],
+    ids=["waves", "summary"],
+)
+def test_report_cache_replay_reports(
+    report_cache: ReportCache, inventory_file: Path, capsys: pytest.CaptureFixture, file_output: tuple[str, ...]
+) -> None:
+    config = Config.from_args("--file", str(inventory_file), "--get-os-counts")
+    report_cache.set(report_cache.key(config), "output\n", [])
+    # The cached output doesn't hold the files, so they are written again
+    file_config = Config.from_args("--file", str(inventory_file), "--get-os-counts", *file_output)
+    report_cache.set(report_cache.key(file_config), "output\n", [])
+
+    assert report_cache.replay_reports(config)
+    assert not report_cache.replay_reports(file_config)
+    assert capsys.readouterr().out == "output\n"
+
+
+def test_skip_output_csv(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture) -> None:
+    monkeypatch.chdir(tmp_path)
+    caplog.set_level(logging.INFO)
+
+    skip_output_csv("the cached output is used")
+    assert caplog.record_tuples[-1][1] == logging.INFO
+
+    # An output.csv of another run is left in place, so it is pointed out
+    (tmp_path / "output.csv").write_text("OS Name\n")
+    skip_output_csv("the cached output is used")
+    assert caplog.record_tuples[-1][1] == logging.WARNING
+    assert (tmp_path / "output.csv").read_text() == "OS Name\n"
+
+
+def test_report_cache_graphs_round_trip(report_cache: ReportCache, mocker: MockFixture) -> None:
+    mock_visualizer = mocker.patch("vminfo_parser.visualizer.Visualizer").return_value
+    counts = pd.Series({"CentOS": 1, "Ubuntu": 2}, name="count").rename_axis("OS Name")
+    by_environment = pd.DataFrame(
+        {"non-prod": [1, 0], "prod": [2, 3]}, index=pd.Index(["CentOS", "Ubuntu"], name="OS Name", dtype=object)
+    ).rename_axis(columns="Environment")
+    trend = pd.DataFrame({"CentOS": [1.0, None]}, index=pd.to_datetime(["2024-01-01", "2024-01-08"]))
+    report_cache.set(
+        "key",
+        "output\n",
+        [
+            ("visualize_os_distribution", (counts, None), {}),
+            ("visualize_supported_os_distribution", (by_environment,), {"environment_filter": "both"}),
+            ("visualize_trend", (trend, "OS"), {}),
+        ],
+    )
+
+    assert report_cache.replay("key")
+
+    (replayed_counts, _), _ = mock_visualizer.visualize_os_distribution.call_args
+    pd.testing.assert_series_equal(replayed_counts, counts)
+    (replayed_environments,), kwargs = mock_visualizer.visualize_supported_os_distribution.call_args
+    pd.testing.assert_frame_equal(replayed_environments, by_environment)
+    assert kwargs == {"environment_filter": "both"}
+    (replayed_trend, title), _ = mock_visualizer.visualize_trend.call_args
+    pd.testing.assert_frame_equal(replayed_trend, trend, check_freq=False)
+    assert title == "OS"
+
+
+def test_report_cache_ignores_pickles(report_cache: ReportCache) -> None:
+    # Entries are JSON, a pickle planted in a shared cache directory is never loaded
+    report_cache.directory.mkdir(parents=True)
+    path = report_cache.directory / "key.report"
+    path.write_bytes(pickle.dumps({"created": time.time(), "output": "planted", "graphs": b""}))
+
+    assert report_cache.get("key") is None
+    assert not path.exists()
+
+
+def test_graph_recorder(mock_visualizer: MockType) -> None:
+    recorder = GraphRecorder(mock_visualizer)
+
+    recorder.visualize_os_distribution("counts", 5)
+    recorder.visualize_disk_space_vertical("disk", os_filter="os1")
+
+    assert recorder.calls == [
+        ("visualize_os_distribution", ("counts", 5), {}),
+        ("visualize_disk_space_vertical", ("disk",), {"os_filter": "os1"}),
+    ]
+    mock_visualizer.visualize_os_distribution.assert_called_once_with("counts", 5)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vminfo_parser.capacity import NodeShape, first_fit_decreasing, plan_capacity
+from vminfo_parser.vmdata import VMData
+
+
+def _naive_first_fit_decreasing(sizes: np.ndarray, capacity: np.ndarray) -> int:
+    shares = sizes / capacity
+    nodes: list[np.ndarray] = []
+    for size in sizes[np.lexsort((-shares.sum(axis=1), -shares.max(axis=1)))]:
+        for node in nodes:
+            if (node + size <= capacity).all():
+                node += size
+                break
+        else:
+            nodes.append(size.copy())
+    return len(nodes)
+
+
+@pytest.fixture
+def inventory() -> VMData:
+    return VMData(
+        pd.DataFrame(
+            {
+                "VM OS": [
+                    "Red Hat Enterprise Linux 9 (64-bit)",
+                    "Red Hat Enterprise Linux 8 (64-bit)",
+                    "Microsoft Windows Server 2019 (64-bit)",
+                    "CentOS 7 (64-bit)",
+                    "Red Hat Enterprise Linux 9 (64-bit)",
+                    "Microsoft Windows Server 2022 (64-bit)",
+                ],
+                "Environment": ["Prod", "Prod", "Dev", "Prod", "Prod", "Dev"],
+                "VM MEM (GB)": [32, 32, 16, 8, 64, 256],
+                "VM Provisioned (GB)": [100, 200, 300, 400, 500, 600],
+                "VM CPU": [8, 8, 4, 2, 16, 4],
+                "Site Name": ["s1", "s1", "s1", "s1", "s2", "s2"],
+            }
+        )
+    )
+
+
+def test_node_shape_parse() -> None:
+    shape = NodeShape.parse("64,512,4096.5")
+
+    assert shape == NodeShape(64, 512, 4096.5)
+    assert shape.label == "64 vCPU / 512 GiB / 4096.5 GiB"
+
+
+@pytest.mark.parametrize("text", ["64,512", "64,512,4096,1", "64,0,4096", "a,b,c"])
+def test_node_shape_parse_invalid(text: str) -> None:
+    with pytest.raises(ValueError):
+        NodeShape.parse(text)
+
+
+def test_first_fit_decreasing() -> None:
+    capacity = np.array([10.0, 10.0, 10.0])
+
+    # 6+4 per node in the first resource, with the 3s filling the nodes of the 6s
+    sizes = np.array([[6, 1, 1], [4, 1, 1], [6, 1, 1], [3, 8, 1], [4, 1, 1], [0, 0, 0]], dtype=float)
+
+    assert first_fit_decreasing(sizes, capacity) == 3
+    assert first_fit_decreasing(np.empty((0, 3)), capacity) == 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_first_fit_decreasing_matches_naive(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    capacity = np.array([64.0, 512.0, 1000.0])
+    vm_sizes = np.column_stack([rng.integers(1, 40, 15), rng.integers(1, 300, 15), rng.integers(1, 700, 15)])
+    # Many VMs of the same size, so identical nodes are added at once
+    sizes = vm_sizes[rng.integers(0, len(vm_sizes), 500)].astype(float)
+
+    assert first_fit_decreasing(sizes, capacity) == _naive_first_fit_decreasing(sizes, capacity)
+
+
+def test_plan_capacity(inventory: VMData) -> None:
+    plan = plan_capacity(inventory, [NodeShape(16, 128, 1000)], ["Prod"], "both")
+
+    assert plan.to_dict("list") == {
+        "Site Name": ["s1", "s1", "s2", "s2"],
+        "Environment": ["non-prod", "prod", "non-prod", "prod"],
+        "Node Shape": ["16 vCPU / 128 GiB / 1000 GiB"] * 4,
+        "VMs": [1, 2, 0, 1],
+        "Nodes": [1, 1, 0, 1],
+        "vCPU %": [25.0, 100.0, 0.0, 100.0],
+        "Memory %": [12.5, 50.0, 0.0, 50.0],
+        "Disk %": [30.0, 30.0, 0.0, 50.0],
+        "Too Large": [0, 0, 1, 0],
+    }
+
+
+def test_plan_capacity_filters(inventory: VMData) -> None:
+    shapes = [NodeShape(16, 128, 1000), NodeShape(32, 256, 2000)]
+
+    plan = plan_capacity(inventory, shapes, ["Prod"], "prod", site="s1")
+
+    assert plan["Site Name"].tolist() == ["s1", "s1"]
+    assert plan["Node Shape"].tolist() == [shape.label for shape in shapes]
+    assert plan["VMs"].tolist() == [2, 2]
+    assert plan["Environment"].tolist() == ["prod", "prod"]
@@ -1,10 +1,14 @@
 import typing as t
 from collections.abc import Generator
 
+import numpy as np
 import pandas as pd
 import pytest
 
 from vminfo_parser.clioutput import CLIOutput
+from vminfo_parser.diff import SnapshotDiff
+from vminfo_parser.quality import DataQuality
+from vminfo_parser.vmdata import VMData
 
 
 @pytest.fixture
@@ -15,12 +19,158 @@ def cli_output() -> Generator[CLIOutput, None, None]:
     co.output.close()
 
 
+def test_print_capacity_plan(cli_output: CLIOutput) -> None:
+    plan = pd.DataFrame(
+        {
+            "Node Shape": ["64 vCPU / 512 GiB / 4096 GiB"],
+            "VMs": [120],
+            "Nodes": [8],
+            "vCPU %": [62.54],
+            "Too Large": [1],
+        }
+    )
+
+    cli_output.print_capacity_plan(plan)
+
+    assert cli_output.getvalue().splitlines()[1:-1] == [
+        "Capacity Plan",
+        "=============",
+        "Node Shape                      VMs    Nodes    vCPU %    Too Large",
+        "----------------------------  -----  -------  --------  -----------",
+        "64 vCPU / 512 GiB / 4096 GiB    120        8      62.5            1",
+    ]
+
+
+def test_print_wave_plan(cli_output: CLIOutput) -> None:
+    waves = pd.DataFrame({"Wave": [1, 2], "VMs": [50, 12], "Memory GiB": [1000.0, 240.5]})
+
+    cli_output.print_wave_plan(waves)
+
+    assert cli_output.getvalue().splitlines()[1:-1] == [
+        "Migration Waves",
+        "===============",
+        "  Wave    VMs    Memory GiB",
+        "------  -----  ------------",
+        "     1     50          1000",
+        "     2     12           240",
+    ]
+
+
+def test_print_pivot(cli_output: CLIOutput) -> None:
+    table = pd.DataFrame({"Site Name": ["DC1", "DC2"], "count": [3, 12], "p95:vmMemory": [16.0, 7.25]})
+
+    cli_output.print_pivot(table)
+
+    assert cli_output.getvalue().splitlines()[1:-1] == [
+        "Pivot Report",
+        "============",
+        "Site Name      count    p95:vmMemory",
+        "-----------  -------  --------------",
+        "DC1                3            16.0",
+        "DC2               12             7.2",
+    ]
+
+
+def test_print_data_quality(cli_output: CLIOutput) -> None:
+    quality = DataQuality(rows=4)
+    inventory = pd.DataFrame({"VM": ["vm1", "vm2", "vm3", "vm4"], "Environment": ["Prod", None, "Dev", ""]})
+    quality.record(
+        "Missing Environment",
+        inventory["Environment"].isna() | inventory["Environment"].eq(""),
+        inventory,
+        ["Environment"],
+    )
+
+    cli_output.print_data_quality(quality)
+
+    assert cli_output.getvalue().splitlines()[1:-1] == [
+        "Data Quality",
+        "============",
+        "Check                  VMs    Percent",
+        "-------------------  -----  ---------",
+        "Unparsable Memory        0       0.00",
+        "Unparsable Disk          0       0.00",
+        "Unmatched OS             0       0.00",
+        "Missing Environment      2      50.00",
+        "",
+        "Missing Environment: first 2 of 2 rows",
+        "======================================",
+        "Row    VM    Environment",
+        "-----  ----  -------------",
+        "1      vm2",
+        "3      vm4",
+    ]
+
+
+def test_print_trends(cli_output: CLIOutput) -> None:
+    dates = pd.DatetimeIndex(["2024-01-01", "2024-01-08"], name="Snapshot")
+    trends = {"Supported OS Counts": pd.DataFrame({"Supported": [10, 12], "Unsupported": [5, 3]}, index=dates)}
+
+    cli_output.print_trends(trends)
+
+    assert cli_output.getvalue().splitlines()[1:-1] == [
+        "Supported OS Counts",
+        "===================",
+        "Snapshot      Supported    Unsupported",
+        "----------  -----------  -------------",
+        "2024-01-01           10              5",
+        "2024-01-08           12              3",
+    ]
+
+
 @pytest.mark.parametrize("arg", ["string", "string\n", None, 0, 0.1, object()], ids=type)
 def test_write(cli_output: CLIOutput, arg: t.Any) -> None:
     cli_output.write(arg)
     assert cli_output.output.getvalue() == str(arg)
 
 
+def test_getvalue(cli_output: CLIOutput) -> None:
+    cli_output.writeline("line")
+    assert cli_output.getvalue() == "line\n"
+
+    cli_output.close()
+    with pytest.raises(ValueError):
+        cli_output.getvalue()
+
+
+def test_print_resource_quantiles(cli_output: CLIOutput) -> None:
+    quantiles = pd.DataFrame(
+        {"Count": [3], "p50": [2.04], "Max": [10.0]}, index=pd.Index(["Memory (GiB)"], name="Resource")
+    )
+
+    cli_output.print_resource_quantiles(quantiles)
+
+    assert cli_output.getvalue().splitlines()[1:4] == [
+        "Resource        Count    p50    Max",
+        "------------  -------  -----  -----",
+        "Memory (GiB)        3    2.0   10.0",
+    ]
+
+
+def test_print_snapshot_diff(cli_output: CLIOutput) -> None:
+    resources = {"Environment": ["Prod"], "VM MEM (GB)": [8], "VM Provisioned (GB)": [100], "VM CPU": [4]}
+    before = VMData(pd.DataFrame({"VM": ["a"], "VM OS": ["CentOS 7 (64-bit)"], **resources}))
+    after = VMData(pd.DataFrame({"VM": ["a"], "VM OS": ["CentOS 8 (64-bit)"], **resources}))
+
+    cli_output.print_snapshot_diff(SnapshotDiff.from_vmdata(before, after))
+
+    lines = cli_output.getvalue().splitlines()
+    assert lines[1:8] == [
+        "Change               VMs",
+        "-----------------  -----",
+        "Added                  0",
+        "Removed                0",
+        "Resized                0",
+        "OS Upgraded            1",
+        "Environment Moved      0",
+    ]
+    assert lines[-4:-1] == [
+        "VM    Change       Before    After",
+        "----  -----------  --------  --------",
+        "a     OS Upgraded  CentOS 7  CentOS 8",
+    ]
+
+
 @pytest.mark.parametrize("arg", ["string", "string\n", None, 0, 0.1, object()], ids=type)
 def test_writeline(cli_output: CLIOutput, arg: t.Any) -> None:
     cli_output.writeline(arg)
@@ -98,57 +248,53 @@ def test_print_formatted_disk_space(
                     "Site_VM_Count": [428, 177],
                 }
             ),
-            "\nSite Name     Memory Capacity (GB)\n"
-            "-----------  ----------------------\n"
-            "Site1                 533\n"
-            "Site2                 764\n"
-            "\nSite Name     Core Count\n"
-            "-----------  ------------\n"
-            "Site1            2594\n"
-            "Site2            970\n"
-            "\nSite Name     Disk Capacity (TB)\n"
-            "-----------  --------------------\n"
-            "Site1                779\n"
-            "Site2                247\n"
-            "\nSite Name     VM Count\n"
-            "-----------  ----------\n"
-            "Site1           428\n"
-            "Site2           177\n\n",
+            "\nSite Name      Memory     Core    Disk       VM\n"
+            "                 (GB)    Count    (TB)    Count\n"
+            "-----------  --------  -------  ------  -------\n"
+            "Site1             533     2594     779      428\n"
+            "Site2             764      970     247      177\n\n",
         ),
-    ],
-    ids=["default"],
-)
-def test_print_site_usage(cli_output: CLIOutput, resource_list: list, df: pd.DataFrame, expected: str) -> None:
-    cli_output.print_site_usage(resource_list, df)
-    result = cli_output.output.getvalue()
-    assert result == expected
-
-
-@pytest.mark.parametrize(
-    "dataFrame, headers, table_format, expected",
-    [
         (
+            ["VM", "Disk"],
             pd.DataFrame(
                 {
                     "Site Name": ["Site1", "Site2"],
-                    "Site_RAM_Usage": [533, 764],
+                    "Site_Disk_Usage": [779, 247],
+                    "Site_VM_Count": [428, 177],
+                    "Site_Supported_VM_Count": [400, 177],
+                    "Site_Unsupported_VM_Count": [28, 0],
+                    "Site_Disk_Mean": [1130.77, 694.0],
+                    "Site_Disk_P50": [219.2, np.nan],
                 }
-            ).set_index("Site Name"),
-            ["Site Name", "Memory Capacity (GB)"],
-            "simple",
-            "Site Name     Memory Capacity (GB)\n"
-            "-----------  ----------------------\n"
-            "Site1                 533\n"
-            "Site2                 764",
-        )
+            ),
+            "\nSite Name         VM    Supported    Unsupported    Disk    Disk Mean    Disk P50\n"
+            "               Count           OS             OS    (TB)         (GB)        (GB)\n"
+            "-----------  -------  -----------  -------------  ------  -----------  ----------\n"
+            "Site1            428          400             28     779       1130.8       219.2\n"
+            "Site2            177          177              0     247        694.0           -\n\n",
+        ),
+        (
+            ["Disk"],
+            pd.DataFrame(
+                {
+                    "Site Name": ["Site1", "Site2"],
+                    "Site_Disk_Usage": [779, 247],
+                    "Site_Disk_P95_Approx": [6976.1, 1465.9],
+                }
+            ),
+            "\nSite Name      Disk    ~Disk P95\n"
+            "               (TB)         (GB)\n"
+            "-----------  ------  -----------\n"
+            "Site1           779       6976.1\n"
+            "Site2           247       1465.9\n"
+            "~ estimated from quantile sketches, within 1% of the VM value at that rank\n\n",
+        ),
     ],
-    ids=["simple"],
+    ids=["default", "statistics", "approximate"],
 )
-def test_create_site_table(
-    cli_output: CLIOutput, dataFrame: pd.DataFrame, headers: list, table_format: str, expected: str
-) -> None:
-    memory_usage = dataFrame["Site_RAM_Usage"].round(0).astype(int)
-    result = cli_output.create_site_table(memory_usage, headers=headers, table_format=table_format)
+def test_print_site_usage(cli_output: CLIOutput, resource_list: list, df: pd.DataFrame, expected: str) -> None:
+    cli_output.print_site_usage(resource_list, df)
+    result = cli_output.output.getvalue()
     assert result == expected
 
 
@@ -61,7 +61,7 @@ def test_cli_yaml_and_args(capsys: pytest.CaptureFixture, caplog: pytest.LogCapt
         ("vminfo_parser.config", logging.ERROR, "When using --yaml, no other arguments should be provided.")
     ]
     assert "usage:" in output.err
-    assert "[-h] [--file FILE | --yaml YAML | --directory DIRECTORY]" in output.err
+    assert "[--file FILE | --yaml YAML | --directory DIRECTORY | --summary SUMMARY" in output.err
 
 
 def test_yaml_from_args(config_dict: dict, yaml_config: str) -> None:
@@ -151,3 +151,262 @@ def test_validate_missing_env(caplog: pytest.LogCaptureFixture) -> None:
             ),
         )
     ]
+
+
+@pytest.mark.parametrize(
+    "options,message",
+    [
+        ({"adaptive_disk_bins": 0}, "--adaptive-disk-bins must be at least 1"),
+        (
+            {"adaptive_disk_bins": 4, "over_under_tb": True},
+            "--adaptive-disk-bins can't be combined with --summary, --breakdown-by-terabyte or --over-under-tb",
+        ),
+    ],
+    ids=["zero", "over_under_tb"],
+)
+def test_validate_adaptive_disk_bins(caplog: pytest.LogCaptureFixture, options: dict, message: str) -> None:
+    with pytest.raises(SystemExit):
+        Config(
+            **{
+                "file": "testfile",
+                "sort_by_env": "all",
+                "breakdown_by_terabyte": False,
+                "over_under_tb": False,
+                **options,
+            }
+        )._validate()
+
+    assert caplog.record_tuples == [("vminfo_parser.config", logging.CRITICAL, message)]
+
+
+@pytest.mark.parametrize(
+    "options,message",
+    [
+        ({"measure": "count"}, "--measure needs --group-by"),
+        (
+            {"group_by": "OS Name", "measure": "count,sum"},
+            "Measure sum is not count or one of sum, mean, min, max or a percentile like p95, "
+            "followed by : and a column",
+        ),
+        (
+            {"group_by": "OS Name", "measure": "median:vmDisk"},
+            "Measure median:vmDisk is not count or one of sum, mean, min, max or a percentile like p95, "
+            "followed by : and a column",
+        ),
+        (
+            {"group_by": "OS Name", "summary": ["summary.json"]},
+            "--group-by can't be combined with --summary or --backend polars",
+        ),
+        ({"group_by": "OS Name", "approximate": True}, "--approximate can't be combined with --group-by"),
+    ],
+)
+def test_validate_pivot(caplog: pytest.LogCaptureFixture, options: dict, message: str) -> None:
+    with pytest.raises(SystemExit):
+        Config(file="testfile", sort_by_env="all", **options)._validate()
+
+    assert caplog.record_tuples == [("vminfo_parser.config", logging.CRITICAL, message)]
+
+
+@pytest.mark.parametrize(
+    "options,message",
+    [
+        (
+            {"summary": ["summary.json"]},
+            "--where can't be combined with --summary, summaries have no rows to filter",
+        ),
+        ({"approximate": True}, "--approximate can't be combined with --where"),
+        ({"workers": 2}, "--workers can't be combined with --where"),
+    ],
+)
+def test_validate_where(caplog: pytest.LogCaptureFixture, options: dict, message: str) -> None:
+    with pytest.raises(SystemExit):
+        Config(file="testfile", sort_by_env="all", where="vCPU > 4", **options)._validate()
+
+    assert caplog.record_tuples == [("vminfo_parser.config", logging.CRITICAL, message)]
+
+
+@pytest.mark.parametrize(
+    "options,message",
+    [
+        ({"summary": ["summary.json"]}, "--data-quality can't be combined with --summary or --backend polars"),
+        ({"backend": "polars"}, "--data-quality can't be combined with --summary or --backend polars"),
+        ({"approximate": True}, "--approximate can't be combined with --data-quality"),
+        ({"workers": 2}, "--workers can't be combined with --data-quality"),
+    ],
+)
+def test_validate_data_quality(caplog: pytest.LogCaptureFixture, options: dict, message: str) -> None:
+    with pytest.raises(SystemExit):
+        Config(file="testfile", sort_by_env="all", data_quality=True, **options)._validate()
+
+    assert caplog.record_tuples == [("vminfo_parser.config", logging.CRITICAL, message)]
+
+
+def test_validate_top_n(caplog: pytest.LogCaptureFixture) -> None:
+    with pytest.raises(SystemExit):
+        Config(file="testfile", sort_by_env="all", top_n=0)._validate()
+
+    assert caplog.record_tuples == [("vminfo_parser.config", logging.CRITICAL, "--top-n must be at least 1")]
+
+
+def test_validate_approximate_unsupported(caplog: pytest.LogCaptureFixture) -> None:
+    with pytest.raises(SystemExit):
+        Config(
+            file="testfile", sort_by_env="all", approximate=True, sort_by_site=True, get_supported_os=True
+        )._validate()
+
+    assert caplog.record_tuples == [
+        (
+            "vminfo_parser.config",
+            logging.CRITICAL,
+            "--approximate can't be combined with --sort-by-site, --get-supported-os",
+        )
+    ]
+
+
+def test_validate_approximate_both(caplog: pytest.LogCaptureFixture) -> None:
+    with pytest.raises(SystemExit):
+        Config(file="testfile", sort_by_env="both", prod_env_labels="prod", approximate=True)._validate()
+
+    assert caplog.record_tuples == [
+        (
+            "vminfo_parser.config",
+            logging.CRITICAL,
+            "--approximate can't count OS names per environment category with --sort-by-env both",
+        )
+    ]
+
+
+@pytest.mark.parametrize("options", [{"summary": ["summary.json"]}, {"approximate": True}])
+def test_validate_polars_backend_unsupported(caplog: pytest.LogCaptureFixture, options: dict) -> None:
+    with pytest.raises(SystemExit):
+        Config(file="testfile", sort_by_env="all", backend="polars", **options)._validate()
+
+    assert caplog.record_tuples == [
+        (
+            "vminfo_parser.config",
+            logging.CRITICAL,
+            "--backend polars can't be combined with --summary or --approximate",
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    "options,message",
+    [
+        ({"workers": 0}, "--workers and --partition-size must be at least 1"),
+        ({"workers": 2, "partition_size": 0}, "--workers and --partition-size must be at least 1"),
+        ({"workers": 2, "approximate": True}, "--workers can't be combined with --approximate"),
+        (
+            {"workers": 2, "summary": ["summary.json"], "adaptive_disk_bins": 4},
+            "--workers can't be combined with --summary, --adaptive-disk-bins",
+        ),
+        ({"workers": 2, "backend": "polars"}, "--workers can't be combined with --backend polars"),
+        ({"queue_dir": "queue", "approximate": True}, "--queue-dir can't be combined with --approximate"),
+        ({"workers": 2, "queue_dir": "queue"}, "--workers can't be combined with --queue-dir"),
+        ({"worker": True}, "--worker needs the --queue-dir of the coordinator"),
+    ],
+)
+def test_validate_partitioned(caplog: pytest.LogCaptureFixture, options: dict, message: str) -> None:
+    with pytest.raises(SystemExit):
+        Config(file="testfile", sort_by_env="all", **options)._validate()
+
+    assert caplog.record_tuples == [("vminfo_parser.config", logging.CRITICAL, message)]
+
+
+@pytest.mark.parametrize(
+    "options,message",
+    [
+        ({"diff_key": "VM"}, "--diff-key needs --diff-against"),
+        (
+            {"diff_against": "old.csv", "summary": ["summary.json"]},
+            "--diff-against can't be combined with --summary or --backend polars",
+        ),
+        (
+            {"diff_against": "old.csv", "backend": "polars"},
+            "--diff-against can't be combined with --summary or --backend polars",
+        ),
+        ({"diff_against": "old.csv", "workers": 2}, "--workers can't be combined with --diff-against"),
+    ],
+)
+def test_validate_diff(caplog: pytest.LogCaptureFixture, options: dict, message: str) -> None:
+    with pytest.raises(SystemExit):
+        Config(file="testfile", sort_by_env="all", **options)._validate()
+
+    assert caplog.record_tuples == [("vminfo_parser.config", logging.CRITICAL, message)]
+
+
+@pytest.mark.parametrize(
+    "options,message",
+    [
+        ({"workers": 2}, "--trend can't be combined with --workers"),
+        ({"diff_against": "old.csv"}, "--trend can't be combined with --diff-against"),
+        ({"backend": "polars"}, "--trend can't be combined with --backend polars"),
+    ],
+)
+def test_validate_trend(caplog: pytest.LogCaptureFixture, options: dict, message: str) -> None:
+    with pytest.raises(SystemExit):
+        Config(file=None, trend="snapshots", sort_by_env="all", **options)._validate()
+
+    assert caplog.record_tuples == [("vminfo_parser.config", logging.CRITICAL, message)]
+
+
+def test_validate_site(caplog: pytest.LogCaptureFixture) -> None:
+    with pytest.raises(SystemExit):
+        Config(file="testfile", sort_by_env="all", site="DC1", get_resource_quantiles=True)._validate()
+
+    assert caplog.record_tuples == [
+        (
+            "vminfo_parser.config",
+            logging.CRITICAL,
+            "--site can't be combined with --get-resource-quantiles, its sketches cover every site",
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    "options,message",
+    [
+        ({"plan_capacity": ["64,512"]}, "Node shape 64,512 is not three positive numbers: vCPU,memory GiB,disk GiB"),
+        (
+            {"plan_capacity": ["64,512,4096"], "summary": ["summary.json"]},
+            "--plan-capacity can't be combined with --summary or --backend polars",
+        ),
+        ({"plan_capacity": ["64,512,4096"], "workers": 2}, "--workers can't be combined with --plan-capacity"),
+    ],
+)
+def test_validate_capacity(caplog: pytest.LogCaptureFixture, options: dict, message: str) -> None:
+    with pytest.raises(SystemExit):
+        Config(file="testfile", sort_by_env="all", **options)._validate()
+
+    assert caplog.record_tuples == [("vminfo_parser.config", logging.CRITICAL, message)]
+
+
+@pytest.mark.parametrize(
+    "options,message",
+    [
+        ({"wave_max_vms": 10}, "--wave-max-vms needs --plan-waves"),
+        ({"wave_across_sites": True}, "--wave-across-sites needs --plan-waves"),
+        ({"plan_waves": "waves.xlsx", "wave_max_vms": 10}, "--plan-waves must be a .csv or .parquet file"),
+        (
+            {"plan_waves": "waves.csv"},
+            "--plan-waves needs at least one of --wave-max-vms, --wave-max-memory and --wave-max-disk, each positive",
+        ),
+        (
+            {"plan_waves": "waves.csv", "wave_max_disk": 0},
+            "--plan-waves needs at least one of --wave-max-vms, --wave-max-memory and --wave-max-disk, each positive",
+        ),
+        (
+            {"plan_waves": "waves.csv", "wave_max_vms": 10, "backend": "polars"},
+            "--plan-waves can't be combined with --summary or --backend polars",
+        ),
+        (
+            {"plan_waves": "waves.csv", "wave_max_vms": 10, "trend": "snapshots"},
+            "--trend can't be combined with --plan-waves",
+        ),
+    ],
+)
+def test_validate_waves(caplog: pytest.LogCaptureFixture, options: dict, message: str) -> None:
+    with pytest.raises(SystemExit):
+        Config(file=None, sort_by_env="all", **options)._validate()
+
+    assert caplog.record_tuples == [("vminfo_parser.config", logging.CRITICAL, message)]
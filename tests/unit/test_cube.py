@@ -0,0 +1,303 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vminfo_parser.cube import (
+    Cube,
+    adaptive_disk_bins,
+    adaptive_disk_edges,
+    disk_bins,
+    group_ids,
+    grouped_sum,
+    site_quantiles,
+    sketch_sites,
+    to_numeric,
+)
+from vminfo_parser.sketch import QuantileSketch
+from vminfo_parser.support import load_support_matrix
+
+COLUMN_HEADERS = {
+    "environment": "Environment",
+    "vmMemory": "VM MEM (GB)",
+    "vmDisk": "VM Provisioned (GB)",
+    "vCPU": "VM CPU",
+}
+SITE_MEASURES = {"Memory": "vmMemory", "CPU": "vCPU", "Disk": "vmDisk"}
+
+
+@pytest.fixture
+def inventory() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "OS Name": ["CentOS", "CentOS", "CentOS", "Ubuntu Linux", "Ubuntu Linux", None],
+            "OS Version": ["7", "7", None, None, None, None],
+            "Environment": ["prod", "prod", "dev", "dev", None, "prod"],
+            "Site Name": ["DC1", "DC1", "DC2", "DC2", "DC2", "DC1"],
+            "VM MEM (GB)": [8.0, 8.0, 4.0, 2.0, 16.0, 1.0],
+            "VM Provisioned (GB)": [100.0, 150.0, 200.5, 5000.0, 2048.25, np.nan],
+            "VM CPU": [2, 2, 1, 4, 8, 1],
+        }
+    )
+
+
+def test_from_dataframe(inventory: pd.DataFrame) -> None:
+    cube = Cube.from_dataframe(inventory, COLUMN_HEADERS)
+
+    assert list(cube.frame.columns) == list(Cube.DIMENSIONS + Cube.MEASURES)
+    # the two CentOS 7 prod VMs share a disk bin and collapse into one cell
+    assert len(cube.frame) == len(inventory) - 1
+    assert cube.frame["Count"].sum() == len(inventory)
+    assert cube.frame["Memory"].sum() == inventory["VM MEM (GB)"].sum()
+    assert cube.frame["CPU"].sum() == inventory["VM CPU"].sum()
+    assert cube.frame["Disk TiB"].sum() == np.ceil(inventory["VM Provisioned (GB)"].fillna(0) / 1024).sum()
+
+
+def test_from_dataframe_empty() -> None:
+    cube = Cube.from_dataframe(pd.DataFrame(columns=list(COLUMN_HEADERS.values())), COLUMN_HEADERS)
+
+    assert cube.frame.empty
+
+
+def test_disk_bins() -> None:
+    bins = disk_bins(pd.Series([0, 200, 200.5, 201, 400, np.nan]))
+
+    assert bins[0] == bins[1]
+    assert len({bins[1], bins[2], bins[3]}) == 3
+    assert bins[3] == bins[4]
+    assert bins[5] == -1
+
+
+@pytest.mark.parametrize(
+    "ranges,max_disk_space,expected",
+    [
+        ([(0, 200), (201, 400), (5001, 5000)], 5000, {"0-200 GiB": 2}),
+        ([(0, 1000), (1001, 5000)], 5000, {"0-1000 GiB": 3, "1001-5000 GiB": 2}),
+    ],
+    ids=["gap_excluded", "open_range"],
+)
+def test_assign_disk_ranges(
+    inventory: pd.DataFrame, ranges: list[tuple[int, int]], max_disk_space: int, expected: dict[str, int]
+) -> None:
+    frame = Cube.from_dataframe(inventory, COLUMN_HEADERS).frame
+
+    labelled = Cube.assign_disk_ranges(frame, ranges, max_disk_space)
+
+    assert labelled.groupby("Disk Space Range")["Count"].sum().to_dict() == expected
+
+
+def test_assign_disk_ranges_fraction_above_max(inventory: pd.DataFrame) -> None:
+    # 2048.25 GiB is above the truncated maximum of 2048, which the reports have always left out
+    frame = Cube.from_dataframe(inventory.iloc[[0, 1, 4]], COLUMN_HEADERS).frame
+
+    labelled = Cube.assign_disk_ranges(frame, [(0, 1000), (1001, 2048)], 2048)
+
+    assert labelled.groupby("Disk Space Range")["Count"].sum().to_dict() == {"0-1000 GiB": 2}
+
+
+def test_assign_disk_ranges_unsupported_bound(inventory: pd.DataFrame) -> None:
+    frame = Cube.from_dataframe(inventory, COLUMN_HEADERS).frame
+
+    with pytest.raises(ValueError):
+        Cube.assign_disk_ranges(frame, [(0, 123)], 5000)
+
+
+def test_from_dataframe_sketches(inventory: pd.DataFrame) -> None:
+    cube = Cube.from_dataframe(inventory, COLUMN_HEADERS)
+
+    assert set(cube.sketches) == set(Cube.SKETCHED)
+    assert cube.sketches["Disk"].count == inventory["VM Provisioned (GB)"].count()
+    assert cube.sketches["Memory"].max == inventory["VM MEM (GB)"].max()
+
+
+def test_merge(inventory: pd.DataFrame) -> None:
+    whole = Cube.from_dataframe(inventory, COLUMN_HEADERS)
+
+    merged = Cube.merge(
+        [
+            Cube.from_dataframe(inventory.iloc[:4], COLUMN_HEADERS),
+            Cube.from_dataframe(inventory.iloc[4:], COLUMN_HEADERS),
+        ]
+    )
+
+    pd.testing.assert_frame_equal(merged.frame, whole.frame, check_dtype=False)
+    assert merged.sketches["CPU"].to_dict() == whole.sketches["CPU"].to_dict()
+
+
+def _sketched_sites(inventory: pd.DataFrame) -> Cube:
+    """Cube of inventory with sketches per site, like the cube of a summary, see Summary.from_vmdata."""
+    cube = Cube.from_dataframe(inventory, COLUMN_HEADERS)
+    measures = {measure: to_numeric(inventory[COLUMN_HEADERS[header]]) for measure, header in SITE_MEASURES.items()}
+    return Cube(cube.frame, cube.sketches, sketch_sites(inventory["Site Name"], measures))
+
+
+def test_merge_site_sketches(inventory: pd.DataFrame) -> None:
+    whole = _sketched_sites(inventory)
+
+    merged = Cube.merge([_sketched_sites(inventory.iloc[:3]), _sketched_sites(inventory.iloc[3:])])
+
+    assert set(merged.site_sketches) == {"DC1", "DC2"}
+    for site, sketches in whole.site_sketches.items():
+        for measure, sketch in sketches.items():
+            assert merged.site_sketches[site][measure].to_dict() == sketch.to_dict()
+
+
+def test_site_statistics(inventory: pd.DataFrame) -> None:
+    statistics = _sketched_sites(inventory).site_statistics(load_support_matrix()).set_index("Site Name")
+
+    assert statistics["Count"].to_dict() == {"DC1": 3, "DC2": 3}
+    # CentOS and Ubuntu Linux aren't supported
+    assert statistics["Supported"].to_dict() == {"DC1": 0, "DC2": 0}
+    assert statistics["Unsupported"].to_dict() == {"DC1": 3, "DC2": 3}
+    assert statistics["Memory Mean"].to_dict() == pytest.approx({"DC1": 17 / 3, "DC2": 22 / 3})
+    assert statistics["CPU Max"].to_dict() == {"DC1": 2, "DC2": 8}
+    # DC1 has a VM without disk, left out of its mean
+    assert statistics["Disk Mean"]["DC1"] == pytest.approx(125)
+    assert statistics["Disk Max"]["DC2"] == 5000
+    assert statistics["Memory P50"]["DC1"] == pytest.approx(8, rel=0.01)
+    assert statistics["Disk P95"]["DC2"] == pytest.approx(2048.25, rel=0.01)
+
+
+def test_site_statistics_exact_quantiles(inventory: pd.DataFrame) -> None:
+    quantiles = site_quantiles(
+        inventory["Site Name"],
+        {"Memory": inventory["VM MEM (GB)"], "CPU": inventory["VM CPU"], "Disk": inventory["VM Provisioned (GB)"]},
+    )
+
+    statistics = (
+        Cube.from_dataframe(inventory, COLUMN_HEADERS)
+        .site_statistics(load_support_matrix(), quantiles)
+        .set_index("Site Name")
+    )
+
+    assert statistics["Memory P50"].to_dict() == {"DC1": 8, "DC2": 4}
+    # The VM without disk is left out, and the quantiles interpolate between VMs
+    assert statistics["Disk P50"]["DC1"] == 125
+    assert statistics["Disk P95"]["DC2"] == pytest.approx(4704.825)
+    assert statistics["CPU Max"].to_dict() == {"DC1": 2, "DC2": 8}
+
+
+def test_site_statistics_without_sketches(inventory: pd.DataFrame) -> None:
+    # Cubes of the inventory rows have no sketches per site, the rows give exact quantiles
+    cube = Cube.from_dataframe(inventory, COLUMN_HEADERS)
+    assert cube.site_sketches == {}
+
+    statistics = cube.site_statistics(load_support_matrix())
+
+    assert statistics["Count"].tolist() == [3, 3]
+    assert statistics["Memory P95"].isna().all()
+    assert statistics["Disk Mean"].isna().all()
+
+
+def test_merge_fraction_above_max(inventory: pd.DataFrame) -> None:
+    # 2048.25 GiB stays above the truncated maximum when merged with a cell holding a larger disk
+    larger = inventory.iloc[[4]].assign(**{"VM Provisioned (GB)": 2048.75})
+    merged = Cube.merge(
+        [Cube.from_dataframe(inventory.iloc[[0, 1, 4]], COLUMN_HEADERS), Cube.from_dataframe(larger, COLUMN_HEADERS)]
+    )
+
+    labelled = Cube.assign_disk_ranges(merged.frame, [(0, 1000), (1001, 2048)], 2048)
+
+    assert merged.frame["Disk Top Fraction"].sum() == 2
+    assert labelled.groupby("Disk Space Range")["Count"].sum().to_dict() == {"0-1000 GiB": 2}
+
+
+def test_merge_empty() -> None:
+    with pytest.raises(ValueError):
+        Cube.merge([])
+
+
+def test_adaptive_disk_edges() -> None:
+    disks = np.random.default_rng(0).lognormal(mean=6, sigma=1, size=10000)
+
+    edges = adaptive_disk_edges(QuantileSketch().update(disks), 4)
+
+    assert edges[0] == 0 and edges[-1] == np.ceil(disks.max())
+    assert len(edges) == 5
+    # rounded to two significant digits
+    assert all(int(str(edge)[2:] or 0) == 0 for edge in edges[1:-1])
+    counts = np.bincount(adaptive_disk_bins(pd.Series(disks), edges))
+    assert counts.min() > len(disks) / 4 * 0.8
+
+
+def test_adaptive_disk_edges_merged_quantiles() -> None:
+    edges = adaptive_disk_edges(QuantileSketch().update(np.array([100.0] * 99 + [5000.0])), 4)
+
+    assert edges == (0, 100, 5000)
+
+
+def test_adaptive_disk_edges_empty() -> None:
+    assert adaptive_disk_edges(QuantileSketch(), 4) == ()
+
+
+def test_adaptive_disk_bins() -> None:
+    bins = adaptive_disk_bins(pd.Series([0, 200, 200.5, 5000, 6000, np.nan]), (0, 200, 5000))
+
+    assert bins.tolist() == [0, 0, 1, 1, 1, -1]
+
+
+def test_assign_adaptive_disk_ranges(inventory: pd.DataFrame) -> None:
+    edges = (0, 200, 5000)
+    frame = Cube.from_dataframe(inventory, COLUMN_HEADERS, disk_edges=edges).frame
+
+    labelled = Cube.assign_adaptive_disk_ranges(frame, edges)
+
+    assert labelled.groupby("Disk Space Range")["Count"].sum().to_dict() == {"0-200 GiB": 2, "201-5000 GiB": 3}
+
+
+@pytest.mark.parametrize("sort", [True, False])
+@pytest.mark.parametrize("by", ["OS Name", ["OS Name", "OS Version"], ["Site Name", "Environment", "OS Name"]])
+def test_grouped_sum(inventory: pd.DataFrame, by: str | list[str], sort: bool) -> None:
+    sums = grouped_sum(inventory, by, "VM CPU", sort=sort)
+
+    pd.testing.assert_series_equal(sums, inventory.groupby(by, sort=sort)["VM CPU"].sum(), check_index_type=False)
+
+
+def test_grouped_sum_columns(inventory: pd.DataFrame) -> None:
+    columns = ["VM MEM (GB)", "VM Provisioned (GB)"]
+
+    sums = grouped_sum(inventory, "Site Name", columns)
+
+    pd.testing.assert_frame_equal(sums, inventory.groupby("Site Name")[columns].sum())
+
+
+def test_group_ids(inventory: pd.DataFrame) -> None:
+    keys = [inventory["OS Name"], inventory["OS Version"]]
+
+    ids, first_rows = group_ids(keys, sort=False, dropna=False)
+
+    expected = inventory.groupby(["OS Name", "OS Version"], sort=False, dropna=False).ngroup().to_numpy()
+    np.testing.assert_array_equal(ids, expected)
+    np.testing.assert_array_equal(first_rows, [0, 2, 3, 5])
+
+
+def test_group_ids_overflow(monkeypatch: pytest.MonkeyPatch, inventory: pd.DataFrame) -> None:
+    keys = [inventory["Site Name"], inventory["VM MEM (GB)"], inventory["VM CPU"]]
+    monkeypatch.setattr("vminfo_parser.cube._MAX_COMBINED_CODE", 4)
+
+    ids, _ = group_ids(keys)
+
+    np.testing.assert_array_equal(ids, inventory.groupby(["Site Name", "VM MEM (GB)", "VM CPU"]).ngroup().to_numpy())
+
+
+def test_select_with_indexes(inventory: pd.DataFrame) -> None:
+    cube = Cube.from_dataframe(inventory, COLUMN_HEADERS)
+
+    selection = cube.environment_index(["prod"]).get("non-prod") & cube.index("Site Name").get("DC2")
+    selection &= cube.index("OS Name").any_of(["CentOS", "Ubuntu Linux"])
+    result = cube.select(selection, ["prod"], "Environment")
+
+    assert result["OS Name"].tolist() == ["CentOS", "Ubuntu Linux", "Ubuntu Linux"]
+    assert set(result["Environment"]) == {"non-prod"}
+    assert cube.select(selection)["Environment"].fillna("missing").tolist() == ["dev", "dev", "missing"]
+
+
+@pytest.mark.parametrize("env_filter", [None, "all", "both", "prod", "non-prod"])
+def test_environment_filtered(inventory: pd.DataFrame, env_filter: str | None) -> None:
+    cube = Cube.from_dataframe(inventory, COLUMN_HEADERS)
+
+    result = cube.environment_filtered(["prod"], "Environment", env_filter)
+
+    expected = cube.frame.assign(Environment=np.where(cube.frame["Environment"] == "prod", "prod", "non-prod"))
+    if env_filter in ("prod", "non-prod"):
+        expected = expected[expected["Environment"] == env_filter]
+    pd.testing.assert_frame_equal(result, expected[result.columns], check_dtype=False)
@@ -0,0 +1,130 @@
+import pandas as pd
+import pytest
+
+from vminfo_parser.diff import SnapshotDiff, identity_key
+from vminfo_parser.vmdata import VMData
+
+
+@pytest.fixture
+def before() -> VMData:
+    return VMData(
+        pd.DataFrame(
+            {
+                "VM": ["a", "b", "c", "d"],
+                "VM OS": [
+                    "CentOS 7 (64-bit)",
+                    "Ubuntu Linux (64-bit)",
+                    "Microsoft Windows Server 2016 (64-bit)",
+                    "CentOS 7 (64-bit)",
+                ],
+                "Environment": ["Prod", "Dev", "Prod", "Dev"],
+                "VM MEM (GB)": [8, 16, 32, 4],
+                "VM Provisioned (GB)": [100, 200, 300.5, 5000],
+                "VM CPU": [4, 8, 12, 1],
+                "Site Name": ["s1", "s1", "s2", "s2"],
+            }
+        )
+    )
+
+
+@pytest.fixture
+def after() -> VMData:
+    return VMData(
+        pd.DataFrame(
+            {
+                "VM": ["e", "d", "b", "a"],
+                "VM OS": [
+                    "Red Hat Enterprise Linux 9 (64-bit)",
+                    "CentOS 7 (64-bit)",
+                    "Ubuntu Linux (64-bit)",
+                    "CentOS 8 (64-bit)",
+                ],
+                "Environment": ["Dev", "Dev", "Prod", "Prod"],
+                "VM MEM (GB)": [2, 4, 32, 8],
+                "VM Provisioned (GB)": [50, 5000, 200, 100],
+                "VM CPU": [2, 1, 8, 4],
+                "Site Name": ["s3", "s2", "s1", "s1"],
+            }
+        )
+    )
+
+
+def test_changes(before: VMData, after: VMData) -> None:
+    diff = SnapshotDiff.from_vmdata(before, after)
+
+    assert diff.key == ["VM"]
+    pd.testing.assert_frame_equal(
+        diff.changes,
+        pd.DataFrame(
+            {
+                "VM": ["e", "c", "b", "a", "b"],
+                "Change": ["Added", "Removed", "Resized", "OS Upgraded", "Environment Moved"],
+                "Before": [
+                    "",
+                    "Microsoft Windows Server 2016",
+                    "8 vCPU, 16 GiB memory, 200 GiB disk",
+                    "CentOS 7",
+                    "Dev",
+                ],
+                "After": [
+                    "Red Hat Enterprise Linux 9",
+                    "",
+                    "8 vCPU, 32 GiB memory, 200 GiB disk",
+                    "CentOS 8",
+                    "Prod",
+                ],
+            }
+        ),
+        check_dtype=False,
+    )
+    assert diff.change_counts().to_dict() == {
+        "Added": 1,
+        "Removed": 1,
+        "Resized": 1,
+        "OS Upgraded": 1,
+        "Environment Moved": 1,
+    }
+
+
+def test_count_deltas(before: VMData, after: VMData) -> None:
+    diff = SnapshotDiff.from_vmdata(before, after)
+
+    assert diff.os_counts.to_dict("index") == {
+        "CentOS": {"Before": 2, "After": 2, "Change": 0},
+        "Ubuntu Linux": {"Before": 1, "After": 1, "Change": 0},
+        "Microsoft Windows Server": {"Before": 1, "After": 0, "Change": -1},
+        "Red Hat Enterprise Linux": {"Before": 0, "After": 1, "Change": 1},
+    }
+    assert diff.disk_space.to_dict("index") == {
+        "0-200 GiB": {"Before": 2, "After": 3, "Change": 1},
+        "201-400 GiB": {"Before": 1, "After": 0, "Change": -1},
+        "3001-5000 GiB": {"Before": 1, "After": 1, "Change": 0},
+    }
+    assert diff.site_totals.to_dict("index") == {
+        "s1": {"VM Count": 0, "Memory (GiB)": 16, "CPU": 0, "Disk (TiB)": 0},
+        "s2": {"VM Count": -1, "Memory (GiB)": -32, "CPU": -12, "Disk (TiB)": -1},
+        "s3": {"VM Count": 1, "Memory (GiB)": 2, "CPU": 2, "Disk (TiB)": 1},
+    }
+
+
+def test_duplicate_and_missing_keys(caplog: pytest.LogCaptureFixture, before: VMData, after: VMData) -> None:
+    before.df.loc[len(before.df)] = before.df.iloc[0]
+    after.df.loc[0, "VM"] = None
+
+    diff = SnapshotDiff.from_vmdata(before, after)
+
+    # The duplicate VM is ignored and the VM without a key is neither added nor matched
+    assert diff.change_counts()["Added"] == 0
+    assert "Ignoring 1 VMs with the same key as an earlier VM of the snapshot" in caplog.messages
+    assert "Ignoring 1 VMs without a value for every key column ['VM']" in caplog.messages
+
+
+def test_identity_key(before: VMData, after: VMData) -> None:
+    assert identity_key(before, after, ["VM", "Site Name"]) == ["VM", "Site Name"]
+
+    with pytest.raises(ValueError):
+        identity_key(before, after, ["VM UUID"])
+
+    after.df = after.df.drop(columns="VM")
+    with pytest.raises(ValueError):
+        identity_key(before, after)
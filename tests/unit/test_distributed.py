@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from vminfo_parser.distributed import WorkQueue, coordinate, run_worker
+from vminfo_parser.partition import Partition
+from vminfo_parser.summary import Summary
+from vminfo_parser.vmdata import VMData
+
+from .. import const as test_const
+
+TESTFILE = Path(__file__).parent.parent / test_const.TESTFILE_DIR / "Test_Inventory_VMs.csv"
+
+
+@pytest.fixture
+def queue(tmp_path: Path) -> WorkQueue:
+    return WorkQueue(tmp_path / "queue")
+
+
+def test_claim(queue: WorkQueue) -> None:
+    names = queue.submit([Partition(TESTFILE, 0, 100), Partition(TESTFILE, 100, 200)])
+
+    first = queue.claim()
+    second = WorkQueue(queue.directory).claim()
+
+    assert [first[0], second[0]] == names
+    assert first[1] == Partition(TESTFILE.absolute(), 0, 100)
+    assert queue.claim() is None
+
+
+def test_requeue_stale(queue: WorkQueue) -> None:
+    queue.submit([Partition(TESTFILE)])
+    name, _ = queue.claim()
+
+    assert queue.requeue_stale(60) == 0
+    stale = time.time() - 120
+    os.utime(queue.directory / "runs" / queue.run_id / "claimed" / Path(name).name, (stale, stale))
+    assert queue.requeue_stale(60) == 1
+    assert queue.claim()[0] == name
+
+
+def test_results(queue: WorkQueue) -> None:
+    names = queue.submit([Partition(TESTFILE)])
+    assert queue.results(names) is None
+
+    name, _ = queue.claim()
+    queue.complete(name, Summary.from_vmdata(VMData.from_file(TESTFILE)))
+
+    assert len(queue.results(names)) == 1
+    assert not list((queue.directory / "runs" / queue.run_id / "claimed").iterdir())
+
+
+def test_submit_new_run(queue: WorkQueue) -> None:
+    first_names = queue.submit([Partition(TESTFILE)])
+    name, _ = queue.claim()
+
+    names = queue.submit([Partition(TESTFILE)])
+
+    assert names != first_names
+    assert [path.name for path in (queue.directory / "runs").iterdir()] == [queue.run_id]
+    # A worker still busy with a task of the previous run can't complete the new run
+    queue.complete(name, Summary.from_vmdata(VMData.from_file(TESTFILE)))
+    assert queue.results(names) is None
+
+
+def test_complete_requeued(queue: WorkQueue) -> None:
+    names = queue.submit([Partition(TESTFILE)])
+    name, _ = queue.claim()
+    stale = time.time() - 120
+    os.utime(queue.directory / "runs" / queue.run_id / "claimed" / Path(name).name, (stale, stale))
+    queue.requeue_stale(60)
+
+    queue.complete(name, Summary.from_vmdata(VMData.from_file(TESTFILE)))
+
+    assert queue.results(names) is None
+    assert queue.claim()[0] == name
+
+
+def test_run_worker_waits_for_next_run(queue: WorkQueue) -> None:
+    # The previous run finished before the worker started
+    queue.submit([])
+    queue.close()
+    thread = threading.Thread(target=run_worker, args=(queue.directory, 0.01))
+    thread.start()
+
+    time.sleep(0.1)
+    assert thread.is_alive()
+    coordinate(TESTFILE, queue.directory, partition_size=1024 * 1024, poll_interval=0.01)
+
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_coordinate(queue: WorkQueue, workers: int) -> None:
+    threads = [threading.Thread(target=run_worker, args=(queue.directory, 0.01)) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    summary = coordinate(TESTFILE, queue.directory, partition_size=1024 * 1024, poll_interval=0.01)
+
+    for thread in threads:
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+    assert queue.closed
+    expected = Summary.from_vmdata(VMData.from_file(TESTFILE))
+    pd.testing.assert_frame_equal(summary.cube.frame, expected.cube.frame, check_dtype=False)
+    for measure, sketch in expected.cube.sketches.items():
+        assert summary.cube.sketches[measure].to_dict() == sketch.to_dict()
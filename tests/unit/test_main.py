@@ -1,9 +1,18 @@
-from collections.abc import Callable, Generator
+import logging
+from collections.abc import Generator
+from pathlib import Path
 
+import pandas as pd
 import pytest
 from pytest_mock import MockFixture, MockType
 
 from vminfo_parser import __main__
+from vminfo_parser.approximate import ApproximateAnalyzer
+from vminfo_parser.capacity import NodeShape
+from vminfo_parser.pivot import Measure
+from vminfo_parser.quality import DataQuality
+from vminfo_parser.support import load_support_matrix
+from vminfo_parser.where import Where
 
 from .. import const as test_const
 
@@ -31,6 +40,7 @@ def mock_main(
     main_obj.cli_output = main_obj.clioutput_class.return_value = mock_clioutput
     main_obj.analyzer_class = mocker.patch("vminfo_parser.__main__.Analyzer")
     main_obj.analyzer = main_obj.analyzer_class.return_value = mock_analyzer
+    main_obj.support_matrix = mocker.patch("vminfo_parser.__main__.read_support_matrix").return_value
 
     # Add main functions to mock
     for func in test_const.MAIN_FUNCTION_CALLS.keys():
@@ -39,17 +49,6 @@ def mock_main(
     yield main_obj
 
 
-def generate_by_os_side_effect(os_names: list[str] | None) -> Callable:
-
-    def side_effect(func: Callable[[str], None]) -> None:
-        if os_names is None:
-            return None
-        for os_name in os_names:
-            func(os_name)
-
-    return side_effect
-
-
 def test_main_default(mock_main: MockType) -> None:
     __main__.main()
 
@@ -58,12 +57,14 @@ def test_main_default(mock_main: MockType) -> None:
     mock_main.config.generate_yaml_from_parser.assert_not_called()
 
     # Assert vmdata setup
-    mock_main.vmdata_class.from_file.assert_called_once_with(mock_main.config.file)
+    mock_main.vmdata_class.from_file.assert_called_once_with(mock_main.config.file, where=None)
 
     # Assert module setup
     mock_main.visualizer_class.assert_not_called()
     mock_main.clioutput_class.assert_called_once()
-    mock_main.analyzer_class.assert_called_once_with(mock_main.vm_data, mock_main.config)
+    mock_main.analyzer_class.assert_called_once_with(
+        mock_main.vm_data, mock_main.config, support_matrix=mock_main.support_matrix
+    )
 
     # Assert main funcs not called
     mock_main.sort_by_site.assert_not_called()
@@ -118,6 +119,379 @@ def test_main_funcs_no_graphs(mock_main: MockType, func: str, args: list[str]) -
     getattr(mock_main, func).assert_called_once_with(*expected_args)
 
 
+def test_main_multiple_funcs(mock_main: MockType, mocker: MockFixture) -> None:
+    call_order = mocker.MagicMock()
+    for func in test_const.MAIN_FUNCTION_CALLS.keys():
+        setattr(mock_main.config, func, True)
+        getattr(mock_main, func).side_effect = getattr(call_order, func)
+    __main__.main()
+
+    # every report runs once, in a fixed order, against the same loaded data
+    mock_main.vmdata_class.from_file.assert_called_once()
+    mock_main.analyzer_class.assert_called_once()
+    assert [name for name, _, _ in call_order.mock_calls] == list(test_const.MAIN_FUNCTION_CALLS.keys())
+
+
+@pytest.mark.parametrize("modifier", ["over_under_tb", "breakdown_by_terabyte"])
+def test_main_disk_range_modifiers(mock_main: MockType, modifier: str) -> None:
+    setattr(mock_main.config, modifier, True)
+    __main__.main()
+    mock_main.get_disk_space_ranges.assert_called_once()
+
+    mock_main.get_disk_space_ranges.reset_mock()
+    mock_main.config.show_disk_space_by_os = True
+    __main__.main()
+    mock_main.show_disk_space_by_os.assert_called_once()
+    mock_main.get_disk_space_ranges.assert_not_called()
+
+
+def test_main_report_cache_hit(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_report_cache = mocker.patch("vminfo_parser.__main__.ReportCache").from_config.return_value
+    mock_report_cache.replay_reports.return_value = True
+    mock_main.config.get_os_counts = True
+
+    __main__.main()
+
+    mock_report_cache.replay_reports.assert_called_once_with(mock_main.config)
+    mock_main.vmdata_class.from_file.assert_not_called()
+    mock_main.get_os_counts.assert_not_called()
+
+
+def test_main_report_cache_miss(mock_main: MockType, mocker: MockFixture) -> None:
+    mocker.patch("vminfo_parser.__main__.Summary")
+    mock_report_cache = mocker.patch("vminfo_parser.__main__.ReportCache").from_config.return_value
+    mock_report_cache.replay_reports.return_value = False
+    mock_main.config.get_os_counts = True
+    mock_main.config.generate_graphs = True
+
+    __main__.main()
+
+    mock_main.get_os_counts.assert_called_once()
+    mock_report_cache.set.assert_called_once_with(
+        mock_report_cache.key.return_value, mock_main.cli_output.getvalue.return_value, []
+    )
+
+
+def test_main_summary(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_summary_class = mocker.patch("vminfo_parser.__main__.Summary")
+    mock_main.config.summary = ["a.json", "b.json"]
+    mock_main.config.get_os_counts = True
+
+    __main__.main()
+
+    mock_summary_class.from_file.assert_has_calls([(("a.json",), {}), (("b.json",), {})])
+    mock_main.vmdata_class.from_file.assert_not_called()
+    mock_main.analyzer_class.assert_called_once_with(
+        mock_summary_class.merge.return_value, mock_main.config, support_matrix=mock_main.support_matrix
+    )
+    mock_summary_class.merge.return_value.save_to_csv.assert_not_called()
+
+
+def test_main_save_summary(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_summary_class = mocker.patch("vminfo_parser.__main__.Summary")
+    mock_main.config.save_summary = "summary.json"
+
+    __main__.main()
+
+    mock_summary_class.from_vmdata.assert_called_once_with(mock_main.vm_data)
+    mock_summary_class.from_vmdata.return_value.to_file.assert_called_once_with("summary.json")
+
+
+def test_main_polars_backend(mock_main: MockType, mocker: MockFixture) -> None:
+    pytest.importorskip("polars")
+    mock_polars_class = mocker.patch("vminfo_parser.polars_backend.PolarsVMData")
+    mock_main.config.backend = "polars"
+
+    __main__.main()
+
+    mock_polars_class.from_file.assert_called_once_with(mock_main.config.file, None)
+    mock_main.vmdata_class.from_file.assert_not_called()
+    mock_main.analyzer_class.assert_called_once_with(
+        mock_polars_class.from_file.return_value, mock_main.config, support_matrix=mock_main.support_matrix
+    )
+
+
+def test_main_workers(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_summarize = mocker.patch("vminfo_parser.__main__.summarize_partitioned")
+    mock_main.config.workers = 4
+    mock_main.config.partition_size = 2
+    mock_main.config.get_os_counts = True
+
+    __main__.main()
+
+    mock_summarize.assert_called_once_with(mock_main.config.file, 4, 2 * 1024 * 1024)
+    mock_main.vmdata_class.from_file.assert_not_called()
+    mock_main.analyzer_class.assert_called_once_with(
+        mock_summarize.return_value, mock_main.config, support_matrix=mock_main.support_matrix
+    )
+    mock_summarize.return_value.save_to_csv.assert_not_called()
+
+
+def test_main_queue_dir(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_coordinate = mocker.patch("vminfo_parser.__main__.coordinate")
+    mock_main.config.queue_dir = "queue"
+    mock_main.config.get_os_counts = True
+
+    __main__.main()
+
+    mock_coordinate.assert_called_once_with(mock_main.config.file, "queue", 64 * 1024 * 1024)
+    mock_main.vmdata_class.from_file.assert_not_called()
+    mock_main.analyzer_class.assert_called_once_with(
+        mock_coordinate.return_value, mock_main.config, support_matrix=mock_main.support_matrix
+    )
+
+
+def test_main_worker(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_run_worker = mocker.patch("vminfo_parser.__main__.run_worker")
+    mock_main.config.worker = True
+    mock_main.config.queue_dir = "queue"
+
+    __main__.main()
+
+    mock_run_worker.assert_called_once_with("queue")
+    mock_main.vmdata_class.from_file.assert_not_called()
+    mock_main.clioutput_class.assert_not_called()
+
+
+def test_main_diff_against(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_diff_class = mocker.patch("vminfo_parser.__main__.SnapshotDiff")
+    mock_main.config.diff_against = "previous.csv"
+    mock_main.config.diff_key = "VM,Site Name"
+
+    __main__.main()
+
+    mock_main.vmdata_class.from_file.assert_any_call("previous.csv", where=None)
+    mock_diff_class.from_vmdata.assert_called_once_with(
+        mock_main.vmdata_class.from_file.return_value, mock_main.vm_data, ["VM", "Site Name"]
+    )
+    mock_main.cli_output.print_snapshot_diff.assert_called_once_with(mock_diff_class.from_vmdata.return_value)
+
+
+def test_main_plan_capacity(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_plan_capacity = mocker.patch("vminfo_parser.__main__.plan_capacity")
+    mock_main.config.plan_capacity = ["64,512,4096"]
+    mock_main.config.environments = ["Prod"]
+    mock_main.config.environment_filter = "both"
+    mock_main.config.site = "s1"
+
+    __main__.main()
+
+    mock_plan_capacity.assert_called_once_with(
+        mock_main.vm_data,
+        [NodeShape(64, 512, 4096)],
+        ["Prod"],
+        "both",
+        "s1",
+        support_matrix=mock_main.support_matrix,
+    )
+    mock_main.cli_output.print_capacity_plan.assert_called_once_with(mock_plan_capacity.return_value)
+
+
+def test_main_plan_waves(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_plan_waves = mocker.patch("vminfo_parser.__main__.plan_waves")
+    mock_report_cache = mocker.patch("vminfo_parser.__main__.ReportCache").from_config.return_value
+    mock_report_cache.replay_reports.return_value = False
+    mock_main.config.plan_waves = "waves.csv"
+    mock_main.config.wave_max_vms = 50
+    mock_main.config.environments = ["Prod"]
+    mock_main.config.environment_filter = "both"
+    mock_main.config.site = None
+
+    __main__.main()
+
+    mock_report_cache.get_cube.assert_not_called()
+    mock_plan_waves.assert_called_once_with(
+        mock_main.vm_data,
+        ["Prod"],
+        "both",
+        None,
+        max_vms=50,
+        max_memory=None,
+        max_disk=None,
+        support_matrix=mock_main.support_matrix,
+        across_sites=False,
+    )
+    mock_plan_waves.return_value.to_file.assert_called_once_with("waves.csv")
+    mock_main.cli_output.print_wave_plan.assert_called_once_with(mock_plan_waves.return_value.waves)
+
+
+def test_main_group_by(mock_main: MockType) -> None:
+    mock_main.config.group_by = "Site Name, OS Name"
+    mock_main.config.measure = "count,p95:vmMemory"
+
+    __main__.main()
+
+    mock_main.analyzer.get_pivot.assert_called_once_with(
+        ("Site Name", "OS Name"), (Measure("count"), Measure("p95", "vmMemory"))
+    )
+    mock_main.cli_output.print_pivot.assert_called_once_with(mock_main.analyzer.get_pivot.return_value)
+
+
+def test_main_data_quality(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_report_cache = mocker.patch("vminfo_parser.__main__.ReportCache").from_config.return_value
+    mock_report_cache.replay_reports.return_value = False
+    mock_main.config.data_quality = True
+    mock_main.vm_data.data_quality = DataQuality()
+
+    __main__.main()
+
+    # The findings come from normalizing the inventory, which a stored cube skips
+    mock_report_cache.get_cube.assert_not_called()
+    mock_main.cli_output.print_data_quality.assert_called_once_with(mock_main.vm_data.data_quality)
+
+
+def test_main_stores_cube(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_summary_class = mocker.patch("vminfo_parser.__main__.Summary")
+    mock_report_cache = mocker.patch("vminfo_parser.__main__.ReportCache").from_config.return_value
+    mock_report_cache.replay_reports.return_value = False
+    mock_report_cache.get_cube.return_value = None
+    mock_main.config.get_os_counts = True
+
+    __main__.main()
+
+    mock_main.vmdata_class.from_file.assert_called_once_with(mock_main.config.file, where=None)
+    mock_summary_class.from_vmdata.assert_called_once_with(mock_main.vm_data)
+    mock_report_cache.set_cube.assert_called_once_with(
+        mock_report_cache.cube_key.return_value, mock_summary_class.from_vmdata.return_value.to_json.return_value
+    )
+    mock_main.vm_data.save_to_csv.assert_called_once_with("output.csv")
+
+
+def test_main_stored_cube(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_skip_output_csv = mocker.patch("vminfo_parser.__main__.skip_output_csv")
+    mock_summary_class = mocker.patch("vminfo_parser.__main__.Summary")
+    mock_report_cache = mocker.patch("vminfo_parser.__main__.ReportCache").from_config.return_value
+    mock_report_cache.replay_reports.return_value = False
+    mock_main.config.get_os_counts = True
+
+    __main__.main()
+
+    mock_summary_class.from_json.assert_called_once_with(
+        mock_report_cache.get_cube.return_value, source=f"cube {mock_report_cache.cube_key.return_value}"
+    )
+    mock_main.vmdata_class.from_file.assert_not_called()
+    mock_main.analyzer_class.assert_called_once_with(
+        mock_summary_class.from_json.return_value, mock_main.config, support_matrix=mock_main.support_matrix
+    )
+    mock_report_cache.set_cube.assert_not_called()
+    mock_main.vm_data.save_to_csv.assert_not_called()
+    mock_skip_output_csv.assert_called_once_with("the stored cube is used")
+
+
+def test_main_stored_cube_unused(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_report_cache = mocker.patch("vminfo_parser.__main__.ReportCache").from_config.return_value
+    mock_report_cache.replay_reports.return_value = False
+    mock_main.config.adaptive_disk_bins = 4
+
+    __main__.main()
+
+    mock_report_cache.get_cube.assert_not_called()
+    mock_report_cache.set_cube.assert_not_called()
+    mock_main.vmdata_class.from_file.assert_called_once_with(mock_main.config.file, where=None)
+
+
+def test_main_where(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_report_cache = mocker.patch("vminfo_parser.__main__.ReportCache").from_config.return_value
+    mock_report_cache.replay_reports.return_value = False
+    mock_main.config.where = "OS Name == 'CentOS' and vmDisk > 2048"
+
+    __main__.main()
+
+    # The stored cube holds every row, so the filtered rows are aggregated again
+    mock_report_cache.get_cube.assert_not_called()
+    where = mock_main.vmdata_class.from_file.call_args.kwargs["where"]
+    assert isinstance(where, Where)
+    assert where.text == mock_main.config.where
+
+
+def test_main_where_invalid(mock_main: MockType, caplog: pytest.LogCaptureFixture) -> None:
+    mock_main.config.where = "OS Name = 'CentOS'"
+
+    with pytest.raises(SystemExit):
+        __main__.main()
+
+    assert caplog.record_tuples[-1][1] == logging.CRITICAL
+    mock_main.vmdata_class.from_file.assert_not_called()
+
+
+def test_read_support_matrix_invalid(mock_config: MockType, caplog: pytest.LogCaptureFixture, tmp_path: Path) -> None:
+    mock_config.support_matrix = str(tmp_path / "missing.csv")
+
+    with pytest.raises(SystemExit):
+        __main__.read_support_matrix(mock_config)
+
+    assert caplog.record_tuples[-1][1] == logging.CRITICAL
+
+
+def test_main_trend(mock_main: MockType, mocker: MockFixture, tmp_path: Path) -> None:
+    snapshots = [(pd.Timestamp(2024, 1, 1), tmp_path / "a-2024-01-01.csv")]
+    mocker.patch("vminfo_parser.__main__.find_snapshots", return_value=snapshots)
+    mock_summaries_class = mocker.patch("vminfo_parser.__main__.SnapshotSummaries")
+    mock_compute_trends = mocker.patch("vminfo_parser.__main__.compute_trends", return_value={"OS Counts": "trend"})
+    mock_main.config.trend = str(tmp_path)
+    mock_main.config.generate_graphs = True
+
+    __main__.main()
+
+    mock_summaries_class.assert_called_once_with(tmp_path / ".vminfo_parser")
+    mock_summaries_class.return_value.get.assert_called_once_with(snapshots[0][1])
+    mock_compute_trends.assert_called_once_with(
+        [(snapshots[0][0], mock_summaries_class.return_value.get.return_value)], mock_main.support_matrix
+    )
+    mock_main.cli_output.print_trends.assert_called_once_with({"OS Counts": "trend"})
+    mock_main.visualizer.visualize_trend.assert_called_once_with("trend", "OS Counts")
+    mock_main.vmdata_class.from_file.assert_not_called()
+    mock_main.analyzer_class.assert_not_called()
+
+
+def test_main_trend_without_snapshots(mock_main: MockType, mocker: MockFixture) -> None:
+    mocker.patch("vminfo_parser.__main__.find_snapshots", return_value=[])
+    mock_main.config.trend = "snapshots"
+
+    with pytest.raises(SystemExit):
+        __main__.main()
+
+    mock_main.clioutput_class.assert_not_called()
+
+
+def test_main_approximate(mock_main: MockType, mocker: MockFixture) -> None:
+    mock_approximate_class = mocker.patch("vminfo_parser.__main__.ApproximateAnalyzer")
+    mock_main.config.approximate = True
+    mock_main.config.get_os_counts = True
+    mock_main.config.get_resource_quantiles = True
+
+    __main__.main()
+
+    mock_approximate_class.from_file.assert_called_once_with(mock_main.config.file, mock_main.config)
+    mock_main.vmdata_class.from_file.assert_not_called()
+    mock_main.analyzer_class.assert_not_called()
+    mock_main.get_os_counts.assert_called_once_with(
+        mock_main.config, mock_approximate_class.from_file.return_value, mock_main.cli_output, None
+    )
+    mock_main.get_resource_quantiles.assert_called_once_with(
+        mock_approximate_class.from_file.return_value, mock_main.cli_output
+    )
+    mock_main.cli_output.close.assert_called_once()
+
+
+def test_get_os_counts_approximate(
+    mocker: MockFixture, mock_config: MockType, mock_clioutput: MockType, mock_visualizer: MockType
+) -> None:
+    mock_analyzer = mocker.NonCallableMagicMock(ApproximateAnalyzer)
+    __main__.get_os_counts(mock_config, mock_analyzer, mock_clioutput, mock_visualizer)
+    counts = mock_analyzer.get_operating_system_counts.return_value
+    mock_clioutput.format_series_output.assert_called_once_with(counts)
+    mock_visualizer.visualize_os_distribution.assert_called_once_with(
+        counts.__getitem__.return_value, mock_config.count_filter
+    )
+    counts.__getitem__.assert_called_once_with("count")
+
+
+def test_get_resource_quantiles(mock_analyzer: MockType, mock_clioutput: MockType) -> None:
+    __main__.get_resource_quantiles(mock_analyzer, mock_clioutput)
+    mock_clioutput.print_resource_quantiles.assert_called_once_with(mock_analyzer.get_resource_quantiles.return_value)
+
+
 def test_get_unsupported_os(mock_analyzer: MockType, mock_clioutput: MockType, mock_visualizer: MockType) -> None:
     __main__.get_unsupported_os(mock_analyzer, mock_clioutput, mock_visualizer)
     mock_analyzer.get_unsupported_os_counts.assert_called_once()
@@ -177,8 +551,9 @@ def test_get_os_counts_no_graphs(
 
 
 def test_sort_by_site(mock_vmdata: MockType, mock_clioutput: MockType) -> None:
-    __main__.sort_by_site(mock_vmdata, mock_clioutput)
-    mock_vmdata.create_site_specific_dataframe.assert_called_once()
+    support_matrix = load_support_matrix()
+    __main__.sort_by_site(mock_vmdata, mock_clioutput, support_matrix)
+    mock_vmdata.create_site_specific_dataframe.assert_called_once_with(support_matrix)
     mock_clioutput.print_site_usage.assert_called_once_with(
         ["Memory", "CPU", "Disk", "VM"], mock_vmdata.create_site_specific_dataframe.return_value
     )
@@ -187,17 +562,12 @@ def test_sort_by_site(mock_vmdata: MockType, mock_clioutput: MockType) -> None:
 def test_show_disk_space_by_os(
     mock_config: MockType, mock_analyzer: MockType, mock_clioutput: MockType, mock_visualizer: MockType
 ) -> None:
-    mock_analyzer.by_os.side_effect = generate_by_os_side_effect(["os1", "os2"])
     expected_df = mock_analyzer.get_disk_space.return_value
     expected_df.empty = False
+    mock_analyzer.get_disk_space_by_os.return_value = {"os1": expected_df, "os2": expected_df}
     __main__.show_disk_space_by_os(mock_config, mock_analyzer, mock_clioutput, mock_visualizer)
-    mock_analyzer.by_os.assert_called_once()
-    mock_analyzer.get_disk_space.assert_has_calls(
-        [
-            ((), {"os_filter": "os1"}),
-            ((), {"os_filter": "os2"}),
-        ]
-    )
+    mock_analyzer.get_disk_space_by_os.assert_called_once()
+    mock_analyzer.get_disk_space.assert_not_called()
     mock_clioutput.print_formatted_disk_space.assert_has_calls(
         [
             ((expected_df,), {"os_filter": "os1"}),
@@ -216,9 +586,9 @@ def test_show_disk_space_by_os(
 def test_show_disk_space_by_os_no_graphs(
     mock_config: MockType, mock_analyzer: MockType, mock_clioutput: MockType, mock_visualizer: MockType
 ) -> None:
-    mock_analyzer.get_unique_os_names.return_value = ["os1", "os2"]
     expected_df = mock_analyzer.get_disk_space.return_value
     expected_df.empty = False
+    mock_analyzer.get_disk_space_by_os.return_value = {"os1": expected_df, "os2": expected_df}
     __main__.show_disk_space_by_os(mock_config, mock_analyzer, mock_clioutput, None)
     mock_visualizer.visualize_disk_space_vertical.assert_not_called()
     mock_visualizer.visualize_disk_space_horizontal.assert_not_called()
@@ -227,9 +597,9 @@ def test_show_disk_space_by_os_no_graphs(
 def test_show_disk_space_by_os_all_env(
     mock_config: MockType, mock_analyzer: MockType, mock_clioutput: MockType, mock_visualizer: MockType
 ) -> None:
-    mock_analyzer.by_os.side_effect = generate_by_os_side_effect(["os1", "os2"])
     expected_df = mock_analyzer.get_disk_space.return_value
     expected_df.empty = False
+    mock_analyzer.get_disk_space_by_os.return_value = {"os1": expected_df, "os2": expected_df}
     mock_config.environment_filter = "all"
     __main__.show_disk_space_by_os(mock_config, mock_analyzer, mock_clioutput, mock_visualizer)
     mock_visualizer.visualize_disk_space_horizontal.assert_has_calls(
@@ -244,9 +614,9 @@ def test_show_disk_space_by_os_all_env(
 def test_show_disk_space_by_os_empty_df(
     mock_config: MockType, mock_analyzer: MockType, mock_clioutput: MockType, mock_visualizer: MockType
 ) -> None:
-    mock_analyzer.by_os.side_effect = generate_by_os_side_effect(["os1", "os2"])
     expected_df = mock_analyzer.get_disk_space.return_value
     expected_df.empty = True
+    mock_analyzer.get_disk_space_by_os.return_value = {"os1": expected_df, "os2": expected_df}
     __main__.show_disk_space_by_os(mock_config, mock_analyzer, mock_clioutput, mock_visualizer)
     mock_clioutput.print_formatted_disk_space.assert_not_called()
     mock_visualizer.visualize_disk_space_vertical.assert_not_called()
@@ -254,9 +624,10 @@ def test_show_disk_space_by_os_empty_df(
 
 
 def test_output_os_by_version(mock_analyzer: MockType, mock_clioutput: MockType, mock_visualizer: MockType) -> None:
-    mock_analyzer.by_os.side_effect = generate_by_os_side_effect(["os1", "os2"])
     expected_df = mock_analyzer.get_os_version_distribution.return_value
+    mock_analyzer.get_os_version_distributions.return_value = {"os1": expected_df, "os2": expected_df}
     __main__.output_os_by_version(mock_analyzer, mock_clioutput, mock_visualizer)
+    mock_analyzer.get_os_version_distributions.assert_called_once()
     mock_clioutput.format_dataframe_output.assert_has_calls(
         [
             ((expected_df,), {"os_name": "os1"}),
@@ -274,8 +645,8 @@ def test_output_os_by_version(mock_analyzer: MockType, mock_clioutput: MockType,
 def test_output_os_by_version_no_graphs(
     mock_analyzer: MockType, mock_clioutput: MockType, mock_visualizer: MockType
 ) -> None:
-    mock_analyzer.by_os.side_effect = generate_by_os_side_effect(["os1", "os2"])
     expected_df = mock_analyzer.get_os_version_distribution.return_value
+    mock_analyzer.get_os_version_distributions.return_value = {"os1": expected_df, "os2": expected_df}
     __main__.output_os_by_version(mock_analyzer, mock_clioutput, None)
     mock_clioutput.format_dataframe_output.assert_has_calls(
         [
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from vminfo_parser.partition import Partition, plan_partitions, read_partition, summarize_partitioned
+from vminfo_parser.summary import Summary
+from vminfo_parser.vmdata import VMData
+
+from .. import const as test_const
+
+TESTFILE_DIR = Path(__file__).parent.parent / test_const.TESTFILE_DIR
+
+
+@pytest.fixture
+def inventory_csv(tmp_path: Path) -> Path:
+    filepath = tmp_path / "inventory.csv"
+    pd.DataFrame(
+        {
+            "VM OS": ["CentOS 7 (64-bit)", "Ubuntu Linux (64-bit)", "Microsoft Windows Server 2019 (64-bit)"] * 20,
+            "Environment": ["Prod", "Dev", "Prod"] * 20,
+            "VM MEM (GB)": list(range(60)),
+            "VM Provisioned (GB)": [100.5, 200, 3000] * 20,
+            "VM CPU": [2, 4, 8] * 20,
+        }
+    ).to_csv(filepath, index=False)
+    return filepath
+
+
+def test_plan_partitions(tmp_path: Path, inventory_csv: Path) -> None:
+    (tmp_path / "site.xlsx").write_bytes((TESTFILE_DIR / "Site_example.xlsx").read_bytes())
+
+    partitions = plan_partitions(tmp_path, 1000)
+
+    assert partitions[0] == Partition(tmp_path / "site.xlsx")
+    assert [partition.path for partition in partitions[1:]] == [inventory_csv] * (len(partitions) - 1)
+    assert partitions[1].start == 0
+    assert partitions[-1].end == inventory_csv.stat().st_size
+    for previous, partition in zip(partitions[1:], partitions[2:]):
+        assert partition.start == previous.end
+
+
+@pytest.mark.parametrize("partition_size", [10, 100, 1000, 100000])
+def test_read_partition(inventory_csv: Path, partition_size: int) -> None:
+    frames = [read_partition(partition).df for partition in plan_partitions(inventory_csv, partition_size)]
+
+    # Ranges shorter than a line hold no rows, and their empty frames have object columns
+    pd.testing.assert_frame_equal(
+        pd.concat(frames, ignore_index=True), VMData.from_file(inventory_csv).df, check_dtype=False
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_summarize_partitioned(workers: int) -> None:
+    testfile = TESTFILE_DIR / "Test_Inventory_VMs.csv"
+
+    summary = summarize_partitioned(testfile, workers, partition_size=1024 * 1024)
+
+    expected = Summary.from_vmdata(VMData.from_file(testfile))
+    pd.testing.assert_frame_equal(summary.cube.frame, expected.cube.frame, check_dtype=False)
+    for measure, sketch in expected.cube.sketches.items():
+        assert summary.cube.sketches[measure].to_dict() == sketch.to_dict()
+    assert summary.column_headers == expected.column_headers
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vminfo_parser.pivot import Measure, parse_measures, pivot
+from vminfo_parser.vmdata import VMData
+
+
+@pytest.fixture
+def vm_data() -> VMData:
+    df = pd.DataFrame(
+        {
+            "Site Name": ["DC1", "DC1", "DC2", "DC2", "DC2", None],
+            "OS Name": ["CentOS", "Ubuntu Linux", "CentOS", "CentOS", "Ubuntu Linux", "CentOS"],
+            "Environment": ["prod", "dev", "prod", "dev", "prod", "prod"],
+            "Memory": [4, 8, 16, 2, 32, 64],
+            "Disk": ["1,000", "200", None, "300", "400", "500"],
+            "CPUs": [1, 2, 4, 1, 8, 16],
+        }
+    )
+    vm_data = VMData(df, normalize=False)
+    vm_data.column_headers = {"environment": "Environment", "vmMemory": "Memory", "vmDisk": "Disk", "vCPU": "CPUs"}
+    return vm_data
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("count", Measure("count")),
+        ("count:vmDisk", Measure("count", "vmDisk")),
+        ("sum:vmDisk", Measure("sum", "vmDisk")),
+        (" p95:VM MEM (GB)", Measure("p95", "VM MEM (GB)")),
+        ("p99.9:vmMemory", Measure("p99.9", "vmMemory")),
+    ],
+)
+def test_measure_parse(text: str, expected: Measure) -> None:
+    assert Measure.parse(text) == expected
+
+
+@pytest.mark.parametrize("text", ["sum", "median:vmDisk", "p101:vmDisk", "count:"])
+def test_measure_parse_invalid(text: str) -> None:
+    with pytest.raises(ValueError, match="is not count or one of"):
+        Measure.parse(text)
+
+
+def test_measure_label() -> None:
+    assert [measure.label for measure in parse_measures("count,sum:vmDisk")] == ["count", "sum:vmDisk"]
+
+
+def test_pivot(vm_data: VMData) -> None:
+    measures = parse_measures("count,count:vmDisk,sum:vmDisk,mean:vCPU,min:vmMemory,max:vmMemory,p50:vmMemory")
+
+    result = pivot(vm_data, ["Site Name", "OS Name"], measures, ["prod"])
+
+    # The VM without a site is left out, and missing disk values aren't counted
+    expected = pd.DataFrame(
+        {
+            "Site Name": ["DC1", "DC1", "DC2", "DC2"],
+            "OS Name": ["CentOS", "Ubuntu Linux", "CentOS", "Ubuntu Linux"],
+            "count": [1, 1, 2, 1],
+            "count:vmDisk": [1, 1, 1, 1],
+            "sum:vmDisk": [1000.0, 200.0, 300.0, 400.0],
+            "mean:vCPU": [1.0, 2.0, 2.5, 8.0],
+            "min:vmMemory": [4, 8, 2, 32],
+            "max:vmMemory": [4, 8, 16, 32],
+            "p50:vmMemory": [4.0, 8.0, 9.0, 32.0],
+        }
+    )
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("q", [0, 25, 50, 95, 100])
+def test_pivot_percentiles_match_pandas(q: int) -> None:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"OS Name": rng.choice(["a", "b", "c"], 1000), "Memory": rng.integers(1, 512, 1000)})
+    df.loc[::7, "Memory"] = np.nan
+    vm_data = VMData(df, normalize=False)
+    vm_data.column_headers = {"vmMemory": "Memory"}
+
+    result = pivot(vm_data, ["OS Name"], [Measure(f"p{q}", "vmMemory")], [])
+
+    expected = df.groupby("OS Name")["Memory"].quantile(q / 100)
+    np.testing.assert_allclose(result[f"p{q}:vmMemory"], expected.to_numpy())
+
+
+@pytest.mark.parametrize(
+    "env_filter,site,expected",
+    [
+        ("prod", None, {"CentOS": 3, "Ubuntu Linux": 1}),
+        ("both", "DC2", {"CentOS": 2, "Ubuntu Linux": 1}),
+        ("non-prod", "DC1", {"Ubuntu Linux": 1}),
+    ],
+)
+def test_pivot_filtered(vm_data: VMData, env_filter: str, site: str | None, expected: dict) -> None:
+    result = pivot(vm_data, ["OS Name"], [Measure("count")], ["prod"], env_filter, site)
+
+    assert dict(zip(result["OS Name"], result["count"])) == expected
+
+
+def test_pivot_unknown_column(vm_data: VMData) -> None:
+    with pytest.raises(ValueError, match="Column 'Cluster' is not in the inventory"):
+        pivot(vm_data, ["Cluster"], [Measure("count")], [])
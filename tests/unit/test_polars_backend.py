@@ -0,0 +1,127 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from vminfo_parser.vmdata import VMData
+from vminfo_parser.where import Where
+
+from .. import const as test_const
+
+pytest.importorskip("polars")
+
+import polars as pl  # noqa: E402
+
+from vminfo_parser.polars_backend import PolarsVMData, _where_expression  # noqa: E402
+
+TESTFILE_DIR = Path(__file__).parent.parent / test_const.TESTFILE_DIR
+
+
+@pytest.fixture(params=["Test_Inventory_VMs.csv", "Test_Inventory_VMs.xlsx", "Site_example.xlsx"])
+def testfile(request: pytest.FixtureRequest) -> Path:
+    return TESTFILE_DIR / request.param
+
+
+def assert_cubes_equal(polars_data: PolarsVMData, vm_data: VMData) -> None:
+    # pandas may read OS names as its string dtype, polars results are converted to object columns
+    pd.testing.assert_frame_equal(polars_data.cube.frame, vm_data.cube.frame, check_dtype=False)
+    for measure, sketch in vm_data.cube.sketches.items():
+        assert polars_data.cube.sketches[measure].to_dict() == sketch.to_dict()
+
+
+def test_cube(testfile: Path) -> None:
+    polars_data = PolarsVMData.from_file(testfile)
+    vm_data = VMData.from_file(testfile)
+
+    assert polars_data.column_headers == vm_data.column_headers
+    assert_cubes_equal(polars_data, vm_data)
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "OS Name == 'CentOS' or vmDisk > 2048 and Environment != 'Prod'",
+        "OS Version in ['7', 2019] and not vCPU <= 2",
+        "OS Name not in ['Ubuntu Linux']",
+    ],
+)
+def test_cube_where(testfile: Path, expression: str) -> None:
+    where = Where(expression)
+    polars_data = PolarsVMData.from_file(testfile, where)
+    vm_data = VMData.from_file(testfile, where=where)
+
+    assert 0 < vm_data.cube.frame["Count"].sum() < VMData.from_file(testfile).cube.frame["Count"].sum()
+    assert_cubes_equal(polars_data, vm_data)
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        ("OS Version == '7'", [True, False, False, True, False]),
+        ("OS Version != '7'", [False, True, True, False, True]),
+        ("OS Version in ['8', 2019]", [False, False, True, False, False]),
+    ],
+)
+def test_where_float_column(expression: str, expected: list[bool]) -> None:
+    # Strings are compared as numbers with columns of floats, whose text is e.g. '7.0'
+    frame = pl.DataFrame({"OS Version": [7.0, 20.0, 8.0, 7.0, None]})
+
+    mask = frame.select(_where_expression(Where(expression).tree, {}, frame.schema)).to_series()
+
+    assert mask.to_list() == expected
+
+
+@pytest.mark.parametrize("test_dataframe", test_const.TEST_DATAFRAMES, ids=lambda df: f"version {df['version']}")
+def test_cube_header_versions(tmp_path: Path, test_dataframe: dict) -> None:
+    filepath = tmp_path / "inventory.csv"
+    pd.DataFrame(test_dataframe["df"]).to_csv(filepath, index=False)
+
+    polars_data = PolarsVMData.from_file(filepath)
+
+    assert polars_data.unit_type == "GiB"
+    assert_cubes_equal(polars_data, VMData.from_file(filepath))
+
+
+def test_cube_directory(tmp_path: Path) -> None:
+    for name in ["Test_Inventory_VMs.csv", "Site_example.xlsx"]:
+        (tmp_path / name).write_bytes((TESTFILE_DIR / name).read_bytes())
+
+    assert_cubes_equal(PolarsVMData.from_file(tmp_path), VMData.from_file(tmp_path))
+
+
+def test_adaptive_cube() -> None:
+    testfile = TESTFILE_DIR / "Test_Inventory_VMs.csv"
+    edges = (0, 150, 450, 12000)
+
+    polars_cube = PolarsVMData.from_file(testfile).adaptive_cube(edges)
+
+    pd.testing.assert_frame_equal(
+        polars_cube.frame, VMData.from_file(testfile).adaptive_cube(edges).frame, check_dtype=False
+    )
+
+
+def test_create_site_specific_dataframe() -> None:
+    testfile = TESTFILE_DIR / "Site_example.xlsx"
+
+    site_usage = PolarsVMData.from_file(testfile).create_site_specific_dataframe()
+
+    pd.testing.assert_frame_equal(
+        site_usage, VMData.from_file(testfile).create_site_specific_dataframe(), check_dtype=False
+    )
+
+
+def test_sketch_sites() -> None:
+    testfile = TESTFILE_DIR / "Site_example.xlsx"
+
+    site_sketches = PolarsVMData.from_file(testfile).sketch_sites()
+
+    expected = VMData.from_file(testfile).sketch_sites()
+    assert site_sketches.keys() == expected.keys()
+    for site, sketches in expected.items():
+        for measure, sketch in sketches.items():
+            assert site_sketches[site][measure].to_dict() == sketch.to_dict()
+
+
+def test_create_site_specific_dataframe_no_site_name() -> None:
+    with pytest.raises(ValueError):
+        PolarsVMData.from_file(TESTFILE_DIR / "Test_Inventory_VMs.csv").create_site_specific_dataframe()
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vminfo_parser import const as vm_const
+from vminfo_parser.quality import MISSING_ENVIRONMENT, UNMATCHED_OS, UNPARSABLE_DISK, UNPARSABLE_MEMORY, DataQuality
+from vminfo_parser.vmdata import VMData
+from vminfo_parser.where import Where
+
+INVENTORY = (
+    "VM,OS according to the configuration file,OS according to the VMware Tools,Environment,Memory,"
+    "Provisioned MiB,CPUs\n"
+    "vm1,Ubuntu Linux (64-bit),,Prod,8192,4096000,4\n"
+    "vm2,Plan 9,,,8192,abc,4\n"
+    "vm3,CentOS 7 (64-bit),,Dev,lots,3 072 000,2\n"
+    "vm4,,,Dev,,,2\n"
+    "vm5,Inferno,,,1 024,,8\n"
+)
+
+
+@pytest.fixture
+def inventory() -> pd.DataFrame:
+    return pd.DataFrame({"VM": [f"vm{i}" for i in range(8)], "Memory": ["8192", "x"] * 4})
+
+
+def test_record(inventory: pd.DataFrame, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(vm_const, "DATA_QUALITY_SAMPLE_ROWS", 3)
+    quality = DataQuality(rows=len(inventory))
+
+    quality.record(UNPARSABLE_MEMORY, inventory["Memory"].eq("x"), inventory, ["Memory"])
+    quality.record(UNPARSABLE_MEMORY, np.array([True] + [False] * 7), inventory, ["Memory"])
+
+    assert quality.counts == {UNPARSABLE_MEMORY: 5, UNPARSABLE_DISK: 0, UNMATCHED_OS: 0, MISSING_ENVIRONMENT: 0}
+    # Only the first sample rows are kept, with the VM identity first
+    assert quality.samples[UNPARSABLE_MEMORY].index.tolist() == [1, 3, 5]
+    assert list(quality.samples[UNPARSABLE_MEMORY].columns) == ["VM", "Memory"]
+    assert quality.to_frame().loc[UNPARSABLE_MEMORY].tolist() == [5, 62.5]
+
+
+def test_merge(inventory: pd.DataFrame) -> None:
+    parts = []
+    for part in (inventory.iloc[:4], inventory.iloc[4:]):
+        quality = DataQuality(rows=len(part))
+        quality.record(UNPARSABLE_MEMORY, part["Memory"].eq("x"), part, ["Memory"])
+        parts.append(quality)
+
+    merged = DataQuality.merge(parts)
+
+    assert merged.rows == 8
+    assert merged.counts[UNPARSABLE_MEMORY] == 4
+    assert merged.samples[UNPARSABLE_MEMORY]["VM"].tolist() == ["vm1", "vm3", "vm5", "vm7"]
+
+
+def test_to_frame_empty() -> None:
+    frame = DataQuality().to_frame()
+
+    assert frame.index.tolist() == list(vm_const.DATA_QUALITY_CHECKS)
+    assert frame["VMs"].eq(0).all()
+    assert frame["Percent"].eq(0).all()
+
+
+@pytest.mark.parametrize("chunk_size", [2, 100], ids=["chunked", "whole"])
+def test_normalize_data_quality(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, chunk_size: int) -> None:
+    monkeypatch.setattr(vm_const, "DEFAULT_CHUNK_SIZE", chunk_size)
+    test_file = tmp_path / "test.csv"
+    test_file.write_text(INVENTORY)
+
+    # --where reads CSV files in chunks, the findings still cover every row read
+    vm_data = VMData.from_file(test_file, where=Where("vCPU > 3"))
+    quality = vm_data.data_quality
+
+    assert quality.rows == 5
+    assert quality.counts == {UNPARSABLE_MEMORY: 1, UNPARSABLE_DISK: 1, UNMATCHED_OS: 2, MISSING_ENVIRONMENT: 2}
+    assert quality.samples[UNPARSABLE_MEMORY].to_dict("list") == {"VM": ["vm3"], "Memory": ["lots"]}
+    assert quality.samples[UNPARSABLE_DISK].to_dict("list") == {"VM": ["vm2"], "Provisioned MiB": ["abc"]}
+    assert quality.samples[UNMATCHED_OS]["VM"].tolist() == ["vm2", "vm5"]
+    assert quality.samples[MISSING_ENVIRONMENT].index.tolist() == [1, 4]
+    # Unparsable and blank numbers are missing rather than failing the conversion to GiB
+    assert vm_data.df["VM"].tolist() == ["vm1", "vm2", "vm5"]
+    assert vm_data.df["Memory"].tolist() == [8, 8, 1]
+    assert vm_data.df["Provisioned MiB"].iloc[1:].isna().all()
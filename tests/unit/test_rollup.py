@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vminfo_parser.rollup import OTHER_LABEL, roll_up_counts
+
+
+@pytest.fixture
+def counts() -> pd.Series:
+    return pd.Series(
+        [3, 10, 1, 5, 2, 5],
+        index=pd.Index(["c", "a", "f", "b", "e", "d"], name="OS Name"),
+        name="count",
+    )
+
+
+@pytest.mark.parametrize(
+    "minimum,top,expected",
+    [
+        (None, None, {"a": 10, "b": 5, "d": 5, "c": 3, "e": 2, "f": 1}),
+        (3, None, {"a": 10, "b": 5, "d": 5, "c": 3, OTHER_LABEL: 3}),
+        (None, 2, {"a": 10, "b": 5, OTHER_LABEL: 11}),
+        (None, 3, {"a": 10, "b": 5, "d": 5, OTHER_LABEL: 6}),
+        (4, 1, {"a": 10, OTHER_LABEL: 16}),
+        (2, None, {"a": 10, "b": 5, "d": 5, "c": 3, "e": 2, "f": 1}),
+    ],
+    ids=["none", "minimum", "top_tie", "top", "minimum_and_top", "single_rest"],
+)
+def test_roll_up_counts_series(counts: pd.Series, minimum: int | None, top: int | None, expected: dict) -> None:
+    result = roll_up_counts(counts, minimum=minimum, top=top)
+
+    assert result.to_dict() == expected
+    assert list(result.index) == list(expected)
+    assert result.name == "count"
+    assert result.index.name == "OS Name"
+
+
+def test_roll_up_counts_ties_keep_order(counts: pd.Series) -> None:
+    result = roll_up_counts(counts, top=2, other=None)
+
+    # b and d tie, b comes first in counts
+    assert list(result.index) == ["a", "b"]
+
+
+def test_roll_up_counts_drop_rest(counts: pd.Series) -> None:
+    result = roll_up_counts(counts, minimum=2, other=None)
+
+    assert result.to_dict() == {"a": 10, "b": 5, "d": 5, "c": 3, "e": 2}
+
+
+@pytest.mark.parametrize("by,expected_index", [(None, ["b", "a", OTHER_LABEL]), ("prod", ["a", "b", OTHER_LABEL])])
+def test_roll_up_counts_dataframe(by: str | None, expected_index: list[str]) -> None:
+    counts = pd.DataFrame(
+        {"prod": [5, 4, 1, 0], "non-prod": [1, 4, 1, 2]},
+        index=pd.Index(["a", "b", "c", "d"], name="OS Name"),
+    )
+
+    result = roll_up_counts(counts, top=2, by=by)
+
+    assert list(result.index) == expected_index
+    assert result.index.name == "OS Name"
+    assert result.loc[OTHER_LABEL].tolist() == [1, 3]
+    np.testing.assert_array_equal(result.sum().to_numpy(), counts.sum().to_numpy())
+
+
+def test_roll_up_counts_empty() -> None:
+    counts = pd.Series([], index=pd.Index([], name="OS Name"), name="count", dtype=np.int64)
+
+    result = roll_up_counts(counts, minimum=2, top=3)
+
+    assert result.empty
@@ -0,0 +1,120 @@
+import math
+
+import numpy as np
+import pytest
+
+from vminfo_parser.sketch import QuantileSketch, SpaceSaving
+
+
+@pytest.fixture
+def values() -> np.ndarray:
+    return np.random.default_rng(0).lognormal(mean=5, sigma=1.5, size=10000)
+
+
+@pytest.mark.parametrize("q", [0, 0.25, 0.5, 0.9, 0.99, 1])
+def test_quantile(values: np.ndarray, q: float) -> None:
+    sketch = QuantileSketch(relative_accuracy=0.01).update(values)
+
+    assert sketch.quantile(q) == pytest.approx(np.quantile(values, q, method="lower"), rel=0.01)
+
+
+def test_update_ignores_nan_and_counts_zero() -> None:
+    sketch = QuantileSketch().update(np.array([np.nan, 0, 0, 0, 10]))
+
+    assert sketch.count == 4
+    assert sketch.zero_count == 3
+    assert sketch.quantile(0.5) == 0
+    assert sketch.quantile(1) == 10
+
+
+def test_merge(values: np.ndarray) -> None:
+    whole = QuantileSketch().update(values)
+
+    merged = QuantileSketch().update(values[:3000]).merge(QuantileSketch().update(values[3000:]))
+
+    assert merged.to_dict() == whole.to_dict()
+
+
+def test_grouped(values: np.ndarray) -> None:
+    values = values.copy()
+    values[::7] = 0
+    values[::11] = np.nan
+    ids = np.random.default_rng(1).integers(-1, 4, len(values))
+
+    sketches = QuantileSketch.grouped(ids, values, 5)
+
+    for group, sketch in enumerate(sketches):
+        assert sketch.to_dict() == QuantileSketch().update(values[ids == group]).to_dict()
+    # No values in the last group
+    assert sketches[4].count == 0
+
+
+def test_merge_different_accuracy() -> None:
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+
+def test_dict_round_trip(values: np.ndarray) -> None:
+    sketch = QuantileSketch().update(values)
+
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+
+    assert restored.to_dict() == sketch.to_dict()
+    assert restored.quantile(0.95) == sketch.quantile(0.95)
+
+
+def test_empty() -> None:
+    sketch = QuantileSketch()
+
+    assert math.isnan(sketch.quantile(0.5))
+    assert QuantileSketch.from_dict(sketch.to_dict()).count == 0
+
+
+@pytest.mark.parametrize("relative_accuracy", [0, 1, -0.1])
+def test_invalid_accuracy(relative_accuracy: float) -> None:
+    with pytest.raises(ValueError):
+        QuantileSketch(relative_accuracy)
+
+
+def test_invalid_quantile() -> None:
+    with pytest.raises(ValueError):
+        QuantileSketch().update(np.array([1.0])).quantile(1.5)
+
+
+def test_space_saving_exact_within_capacity() -> None:
+    sketch = SpaceSaving(capacity=3).update([("a", 5), ("b", 2)]).update([("a", 1), ("c", 4)])
+
+    assert sketch.top() == [("a", 6, 0), ("c", 4, 0), ("b", 2, 0)]
+    assert sketch.total == 12
+    assert sketch.min_count() == 2
+
+
+def test_space_saving_error_bounds() -> None:
+    rng = np.random.default_rng(0)
+    items = rng.zipf(1.5, size=5000)
+    true_counts = dict(zip(*np.unique(items, return_counts=True)))
+
+    sketch = SpaceSaving(capacity=20)
+    for chunk in np.array_split(items, 50):
+        sketch.update(zip(*np.unique(chunk, return_counts=True)))
+
+    assert sketch.total == len(items)
+    for item, count, error in sketch.top():
+        assert count - error <= true_counts[item] <= count
+    # the most frequent item can't be crowded out
+    assert sketch.top(1)[0][0] == max(true_counts, key=true_counts.get)
+
+
+def test_space_saving_merge() -> None:
+    left = SpaceSaving(capacity=2).update([("a", 10), ("b", 3), ("c", 1)])
+    right = SpaceSaving(capacity=2).update([("a", 2), ("d", 5)])
+
+    merged = left.merge(right)
+
+    assert merged.total == 21
+    assert merged.top() == [("a", 12, 0), ("d", 9, 4)]
+
+
+def test_space_saving_invalid_capacity() -> None:
+    with pytest.raises(ValueError):
+        SpaceSaving(capacity=0)
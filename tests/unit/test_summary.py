@@ -0,0 +1,148 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pytest_mock import MockType
+
+from vminfo_parser import const
+from vminfo_parser.analyzer import Analyzer
+from vminfo_parser.summary import Summary
+from vminfo_parser.vmdata import VMData
+
+COLUMN_HEADERS = {"environment": "Environment", "vmMemory": "Memory", "vmDisk": "Disk", "vCPU": "CPUs"}
+
+
+def _vmdata(df: pd.DataFrame) -> VMData:
+    vm_data = VMData(df.reset_index(drop=True), normalize=False)
+    vm_data.column_headers = COLUMN_HEADERS
+    return vm_data
+
+
+@pytest.fixture
+def inventory() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "OS Name": ["CentOS", "CentOS", "Ubuntu Linux", "Ubuntu Linux", None, "CentOS"],
+            "OS Version": ["7", "8", "22.04", None, None, "7"],
+            "Environment": ["prod", "dev", None, "prod", "dev", "prod"],
+            "Site Name": ["DC1", "DC2", "DC1", "DC1", "DC2", "DC2"],
+            "Memory": [1, 2, 3, 4, 5, 6],
+            "Disk": [100.5, 450, 2500, 300, None, 100.25],
+            "CPUs": [1, 2, 4, 8, 16, 1],
+        }
+    )
+
+
+@pytest.fixture
+def analyzer_config(mock_config: MockType) -> MockType:
+    mock_config.environments = ["prod"]
+    mock_config.environment_filter = "both"
+    mock_config.count_filter = None
+    return mock_config
+
+
+def test_file_round_trip(inventory: pd.DataFrame, tmp_path: Path) -> None:
+    summary = Summary.from_vmdata(_vmdata(inventory))
+
+    summary.to_file(tmp_path / "summary.json")
+    restored = Summary.from_file(tmp_path / "summary.json")
+
+    pd.testing.assert_frame_equal(restored.cube.frame, summary.cube.frame, check_dtype=False)
+    assert restored.column_headers == summary.column_headers
+    assert restored.cube.sketches["Disk"].to_dict() == summary.cube.sketches["Disk"].to_dict()
+    assert restored.cube.site_sketches["DC2"]["CPU"].to_dict() == summary.cube.site_sketches["DC2"]["CPU"].to_dict()
+
+
+@pytest.mark.parametrize("version", [0, 1, 2], ids=["unknown", "without_site_sketches", "without_architecture"])
+def test_from_file_wrong_format(tmp_path: Path, version: int) -> None:
+    (tmp_path / "summary.json").write_text(f'{{"format": {version}}}')
+
+    with pytest.raises(ValueError):
+        Summary.from_file(tmp_path / "summary.json")
+
+
+@pytest.mark.parametrize(
+    "report",
+    [
+        "get_operating_system_counts",
+        "get_supported_os_counts",
+        "get_os_version_distributions",
+        "get_disk_space_by_os",
+        "get_resource_quantiles",
+    ],
+)
+def test_merged_summary_reports(inventory: pd.DataFrame, analyzer_config: MockType, report: str) -> None:
+    summary = Summary.merge(
+        [Summary.from_vmdata(_vmdata(inventory.iloc[:3])), Summary.from_vmdata(_vmdata(inventory.iloc[3:]))]
+    )
+
+    expected = getattr(Analyzer(_vmdata(inventory), analyzer_config), report)()
+    response = getattr(Analyzer(summary, analyzer_config), report)()
+
+    if isinstance(expected, dict):
+        assert expected.keys() == response.keys()
+        for os_name in expected:
+            pd.testing.assert_frame_equal(response[os_name], expected[os_name], check_like=True)
+    elif isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(response.sort_index(), expected.sort_index())
+    else:
+        pd.testing.assert_frame_equal(response.sort_index(), expected.sort_index(), check_like=True)
+
+
+@pytest.mark.parametrize(
+    "report",
+    [
+        "get_operating_system_counts",
+        "get_unsupported_os_counts",
+        "get_os_version_distributions",
+        "get_disk_space_by_os",
+    ],
+)
+def test_site_reports(inventory: pd.DataFrame, analyzer_config: MockType, report: str) -> None:
+    expected = getattr(Analyzer(_vmdata(inventory[inventory["Site Name"] == "DC1"]), analyzer_config), report)()
+    analyzer_config.site = "DC1"
+    response = getattr(Analyzer(Summary.from_vmdata(_vmdata(inventory)), analyzer_config), report)()
+
+    if isinstance(expected, dict):
+        assert list(expected) == list(response) == ["CentOS", "Ubuntu Linux"]
+        for os_name in expected:
+            pd.testing.assert_frame_equal(response[os_name], expected[os_name], check_like=True)
+    else:
+        pd.testing.assert_frame_equal(response.sort_index(), expected.sort_index(), check_like=True)
+
+
+def test_create_site_specific_dataframe(inventory: pd.DataFrame) -> None:
+    vm_data = _vmdata(inventory)
+
+    response = Summary.merge(
+        [Summary.from_vmdata(_vmdata(inventory.iloc[:3])), Summary.from_vmdata(_vmdata(inventory.iloc[3:]))]
+    ).create_site_specific_dataframe()
+
+    pd.testing.assert_frame_equal(response, Summary.from_vmdata(vm_data).create_site_specific_dataframe())
+    # Only the medians and 95th percentiles are estimated, and named as such
+    exact = vm_data.create_site_specific_dataframe()
+    assert list(response.columns) == [const.SITE_APPROXIMATE_COLUMNS.get(column, column) for column in exact.columns]
+    pd.testing.assert_frame_equal(
+        response.drop(columns=list(const.SITE_APPROXIMATE_COLUMNS.values())),
+        exact.drop(columns=list(const.SITE_APPROXIMATE_COLUMNS)),
+    )
+
+
+def test_create_site_specific_dataframe_no_sites(inventory: pd.DataFrame) -> None:
+    summary = Summary.from_vmdata(_vmdata(inventory.drop(columns="Site Name")))
+
+    with pytest.raises(ValueError):
+        summary.create_site_specific_dataframe()
+
+
+def test_merge_empty() -> None:
+    with pytest.raises(ValueError):
+        Summary.merge([])
+
+
+def test_adaptive_cube(inventory: pd.DataFrame) -> None:
+    summary = Summary.from_vmdata(_vmdata(inventory))
+
+    with pytest.raises(ValueError):
+        summary.adaptive_cube((0, 200, 2500))
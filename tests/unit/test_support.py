@@ -0,0 +1,110 @@
+import math
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from vminfo_parser import const
+from vminfo_parser.cube import Cube
+from vminfo_parser.support import SupportMatrix, SupportRule, load_support_matrix
+
+VERSIONED_MATRIX = """OS Name,Min Version,Max Version,Architecture,Supported
+Red Hat Enterprise Linux,,7,,false
+Red Hat Enterprise Linux,8,,,true
+Microsoft Windows Server,2016,,64-bit,yes
+"""
+
+
+@pytest.fixture
+def versioned_matrix(tmp_path: Path) -> SupportMatrix:
+    path = tmp_path / "matrix.csv"
+    path.write_text(VERSIONED_MATRIX)
+    return SupportMatrix.from_file(path)
+
+
+def test_from_file(versioned_matrix: SupportMatrix) -> None:
+    assert versioned_matrix.rules == (
+        SupportRule("Red Hat Enterprise Linux", False, -math.inf, 7),
+        SupportRule("Red Hat Enterprise Linux", True, 8, math.inf),
+        SupportRule("Microsoft Windows Server", True, 2016, math.inf, "64-bit"),
+    )
+    assert versioned_matrix.os_names == {"Red Hat Enterprise Linux", "Microsoft Windows Server"}
+
+
+@pytest.mark.parametrize(
+    "os_name,os_version,architecture,expected",
+    [
+        ("Red Hat Enterprise Linux", "7 ", "64-bit", False),
+        ("Red Hat Enterprise Linux", "6/7", "64-bit", False),
+        ("Red Hat Enterprise Linux", "8", "64-bit", True),
+        ("Red Hat Enterprise Linux", "9.2", None, True),
+        # No rule without version bounds matches a missing version
+        ("Red Hat Enterprise Linux", None, "64-bit", False),
+        ("Microsoft Windows Server", "2019", "64-bit", True),
+        ("Microsoft Windows Server", "2019", "32-bit", False),
+        ("Microsoft Windows Server", "2012 R2", "64-bit", False),
+        ("CentOS", "8", "64-bit", False),
+        (None, "8", "64-bit", False),
+    ],
+)
+def test_is_supported(
+    versioned_matrix: SupportMatrix,
+    os_name: str | None,
+    os_version: str | None,
+    architecture: str | None,
+    expected: bool,
+) -> None:
+    assert versioned_matrix.is_supported(os_name, os_version, architecture) is expected
+
+
+@pytest.mark.parametrize("os_name", ["CentOS", "Ubuntu Linux", *sorted(const.SUPPORTED_OSES)])
+@pytest.mark.parametrize("os_version", ["7", "2019", None])
+def test_default_matrix(os_name: str, os_version: str | None) -> None:
+    assert load_support_matrix().is_supported(os_name, os_version, "64-bit") is (os_name in const.SUPPORTED_OSES)
+
+
+def test_classify(versioned_matrix: SupportMatrix) -> None:
+    os_names = pd.Series(["Red Hat Enterprise Linux", "Red Hat Enterprise Linux", None, "Red Hat Enterprise Linux"])
+    os_versions = pd.Series(["7", "8", "8", "8"])
+    architectures = pd.Series(["64-bit", "64-bit", "64-bit", None])
+
+    support = versioned_matrix.classify(os_names, os_versions, architectures)
+
+    assert list(support.categories) == list(const.SUPPORT_STATUSES)
+    assert list(support) == ["Unsupported", "Supported", "Unsupported", "Supported"]
+
+
+def test_cube_support(versioned_matrix: SupportMatrix) -> None:
+    cube = Cube(
+        pd.DataFrame(
+            {
+                "OS Name": ["Red Hat Enterprise Linux", "Red Hat Enterprise Linux", "Microsoft Windows Server"],
+                "OS Version": ["7", "8", "2019"],
+                "Architecture": ["64-bit", "64-bit", "32-bit"],
+                "Count": [2, 3, 1],
+            }
+        )
+    )
+
+    support = cube.support(versioned_matrix)
+
+    assert list(support) == ["Unsupported", "Supported", "Unsupported"]
+    assert cube.support(versioned_matrix) is support
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "OS Name,Min Version,Supported\nCentOS,7,true\n",
+        "OS Name,Min Version,Max Version,Architecture,Supported\nCentOS,,,,maybe\n",
+        "OS Name,Min Version,Max Version,Architecture,Supported\n,,,,true\n",
+        "OS Name,Min Version,Max Version,Architecture,Supported\nCentOS,seven,,,true\n",
+    ],
+    ids=["missing_column", "invalid_supported", "missing_os_name", "invalid_version"],
+)
+def test_from_file_invalid(tmp_path: Path, text: str) -> None:
+    path = tmp_path / "matrix.csv"
+    path.write_text(text)
+
+    with pytest.raises(ValueError):
+        SupportMatrix.from_file(path)
@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pytest_mock import MockFixture
+
+from vminfo_parser.summary import Summary
+from vminfo_parser.trend import SnapshotSummaries, compute_trends, find_snapshots
+from vminfo_parser.vmdata import VMData
+
+from .. import const as test_const
+
+TESTFILE_DIR = Path(__file__).parent.parent / test_const.TESTFILE_DIR
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path: Path) -> Path:
+    inventory = pd.read_excel(TESTFILE_DIR / "Site_example.xlsx")
+    for index, name in enumerate(["inventory-2024-01-15.csv", "inventory_20240101.csv", "inventory-2024-01-08.csv"]):
+        inventory.iloc[: 100 * (index + 1)].to_csv(tmp_path / name, index=False)
+    (tmp_path / "notes.txt").write_text("not a snapshot")
+    return tmp_path
+
+
+def test_find_snapshots(snapshot_dir: Path, caplog: pytest.LogCaptureFixture) -> None:
+    inventory = pd.read_excel(TESTFILE_DIR / "Site_example.xlsx")
+    inventory.to_csv(snapshot_dir / "latest.csv", index=False)
+
+    assert find_snapshots(snapshot_dir) == [
+        (pd.Timestamp(2024, 1, 1), snapshot_dir / "inventory_20240101.csv"),
+        (pd.Timestamp(2024, 1, 8), snapshot_dir / "inventory-2024-01-08.csv"),
+        (pd.Timestamp(2024, 1, 15), snapshot_dir / "inventory-2024-01-15.csv"),
+    ]
+    assert f"Ignoring {snapshot_dir / 'latest.csv'}, its name doesn't contain a date" in caplog.messages
+
+
+def test_snapshot_summaries(snapshot_dir: Path, tmp_path: Path, mocker: MockFixture) -> None:
+    from_file = mocker.spy(VMData, "from_file")
+    snapshot = snapshot_dir / "inventory-2024-01-08.csv"
+    summaries = SnapshotSummaries(tmp_path / "summaries")
+
+    summary = summaries.get(snapshot)
+    cached = summaries.get(snapshot)
+
+    assert from_file.call_count == 1
+    pd.testing.assert_frame_equal(cached.cube.frame, summary.cube.frame, check_dtype=False)
+
+    # A changed snapshot is summarized again, replacing its cached summary
+    stat = snapshot.stat()
+    os.utime(snapshot, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    summaries.get(snapshot)
+
+    assert from_file.call_count == 2
+    assert len(list((tmp_path / "summaries").iterdir())) == 1
+
+
+def test_compute_trends(snapshot_dir: Path) -> None:
+    snapshots = [(date, Summary.from_vmdata(VMData.from_file(path))) for date, path in find_snapshots(snapshot_dir)]
+
+    trends = compute_trends(snapshots)
+
+    assert list(trends) == ["OS Counts", "Supported OS Counts", "Disk Space Ranges", "Site VM Counts"]
+    dates = pd.DatetimeIndex(["2024-01-01", "2024-01-08", "2024-01-15"], name="Snapshot")
+    for trend in trends.values():
+        pd.testing.assert_index_equal(trend.index, dates)
+    # Every VM has a site and disk size, while VMs without an OS name aren't counted per OS
+    assert trends["Site VM Counts"].sum(axis=1).tolist() == [200, 300, 100]
+    assert trends["Disk Space Ranges"].sum(axis=1).tolist() == [200, 300, 100]
+    pd.testing.assert_series_equal(
+        trends["Supported OS Counts"].sum(axis=1), trends["OS Counts"].sum(axis=1), check_names=False
+    )
+    latest = snapshots[-1][1].cube.frame
+    assert (
+        trends["OS Counts"].iloc[-1].to_dict()
+        == latest.groupby("OS Name")["Count"].sum().reindex(trends["OS Counts"].columns, fill_value=0).to_dict()
+    )
@@ -119,3 +119,16 @@ def test_visualize_supported_os_distribution(
     visualizer: Visualizer, supported_os_count_series: pd.Series
 ) -> plt.Figure:
     return visualizer.visualize_supported_os_distribution(supported_os_count_series)
+
+
+def test_visualize_trend(visualizer: Visualizer) -> None:
+    trend = pd.DataFrame(
+        {"Supported": [339, 667, 982], "Unsupported": [67, 144, 219]},
+        index=pd.DatetimeIndex(["2024-01-01", "2024-01-08", "2024-01-15"], name="Snapshot"),
+    )
+
+    figure = visualizer.visualize_trend(trend, "Supported OS Counts")
+
+    assert isinstance(figure, plt.Figure)
+    assert figure.axes[0].get_title() == "Supported OS Counts Over Time"
+    assert [line.get_label() for line in figure.axes[0].get_lines()] == ["Supported", "Unsupported"]
@@ -11,7 +11,9 @@ import pandas as pd
 import pytest
 
 import vminfo_parser.const as vm_const
-from vminfo_parser.vmdata import VMData, _categorize_environment
+from vminfo_parser.cube import categorize_environment
+from vminfo_parser.vmdata import VMData
+from vminfo_parser.where import Where
 
 
 from .. import const as test_const
@@ -91,6 +93,57 @@ def test_from_file_directory(tmp_path: Path, caplog: pytest.LogCaptureFixture) -
     assert isinstance(result, VMData)
 
 
+def test_from_file_chunks(tmp_path: Path) -> None:
+    test_file = tmp_path / "test.csv"
+    test_file.write_text(
+        "VM OS,VM MEM (GB),VM CPU,VM Provisioned (GB),Environment\n"
+        "Ubuntu Linux (64-bit),8,4,100,Prod\n"
+        "Microsoft Windows Server 2019 (64-bit),8,4,200,Dev\n"
+        ",16,2,300,Dev\n"
+    )
+
+    chunks = list(VMData.from_file_chunks(test_file, 2))
+
+    assert [len(chunk.df) for chunk in chunks] == [2, 1]
+    assert all(chunk.normalized for chunk in chunks)
+    assert chunks[0].df["OS Name"].tolist() == ["Ubuntu Linux", "Microsoft Windows Server"]
+    # a chunk without any OS values is still normalized
+    assert chunks[1].df["OS Name"].isna().all()
+
+
+@pytest.mark.parametrize("chunk_size", [2, 100], ids=["chunked", "whole"])
+def test_from_file_where(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, chunk_size: int) -> None:
+    monkeypatch.setattr(vm_const, "DEFAULT_CHUNK_SIZE", chunk_size)
+    test_file = tmp_path / "test.csv"
+    test_file.write_text(
+        "OS according to the configuration file,OS according to the VMware Tools,Environment,Memory,"
+        "Provisioned MiB,CPUs\n"
+        "Ubuntu Linux (64-bit),,Prod,8192,4096000,4\n"
+        "Microsoft Windows Server 2019 (64-bit),,Dev,8192,102400,4\n"
+        "CentOS 7 (64-bit),,Dev,16384,3072000,2\n"
+    )
+
+    result = VMData.from_file(test_file, where=Where("OS Name != 'Ubuntu Linux' and vmDisk > 2000"))
+
+    assert result.normalized
+    assert result.unit_type == "GiB"
+    assert result.df["OS Name"].tolist() == ["CentOS"]
+    # MiB are converted to GiB once, in each chunk
+    assert result.df["Provisioned MiB"].tolist() == [3000]
+    assert result.df.index.tolist() == [0]
+
+
+def test_from_file_chunks_excel(datafile: tuple[bool, Path]) -> None:
+    empty, filepath = datafile
+    if empty or filepath.suffix != ".xlsx":
+        pytest.skip("only complete Excel files are read whole")
+
+    chunks = list(VMData.from_file_chunks(filepath, 2))
+
+    assert len(chunks) == 1
+    assert chunks[0].df.shape[0] == test_const.TESTFILE_SHAPE[0]
+
+
 def test_from_file_invalid_type(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
     # Create test file with invalid type
     test_file = tmp_path / "test.txt"
@@ -250,6 +303,22 @@ def test_create_site_specific_dataframe(vmdata_with_headers: VMData) -> None:
 
     assert total_vms_original == total_vms_result
 
+    # Supported and unsupported OS split the VMs of every site
+    pd.testing.assert_series_equal(
+        result["Site_Supported_VM_Count"] + result["Site_Unsupported_VM_Count"],
+        result["Site_VM_Count"],
+        check_names=False,
+    )
+
+    # Means, maximums and quantiles are exact, computed from the inventory rows
+    by_site = vmdata_with_headers.df.groupby("Site Name")["VM CPU"]
+    result = result.set_index("Site Name")
+    assert result["Site_CPU_Mean"].to_dict() == pytest.approx(by_site.mean().to_dict())
+    assert result["Site_CPU_Max"].to_dict() == by_site.max().to_dict()
+    assert result["Site_CPU_P50"].to_dict() == pytest.approx(by_site.median().to_dict())
+    disk_p95 = vmdata_with_headers.df.groupby("Site Name")["VM Provisioned (GB)"].quantile(0.95)
+    assert result["Site_Disk_P95"].to_dict() == pytest.approx(disk_p95.to_dict())
+
 
 @pytest.mark.parametrize(
     "vmdata",
@@ -301,7 +370,7 @@ def test_create_site_specific_dataframe_empty(vmdata_with_headers: VMData) -> No
 )
 def test_categorize_environment(env_value, prod_envs, expected):
 
-    result = _categorize_environment(env_value, prod_envs)
+    result = categorize_environment(env_value, prod_envs)
     assert result == expected
 
 
@@ -449,3 +518,75 @@ def test_create_environment_filtered_dataframe(env_values, prod_envs, env_filter
     if expected_count > 0:
         category_counts = result["Environment"].value_counts().to_dict()
         assert category_counts == expected_categories
+
+
+@pytest.mark.parametrize(
+    "env_filter, expected_categories",
+    [
+        (None, {"prod": 2, "non-prod": 2}),
+        ("both", {"prod": 2, "non-prod": 2}),
+        ("prod", {"prod": 2}),
+        ("non-prod", {"non-prod": 2}),
+    ],
+)
+def test_create_environment_filtered_cube(env_filter, expected_categories):
+    df = pd.DataFrame(
+        {
+            "OS Name": ["CentOS", "CentOS", "Ubuntu Linux", "Ubuntu Linux"],
+            "OS Version": ["7", "7", None, None],
+            "ent-env": ["prod", "production", "dev", None],
+            "Memory": [1, 2, 3, 4],
+            "Disk": [100, 200, 300, 400],
+            "CPUs": [1, 1, 1, 1],
+        }
+    )
+    vmdata = VMData(df, normalize=False)
+    vmdata.column_headers = {"environment": "ent-env", "vmMemory": "Memory", "vmDisk": "Disk", "vCPU": "CPUs"}
+
+    result = vmdata.create_environment_filtered_cube(prod_envs=["prod"], env_filter=env_filter)
+
+    assert "Environment" not in result.columns
+    assert result.groupby("ent-env")["Count"].sum().to_dict() == expected_categories
+
+
+def test_data_version():
+    vmdata = VMData(pd.DataFrame({"OS Name": ["CentOS"]}), normalize=False)
+    version = vmdata.data_version
+
+    assert vmdata.data_version == version
+
+    vmdata.df = pd.DataFrame({"OS Name": ["Ubuntu Linux"]})
+    assert vmdata.data_version == version + 1
+
+    vmdata.invalidate()
+    assert vmdata.data_version == version + 2
+
+
+def test_adaptive_cube() -> None:
+    vmdata = VMData(pd.DataFrame({"Environment": ["prod"], "Memory": [1], "Disk": [100], "CPUs": [1]}), normalize=False)
+    vmdata.column_headers = {"environment": "Environment", "vmMemory": "Memory", "vmDisk": "Disk", "vCPU": "CPUs"}
+
+    cube = vmdata.adaptive_cube((0, 50, 100))
+
+    assert vmdata.adaptive_cube((0, 50, 100)) is cube
+    assert cube.frame["Disk Bin"].tolist() == [1]
+
+    vmdata.invalidate()
+    assert vmdata.adaptive_cube((0, 50, 100)) is not cube
+
+
+@pytest.mark.parametrize("datafile", ["csv"], indirect=["datafile"])
+def test_os_index(datafile: tuple[bool, Path]) -> None:
+    _, filepath = datafile
+    vmdata = VMData.from_file(filepath)
+    # built on first use
+    assert vmdata._os_index is None
+    index = vmdata.os_index
+
+    assert vmdata.os_index is index
+    for os_name in vmdata.df["OS Name"].dropna().unique():
+        np.testing.assert_array_equal(index.rows(os_name), np.flatnonzero(vmdata.df["OS Name"] == os_name))
+
+    vmdata.df = vmdata.df.iloc[::-1].reset_index(drop=True)
+    assert vmdata.os_index is not index
+    assert vmdata.df["OS Name"].iloc[vmdata.os_index.rows("CentOS")].eq("CentOS").all()
@@ -0,0 +1,118 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vminfo_parser.vmdata import VMData
+from vminfo_parser.waves import WavePlan, assign_waves, plan_waves
+
+
+@pytest.fixture
+def inventory() -> VMData:
+    return VMData(
+        pd.DataFrame(
+            {
+                "VM OS": [
+                    "Red Hat Enterprise Linux 9 (64-bit)",
+                    "Red Hat Enterprise Linux 8 (64-bit)",
+                    "Microsoft Windows Server 2019 (64-bit)",
+                    "CentOS 7 (64-bit)",
+                    "Red Hat Enterprise Linux 9 (64-bit)",
+                    "Microsoft Windows Server 2022 (64-bit)",
+                ],
+                "Environment": ["Prod", "Prod", "Dev", "Prod", "Prod", "Dev"],
+                "VM MEM (GB)": [32, 32, 16, 8, 64, 256],
+                "VM Provisioned (GB)": [100, 200, 300, 400, 500, 600],
+                "VM CPU": [8, 8, 4, 2, 16, 4],
+                "Site Name": ["s1", "s1", "s1", "s1", "s2", "s2"],
+            }
+        )
+    )
+
+
+def test_assign_waves() -> None:
+    memory = np.array([8.0, 4, 4, 2, 2, 20])
+    disk = np.array([100.0, 100, 100, 100, 100, 100])
+
+    waves = assign_waves(memory, disk, max_vms=2, max_memory=10)
+
+    # The VM with 20 GiB gets a wave of its own, the others are spread over the 3 waves 2 VMs each need
+    assert waves[5] == 3
+    assert np.bincount(waves[:5]).tolist() == [1, 2, 2]
+    assert np.bincount(waves, weights=memory)[:3].max() <= 10
+    assert len(assign_waves(np.empty(0), np.empty(0), max_vms=2)) == 0
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_assign_waves_respects_caps(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    memory = rng.integers(1, 64, 2000).astype(float)
+    disk = rng.integers(10, 2000, 2000).astype(float)
+
+    waves = assign_waves(memory, disk, max_vms=50, max_memory=1000, max_disk=40000)
+
+    assert np.bincount(waves).min() > 0
+    assert np.bincount(waves).max() <= 50
+    assert np.bincount(waves, weights=memory).max() <= 1000
+    assert np.bincount(waves, weights=disk).max() <= 40000
+    # A few more waves at most than the caps need
+    fewest = max(2000 / 50, memory.sum() / 1000, disk.sum() / 40000)
+    assert waves.max() + 1 <= np.ceil(fewest * 1.05)
+
+
+def test_plan_waves(inventory: VMData) -> None:
+    plan = plan_waves(inventory, ["Prod"], "both", max_vms=1, max_disk=1000)
+
+    assert plan.waves.to_dict("list") == {
+        "Wave": [1, 2, 3, 4, 5],
+        "Site Name": ["s1", "s1", "s1", "s2", "s2"],
+        "Environment": ["non-prod", "prod", "prod", "non-prod", "prod"],
+        "VMs": [1, 1, 1, 1, 1],
+        "vCPU": [4.0, 8.0, 8.0, 4.0, 16.0],
+        "Memory GiB": [16.0, 32.0, 32.0, 256.0, 64.0],
+        "Disk GiB": [300.0, 100.0, 200.0, 600.0, 500.0],
+    }
+    assert plan.vms["Wave"].tolist() == [1, 2, 3, 4, 5]
+    assert plan.vms["VM Provisioned (GB)"].tolist() == [300, 100, 200, 600, 500]
+
+
+def test_plan_waves_across_sites(inventory: VMData) -> None:
+    plan = plan_waves(inventory, ["Prod"], "prod", max_memory=64, across_sites=True)
+
+    # The prod VMs of s1 and s2 share waves, and the waves have no Site Name
+    assert plan.waves.to_dict("list") == {
+        "Wave": [1, 2],
+        "Environment": ["prod", "prod"],
+        "VMs": [1, 2],
+        "vCPU": [16.0, 16.0],
+        "Memory GiB": [64.0, 64.0],
+        "Disk GiB": [500.0, 300.0],
+    }
+    assert plan.vms["Site Name"].tolist() == ["s2", "s1", "s1"]
+
+
+def test_plan_waves_filters(inventory: VMData) -> None:
+    plan = plan_waves(inventory, ["Prod"], "prod", site="s1", max_memory=64)
+
+    assert plan.waves["VMs"].tolist() == [2]
+    assert plan.vms["OS Name"].tolist() == ["Red Hat Enterprise Linux", "Red Hat Enterprise Linux"]
+
+
+def test_wave_plan_to_file(inventory: VMData, tmp_path: Path) -> None:
+    plan = plan_waves(inventory, [], max_vms=2)
+
+    plan.to_file(tmp_path / "waves.csv")
+
+    assert pd.read_csv(tmp_path / "waves.csv")["Wave"].tolist() == plan.vms["Wave"].tolist()
+    with pytest.raises(ValueError):
+        plan.to_file(tmp_path / "waves.xlsx")
+
+
+def test_wave_plan_to_parquet(tmp_path: Path) -> None:
+    pytest.importorskip("pyarrow")
+    plan = WavePlan(pd.DataFrame({"Wave": [1, 1], "VM": ["a", 2]}), pd.DataFrame({"Wave": [1]}))
+
+    plan.to_file(tmp_path / "waves.parquet")
+
+    assert pd.read_parquet(tmp_path / "waves.parquet")["VM"].tolist() == ["a", "2"]
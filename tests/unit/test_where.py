@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vminfo_parser import where as where_module
+from vminfo_parser.where import Comparison, Logical, Membership, Not, Where
+
+COLUMN_HEADERS = {"vmDisk": "Total disk capacity MiB", "environment": "Environment"}
+
+
+@pytest.fixture
+def inventory() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "OS Name": ["CentOS", "Ubuntu Linux", "CentOS", None, "Microsoft Windows Server"],
+            "OS Version": [7, 20, 8, 7, 2019],
+            "Site Name": ["DC1", "DC2", "DC3", "DC1", "DC2"],
+            "Total disk capacity MiB": ["1024", "4096", None, "3000", "2048"],
+            "Environment": ["Prod", "Dev", "Prod", "Dev", None],
+        }
+    )
+
+
+@pytest.fixture(params=["numpy", "numexpr"])
+def evaluator(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> None:
+    if request.param == "numexpr":
+        pytest.importorskip("numexpr")
+    else:
+        monkeypatch.setattr(where_module, "numexpr", None)
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("vmDisk > 2048", Comparison("vmDisk", ">", 2048.0)),
+        ("OS Name == 'CentOS'", Comparison("OS Name", "==", "CentOS")),
+        ('`OS Name` != "it\\"s"', Comparison("OS Name", "!=", 'it"s')),
+        ("Site Name in ['DC1','DC2']", Membership("Site Name", ("DC1", "DC2"))),
+        ("OS Version NOT IN [7, '8']", Membership("OS Version", (7.0, "8"), negated=True)),
+        (
+            "vmDisk > 1 or vmDisk < -1 and not Site Name == 'DC1'",
+            Logical(
+                "or",
+                (
+                    Comparison("vmDisk", ">", 1.0),
+                    Logical("and", (Comparison("vmDisk", "<", -1.0), Not(Comparison("Site Name", "==", "DC1")))),
+                ),
+            ),
+        ),
+        (
+            "(vmDisk > 1 or vmDisk < 1e3) and OS Version >= 7.5",
+            Logical(
+                "and",
+                (
+                    Logical("or", (Comparison("vmDisk", ">", 1.0), Comparison("vmDisk", "<", 1000.0))),
+                    Comparison("OS Version", ">=", 7.5),
+                ),
+            ),
+        ),
+    ],
+)
+def test_parse(text: str, expected: object) -> None:
+    where = Where(text)
+
+    assert where.tree == expected
+    assert where.text == text
+
+
+def test_columns() -> None:
+    where = Where("not (vmDisk > 1 or Site Name in ['DC1']) and vmDisk < 5")
+
+    assert where.columns == {"vmDisk", "Site Name"}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "vmDisk",
+        "vmDisk >",
+        "vmDisk > 1 and",
+        "vmDisk = 1",
+        "(vmDisk > 1",
+        "vmDisk > 1)",
+        "OS Name < 'CentOS'",
+        "Site Name in 'DC1'",
+        "Site Name in ['DC1'",
+        "Site Name not ['DC1']",
+        "> 1",
+        "vmDisk > 'unterminated",
+    ],
+)
+def test_parse_invalid(text: str) -> None:
+    with pytest.raises(ValueError):
+        Where(text)
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("vmDisk > 2048", [False, True, False, True, False]),
+        ("vmDisk <= 2048", [True, False, False, False, True]),
+        ("vmDisk != 2048", [True, True, True, True, False]),
+        ("OS Name == 'CentOS'", [True, False, True, False, False]),
+        ("OS Name != 'CentOS'", [False, True, False, True, True]),
+        ("OS Version == '7'", [True, False, False, True, False]),
+        ("OS Version == 7", [True, False, False, True, False]),
+        ("Site Name in ['DC1', 'DC3']", [True, False, True, True, False]),
+        ("OS Version in [8, '2019']", [False, False, True, False, True]),
+        ("Environment not in ['Prod']", [False, True, False, True, True]),
+        ("not vmDisk > 2048", [True, False, True, False, True]),
+        ("OS Name == 'CentOS' or vmDisk > 2048 and environment != 'Prod'", [True, True, True, True, False]),
+        ("(OS Name == 'CentOS' or vmDisk > 2048) and environment != 'Prod'", [False, True, False, True, False]),
+    ],
+)
+@pytest.mark.usefixtures("evaluator")
+def test_mask(inventory: pd.DataFrame, text: str, expected: list[bool]) -> None:
+    mask = Where(text).mask(inventory, COLUMN_HEADERS)
+
+    assert mask.dtype == bool
+    np.testing.assert_array_equal(mask, expected)
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("OS Version == '7'", [True, False, False, True, False]),
+        ("OS Version != '7'", [False, True, True, False, True]),
+        ("OS Version in ['8', 2019]", [False, False, True, False, False]),
+        ("OS Version not in ['7']", [False, True, True, False, True]),
+    ],
+)
+@pytest.mark.usefixtures("evaluator")
+def test_mask_float_column(inventory: pd.DataFrame, text: str, expected: list[bool]) -> None:
+    # Strings are compared as numbers with columns of floats, whose text is e.g. '7.0'
+    inventory["OS Version"] = inventory["OS Version"].astype(float)
+    inventory.loc[4, "OS Version"] = np.nan
+    mask = Where(text).mask(inventory, COLUMN_HEADERS)
+
+    np.testing.assert_array_equal(mask, expected)
+
+
+@pytest.mark.usefixtures("evaluator")
+def test_mask_unknown_column(inventory: pd.DataFrame) -> None:
+    with pytest.raises(ValueError, match="vmMemory"):
+        Where("vmMemory > 1").mask(inventory, COLUMN_HEADERS)
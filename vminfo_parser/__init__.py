@@ -4,6 +4,36 @@ from ._version import __version__
 
 __all__ = [
     "__version__",
+    "main",
 ]
 
+
+def main(*args: str) -> None:
+    """Entry point of the vminfo-parser script.
+
+    Cached reports are printed before the modules that read and analyze the inventory, and pandas, are imported.
+    """
+    from .cache import ReportCache
+    from .config import Config
+
+    config = Config.from_args(*args)
+    if config.generate_yaml:
+        config.generate_yaml_from_parser()
+        exit()
+
+    if config.worker:
+        from .distributed import run_worker
+
+        run_worker(config.queue_dir)
+        return
+
+    report_cache = ReportCache.from_config(config)
+    if report_cache is not None and report_cache.replay_reports(config):
+        return
+
+    from .__main__ import run
+
+    run(config)
+
+
 logging.basicConfig()
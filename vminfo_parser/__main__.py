@@ -1,15 +1,39 @@
 #!/usr/bin/env python3
 # Std lib imports
+import hashlib
 import logging
+import typing as t
+from pathlib import Path
 
 # 3rd party imports
 import pandas as pd
 
+from . import const
 from .analyzer import Analyzer
+from .approximate import ApproximateAnalyzer
+from .cache import OUTPUT_CSV, GraphRecorder, ReportCache, skip_output_csv
+from .capacity import NodeShape, plan_capacity
 from .clioutput import CLIOutput
 from .config import Config
+from .diff import SnapshotDiff
+from .distributed import coordinate, run_worker
+from .partition import summarize_partitioned
+from .pivot import parse_measures
+from .summary import Summary
+from .support import SupportMatrix, load_support_matrix
+from .trend import (
+    SUMMARY_CACHE_DIRECTORY,
+    SnapshotSummaries,
+    compute_trends,
+    find_snapshots,
+)
 from .visualizer import Visualizer
 from .vmdata import VMData
+from .waves import plan_waves
+from .where import Where
+
+if t.TYPE_CHECKING:
+    from .polars_backend import PolarsVMData
 
 LOGGER = logging.getLogger(__name__)
 
@@ -47,7 +71,7 @@ def get_supported_os(config: Config, analyzer: Analyzer, cli_output: CLIOutput,
 
 
 def output_os_by_version(analyzer: Analyzer, cli_output: CLIOutput, visualizer: Visualizer | None) -> None:
-    """Get os versions from analyzer and pass the result to outputs, once for each os.
+    """Get os versions for every os from analyzer in one batch and pass each result to outputs.
 
     Args:
         analyzer (Analyzer): Analyzer instance
@@ -55,20 +79,11 @@ def output_os_by_version(analyzer: Analyzer, cli_output: CLIOutput, visualizer:
         visualizer (Visualizer | None): Visualizer instance, or None if no graph output desired
     """
 
-    def output_os_versions(os_name: str) -> None:
-        """Get os versions from analyzer and pass the result to outputs.
-
-        Args:
-            os_name (str): OS name for this iteration
-        """
-
-        counts_dataframe = analyzer.get_os_version_distribution(os_name)
+    for os_name, counts_dataframe in analyzer.get_os_version_distributions().items():
         cli_output.format_dataframe_output(counts_dataframe, os_name=os_name)
         if visualizer is not None:
             visualizer.visualize_os_version_distribution(counts_dataframe, os_name=os_name)
 
-    analyzer.by_os(output_os_versions)
-
 
 def get_disk_space_ranges(
     config: Config, analyzer: Analyzer, cli_output: CLIOutput, visualizer: Visualizer | None
@@ -106,13 +121,16 @@ def get_os_counts(config: Config, analyzer: Analyzer, cli_output: CLIOutput, vis
     cli_output.format_series_output(counts)
 
     if visualizer:
+        if isinstance(analyzer, ApproximateAnalyzer):
+            # graph the estimated counts without their error bounds
+            counts = counts["count"]
         visualizer.visualize_os_distribution(counts, config.count_filter)
 
 
 def show_disk_space_by_os(
     config: Config, analyzer: Analyzer, cli_output: CLIOutput, visualizer: Visualizer | None
 ) -> None:
-    """Get disk space ranges from analyzer and pass to outputs, once for each os.
+    """Get disk space ranges for every os from analyzer in one batch and pass each to outputs.
 
     Args:
         config (Config): Config instance
@@ -121,14 +139,7 @@ def show_disk_space_by_os(
         visualizer (Visualizer | None): Visualizer instance, or None if no graph output desired
     """
 
-    def show_disk_space(os_name: str) -> None:
-        """Get disk space ranges from analyzer and pass to outputs.
-
-        Args:
-            os_name (str):  OS name for this iteration
-        """
-
-        disk_space_df = analyzer.get_disk_space(os_filter=os_name)
+    for os_name, disk_space_df in analyzer.get_disk_space_by_os().items():
         if not disk_space_df.empty:
             cli_output.print_formatted_disk_space(disk_space_df, os_filter=os_name)
             if visualizer:
@@ -137,64 +148,396 @@ def show_disk_space_by_os(
                 else:
                     visualizer.visualize_disk_space_vertical(disk_space_df, os_filter=os_name)
 
-    analyzer.by_os(show_disk_space)
+
+def get_resource_quantiles(analyzer: Analyzer, cli_output: CLIOutput) -> None:
+    """Get quantiles of resources per VM from analyzer and output using cli only.
+
+    Args:
+        analyzer (Analyzer): Analyzer instance
+        cli_output (CLIOutput): CLI Output instance
+    """
+    cli_output.print_resource_quantiles(analyzer.get_resource_quantiles())
 
 
-def sort_by_site(vm_data: VMData, cli_output: CLIOutput) -> None:
+def sort_by_site(vm_data: VMData | Summary, cli_output: CLIOutput, support_matrix: SupportMatrix) -> None:
     """Get resource usage by site and output using cli only.
 
     Args:
-        vm_data (VMData): VMData instance
+        vm_data (VMData | Summary): VMData or Summary instance
         cli_output (CLIOutput): CLI Output instance
+        support_matrix (SupportMatrix): matrix to count supported VMs by
     """
-    site_dataframe = vm_data.create_site_specific_dataframe()
+    site_dataframe = vm_data.create_site_specific_dataframe(support_matrix)
     cli_output.print_site_usage(["Memory", "CPU", "Disk", "VM"], site_dataframe)
 
 
-def main(*args: str) -> None:  # noqa: C901
+def diff_snapshots(config: Config, vm_data: VMData, cli_output: CLIOutput) -> None:
+    """Compare the inventory with an earlier snapshot and output the changes using cli only.
+
+    Args:
+        config (Config): Config instance
+        vm_data (VMData): VMData instance of the later snapshot
+        cli_output (CLIOutput): CLI Output instance
+    """
+    previous = VMData.from_file(config.diff_against, where=load_where(config))
+    key = config.diff_key.split(",") if config.diff_key else None
+    cli_output.print_snapshot_diff(SnapshotDiff.from_vmdata(previous, vm_data, key))
+
+
+def get_capacity_plan(config: Config, vm_data: VMData, cli_output: CLIOutput, support_matrix: SupportMatrix) -> None:
+    """Plan the nodes of each --plan-capacity shape the VMs need and output the plan using cli only.
+
+    Args:
+        config (Config): Config instance
+        vm_data (VMData): VMData instance
+        cli_output (CLIOutput): CLI Output instance
+        support_matrix (SupportMatrix): matrix of the VMs to plan for
+    """
+    shapes = [NodeShape.parse(shape) for shape in config.plan_capacity]
+    plan = plan_capacity(
+        vm_data, shapes, config.environments, config.environment_filter, config.site, support_matrix=support_matrix
+    )
+    cli_output.print_capacity_plan(plan)
+
+
+def get_wave_plan(config: Config, vm_data: VMData, cli_output: CLIOutput, support_matrix: SupportMatrix) -> None:
+    """Partition the VMs into migration waves, write them to the --plan-waves file and output the waves using cli only.
+
+    Args:
+        config (Config): Config instance
+        vm_data (VMData): VMData instance
+        cli_output (CLIOutput): CLI Output instance
+        support_matrix (SupportMatrix): matrix of the VMs to plan for
+    """
+    plan = plan_waves(
+        vm_data,
+        config.environments,
+        config.environment_filter,
+        config.site,
+        max_vms=config.wave_max_vms,
+        max_memory=config.wave_max_memory,
+        max_disk=config.wave_max_disk,
+        support_matrix=support_matrix,
+        across_sites=config.wave_across_sites,
+    )
+    try:
+        plan.to_file(config.plan_waves)
+    except ImportError:
+        LOGGER.critical("Writing Parquet files needs pyarrow, install it with: pip install vminfo_parser[parquet]")
+        exit(1)
+    cli_output.print_wave_plan(plan.waves)
+
+
+def get_data_quality(vm_data: VMData, cli_output: CLIOutput) -> None:
+    """Output the data quality problems found while normalizing the inventory using cli only.
+
+    Args:
+        vm_data (VMData): VMData instance
+        cli_output (CLIOutput): CLI Output instance
+    """
+    cli_output.print_data_quality(vm_data.data_quality)
+
+
+def get_pivot(config: Config, analyzer: Analyzer, cli_output: CLIOutput) -> None:
+    """Aggregate the --measure measures per group of the --group-by columns and output them using cli only.
+
+    Args:
+        config (Config): Config instance
+        analyzer (Analyzer): Analyzer instance
+        cli_output (CLIOutput): CLI Output instance
+    """
+    group_by = tuple(column.strip() for column in config.group_by.split(","))
+    try:
+        table = analyzer.get_pivot(group_by, tuple(parse_measures(config.measure or "count")))
+    except ValueError as e:
+        LOGGER.critical("Can't output the --group-by pivot report: %s", e)
+        exit(1)
+    cli_output.print_pivot(table)
+
+
+def main(*args: str) -> None:
     config = Config.from_args(*args)
     if config.generate_yaml:
         config.generate_yaml_from_parser()
         exit()
-    if config.directory:
-        vm_data = VMData.from_file(config.directory)
+
+    if config.worker:
+        run_worker(config.queue_dir)
+        return
+
+    report_cache = ReportCache.from_config(config)
+    if report_cache is not None and report_cache.replay_reports(config):
+        return
+
+    run(config)
+
+
+def run(config: Config) -> None:  # noqa: C901
+    """Load the inventory and output every report requested by config, storing the output in the report cache.
+
+    Args:
+        config (Config): Config instance
+    """
+    report_cache = ReportCache.from_config(config)
+    if config.approximate:
+        run_approximate(config, report_cache)
+        return
+    if config.trend:
+        run_trend(config, report_cache)
+        return
+
+    # Read before the inventory, so an invalid matrix fails fast
+    support_matrix = read_support_matrix(config)
+    vm_data: "VMData | Summary | PolarsVMData"
+    partition_size = (config.partition_size or const.DEFAULT_PARTITION_SIZE_MIB) * 1024 * 1024
+    # Summaries have no rows, so there is no output.csv and --save-summary writes them as they are
+    summarized = bool(config.summary or config.workers or config.queue_dir)
+    cube_key = report_cache.cube_key(config) if report_cache is not None and uses_stored_cube(config) else None
+    stored_cube = load_stored_cube(report_cache, cube_key) if cube_key is not None else None
+    if config.summary:
+        vm_data = Summary.merge([Summary.from_file(path) for path in config.summary])
+    elif stored_cube is not None:
+        vm_data = stored_cube
+        summarized = True
+    elif config.backend == "polars":
+        try:
+            from . import polars_backend
+        except ImportError:
+            LOGGER.critical("--backend polars needs polars, install it with: pip install vminfo_parser[polars]")
+            exit(1)
+        vm_data = polars_backend.PolarsVMData.from_file(config.directory or config.file, load_where(config))
+    elif config.workers:
+        vm_data = summarize_partitioned(config.directory or config.file, config.workers, partition_size)
+    elif config.queue_dir:
+        vm_data = coordinate(config.directory or config.file, config.queue_dir, partition_size)
     else:
-        vm_data = VMData.from_file(config.file)
+        vm_data = VMData.from_file(config.directory or config.file, where=load_where(config))
+
+    if config.save_summary or (cube_key is not None and stored_cube is None):
+        summary = vm_data if summarized else Summary.from_vmdata(vm_data)
+        if config.save_summary:
+            summary.to_file(config.save_summary)
+        if cube_key is not None and stored_cube is None:
+            report_cache.set_cube(cube_key, summary.to_json())
 
     visualizer: Visualizer | None = None
     if config.generate_graphs:
         visualizer = Visualizer()
+        if report_cache is not None:
+            visualizer = GraphRecorder(visualizer)
     cli_output = CLIOutput()
-    analyzer = Analyzer(vm_data, config)
+    analyzer = Analyzer(vm_data, config, support_matrix=support_matrix)
+
+    # Every requested report runs against the same VMData and Analyzer,
+    # so the inventory is parsed and aggregated only once per invocation
+    if config.sort_by_site:
+        sort_by_site(vm_data, cli_output, support_matrix)
+
+    if config.show_disk_space_by_os:
+        show_disk_space_by_os(config, analyzer, cli_output, visualizer)
+
+    # --over-under-tb and --breakdown-by-terabyte only change the ranges of --show-disk-space-by-os when combined
+    if config.get_disk_space_ranges or (
+        (config.over_under_tb or config.breakdown_by_terabyte) and not config.show_disk_space_by_os
+    ):
+        get_disk_space_ranges(config, analyzer, cli_output, visualizer)
+
+    if config.get_os_counts:
+        get_os_counts(config, analyzer, cli_output, visualizer)
 
-    match True:
-        case config.sort_by_site:
-            sort_by_site(vm_data, cli_output)
+    if config.output_os_by_version:
+        output_os_by_version(analyzer, cli_output, visualizer)
 
-        case config.show_disk_space_by_os:
-            show_disk_space_by_os(config, analyzer, cli_output, visualizer)
+    if config.get_supported_os:
+        get_supported_os(config, analyzer, cli_output, visualizer)
 
-        case config.get_disk_space_ranges | config.over_under_tb | config.breakdown_by_terabyte:
-            get_disk_space_ranges(config, analyzer, cli_output, visualizer)
+    if config.get_unsupported_os:
+        get_unsupported_os(analyzer, cli_output, visualizer)
 
-        case config.get_os_counts:
-            get_os_counts(config, analyzer, cli_output, visualizer)
+    if config.get_resource_quantiles:
+        get_resource_quantiles(analyzer, cli_output)
 
-        case config.output_os_by_version:
-            output_os_by_version(analyzer, cli_output, visualizer)
+    if config.diff_against:
+        diff_snapshots(config, vm_data, cli_output)
 
-        case config.get_supported_os:
-            get_supported_os(config, analyzer, cli_output, visualizer)
+    if config.plan_capacity:
+        get_capacity_plan(config, vm_data, cli_output, support_matrix)
 
-        case config.get_unsupported_os:
-            get_unsupported_os(analyzer, cli_output, visualizer)
+    if config.plan_waves:
+        get_wave_plan(config, vm_data, cli_output, support_matrix)
 
-    # Save results if necessary
-    vm_data.save_to_csv("output.csv")
+    if config.group_by:
+        get_pivot(config, analyzer, cli_output)
+
+    if config.data_quality:
+        get_data_quality(vm_data, cli_output)
+
+    if report_cache is not None:
+        graphs = visualizer.calls if isinstance(visualizer, GraphRecorder) else []
+        report_cache.set(report_cache.key(config), cli_output.getvalue(), graphs)
+
+    # Save results if necessary, summaries have no rows to save
+    if not summarized:
+        vm_data.save_to_csv(OUTPUT_CSV)
+    elif stored_cube is not None:
+        skip_output_csv("the stored cube is used")
+    else:
+        skip_output_csv("only summaries of the inventory are loaded")
 
     # close clioutput
     cli_output.close()
 
 
+def uses_stored_cube(config: Config) -> bool:
+    """Whether the reports of config can be answered from the cube of the inventory stored in the report cache.
+
+    Args:
+        config (Config): Config instance
+
+    Returns:
+        bool: False if the input already is a summary or a report needs the inventory rows
+    """
+    return not (
+        config.summary
+        or config.backend == "polars"
+        or config.diff_against
+        or config.adaptive_disk_bins
+        or config.plan_capacity
+        or config.plan_waves
+        or config.group_by
+        or config.where
+        or config.data_quality
+    )
+
+
+def load_where(config: Config) -> Where | None:
+    """Parse the --where expression of config, exiting if it isn't valid.
+
+    Args:
+        config (Config): Config instance
+
+    Returns:
+        Where | None: parsed expression, or None if there is no --where
+    """
+    if not config.where:
+        return None
+    try:
+        return Where(config.where)
+    except ValueError as e:
+        LOGGER.critical("%s", e)
+        exit(1)
+
+
+def read_support_matrix(config: Config) -> SupportMatrix:
+    """Read the --support-matrix file of config, or the default matrix, exiting if it isn't valid.
+
+    Args:
+        config (Config): Config instance
+
+    Returns:
+        SupportMatrix: matrix of the file
+    """
+    try:
+        return load_support_matrix(config.support_matrix)
+    except (ValueError, OSError) as e:
+        LOGGER.critical("Can't read the support matrix: %s", e)
+        exit(1)
+
+
+def load_stored_cube(report_cache: ReportCache, cube_key: str) -> Summary | None:
+    """Load the cube of the inventory an earlier run stored in the report cache.
+
+    Args:
+        report_cache (ReportCache): ReportCache instance
+        cube_key (str): key from ReportCache.cube_key
+
+    Returns:
+        Summary | None: summary holding the stored cube, or None if there is no readable cube
+    """
+    summary_json = report_cache.get_cube(cube_key)
+    if summary_json is None:
+        return None
+    try:
+        summary = Summary.from_json(summary_json, source=f"cube {cube_key}")
+    except (ValueError, KeyError) as e:
+        LOGGER.warning("Ignoring unreadable cube in the report cache: %s", e)
+        return None
+    LOGGER.debug("Using the cube of the inventory stored in the report cache")
+    return summary
+
+
+def run_approximate(config: Config, report_cache: ReportCache | None) -> None:
+    """Sketch the inventory in one pass and output the reports --approximate supports.
+
+    Args:
+        config (Config): Config instance
+        report_cache (ReportCache | None): ReportCache to store the output in, or None
+    """
+    analyzer = ApproximateAnalyzer.from_file(config.directory or config.file, config)
+
+    visualizer: Visualizer | None = None
+    if config.generate_graphs:
+        visualizer = Visualizer()
+        if report_cache is not None:
+            visualizer = GraphRecorder(visualizer)
+    cli_output = CLIOutput()
+
+    if config.get_os_counts:
+        get_os_counts(config, analyzer, cli_output, visualizer)
+
+    if config.get_resource_quantiles:
+        get_resource_quantiles(analyzer, cli_output)
+
+    if report_cache is not None:
+        graphs = visualizer.calls if isinstance(visualizer, GraphRecorder) else []
+        report_cache.set(report_cache.key(config), cli_output.getvalue(), graphs)
+
+    skip_output_csv("no rows are kept by --approximate")
+    cli_output.close()
+
+
+def run_trend(config: Config, report_cache: ReportCache | None) -> None:
+    """Summarize the snapshots in the --trend directory and output the trends over them.
+
+    Summaries are cached, in the report cache directory if there is one, so only new or changed
+    snapshots are loaded again.
+
+    Args:
+        config (Config): Config instance
+        report_cache (ReportCache | None): ReportCache to store the output in, or None
+    """
+    snapshots = find_snapshots(config.trend)
+    if not snapshots:
+        LOGGER.critical("Directory %s includes no snapshots with a date in their file name", config.trend)
+        exit(1)
+
+    if config.cache_dir:
+        # One directory per snapshot directory, as snapshots in different directories may share their names
+        directory_key = hashlib.sha256(str(Path(config.trend).resolve()).encode()).hexdigest()[:16]
+        summaries = SnapshotSummaries(Path(config.cache_dir) / "summaries" / directory_key)
+    else:
+        summaries = SnapshotSummaries(Path(config.trend) / SUMMARY_CACHE_DIRECTORY)
+    trends = compute_trends([(date, summaries.get(path)) for date, path in snapshots], read_support_matrix(config))
+
+    visualizer: Visualizer | None = None
+    if config.generate_graphs:
+        visualizer = Visualizer()
+        if report_cache is not None:
+            visualizer = GraphRecorder(visualizer)
+    cli_output = CLIOutput()
+
+    cli_output.print_trends(trends)
+    if visualizer is not None:
+        for title, trend in trends.items():
+            visualizer.visualize_trend(trend, title)
+
+    if report_cache is not None:
+        graphs = visualizer.calls if isinstance(visualizer, GraphRecorder) else []
+        report_cache.set(report_cache.key(config), cli_output.getvalue(), graphs)
+
+    skip_output_csv("only summaries of the --trend snapshots are kept")
+    cli_output.close()
+
+
 if __name__ == "__main__":
     main()
@@ -7,20 +7,62 @@ from collections.abc import Callable
 import pandas as pd
 
 from . import const
+from .bitmap import Bitmap
+from .cache import DEFAULT_CACHE_SIZE, ResultCache, cached_result
 from .config import Config
+from .cube import Cube, adaptive_disk_edges, grouped_sum
+from .pivot import Measure, pivot
+from .rollup import roll_up_counts
+from .summary import Summary
+from .support import SUPPORTED, UNSUPPORTED, SupportMatrix, load_support_matrix
 from .vmdata import VMData
 
 LOGGER = logging.getLogger(__name__)
 
 
 class Analyzer:
+    # Config fields the reports depend on, results are cached per combination of their values
+    CACHE_KEY_FIELDS = (
+        "environment_filter",
+        "environments",
+        "os_name",
+        "site",
+        "count_filter",
+        "top_n",
+        "breakdown_by_terabyte",
+        "over_under_tb",
+        "disk_space_by_granular_os",
+        "adaptive_disk_bins",
+    )
+
     def __init__(
         self: t.Self,
-        vm_data: VMData,
+        vm_data: VMData | Summary,
         config: Config,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        support_matrix: SupportMatrix | None = None,
     ) -> None:
         self.vm_data = vm_data
         self.config = config
+        self.results = ResultCache(cache_size)
+        self.support_matrix = support_matrix or load_support_matrix(config.support_matrix)
+
+    def cache_key(self: t.Self) -> tuple:
+        """Hashable state report results depend on: the CACHE_KEY_FIELDS of config and the data version.
+
+        Returns:
+            tuple: values of CACHE_KEY_FIELDS, followed by the data version of vm_data
+        """
+        values = [getattr(self.config, field) for field in self.CACHE_KEY_FIELDS]
+        return (*(tuple(value) if isinstance(value, list) else value for value in values), self.vm_data.data_version)
+
+    def invalidate_cache(self: t.Self) -> None:
+        """Remove every cached report result.
+
+        Only needed when results may be stale without a change of config or data version,
+        e.g. after changing vm_data in place without a new data version.
+        """
+        self.results.clear()
 
     def generate_dynamic_ranges(self: t.Self, max_disk_space: int) -> list[tuple[int, int]]:
         """
@@ -38,29 +80,8 @@ class Analyzer:
             [(0, 2000), (2001, 10000), (10001, 20000), (20001, 50000), (50001, 150000)]
         """
         disk_space_ranges_dict = {
-            "tb": [
-                (0, 2000),
-                (2001, 10000),
-                (10001, 20000),
-                (20001, 50000),
-                (50001, 100000),
-                (100001, max_disk_space),
-            ],
-            "gb": [
-                (0, 200),
-                (201, 400),
-                (401, 600),
-                (601, 800),
-                (801, 1000),
-                (1001, 2000),
-                (2001, 3000),
-                (3001, 5000),
-                (5001, 10000),
-                (10001, 20000),
-                (20001, 50000),
-                (50001, 100000),
-                (100001, max_disk_space),
-            ],
+            "tb": list(const.DISK_SPACE_RANGES["tb"]) + [(100001, max_disk_space)],
+            "gb": list(const.DISK_SPACE_RANGES["gb"]) + [(100001, max_disk_space)],
         }
         disk_space_ranges = []
         # In this section we are dynamically removing unneeded ranges
@@ -80,7 +101,7 @@ class Analyzer:
             else:
                 disk_space_ranges = ranges[:2] + [(10001, max_disk_space)]
         elif self.config.over_under_tb:
-            disk_space_ranges = [(0, 1000), (1001, max_disk_space)]
+            disk_space_ranges = list(const.DISK_SPACE_RANGES["over_under_tb"]) + [(1001, max_disk_space)]
         # The Same logic applies to the 'gb' items as to the 'tb' items
         # however, given that this is more fine-grained, there are more ranges to add
         else:
@@ -98,54 +119,6 @@ class Analyzer:
 
         return disk_space_ranges
 
-    def calculate_disk_space_ranges(
-        self: t.Self,
-        dataFrame: pd.DataFrame | None = None,
-    ) -> list[tuple[int, int]]:
-        """
-        Calculate the ranges of disk space based on the provided DataFrame and specified display options.
-        This function processes the DataFrame to determine which disk space ranges contain virtual machines.
-
-        Args:
-            dataFrame (pd.DataFrame, optional): The DataFrame containing disk space data.
-                If None, the default DataFrame from the instance will be used. Defaults to None.
-
-        Returns:
-            list[tuple[int, int]]: A list of tuples representing the disk space ranges that contain virtual machines.
-
-        Examples:
-            >>> calculate_disk_space_ranges(dataFrame=my_dataframe)
-            [(0, 2000), (2001, 10000)]
-        """
-        if dataFrame is None:
-            # default to the dataframe in the attribute unless overridden
-            dataFrame = self.vm_data.df
-        frameHeading = self.vm_data.column_headers["vmDisk"]
-        # sometimes the values in this column are interpreted as a string and have a comma inserted
-        # we want to check and replace the comma
-        for index, row in dataFrame.iterrows():
-            if isinstance(row[frameHeading], str):
-                dataFrame.at[index, frameHeading] = row[frameHeading].replace(",", "")
-
-        dataFrame[frameHeading] = pd.to_numeric(dataFrame[frameHeading], errors="coerce")
-        # Normalize the Disk Column to GiB before applying further analysis
-        if self.vm_data.unit_type == "MiB":
-            dataFrame[frameHeading] = dataFrame[frameHeading] / 1024
-        max_disk_space = round(int(dataFrame[frameHeading].max()))
-        disk_space_ranges = self.generate_dynamic_ranges(max_disk_space)
-        disk_space_ranges_with_vms = []
-        for range_start, range_end in disk_space_ranges:
-            epsilon = 1
-
-            vms_in_range = dataFrame[
-                (dataFrame[frameHeading] >= range_start - epsilon) & (dataFrame[frameHeading] <= range_end + epsilon)
-            ]
-
-            if not vms_in_range.empty:
-                disk_space_ranges_with_vms.append((range_start, range_end))
-
-        return disk_space_ranges_with_vms
-
     def convert_to_tb(self: t.Self, value: str) -> str:
         """
         Convert a given storage value in GiB to TiB if applicable.
@@ -200,12 +173,12 @@ class Analyzer:
         """
         Sorts the provided DataFrame by disk space range, optionally breaking down by operating system.
 
-        This function groups the data by operating system and version or by environment, counts the occurrences,
+        This function groups the data by operating system and version or by environment, sums the counts,
         and sorts the results based on the disk space range. It also applies necessary conversions and drops
         specified columns.
 
         Args:
-            dataFrame (pd.DataFrame): The DataFrame containing disk space data to be sorted.
+            dataFrame (pd.DataFrame): Cube rows labelled with a "Disk Space Range", see Cube.assign_disk_ranges.
 
         Returns:
             pd.DataFrame: A sorted dataFrame object based on the disk space range in the dataFrame
@@ -214,16 +187,12 @@ class Analyzer:
 
         if self.config.disk_space_by_granular_os:
             if self.config.environment_filter == "all":
-                dataFrame = (
-                    dataFrame.groupby(["OS Name", "OS Version", "Disk Space Range"])
-                    .size()
-                    .reset_index(name="Count")  # Add a "Count" column for combined results
-                )
+                dataFrame = grouped_sum(dataFrame, ["OS Name", "OS Version", "Disk Space Range"]).reset_index(
+                    name="Count"
+                )  # Add a "Count" column for combined results
             else:
-                dataFrame = (
-                    dataFrame.groupby(["OS Name", "OS Version", "Disk Space Range", envHeading])
-                    .size()
-                    .unstack(fill_value=0)
+                dataFrame = grouped_sum(dataFrame, ["OS Name", "OS Version", "Disk Space Range", envHeading]).unstack(
+                    fill_value=0
                 )
                 dataFrame = dataFrame.reset_index()
             # create an integer of the large end of range for sorting by size of range
@@ -243,20 +212,15 @@ class Analyzer:
         else:
 
             if self.config.environment_filter == "both":
-                range_counts_by_environment = (
-                    dataFrame.groupby(["Disk Space Range", envHeading]).size().unstack(fill_value=0)
+                range_counts_by_environment = grouped_sum(dataFrame, ["Disk Space Range", envHeading]).unstack(
+                    fill_value=0
                 )
             elif self.config.environment_filter == "all":
-                range_counts_by_environment = dataFrame["Disk Space Range"].value_counts().reset_index()
-                range_counts_by_environment.columns = ["Disk Space Range", "Count"]
-                range_counts_by_environment.set_index("Disk Space Range", inplace=True)
+                range_counts_by_environment = grouped_sum(dataFrame, "Disk Space Range").to_frame()
             else:
-                range_counts_by_environment = (
-                    dataFrame[dataFrame[envHeading] == self.config.environment_filter]
-                    .groupby(["Disk Space Range", envHeading])
-                    .size()
-                    .unstack(fill_value=0)
-                )
+                range_counts_by_environment = grouped_sum(
+                    dataFrame[dataFrame[envHeading] == self.config.environment_filter], ["Disk Space Range", envHeading]
+                ).unstack(fill_value=0)
             range_counts_by_environment["second_number"] = (
                 range_counts_by_environment.index.str.split("-").str[1].str.split().str[0].astype(int)
             )
@@ -271,36 +235,133 @@ class Analyzer:
 
         return sorted_range_counts_by_environment
 
+    @cached_result
     def get_disk_space(self: t.Self, os_filter: str) -> pd.DataFrame:
         """
         Processes and formats disk space data from the provided DataFrame based on specified filters.
 
-        This function calculates disk space ranges, groups the data by environment or operating system
+        This function calculates disk space ranges from the aggregation cube, groups the data by environment
+        or operating system
 
         Args:
             None
         Returns:
             pd.DataFrame: A DataFrame containing counts of disk space ranges, optionally sorted by environment
         """
-        df = self.vm_data.create_environment_filtered_dataframe(
-            self.config.environments, self.config.environment_filter
-        )
+        cube = self._disk_space_cube()
+        selection = self._selection(cube)
 
         if os_filter:
-            df = df[df["OS Name"] == os_filter]
+            selection &= cube.index("OS Name").get(os_filter)
+
+        return self._calculate_disk_space(self._environment_filtered_cube(cube, selection), os_filter)
+
+    @cached_result
+    def get_disk_space_by_os(self: t.Self) -> dict[str, pd.DataFrame]:
+        """Batched get_disk_space for every os in get_unique_os_names.
+
+        The environment and site are selected once, and the cells of each os with an AND of that selection
+        and the bitmap of the os, instead of filtering the cube again for each os.
+
+        Returns:
+            dict[str, pd.DataFrame]: get_disk_space result for each os name, in get_unique_os_names order
+        """
+        cube = self._disk_space_cube()
+        selection = self._selection(cube)
+        os_index = cube.index("OS Name")
+
+        return {
+            os_name: self._calculate_disk_space(
+                self._environment_filtered_cube(cube, selection & os_index.get(os_name)), os_name
+            )
+            for os_name in self.get_unique_os_names()
+        }
+
+    def _calculate_disk_space(self: t.Self, dataFrame: pd.DataFrame, os_filter: str | None) -> pd.DataFrame:
+        """Label filtered cube rows with disk space ranges and sort them for output.
+
+        Args:
+            dataFrame (pd.DataFrame): environment filtered cube frame, filtered to os_filter if set
+            os_filter (str | None): os the frame was filtered to, used for logging
+
+        Returns:
+            pd.DataFrame: A DataFrame containing counts of disk space ranges, empty if there is no disk data
+        """
+        if dataFrame["Disk Max"].isna().all():
+            LOGGER.warning("No disk space data for %s", os_filter if os_filter else "the selected environment")
+            return pd.DataFrame()
 
-        diskHeading = self.vm_data.column_headers["vmDisk"]
-        disk_space_ranges = self.calculate_disk_space_ranges(dataFrame=df)
-        for lower, upper in disk_space_ranges:
-            mask = (df[diskHeading] >= lower) & (df[diskHeading] <= upper)
-            df.loc[mask, "Disk Space Range"] = f"{lower}-{upper} GiB"
+        if self.config.adaptive_disk_bins:
+            dataFrame = Cube.assign_adaptive_disk_ranges(dataFrame, self.get_adaptive_disk_edges())
+        else:
+            max_disk_space = round(int(dataFrame["Disk Max"].max()))
+            disk_space_ranges = self.generate_dynamic_ranges(max_disk_space)
+            dataFrame = Cube.assign_disk_ranges(dataFrame, disk_space_ranges, max_disk_space)
+
+        return self.sort_by_disk_space_range(dataFrame)
+
+    @cached_result
+    def get_adaptive_disk_edges(self: t.Self) -> tuple[int, ...]:
+        """Edges of the adaptive disk space ranges, from quantiles of the disk size of every VM.
+
+        The edges are computed once for the whole inventory, so every OS and environment breakdown
+        uses the same ranges.
+
+        Returns:
+            tuple[int, ...]: edges from adaptive_disk_edges for the configured number of bins
+        """
+        return adaptive_disk_edges(self.vm_data.cube.sketches["Disk"], self.config.adaptive_disk_bins)
 
-        return self.sort_by_disk_space_range(df)
+    def _disk_space_cube(self: t.Self) -> Cube:
+        """Cube to label with disk space ranges.
+
+        Returns:
+            Cube: the adaptive cube when adaptive disk bins are configured, else the cube of vm_data
+        """
+        if self.config.adaptive_disk_bins:
+            return self.vm_data.adaptive_cube(self.get_adaptive_disk_edges())
+        return self.vm_data.cube
+
+    def _selection(self: t.Self, cube: Cube, environment: bool = True) -> Bitmap:
+        """Cells of cube of the configured environment filter and site, an AND of the cube's bitmap indexes.
+
+        Args:
+            cube (Cube): cube to select cells of
+            environment (bool, optional): restrict to the configured environment filter, otherwise
+              only to the site. Defaults to True.
+
+        Returns:
+            Bitmap: selected cells of cube, every cell if neither is configured
+        """
+        selection = Bitmap.full(len(cube.frame))
+        env_filter = self.config.environment_filter
+        if environment and env_filter and env_filter not in ["all", "both"]:
+            selection &= cube.environment_index(self.config.environments).get(env_filter)
+        if self.config.site:
+            selection &= cube.index("Site Name").get(self.config.site)
+        return selection
+
+    def _environment_filtered_cube(
+        self: t.Self, cube: Cube | None = None, selection: Bitmap | None = None
+    ) -> pd.DataFrame:
+        """Cells of a cube in selection, with environment replaced with category.
+
+        Args:
+            cube (Cube | None, optional): cube to select cells of. Defaults to the cube of vm_data.
+            selection (Bitmap | None, optional): cells to select. Defaults to the configured environment and site.
+
+        Returns:
+            pd.DataFrame: cube rows in selection, with the environment category column named as in the inventory
+        """
+        cube = self.vm_data.cube if cube is None else cube
+        if selection is None:
+            selection = self._selection(cube)
+        return cube.select(selection, self.config.environments, self.vm_data.column_headers["environment"])
 
+    @cached_result
     def get_unique_os_names(self: t.Self) -> list[str]:
-        """Generate list of unique os names from dataframe.
+        """Generate list of unique os names from the cube, in the order they first appear in the inventory.
 
-        Uses vmdata object if no dataframe is passed.
         Returns single entry if os_name in config object.
         Returns empty list if os_name in config object and os_name not in dataframe.
         Args:
@@ -310,9 +371,10 @@ class Analyzer:
             list[str]: A list of unique OS Names
         """
 
+        cube = self.vm_data.cube
         os_names: list[str] = [
             os_name
-            for os_name in self.vm_data.df["OS Name"].unique()
+            for os_name in cube.select(self._selection(cube, environment=False))["OS Name"].unique()
             if os_name is not None and not pd.isna(os_name) and os_name != ""
         ]
         if not os_names:
@@ -323,6 +385,7 @@ class Analyzer:
             return []
         return os_names
 
+    @cached_result
     def get_operating_system_counts(self: t.Self) -> pd.Series | pd.DataFrame:
         """Returns the counts of operating systems based on the configured environment filter.
 
@@ -334,14 +397,13 @@ class Analyzer:
             pd.Series | pd.DataFrame: Series object containing counts, indexed by OS, or
               DataFrame object containing counts per environment category, indexed by OS
         """
-        df = self.vm_data.create_environment_filtered_dataframe(
-            self.config.environments, env_filter=self.config.environment_filter
-        )
+        cube = self.vm_data.cube
+        selection = self._selection(cube)
 
         if self.config.os_name:
-            df = df[df["OS Name"] == self.config.os_name]
+            selection &= cube.index("OS Name").get(self.config.os_name)
 
-        return self._calculate_os_counts(df)
+        return self._calculate_os_counts(self._environment_filtered_cube(cube, selection))
 
     def _calculate_os_counts(self: t.Self, dataFrame: pd.DataFrame | None = None) -> pd.Series | pd.DataFrame:
         """Calculates the counts of operating systems based on the provided environment filter.
@@ -351,15 +413,13 @@ class Analyzer:
         or visualization.
 
         Args:
-            dataFrame (pd.DataFrame, optional): The DataFrame containing the data to analyze. Defaults to None.
+            dataFrame (pd.DataFrame, optional): The cube frame containing the data to analyze. Defaults to None.
         Returns:
             pd.Series | pd.DataFrame: Series object containing counts, indexed by OS, or
               DataFrame object containing counts per environment category, indexed by OS
         """
         if dataFrame is None:
-            dataFrame = self.vm_data.create_environment_filtered_dataframe(
-                self.config.environments, env_filter=self.config.environment_filter
-            )
+            dataFrame = self._environment_filtered_cube()
 
         if self.config.environment_filter == "both":
             # create Series of counts by "OS Name" and "environment"
@@ -367,10 +427,23 @@ class Analyzer:
             #   OS Name   Environment
             #   CentOS    non-prod         138
             #             prod             454
+            counts_raw = grouped_sum(dataFrame, ["OS Name", self.vm_data.column_headers["environment"]])
+        else:
+            # sorted like value_counts so ties keep the order the OS first appears in
+            counts_raw = grouped_sum(dataFrame, "OS Name", sort=False)
+
+        return self._roll_up_os_counts(counts_raw)
 
-            counts_raw: pd.Series[int] = dataFrame.groupby(
-                ["OS Name", self.vm_data.column_headers["environment"]]
-            ).size()
+    def _roll_up_os_counts(self: t.Self, counts_raw: "pd.Series[int]") -> pd.Series | pd.DataFrame:
+        """Roll counts by OS Name, and by environment category if the filter is both, up into a report.
+
+        Args:
+            counts_raw (pd.Series[int]): counts indexed by OS Name, or by OS Name and environment category
+        Returns:
+            pd.Series | pd.DataFrame: Series object containing counts, indexed by OS, or
+              DataFrame object containing counts per environment category, indexed by OS
+        """
+        if self.config.environment_filter == "both":
             # convert Series back into DataFrame
             # example:
             #   Environment                                         non-prod     prod
@@ -378,76 +451,45 @@ class Analyzer:
             #   CentOS                                                 138.0    454.0
             counts: pd.DataFrame = counts_raw.unstack().fillna(0)
 
-            # add total column to counts DataFrame to use for filters and sorting
-            counts["total"] = counts.sum(axis=1)
-            # sort by total counts
-            counts: pd.DataFrame = counts.sort_values(by="total", ascending=False)
-
-            # implement minimum count filtering
-            if self.config.count_filter:
-                # create DataFrame of counts less than count_filter
-                other_counts: pd.DataFrame = counts[counts["total"] < self.config.count_filter]
-                # if only one entry below count_fiter,  dont filter it
-                if len(other_counts) > 1:
-                    # sum other_counts by column
-                    other_sum: pd.Series = other_counts.sum()
-                    # remove counts below minimum from counts dataframe
-                    counts = counts[counts["total"] >= self.config.count_filter]
-                    # sort by total
-                    # before other is readded
-                    counts = counts.sort_values(by="total", ascending=False)
-                    # transpose counts for addition of Other
-                    counts = counts.T
-                    # Add other_sum as column
-                    counts["Other"] = other_sum
-                    # reverse transpose
-                    counts = counts.T
-
-            counts = counts.drop("total", axis=1)
+            # keep the largest total counts, adding up the rest as "Other"
+            counts = roll_up_counts(counts, minimum=self.config.count_filter, top=self.config.top_n)
 
         else:
-            # create a Series of sorted integers (counts) from index "OS Name" in dataframe
-            counts: pd.Series[int] = dataFrame["OS Name"].value_counts()
-
-            # implement minimum count filtering
-            if self.config.count_filter:
-                # create series of counts less than count_filter
-                other_counts: pd.Series[int] = counts[counts < self.config.count_filter]
-                # if only one entry below count_fiter,  dont filter it
-                if len(other_counts) > 1:
-                    # total of all counts below minimum
-                    other_total = other_counts.sum()
-                    # remove counts below minimum from counts series
-                    counts = counts[counts >= self.config.count_filter]
-                    # add new entry in series with a name of "Other" and total of all removed entries
-                    counts["Other"] = other_total
+            # Series of integers (counts) indexed by "OS Name"
+            counts: pd.Series[int] = counts_raw.rename("count")
+            counts = roll_up_counts(counts, minimum=self.config.count_filter, top=self.config.top_n)
 
         return counts.astype(int)
 
-    def get_supported_os_counts(self: t.Self) -> pd.Series | pd.DataFrame:
-        """Returns the counts of supported operating systems based on the configured environment filter.
+    @cached_result
+    def _support_status_counts(self: t.Self) -> dict[str, "pd.Series[int]"]:
+        """Counts by OS Name of each support status, from one count grouped by support status.
 
-        This function calculates the counts of supported operating systems and returns the results.
+        The support status of each cube cell comes from the support matrix, see Cube.support.
 
-        Args:
-            None
         Returns:
-            pd.Series | pd.DataFrame: Series object containing counts, indexed by OS, or
-              DataFrame object containing counts per environment category, indexed by OS
+            dict[str, pd.Series[int]]: counts indexed by OS Name, and by environment category if the
+              filter is both, of SUPPORTED and UNSUPPORTED
         """
-
-        dataFrame = self.vm_data.create_environment_filtered_dataframe(
-            self.config.environments, env_filter=self.config.environment_filter
+        cube = self.vm_data.cube
+        selection = self._selection(cube)
+        frame = self._environment_filtered_cube(cube, selection).assign(
+            Support=cube.support(self.support_matrix)[selection.rows()]
         )
 
-        dataFrame = dataFrame[dataFrame["OS Name"].isin(const.SUPPORTED_OSES)]
+        if self.config.environment_filter == "both":
+            counts = grouped_sum(frame, ["Support", "OS Name", self.vm_data.column_headers["environment"]])
+        else:
+            counts = grouped_sum(frame, ["Support", "OS Name"], sort=False)
 
-        return self._calculate_os_counts(dataFrame)
+        statuses = counts.index.get_level_values("Support")
+        return {status: counts[statuses == status].droplevel("Support") for status in (SUPPORTED, UNSUPPORTED)}
 
-    def get_unsupported_os_counts(self: t.Self) -> pd.Series | pd.DataFrame:
+    @cached_result
+    def get_supported_os_counts(self: t.Self) -> pd.Series | pd.DataFrame:
         """Returns the counts of supported operating systems based on the configured environment filter.
 
-        This function calculates the counts of supported operating systems and returns the results.
+        Operating systems are supported as the support matrix classifies their OS Name, OS Version and Architecture.
 
         Args:
             None
@@ -455,15 +497,23 @@ class Analyzer:
             pd.Series | pd.DataFrame: Series object containing counts, indexed by OS, or
               DataFrame object containing counts per environment category, indexed by OS
         """
+        return self._roll_up_os_counts(self._support_status_counts()[SUPPORTED])
 
-        dataFrame = self.vm_data.create_environment_filtered_dataframe(
-            self.config.environments, env_filter=self.config.environment_filter
-        )
+    @cached_result
+    def get_unsupported_os_counts(self: t.Self) -> pd.Series | pd.DataFrame:
+        """Returns the counts of unsupported operating systems based on the configured environment filter.
 
-        dataFrame = dataFrame[~dataFrame["OS Name"].isin(const.SUPPORTED_OSES)]
+        Operating systems are unsupported as the support matrix classifies their OS Name, OS Version and Architecture.
 
-        return self._calculate_os_counts(dataFrame)
+        Args:
+            None
+        Returns:
+            pd.Series | pd.DataFrame: Series object containing counts, indexed by OS, or
+              DataFrame object containing counts per environment category, indexed by OS
+        """
+        return self._roll_up_os_counts(self._support_status_counts()[UNSUPPORTED])
 
+    @cached_result
     def get_os_version_distribution(self: t.Self, os_name: str) -> pd.DataFrame:
         """Create Dataframe of Counts by OS Version for a given OS.
 
@@ -473,16 +523,94 @@ class Analyzer:
         Returns:
             pd.DataFrame: Dataframe with 2 columns, one labeled "OS Version", and the other labeled "Count"
         """
-        df_copy = self.vm_data.df.copy()
-        df_copy = df_copy[(df_copy["OS Name"] == os_name)]
-        counts = df_copy["OS Version"].fillna("unknown").value_counts().reset_index()
-        counts.columns = ["OS Version", "Count"]
+        cube = self.vm_data.cube
+        selection = self._selection(cube, environment=False) & cube.index("OS Name").get(os_name)
+        versions = cube.select(selection)[["OS Version", "Count"]].fillna({"OS Version": "unknown"})
+
+        return self._sort_version_counts(versions.groupby("OS Version", sort=False)["Count"].sum())
+
+    @cached_result
+    def get_os_version_distributions(self: t.Self) -> dict[str, pd.DataFrame]:
+        """Batched get_os_version_distribution for every os in get_unique_os_names.
 
-        if self.config.count_filter:
-            counts = counts[counts["Count"] >= self.config.count_filter]
+        Versions of every os are counted in a single grouping of the cube.
+
+        Returns:
+            dict[str, pd.DataFrame]: get_os_version_distribution result for each os name,
+              in get_unique_os_names order
+        """
+        cube = self.vm_data.cube.select(self._selection(self.vm_data.cube, environment=False))
+        cube = cube[["OS Name", "OS Version", "Count"]].fillna({"OS Version": "unknown"})
+        counts_by_os = {
+            os_name: version_counts.droplevel("OS Name")
+            for os_name, version_counts in cube.groupby(["OS Name", "OS Version"], sort=False)["Count"]
+            .sum()
+            .groupby(level="OS Name", sort=False)
+        }
+        empty_counts = pd.Series(dtype=int, index=pd.Index([], name="OS Version"), name="Count")
+
+        return {
+            os_name: self._sort_version_counts(counts_by_os.get(os_name, empty_counts))
+            for os_name in self.get_unique_os_names()
+        }
+
+    def _sort_version_counts(self: t.Self, version_counts: pd.Series) -> pd.DataFrame:
+        """Sort counts per OS Version like value_counts and apply the minimum count filter.
+
+        Args:
+            version_counts (pd.Series): counts indexed by OS Version, in the order versions first appear
+
+        Returns:
+            pd.DataFrame: Dataframe with 2 columns, one labeled "OS Version", and the other labeled "Count"
+        """
+        counts = roll_up_counts(version_counts, minimum=self.config.count_filter, top=self.config.top_n, other=None)
+        counts = counts.reset_index()
+        counts.columns = ["OS Version", "Count"]
 
         return counts
 
+    @cached_result
+    def get_resource_quantiles(self: t.Self) -> pd.DataFrame:
+        """Estimate quantiles of memory, disk and CPU per VM across the whole inventory.
+
+        Quantiles come from the sketches of the cube, so they are within const.SKETCH_RELATIVE_ACCURACY
+        of a value in the data, and are available for merged summaries too.
+
+        Returns:
+            pd.DataFrame: VM count, const.RESOURCE_QUANTILES and maximum, indexed by resource
+        """
+        quantile_columns = [f"p{round(q * 100)}" for q in const.RESOURCE_QUANTILES]
+        rows = {}
+        for resource, label in [("Memory", "Memory (GiB)"), ("Disk", "Disk (GiB)"), ("CPU", "CPU")]:
+            sketch = self.vm_data.cube.sketches[resource]
+            quantiles = [sketch.quantile(q) for q in const.RESOURCE_QUANTILES]
+            rows[label] = [sketch.count, *quantiles, sketch.max if sketch.count else float("nan")]
+
+        quantiles = pd.DataFrame.from_dict(rows, orient="index", columns=["Count", *quantile_columns, "Max"])
+        quantiles.index.name = "Resource"
+        quantiles["Count"] = quantiles["Count"].astype(int)
+        return quantiles
+
+    @cached_result
+    def get_pivot(self: t.Self, group_by: tuple[str, ...], measures: tuple[Measure, ...]) -> pd.DataFrame:
+        """Aggregate measures per group of the group_by columns, restricted to the configured site and environment.
+
+        Args:
+            group_by (tuple[str, ...]): columns to group by, see pivot
+            measures (tuple[Measure, ...]): measures to compute per group
+
+        Returns:
+            pd.DataFrame: group_by values and one column per measure
+        """
+        return pivot(
+            self.vm_data,
+            list(group_by),
+            list(measures),
+            self.config.environments,
+            self.config.environment_filter,
+            self.config.site,
+        )
+
     def by_os(self: t.Self, func: Callable[[str], None]) -> None:
         """Execute func once for each os in get_unique_os_names.
 
@@ -0,0 +1,193 @@
+# Std lib imports
+import logging
+import typing as t
+from collections.abc import Iterable
+from pathlib import Path
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+from . import const
+from .config import Config
+from .cube import categorize_environment, to_numeric
+from .rollup import roll_up_counts
+from .sketch import QuantileSketch, SpaceSaving
+from .vmdata import VMData
+
+LOGGER = logging.getLogger(__name__)
+
+# Resources sketched per VM, by the key of their column in VMData.column_headers
+_RESOURCES = (("Memory", "vmMemory", "Memory (GiB)"), ("Disk", "vmDisk", "Disk (GiB)"), ("CPU", "vCPU", "CPU"))
+
+
+class InventorySketch:
+    """Fixed size sketches of an inventory, updated one chunk of rows at a time.
+
+    Memory, disk and CPU per VM are kept in QuantileSketches, and the most frequent OS names in a
+    SpaceSaving sketch, so an inventory of any size is read in a single pass without holding its rows.
+    OS names are only counted for VMs matching the environment and OS filters.
+    """
+
+    def __init__(
+        self: t.Self,
+        prod_envs: list[str],
+        env_filter: str = "all",
+        os_name: str | None = None,
+        capacity: int = const.SKETCH_TOP_ITEMS_CAPACITY,
+    ) -> None:
+        if env_filter == "both":
+            raise ValueError("OS names can't be sketched per environment category, filter by one category instead")
+        self.prod_envs = prod_envs
+        self.env_filter = env_filter
+        self.os_name = os_name
+        self.os_names = SpaceSaving(capacity)
+        self.resources = {resource: QuantileSketch() for resource, _, _ in _RESOURCES}
+        self.rows = 0
+
+    @classmethod
+    def from_vmdata(
+        cls: type[t.Self],
+        chunks: Iterable[VMData],
+        prod_envs: list[str],
+        env_filter: str = "all",
+        os_name: str | None = None,
+        chunksize: int = const.DEFAULT_CHUNK_SIZE,
+    ) -> t.Self:
+        """Sketch normalized inventories, in slices of at most chunksize rows.
+
+        Args:
+            chunks (Iterable[VMData]): inventories, e.g. from VMData.from_file_chunks
+            prod_envs (list[str]): list of environment labels defined as prod
+            env_filter (str, optional): environment category to count OS names for. Defaults to "all".
+            os_name (str | None, optional): only count this OS name. Defaults to None.
+            chunksize (int, optional): rows sketched at a time. Defaults to const.DEFAULT_CHUNK_SIZE.
+
+        Returns:
+            InventorySketch: sketch of every row of chunks
+        """
+        sketch = cls(prod_envs, env_filter, os_name)
+        for vm_data in chunks:
+            for start in range(0, len(vm_data.df), chunksize):
+                sketch.update(vm_data.df.iloc[start : start + chunksize], vm_data.column_headers)
+        LOGGER.debug("Sketched %d rows", sketch.rows)
+        return sketch
+
+    def update(self: t.Self, df: pd.DataFrame, column_headers: dict[str, str]) -> t.Self:
+        """Add the rows of a normalized inventory DataFrame to the sketches.
+
+        Args:
+            df (pd.DataFrame): normalized inventory rows
+            column_headers (dict[str, str]): mapping of column keys to the headers used in df
+
+        Returns:
+            InventorySketch: this sketch
+        """
+        for resource, column, _ in _RESOURCES:
+            self.resources[resource].update(to_numeric(df[column_headers[column]]).to_numpy(dtype=float))
+        self.rows += len(df)
+
+        if "OS Name" not in df.columns:
+            return self
+        os_names = df["OS Name"]
+        if self.env_filter != "all":
+            # Categorize each distinct environment of the chunk once
+            codes, environments = pd.factorize(df[column_headers["environment"]], use_na_sentinel=False)
+            categories = np.array([categorize_environment(env, prod_envs=self.prod_envs) for env in environments])
+            os_names = os_names[categories[codes] == self.env_filter]
+        if self.os_name:
+            os_names = os_names[os_names == self.os_name]
+        self.os_names.update(os_names.value_counts(sort=False).items())
+        return self
+
+    def merge(self: t.Self, other: "InventorySketch") -> t.Self:
+        """Add the sketches of another InventorySketch with the same filters to this sketch.
+
+        Args:
+            other (InventorySketch): sketch to merge
+
+        Returns:
+            InventorySketch: this sketch
+        """
+        if (other.prod_envs, other.env_filter, other.os_name) != (self.prod_envs, self.env_filter, self.os_name):
+            raise ValueError("Only sketches with the same filters can be merged")
+        self.os_names.merge(other.os_names)
+        for resource, sketch in self.resources.items():
+            sketch.merge(other.resources[resource])
+        self.rows += other.rows
+        return self
+
+
+class ApproximateAnalyzer:
+    """Analyzer backend answering reports from an InventorySketch, with the error bound of each result.
+
+    Supports the reports of Analyzer that can be answered from the sketches:
+    get_operating_system_counts and get_resource_quantiles.
+    """
+
+    def __init__(self: t.Self, sketch: InventorySketch, config: Config) -> None:
+        self.sketch = sketch
+        self.config = config
+
+    @classmethod
+    def from_file(cls: type[t.Self], filepath: Path, config: Config) -> t.Self:
+        """Sketch an inventory file or directory in one pass, reading CSV files a chunk at a time.
+
+        Args:
+            filepath (Path): The path to the file or directory.
+            config (Config): Config instance
+
+        Returns:
+            ApproximateAnalyzer: analyzer of the sketched inventory
+        """
+        chunksize = config.chunk_size or const.DEFAULT_CHUNK_SIZE
+        sketch = InventorySketch.from_vmdata(
+            VMData.from_file_chunks(filepath, chunksize),
+            config.environments,
+            env_filter=config.environment_filter,
+            os_name=config.os_name,
+            chunksize=chunksize,
+        )
+        return cls(sketch, config)
+
+    def get_operating_system_counts(self: t.Self) -> pd.DataFrame:
+        """Estimate the counts of the most frequent operating systems.
+
+        Each count is at most "error" above the true count. Counts below the configured count filter
+        or outside the configured top N are added up as "Other".
+
+        Returns:
+            pd.DataFrame: count and error, indexed by OS Name by descending count
+        """
+        top = self.sketch.os_names.top()
+        counts = pd.DataFrame(
+            [(count, error) for _, count, error in top],
+            index=pd.Index([item for item, _, _ in top], name="OS Name"),
+            columns=["count", "error"],
+        )
+
+        counts = roll_up_counts(counts, minimum=self.config.count_filter, top=self.config.top_n, by="count")
+
+        return counts.astype(int)
+
+    def get_resource_quantiles(self: t.Self) -> pd.DataFrame:
+        """Estimate quantiles of memory, disk and CPU per VM across the whole inventory.
+
+        Returns:
+            pd.DataFrame: VM count, const.RESOURCE_QUANTILES, maximum and the relative error of the
+              quantiles in percent, indexed by resource
+        """
+        quantile_columns = [f"p{round(q * 100)}" for q in const.RESOURCE_QUANTILES]
+        rows = {}
+        for resource, _, label in _RESOURCES:
+            sketch = self.sketch.resources[resource]
+            quantiles = [sketch.quantile(q) for q in const.RESOURCE_QUANTILES]
+            rows[label] = [sketch.count, *quantiles, sketch.max if sketch.count else float("nan")]
+            rows[label].append(sketch.relative_accuracy * 100)
+
+        quantiles = pd.DataFrame.from_dict(
+            rows, orient="index", columns=["Count", *quantile_columns, "Max", "Error (%)"]
+        )
+        quantiles.index.name = "Resource"
+        quantiles["Count"] = quantiles["Count"].astype(int)
+        return quantiles
@@ -0,0 +1,140 @@
+# Std lib imports
+import typing as t
+from collections.abc import Iterable
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+# Position of each bit in a byte of a Bitmap, most significant bit first like np.packbits
+_BIT_OFFSETS = np.arange(8)
+
+
+class Bitmap:
+    """Set of rows of a frame, as bits packed 8 rows to a byte.
+
+    Bitmaps of the same frame are combined with &, | and ~, a byte at a time, and count and rows
+    only unpack the bytes with a row set, so a selection costs a pass over n / 8 bytes plus its popcount.
+    """
+
+    __slots__ = ("bits", "size")
+
+    def __init__(self: t.Self, bits: np.ndarray, size: int) -> None:
+        self.bits = bits
+        self.size = size
+
+    @classmethod
+    def full(cls: type[t.Self], size: int) -> t.Self:
+        """Bitmap of every row of a frame of size rows."""
+        return ~cls(np.zeros((size + 7) // 8, dtype=np.uint8), size)
+
+    @classmethod
+    def from_mask(cls: type[t.Self], mask: np.ndarray) -> t.Self:
+        """Bitmap of the rows of a boolean mask."""
+        return cls(np.packbits(mask), len(mask))
+
+    def __and__(self: t.Self, other: "Bitmap") -> "Bitmap":
+        return Bitmap(self.bits & other.bits, self.size)
+
+    def __or__(self: t.Self, other: "Bitmap") -> "Bitmap":
+        return Bitmap(self.bits | other.bits, self.size)
+
+    def __invert__(self: t.Self) -> "Bitmap":
+        bits = ~self.bits
+        if self.size % 8:
+            # Clear the padding bits after the last row
+            bits[-1] &= 0xFF << (8 - self.size % 8) & 0xFF
+        return Bitmap(bits, self.size)
+
+    def count(self: t.Self) -> int:
+        """Number of rows in the bitmap."""
+        return int(np.bitwise_count(self.bits).sum())
+
+    def rows(self: t.Self) -> np.ndarray:
+        """Positions of the rows in the bitmap, in ascending order."""
+        set_bytes = np.flatnonzero(self.bits)
+        bits = np.unpackbits(self.bits[set_bytes][:, np.newaxis], axis=1).astype(bool)
+        return (set_bytes[:, np.newaxis] * 8 + _BIT_OFFSETS)[bits]
+
+
+class BitmapIndex:
+    """Bitmap of the rows of each distinct value of a column, built with one pass over the column.
+
+    Missing values are indexed as one value, looked up with None.
+    """
+
+    def __init__(self: t.Self, values: pd.Series | np.ndarray) -> None:
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        self.size = len(codes)
+        self._codes = {_key(value): code for code, value in enumerate(uniques)}
+
+        n_bytes = (self.size + 7) // 8
+        rows = np.arange(self.size)
+        # The bits of rows in the same byte are distinct powers of two, so summing them sets them all
+        self._bits = (
+            np.bincount(
+                codes * n_bytes + (rows >> 3),
+                weights=np.right_shift(0x80, rows & 7),
+                minlength=len(uniques) * n_bytes,
+            )
+            .astype(np.uint8)
+            .reshape(len(uniques), n_bytes)
+        )
+
+    @property
+    def values(self: t.Self) -> list[t.Hashable]:
+        """Distinct values of the column, in the order they first appear."""
+        return list(self._codes)
+
+    def get(self: t.Self, value: t.Hashable) -> Bitmap:
+        """Bitmap of the rows holding value, empty if no row does."""
+        code = self._codes.get(_key(value))
+        if code is None:
+            return Bitmap(np.zeros(self._bits.shape[1], dtype=np.uint8), self.size)
+        return Bitmap(self._bits[code].copy(), self.size)
+
+    def any_of(self: t.Self, values: Iterable[t.Hashable]) -> Bitmap:
+        """Bitmap of the rows holding any of values, the OR of their bitmaps."""
+        codes = [code for code in (self._codes.get(_key(value)) for value in values) if code is not None]
+        return Bitmap(np.bitwise_or.reduce(self._bits[codes], axis=0, initial=0).astype(np.uint8), self.size)
+
+
+class RowIndex:
+    """Positions of the rows of each distinct value of a column, sorted by value so the rows of a value are one slice.
+
+    Built with one factorize and one stable sort of the codes, after which taking the rows of a value
+    costs O(k) for its k rows, in row order. Missing values aren't indexed.
+    """
+
+    def __init__(self: t.Self, values: pd.Series | np.ndarray) -> None:
+        codes, uniques = pd.factorize(values)
+        self._codes = {value: code for code, value in enumerate(uniques)}
+        # Rows of code c are _order[_offsets[c + 1]:_offsets[c + 2]], after the rows of missing values
+        self._order = np.argsort(codes, kind="stable")
+        self._order.flags.writeable = False
+        self._offsets = np.concatenate(([0], np.cumsum(np.bincount(codes + 1, minlength=len(uniques) + 1))))
+
+    @property
+    def values(self: t.Self) -> list[t.Hashable]:
+        """Distinct values of the column, in the order they first appear."""
+        return list(self._codes)
+
+    def rows(self: t.Self, value: t.Hashable) -> np.ndarray:
+        """Positions of the rows holding value, in row order, empty if no row does.
+
+        Returns:
+            np.ndarray: read-only slice of the index
+        """
+        code = self._codes.get(value)
+        if code is None:
+            return self._order[:0]
+        return self._order[self._offsets[code + 1] : self._offsets[code + 2]]
+
+    def rows_of(self: t.Self, values: Iterable[t.Hashable]) -> np.ndarray:
+        """Positions of the rows holding any of values, in row order."""
+        return np.sort(np.concatenate([self._order[:0], *(self.rows(value) for value in values)]))
+
+
+def _key(value: t.Hashable) -> t.Hashable:
+    """Key of value in a BitmapIndex, with every kind of missing value as None."""
+    return None if pd.isna(value) else value
@@ -0,0 +1,467 @@
+# Std lib imports
+import functools
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import typing as t
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from pathlib import Path
+
+# This module is imported before the report cache is checked, so it must not import pandas or
+# any module that does. See vminfo_parser.main.
+from ._version import __version__
+
+if t.TYPE_CHECKING:
+    from .config import Config
+    from .visualizer import Visualizer
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 128
+DEFAULT_REPORT_CACHE_TTL = 3600
+DEFAULT_REPORT_CACHE_MAX_SIZE = 256
+
+# Files read from a --directory, see VMData._compile_df_from_directory
+_DIRECTORY_FILE_EXTENSIONS = (".xls", ".xlsx", ".csv")
+_DIGESTS_FILE = "digests.json"
+_ENTRY_SUFFIX = ".report"
+_CUBE_SUFFIX = ".cube"
+
+_MISSING = object()
+
+# Options writing files the cached output doesn't hold, so their reports are never replayed
+_FILE_OUTPUT_OPTIONS = ("plan_waves", "save_summary")
+# Written by every run that loads the inventory rows
+OUTPUT_CSV = "output.csv"
+
+
+class ResultCache:
+    """Size bounded cache of report results that evicts the least recently used entry when full."""
+
+    def __init__(self: t.Self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        if maxsize < 1:
+            raise ValueError(f"Cache size must be at least 1, got {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[Hashable, t.Any] = OrderedDict()
+
+    def __contains__(self: t.Self, key: Hashable) -> bool:
+        return key in self._results
+
+    def __len__(self: t.Self) -> int:
+        return len(self._results)
+
+    def get(self: t.Self, key: Hashable, default: t.Any = None) -> t.Any:
+        """Return the result stored for key and mark it as the most recently used.
+
+        Args:
+            key (Hashable): key the result was stored under
+            default (t.Any, optional): value returned when key is not cached. Defaults to None.
+
+        Returns:
+            t.Any: cached result, or default
+        """
+        if key not in self._results:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._results.move_to_end(key)
+        return self._results[key]
+
+    def set(self: t.Self, key: Hashable, value: t.Any) -> None:
+        """Store a result, evicting the least recently used results beyond maxsize.
+
+        Args:
+            key (Hashable): key to store the result under
+            value (t.Any): result to store
+        """
+        self._results[key] = value
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            evicted, _ = self._results.popitem(last=False)
+            LOGGER.debug("Evicted %s from result cache", evicted)
+
+    def clear(self: t.Self) -> None:
+        """Remove every stored result."""
+        self._results.clear()
+
+
+def cached_result(func: Callable) -> Callable:
+    """Cache the results of a method in the ResultCache of its instance.
+
+    The instance must have a results attribute holding a ResultCache and a cache_key method
+    returning the hashable state its results depend on. Method arguments must be hashable.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self: t.Any, *args: Hashable, **kwargs: Hashable) -> t.Any:
+        key = (func.__name__, args, tuple(sorted(kwargs.items())), self.cache_key())
+        result = self.results.get(key, _MISSING)
+        if result is _MISSING:
+            result = func(self, *args, **kwargs)
+            self.results.set(key, result)
+        return result
+
+    return wrapper
+
+
+class ReportCache:
+    """Directory of rendered report output, shared by every invocation that uses the same cache directory.
+
+    Entries are keyed by a hash of the input files and the report options of the config.
+    They expire ttl seconds after they are created, and the least recently used entries are removed
+    when the entries take up more than max_size bytes.
+
+    The cube of each input is stored too, keyed by the input files alone, so reports with other options
+    can be answered without reading the inventory again. Cubes are removed with the other entries.
+    """
+
+    def __init__(self: t.Self, directory: Path, max_size: int, ttl: int) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.ttl = ttl
+
+    @classmethod
+    def from_config(cls: type[t.Self], config: "Config") -> t.Self | None:
+        """Create ReportCache from the cache options of config.
+
+        Args:
+            config (Config): Config instance
+
+        Returns:
+            ReportCache | None: ReportCache, or None if no cache directory is configured
+        """
+        if not config.cache_dir:
+            return None
+        max_size = config.cache_max_size if config.cache_max_size is not None else DEFAULT_REPORT_CACHE_MAX_SIZE
+        ttl = config.cache_ttl if config.cache_ttl is not None else DEFAULT_REPORT_CACHE_TTL
+        return cls(Path(config.cache_dir), max_size * 1024 * 1024, ttl)
+
+    def key(self: t.Self, config: "Config") -> str:
+        """Create the key of the reports requested by config.
+
+        Args:
+            config (Config): Config instance
+
+        Returns:
+            str: hex digest of the input files, the support matrix, the report options and the package version
+        """
+        if config.summary:
+            inputs = [Path(path) for path in config.summary]
+        elif getattr(config, "trend", None):
+            inputs = [Path(config.trend)]
+        else:
+            inputs = [Path(config.directory) if config.directory else Path(config.file)]
+        if getattr(config, "diff_against", None):
+            inputs.append(Path(config.diff_against))
+        # The options hold the path of the support matrix, its contents decide which OSes are supported
+        support_matrix = getattr(config, "support_matrix", None)
+        key_data = {
+            "inputs": self._input_digest(inputs),
+            "support_matrix": self._input_digest([Path(support_matrix)]) if support_matrix else None,
+            "options": config.report_options(),
+            "version": __version__,
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode()).hexdigest()
+
+    def cube_key(self: t.Self, config: "Config") -> str:
+        """Create the key of the cube of the inventory read by config.
+
+        Args:
+            config (Config): Config instance
+
+        Returns:
+            str: hex digest of the input files and the package version
+        """
+        inputs = [Path(config.directory) if config.directory else Path(config.file)]
+        key_data = {"inputs": self._input_digest(inputs), "version": __version__}
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+    def get_cube(self: t.Self, key: str) -> str | None:
+        """Load a cube stored by ReportCache.set_cube.
+
+        Args:
+            key (str): key from ReportCache.cube_key
+
+        Returns:
+            str | None: summary JSON of the cube, see Summary.to_json, or None if there is none
+        """
+        path = self.directory / f"{key}{_CUBE_SUFFIX}"
+        try:
+            text = path.read_text()
+        except FileNotFoundError:
+            return None
+        # The modification time marks when the cube was last used, for eviction
+        os.utime(path)
+        return text
+
+    def set_cube(self: t.Self, key: str, summary_json: str) -> None:
+        """Store the cube of an inventory and evict entries beyond the configured limits.
+
+        Args:
+            key (str): key from ReportCache.cube_key
+            summary_json (str): summary JSON of the cube, see Summary.to_json
+        """
+        self._write(self.directory / f"{key}{_CUBE_SUFFIX}", summary_json.encode())
+        self.evict()
+
+    def get(self: t.Self, key: str) -> dict[str, t.Any] | None:
+        """Load an entry, removing it if it has expired.
+
+        Args:
+            key (str): key from ReportCache.key
+
+        Returns:
+            dict[str, t.Any] | None: entry with "output" and "graphs" items, or None if there is no valid entry
+        """
+        path = self.directory / f"{key}{_ENTRY_SUFFIX}"
+        try:
+            entry = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            LOGGER.warning("Ignoring unreadable report cache entry %s: %s", path, e)
+            path.unlink(missing_ok=True)
+            return None
+
+        if time.time() - entry["created"] > self.ttl:
+            LOGGER.debug("Report cache entry %s expired", key)
+            path.unlink(missing_ok=True)
+            return None
+
+        # The modification time marks when the entry was last used, for eviction
+        os.utime(path)
+        return entry
+
+    def set(self: t.Self, key: str, output: str, graphs: list[tuple[str, tuple, dict]]) -> None:
+        """Store the output of an invocation and evict entries beyond the configured limits.
+
+        Args:
+            key (str): key from ReportCache.key
+            output (str): text written to the terminal by CLIOutput
+            graphs (list[tuple[str, tuple, dict]]): Visualizer method calls recorded by GraphRecorder
+        """
+        # Graph data holds pandas objects, encode it separately so entries can be read without pandas.
+        # Entries are JSON rather than pickles, as anyone who can write to a shared cache directory
+        # could otherwise run code in the next invocation that reads it.
+        entry = {
+            "created": time.time(),
+            "output": output,
+            "graphs": json.dumps(graphs, default=_encode_graph_value) if graphs else "",
+        }
+        self._write(self.directory / f"{key}{_ENTRY_SUFFIX}", json.dumps(entry).encode())
+        self.evict()
+
+    def replay(self: t.Self, key: str) -> bool:
+        """Write a cached entry to stdout and show its graphs.
+
+        Args:
+            key (str): key from ReportCache.key
+
+        Returns:
+            bool: True if the entry was found and replayed, False otherwise
+        """
+        entry = self.get(key)
+        if entry is None:
+            return False
+
+        LOGGER.debug("Using cached reports %s", key)
+        sys.stdout.write(entry["output"])
+        if entry["graphs"]:
+            from .visualizer import Visualizer
+
+            visualizer = Visualizer()
+            for method, args, kwargs in json.loads(entry["graphs"], object_hook=_decode_graph_value):
+                getattr(visualizer, method)(*args, **kwargs)
+        return True
+
+    def replay_reports(self: t.Self, config: "Config") -> bool:
+        """Replay the cached reports requested by config, unless config also writes files.
+
+        Both entry points check the cache through this method, see vminfo_parser.main and __main__.main.
+
+        Args:
+            config (Config): Config instance
+
+        Returns:
+            bool: True if the reports were replayed, False if they must be produced
+        """
+        if any(getattr(config, option, None) for option in _FILE_OUTPUT_OPTIONS):
+            return False
+        if not self.replay(self.key(config)):
+            return False
+        skip_output_csv("the cached output is used")
+        return True
+
+    def evict(self: t.Self) -> None:
+        """Remove expired entries, then the least recently used entries until the rest fit in max_size."""
+        entries = []
+        now = time.time()
+        paths = [*self.directory.glob(f"*{_ENTRY_SUFFIX}"), *self.directory.glob(f"*{_CUBE_SUFFIX}")]
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            # Entries are never used after they expire, so they can't have been used after that either
+            if now - stat.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size:
+                break
+            LOGGER.debug("Evicting %s from report cache", path.name)
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+    def _input_digest(self: t.Self, inputs: list[Path]) -> str:
+        """Hash the contents of the input files, and of the spreadsheets in input directories.
+
+        Digests are stored in the cache directory by path, size and modification time,
+        so unchanged files are not read again.
+        """
+        digests_path = self.directory / _DIGESTS_FILE
+        try:
+            digests = json.loads(digests_path.read_text())
+        except (OSError, ValueError):
+            digests = {}
+
+        files = []
+        for path in inputs:
+            if path.is_dir():
+                files.extend(sorted(file for file in path.iterdir() if file.suffix in _DIRECTORY_FILE_EXTENSIONS))
+            else:
+                files.append(path)
+
+        input_digest = hashlib.sha256()
+        updated = False
+        for path in files:
+            file_key = _file_key(path)
+            if file_key not in digests:
+                with open(path, "rb") as input_file:
+                    digests[file_key] = hashlib.file_digest(input_file, "sha256").hexdigest()
+                updated = True
+            input_digest.update(f"{path.name}:{digests[file_key]}".encode())
+
+        if updated:
+            # Digests of files that were changed or removed since are never used again
+            digests = {file_key: digest for file_key, digest in digests.items() if _is_current(file_key)}
+            self._write(digests_path, json.dumps(digests).encode())
+        return input_digest.hexdigest()
+
+    def _write(self: t.Self, path: Path, data: bytes) -> None:
+        """Write a file atomically, so concurrent invocations never read a partial file."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _file_key(path: Path) -> str:
+    """Key of the digest of a file in digests.json, from its path, size and modification time."""
+    stat = path.stat()
+    return f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _is_current(file_key: str) -> bool:
+    """Whether the file of a key from _file_key still has the size and modification time of the key."""
+    path = Path(file_key.rsplit(":", 2)[0])
+    try:
+        return _file_key(path) == file_key
+    except OSError:
+        return False
+
+
+def skip_output_csv(reason: str) -> None:
+    """Log that output.csv is not written, with a warning if an output.csv of an earlier run is left in place.
+
+    Args:
+        reason (str): why the inventory rows aren't available, e.g. "the cached output is used"
+    """
+    if os.path.exists(OUTPUT_CSV):
+        LOGGER.warning("Not writing %s as %s, the existing %s is from an earlier run", OUTPUT_CSV, reason, OUTPUT_CSV)
+    else:
+        LOGGER.info("Not writing %s as %s", OUTPUT_CSV, reason)
+
+
+def _encode_graph_value(value: t.Any) -> t.Any:
+    """Encode the pandas objects and numpy scalars of recorded graph calls for json.dumps, see _decode_graph_value."""
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        # The table schema keeps the index and the values, the dtypes of text and the column names are kept aside,
+        # as text is read back with the default string dtype
+        return {
+            "__pandas__": type(value).__name__,
+            "name": getattr(value, "name", None),
+            "table": value.to_json(orient="table"),
+            "index_dtypes": [str(level.dtype) for level in _index_levels(frame.index)],
+            "dtypes": [str(dtype) for dtype in frame.dtypes],
+            "column_names": list(frame.columns.names),
+            "column_dtypes": [str(level.dtype) for level in _index_levels(frame.columns)],
+        }
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_graph_value(value: dict[str, t.Any]) -> t.Any:
+    """Decode the pandas objects encoded by _encode_graph_value, as the object_hook of json.loads."""
+    if "__pandas__" not in value:
+        return value
+    import pandas as pd
+
+    frame = pd.read_json(io.StringIO(value["table"]), orient="table")
+    frame = frame.astype(dict(zip(frame.columns, value["dtypes"])))
+    frame.index = _restore_dtypes(frame.index, value["index_dtypes"])
+    if value["__pandas__"] == "Series":
+        return frame.iloc[:, 0].rename(value["name"])
+    frame.columns = _restore_dtypes(frame.columns, value["column_dtypes"])
+    frame.columns.names = value["column_names"]
+    return frame
+
+
+def _index_levels(index: t.Any) -> list[t.Any]:
+    """Levels of a MultiIndex, or the index itself."""
+    return list(index.levels) if hasattr(index, "levels") else [index]
+
+
+def _restore_dtypes(index: t.Any, dtypes: list[str]) -> t.Any:
+    """Convert the levels of an index read by pd.read_json back to the dtypes recorded by _encode_graph_value."""
+    levels = [level.astype(dtype) for level, dtype in zip(_index_levels(index), dtypes)]
+    return index.set_levels(levels) if hasattr(index, "levels") else levels[0]
+
+
+class GraphRecorder:
+    """Visualizer wrapper recording each method call, so the graphs can be stored in the ReportCache."""
+
+    def __init__(self: t.Self, visualizer: "Visualizer") -> None:
+        self.visualizer = visualizer
+        self.calls: list[tuple[str, tuple, dict]] = []
+
+    def __getattr__(self: t.Self, name: str) -> t.Any:
+        method = getattr(self.visualizer, name)
+
+        @functools.wraps(method)
+        def record(*args: t.Any, **kwargs: t.Any) -> t.Any:
+            self.calls.append((name, args, kwargs))
+            return method(*args, **kwargs)
+
+        return record
@@ -0,0 +1,239 @@
+# Std lib imports
+import logging
+import typing as t
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+from . import const
+from .cube import (
+    bincount_max,
+    categorize_environment,
+    column_or_empty,
+    group_ids,
+    to_numeric,
+)
+from .support import SUPPORTED, SupportMatrix, load_support_matrix
+from .vmdata import VMData
+
+LOGGER = logging.getLogger(__name__)
+
+_RESOURCES = ("vCPU", "Memory", "Disk")
+
+
+class NodeShape(t.NamedTuple):
+    """Resources of a target node VMs are packed onto, memory and disk in GiB."""
+
+    cpu: float
+    memory: float
+    disk: float
+
+    @classmethod
+    def parse(cls: type[t.Self], text: str) -> t.Self:
+        """Parse a node shape written as vCPU,memory,disk, e.g. "64,512,4096".
+
+        Args:
+            text (str): vCPU, memory GiB and disk GiB of the node, separated by commas
+
+        Returns:
+            NodeShape: parsed shape
+
+        Raises:
+            ValueError: If text isn't three positive numbers.
+        """
+        values = text.split(",")
+        try:
+            shape = cls(*(float(value) for value in values)) if len(values) == 3 else None
+        except ValueError:
+            shape = None
+        if shape is None or min(shape) <= 0:
+            raise ValueError(f"Node shape {text!r} is not three positive numbers: vCPU,memory GiB,disk GiB")
+        return shape
+
+    @property
+    def label(self: t.Self) -> str:
+        return f"{self.cpu:g} vCPU / {self.memory:g} GiB / {self.disk:g} GiB"
+
+
+def first_fit_decreasing(sizes: np.ndarray, capacity: np.ndarray) -> int:
+    """Count the nodes of the given capacity first-fit-decreasing packs VMs onto.
+
+    VMs within 1/const.CAPACITY_PLAN_RESOLUTION of the capacity of each other in every resource are
+    packed as the largest of them, so the VMs are grouped into a few thousand sizes at most. Nodes are
+    filled one at a time, taking as many VMs of each size as fit in size order, which places every VM
+    on the first node it fits on. Once a node is full, as many identical nodes as the remaining VMs fill
+    are added at once.
+
+    Args:
+        sizes (np.ndarray): resources of each VM, one row per VM, each no larger than capacity
+        capacity (np.ndarray): resources of a node, in the columns of sizes
+
+    Returns:
+        int: number of nodes
+    """
+    if not len(sizes):
+        return 0
+    keys = np.ceil(sizes / capacity * const.CAPACITY_PLAN_RESOLUTION).astype(np.int64)
+    ids, first_rows = group_ids([pd.Series(key) for key in keys.T], sort=False)
+    groups = len(first_rows)
+    type_sizes = np.column_stack([bincount_max(ids, pd.Series(column), groups) for column in sizes.T])
+    counts = np.bincount(ids, minlength=groups)
+
+    # Largest share of a node first, then largest total share
+    shares = type_sizes / capacity
+    order = np.lexsort((-shares.sum(axis=1), -shares.max(axis=1)))
+    # VMs that use none of the resources fit on any node
+    order = order[shares[order].max(axis=1) > 0]
+    remaining = counts[order]
+    # One contiguous row per resource
+    type_sizes = np.ascontiguousarray(type_sizes[order].T)
+
+    nodes = 0
+    while len(remaining):
+        free = capacity.astype(float)
+        taken = {}
+        position = 0
+        while position < len(remaining):
+            # How many VMs of each size after position fit in the free resources,
+            # infinitely many of a resource they don't use and NaN, which fmin ignores, if none is free
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fit = free[0] / type_sizes[0, position:]
+                for resource in range(1, len(free)):
+                    np.fmin(fit, free[resource] / type_sizes[resource, position:], out=fit)
+            candidates = np.flatnonzero((fit >= 1) & (remaining[position:] > 0))
+            if not len(candidates):
+                break
+            index = position + candidates[0]
+            take = int(min(np.floor(fit[candidates[0]]), remaining[index]))
+            taken[index] = take
+            remaining[index] -= take
+            free = np.maximum(free - take * type_sizes[:, index], 0)
+            position = index + 1
+
+        # The next nodes take the same VMs for as long as every size they take has enough VMs left
+        repeats = min(remaining[index] // take for index, take in taken.items())
+        for index, take in taken.items():
+            remaining[index] -= repeats * take
+        nodes += 1 + repeats
+
+        # Drop the sizes without VMs left once they are the majority, keeping the size order
+        left = remaining > 0
+        if left.sum() * 2 < len(remaining) or not left[0]:
+            remaining, type_sizes = remaining[left], type_sizes[:, left]
+    return nodes
+
+
+def plan_capacity(
+    vm_data: VMData,
+    shapes: list[NodeShape],
+    prod_envs: list[str],
+    env_filter: str = "all",
+    site: str | None = None,
+    support_matrix: SupportMatrix | None = None,
+) -> pd.DataFrame:
+    """Plan the nodes of each shape the VMs with a supported OS need, per site and environment category.
+
+    VMs are packed by vCPU, memory and disk with first_fit_decreasing. VMs without a value for a resource
+    are packed as if they didn't use it, and VMs larger than a node in any resource are counted apart.
+
+    Args:
+        vm_data (VMData): normalized inventory
+        shapes (list[NodeShape]): shapes of the target nodes, each planned separately
+        prod_envs (list[str]): environment labels defined as prod, see Cube.environment_filtered
+        env_filter (str, optional): environment category to plan, "both" for one plan per category,
+          or "all" for one plan across categories. Defaults to "all".
+        site (str | None, optional): Site Name to plan, every site if None. Defaults to None.
+        support_matrix (SupportMatrix | None, optional): matrix of the supported OSes.
+          Defaults to the matrix of const.SUPPORT_MATRIX_FILE.
+
+    Returns:
+        pd.DataFrame: VMs, nodes, utilization in percent and VMs too large for a node, per site,
+          environment category and node shape
+    """
+    positions, keys, resources = select_supported(vm_data, prod_envs, env_filter, site, support_matrix)
+    first_rows, groups = split_groups(keys, len(positions))
+
+    rows = []
+    for first_row, rows_of_group in zip(first_rows, groups):
+        group_resources = resources[rows_of_group]
+        for shape in shapes:
+            capacity = np.array(shape, dtype=float)
+            fits = (group_resources <= capacity).all(axis=1)
+            nodes = first_fit_decreasing(group_resources[fits], capacity)
+            used = group_resources[fits].sum(axis=0)
+            utilization = used / (capacity * nodes) * 100 if nodes else np.zeros(len(capacity))
+            rows.append(
+                [
+                    *(values.iloc[first_row] for values in keys.values()),
+                    shape.label,
+                    int(fits.sum()),
+                    nodes,
+                    *utilization.round(1),
+                    int((~fits).sum()),
+                ]
+            )
+
+    columns = [*keys, "Node Shape", "VMs", "Nodes", *(f"{resource} %" for resource in _RESOURCES), "Too Large"]
+    LOGGER.debug("Planned %d VMs in %d groups onto %d node shapes", len(resources), len(first_rows), len(shapes))
+    return pd.DataFrame(rows, columns=columns)
+
+
+def select_supported(
+    vm_data: VMData, prod_envs: list[str], env_filter: str, site: str | None, support_matrix: SupportMatrix | None
+) -> tuple[np.ndarray, dict[str, pd.Series], np.ndarray]:
+    """Select the VMs with a supported OS in the site and environment category to plan, see plan_capacity.
+
+    Returns:
+        tuple[np.ndarray, dict[str, pd.Series], np.ndarray]: positions of the selected rows, their Site Name
+          and environment category where plans are split by them, and their vCPU, memory and disk, zero if missing
+    """
+    df = vm_data.df
+    env_column = vm_data.column_headers["environment"]
+    support_matrix = support_matrix or load_support_matrix()
+    # Only the rows of an OS Name with a supported version are classified
+    candidates = vm_data.os_index.rows_of(support_matrix.os_names)
+    support = support_matrix.classify(
+        *(column_or_empty(df, column).iloc[candidates] for column in ("OS Name", "OS Version", "Architecture"))
+    )
+    selected = np.zeros(len(df), dtype=bool)
+    selected[candidates[np.asarray(support == SUPPORTED)]] = True
+    sites = column_or_empty(df, "Site Name")
+    if site:
+        selected &= (sites == site).to_numpy()
+    environments = pd.Series(
+        categorize_environments(column_or_empty(df, env_column), prod_envs), index=df.index, name=env_column
+    )
+    if env_filter not in ("all", "both"):
+        selected &= (environments == env_filter).to_numpy()
+
+    resources = np.column_stack(
+        [
+            np.nan_to_num(to_numeric(df[vm_data.column_headers[column]]).to_numpy(dtype=float, na_value=np.nan))
+            for column in ("vCPU", "vmMemory", "vmDisk")
+        ]
+    )[selected]
+    keys = {}
+    if sites.notna().any():
+        keys["Site Name"] = sites[selected].reset_index(drop=True)
+    if env_filter != "all":
+        keys[env_column] = environments[selected].reset_index(drop=True)
+    return np.flatnonzero(selected), keys, resources
+
+
+def split_groups(keys: dict[str, pd.Series], size: int) -> tuple[np.ndarray, list[np.ndarray]]:
+    """First row and rows of each group of keys, in key order, one group of every row if there are no keys."""
+    if keys:
+        ids, first_rows = group_ids(list(keys.values()), dropna=False)
+    else:
+        ids, first_rows = np.zeros(size, dtype=np.int64), np.zeros(min(size, 1), dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    bounds = np.searchsorted(ids[order], np.arange(len(first_rows) + 1))
+    return first_rows, [order[bounds[group] : bounds[group + 1]] for group in range(len(first_rows))]
+
+
+def categorize_environments(environments: pd.Series, prod_envs: list[str]) -> np.ndarray:
+    """Environment category of every VM, categorizing each distinct environment once."""
+    codes, uniques = pd.factorize(environments, use_na_sentinel=False)
+    categories = np.array([categorize_environment(env, prod_envs=prod_envs) for env in uniques], dtype=object)
+    return categories[codes]
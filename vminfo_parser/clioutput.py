@@ -6,6 +6,42 @@ import weakref
 import pandas as pd
 from tabulate import tabulate
 
+from . import const
+
+if t.TYPE_CHECKING:
+    from .diff import SnapshotDiff
+    from .quality import DataQuality
+
+# Columns of the site usage table of each resource, from the columns of VMData.create_site_specific_dataframe
+_SITE_USAGE_TABLE_COLUMNS = {
+    "Memory": [
+        ("Site_RAM_Usage", "Memory\n(GB)"),
+        ("Site_RAM_Mean", "Memory\nMean"),
+        ("Site_RAM_P50", "Memory\nP50"),
+        ("Site_RAM_P95", "Memory\nP95"),
+        ("Site_RAM_Max", "Memory\nMax"),
+    ],
+    "CPU": [
+        ("Site_CPU_Usage", "Core\nCount"),
+        ("Site_CPU_Mean", "vCPU\nMean"),
+        ("Site_CPU_P50", "vCPU\nP50"),
+        ("Site_CPU_P95", "vCPU\nP95"),
+        ("Site_CPU_Max", "vCPU\nMax"),
+    ],
+    "Disk": [
+        ("Site_Disk_Usage", "Disk\n(TB)"),
+        ("Site_Disk_Mean", "Disk Mean\n(GB)"),
+        ("Site_Disk_P50", "Disk P50\n(GB)"),
+        ("Site_Disk_P95", "Disk P95\n(GB)"),
+        ("Site_Disk_Max", "Disk Max\n(GB)"),
+    ],
+    "VM": [
+        ("Site_VM_Count", "VM\nCount"),
+        ("Site_Supported_VM_Count", "Supported\nOS"),
+        ("Site_Unsupported_VM_Count", "Unsupported\nOS"),
+    ],
+}
+
 
 class CLIOutput:
     def __init__(self: t.Self) -> None:
@@ -61,6 +97,16 @@ class CLIOutput:
             line: str = str(line)
         self.output.write(line)
 
+    def getvalue(self: t.Self) -> str:
+        """Return everything written to the output buffer so far.
+
+        Returns:
+            str: contents of the output buffer
+        """
+        if self._closed:
+            raise ValueError("CLIOutput is already closed")
+        return self.output.getvalue()
+
     def close(self: t.Self) -> None:
         """Calls private finalizer for output buffer.  Finalizer will be closed and cannot be called again."""
         if not self._closed:
@@ -118,60 +164,191 @@ class CLIOutput:
         self.writeline(table)
         self.writeline()
 
-    def print_site_usage(self: t.Self, resource_list: list, dataFrame: pd.DataFrame) -> None:
+    def print_resource_quantiles(self: t.Self, quantiles: pd.DataFrame) -> None:
+        """Print quantiles of resources per VM, see Analyzer.get_resource_quantiles.
+
+        Args:
+            quantiles (pd.DataFrame): VM count, quantiles and maximum indexed by resource
+
+        Returns:
+            None
         """
-        Prints the site-wide usage of a specified resource, including Memory, CPU, Disk, or VM count.
+        self.writeline()
+        # Rows as tuples keep the VM count an integer
+        table = tabulate(
+            list(quantiles.itertuples()),
+            headers=[quantiles.index.name, *quantiles.columns],
+            floatfmt=".1f",
+            numalign="right",
+        )
+        self.writeline(table)
+        self.writeline()
 
+    def print_snapshot_diff(self: t.Self, diff: "SnapshotDiff") -> None:
+        """Print the changes between two snapshots, see SnapshotDiff.
 
         Args:
-            resource_list (list): The type of resource to summarize. Options include "Memory", "CPU", "Disk", or "VM".
-            dataFrame (pd.DataFrame): A DataFrame containing the relevant data for the site, including
-                                      resource usage metrics.
+            diff (SnapshotDiff): changes per VM and count deltas of the snapshots
 
         Returns:
-            None: This function does not return a value; it prints the usage information directly to the console.
+            None
         """
-        dataFrame = dataFrame.set_index("Site Name")
         self.writeline()
-        for resource in resource_list:
-            if not dataFrame.empty:
-                match resource:
-                    case "CPU":
-                        cpu_usage = dataFrame["Site_CPU_Usage"].astype(int)
-                        self.writeline(self.create_site_table(cpu_usage, ["Site Name", "Core Count"]))
-                    case "Memory":
-                        memory_usage = dataFrame["Site_RAM_Usage"].round(0).astype(int)
-                        self.writeline(self.create_site_table(memory_usage, ["Site Name", "Memory Capacity (GB)"]))
-                    case "Disk":
-                        disk_usage = dataFrame["Site_Disk_Usage"]
-                        self.writeline(self.create_site_table(disk_usage, ["Site Name", "Disk Capacity (TB)"]))
-                    case "VM":
-                        vm_count = dataFrame["Site_VM_Count"]
-                        self.writeline(self.create_site_table(vm_count, ["Site Name", "VM Count"]))
-                    case _:
-                        self.writeline("No data available for the specified resource.")
-            else:
-                self.writeline("No data available for the specified resource.")
-            self.writeline("")
+        self.writeline(tabulate(diff.change_counts().to_frame("VMs"), headers="keys"))
+        sections = [
+            ("OS Counts", diff.os_counts),
+            ("Disk Space Ranges", diff.disk_space),
+            ("Site Totals", diff.site_totals),
+        ]
+        for title, dataFrame in sections:
+            if dataFrame is None or dataFrame.empty:
+                continue
+            self.writeline()
+            self.writeline(title)
+            self.writeline("=" * len(title))
+            self.writeline(tabulate(dataFrame, headers="keys", numalign="right"))
+        if not diff.changes.empty:
+            self.writeline()
+            self.writeline("VM Changes")
+            self.writeline("=" * len("VM Changes"))
+            self.writeline(tabulate(diff.changes, headers="keys", showindex=False, disable_numparse=True))
+        self.writeline()
+
+    def print_capacity_plan(self: t.Self, plan: pd.DataFrame) -> None:
+        """Print the nodes planned per site, environment and node shape, see plan_capacity.
 
-    def create_site_table(self: t.Self, df: pd.DataFrame, headers: list, table_format: str = "simple") -> str:
-        """Generate a formatted table from site data.
+        Args:
+            plan (pd.DataFrame): VMs, nodes, utilization and VMs too large for a node per node shape
+
+        Returns:
+            None
+        """
+        self.writeline()
+        self.writeline("Capacity Plan")
+        self.writeline("=" * len("Capacity Plan"))
+        self.writeline(tabulate(plan, headers="keys", showindex=False, numalign="right", floatfmt=".1f"))
+        self.writeline()
 
-        This function takes a DataFrame containing site information and converts it into a
-        string representation of a table with specified headers. The table is formatted for
-        better readability.
+    def print_wave_plan(self: t.Self, waves: pd.DataFrame) -> None:
+        """Print the migration waves planned per site and environment, see plan_waves.
 
         Args:
-            df (pd.DataFrame): A DataFrame containing site data.
-            headers (list): A list of headers for the table.
+            waves (pd.DataFrame): VMs, vCPU, memory and disk of each wave
 
         Returns:
-            str: A string representation of the formatted table.
+            None
+        """
+        self.writeline()
+        self.writeline("Migration Waves")
+        self.writeline("=" * len("Migration Waves"))
+        self.writeline(tabulate(waves, headers="keys", showindex=False, numalign="right", floatfmt=".0f"))
+        self.writeline()
 
-        Examples:
-            >>> df = pd.DataFrame({'Site A': [1], 'Site B': [2]})
-            >>> create_site_table(df, ['Site', 'Value'])
-            '  Site    Value\n-------  ------\nSite A      1\nSite B      2'
+    def print_pivot(self: t.Self, table: pd.DataFrame) -> None:
+        """Print the measures of every group of a pivot report, see pivot.
+
+        Args:
+            table (pd.DataFrame): group_by values and one column per measure
+
+        Returns:
+            None
+        """
+        self.writeline()
+        self.writeline("Pivot Report")
+        self.writeline("=" * len("Pivot Report"))
+        self.writeline(tabulate(table, headers="keys", showindex=False, numalign="right", floatfmt=".1f"))
+        self.writeline()
+
+    def print_data_quality(self: t.Self, quality: "DataQuality") -> None:
+        """Print the VMs with each data quality problem and sample rows of them, see DataQuality.
+
+        Args:
+            quality (DataQuality): findings of the normalization of the inventory
+
+        Returns:
+            None
+        """
+        self.writeline()
+        self.writeline("Data Quality")
+        self.writeline("=" * len("Data Quality"))
+        self.writeline(
+            tabulate(list(quality.to_frame().itertuples()), headers=["Check", "VMs", "Percent"], floatfmt=".2f")
+        )
+        for check in const.DATA_QUALITY_CHECKS:
+            if check not in quality.samples:
+                continue
+            sample = quality.samples[check]
+            title = f"{check}: first {len(sample)} of {quality.counts[check]} rows"
+            self.writeline()
+            self.writeline(title)
+            self.writeline("=" * len(title))
+            sample = sample.astype(object).where(sample.notna(), "").rename_axis("Row")
+            self.writeline(tabulate(sample, headers="keys", disable_numparse=True))
+        self.writeline()
+
+    def print_trends(self: t.Self, trends: dict[str, pd.DataFrame]) -> None:
+        """Print trends over the snapshots of an inventory, see compute_trends.
+
+        Args:
+            trends (dict[str, pd.DataFrame]): counts with one row per snapshot date, by title
+
+        Returns:
+            None
+        """
+        for title, dataFrame in trends.items():
+            self.writeline()
+            self.writeline(title)
+            self.writeline("=" * len(title))
+            dataFrame = dataFrame.set_axis(dataFrame.index.strftime("%Y-%m-%d"))
+            self.writeline(tabulate(dataFrame, headers=[dataFrame.index.name, *dataFrame.columns], numalign="right"))
+        self.writeline()
+
+    def print_site_usage(self: t.Self, resource_list: list, dataFrame: pd.DataFrame) -> None:
+        """
+        Prints the site-wide usage of the specified resources, including Memory, CPU, Disk, or VM count, in one table.
+
+        Each resource is shown with its total and, where dataFrame has them, the mean, median, 95th percentile
+        and maximum per VM, or for VM the counts of supported and unsupported OS, see const.SITE_STATISTICS_COLUMNS.
+        Estimated columns, see const.SITE_APPROXIMATE_COLUMNS, are marked with a "~" and a note of their accuracy.
+
+        Args:
+            resource_list (list): The type of resource to summarize. Options include "Memory", "CPU", "Disk", or "VM".
+            dataFrame (pd.DataFrame): A DataFrame containing the relevant data for the site, including
+                                      resource usage metrics.
+
+        Returns:
+            None: This function does not return a value; it prints the usage information directly to the console.
         """
-        table_data = [[site, f"{value}"] for site, value in df.items()]
-        return tabulate(table_data, headers=headers, numalign="center", tablefmt=table_format)
+        dataFrame = dataFrame.set_index("Site Name")
+        self.writeline()
+        table = {}
+        for resource in resource_list:
+            if resource not in _SITE_USAGE_TABLE_COLUMNS:
+                self.writeline("No data available for the specified resource.")
+                continue
+            for column, header in _SITE_USAGE_TABLE_COLUMNS[resource]:
+                if const.SITE_APPROXIMATE_COLUMNS.get(column) in dataFrame.columns:
+                    column, header = const.SITE_APPROXIMATE_COLUMNS[column], f"~{header}"
+                if column in dataFrame.columns:
+                    values = dataFrame[column]
+                    # Totals are whole numbers, the distribution per VM is shown with one decimal
+                    table[header] = values.round(0).astype(int) if column in const.SITE_USAGE_COLUMNS else values
+        if dataFrame.empty or not table:
+            self.writeline("No data available for the specified resource.")
+        else:
+            table_frame = pd.DataFrame(table)
+            self.writeline(
+                tabulate(
+                    table_frame.astype(object).where(table_frame.notna(), None),
+                    headers="keys",
+                    numalign="right",
+                    floatfmt=".1f",
+                    missingval="-",
+                )
+            )
+            if any(header.startswith("~") for header in table):
+                self.writeline(
+                    f"~ estimated from quantile sketches, within {const.SKETCH_RELATIVE_ACCURACY:.0%} "
+                    "of the VM value at that rank"
+                )
+        self.writeline("")
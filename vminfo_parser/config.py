@@ -1,5 +1,6 @@
 import argparse
 import logging
+import re
 import sys
 import typing as t
 from functools import cached_property
@@ -7,9 +8,81 @@ from pathlib import Path
 
 import yaml
 
+from . import const
+
 LOGGER = logging.getLogger(__name__)
 _IS_TEST: bool = False
 
+# Options that select the input or control how it is loaded or cached rather than the reports
+_NON_REPORT_OPTIONS = (
+    "file",
+    "directory",
+    "summary",
+    "trend",
+    "save_summary",
+    "yaml",
+    "generate_yaml",
+    "cache_dir",
+    "cache_ttl",
+    "cache_max_size",
+    "workers",
+    "partition_size",
+    "queue_dir",
+    "worker",
+)
+
+# Options partitioned and distributed mode can't answer from the merged summaries of the partitions
+_PARTITIONED_UNSUPPORTED_OPTIONS = (
+    "--summary",
+    "--approximate",
+    "--adaptive-disk-bins",
+    "--diff-against",
+    "--plan-capacity",
+    "--plan-waves",
+    "--group-by",
+    "--where",
+    "--data-quality",
+)
+
+# Options trend mode ignores, it reports on the cached summaries of the snapshots
+_TREND_UNSUPPORTED_OPTIONS = (
+    "--approximate",
+    "--workers",
+    "--queue-dir",
+    "--diff-against",
+    "--save-summary",
+    "--adaptive-disk-bins",
+    "--site",
+    "--plan-capacity",
+    "--plan-waves",
+    "--group-by",
+    "--where",
+    "--data-quality",
+)
+
+# Options --approximate can't answer from its sketches
+_APPROXIMATE_UNSUPPORTED_OPTIONS = (
+    "--summary",
+    "--save-summary",
+    "--sort-by-site",
+    "--show-disk-space-by-os",
+    "--get-disk-space-ranges",
+    "--breakdown-by-terabyte",
+    "--over-under-tb",
+    "--adaptive-disk-bins",
+    "--output-os-by-version",
+    "--get-supported-os",
+    "--get-unsupported-os",
+    "--support-matrix",
+    "--diff-against",
+    "--site",
+    "--plan-capacity",
+    "--plan-waves",
+    "--group-by",
+    "--where",
+    "--data-quality",
+)
+
 
 def _get_parser() -> argparse.ArgumentParser:
     """Create ArguementParser object and add arguements to it.
@@ -23,6 +96,20 @@ def _get_parser() -> argparse.ArgumentParser:
     group.add_argument("--file", type=Path, help="The file to parse")
     group.add_argument("--yaml", type=str, help="Path to YAML configuration file")
     group.add_argument("--directory", type=str, help="Directory containing spreadsheet files", default=None)
+    group.add_argument(
+        "--summary",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Summary files written with --save-summary. They are merged and reported on instead of an inventory",
+    )
+    group.add_argument(
+        "--trend",
+        type=str,
+        default=None,
+        help="Directory of dated snapshots of the inventory, e.g. inventory-2024-05-06.csv. "
+        "Outputs the VM counts per OS, support status, disk space range and site of every snapshot",
+    )
 
     parser.add_argument(
         "--sort-by-env",
@@ -85,6 +172,13 @@ def _get_parser() -> argparse.ArgumentParser:
         default=False,
         help="A simple break down of machines under 1 TiB and those over 1 TiB",
     )
+    parser.add_argument(
+        "--adaptive-disk-bins",
+        type=int,
+        default=None,
+        help="Split disk space reports into about this many ranges holding similar numbers of VMs, "
+        "instead of the fixed ranges",
+    )
     parser.add_argument(
         "--output-os-by-version",
         action="store_true",
@@ -103,12 +197,31 @@ def _get_parser() -> argparse.ArgumentParser:
         default=None,
         help="The name of the Operating System to produce a report about",
     )
+    parser.add_argument(
+        "--site",
+        type=str,
+        default=None,
+        help="The Site Name to restrict the OS and disk space reports to",
+    )
+    parser.add_argument(
+        "--where",
+        type=str,
+        default=None,
+        help="Only report on the VMs matching this filter expression, "
+        "i.e. --where \"OS Name == 'CentOS' and vmDisk > 2048 and Site Name in ['DC1','DC2']\"",
+    )
     parser.add_argument(
         "--minimum-count",
         type=int,
         default=0,
         help="Anything below this number will be excluded from the results",
     )
+    parser.add_argument(
+        "--top-n",
+        type=int,
+        default=None,
+        help="Only show the N largest entries of the OS and version counts, adding up the rest as Other",
+    )
     parser.add_argument(
         "--get-supported-os",
         action="store_true",
@@ -121,6 +234,168 @@ def _get_parser() -> argparse.ArgumentParser:
         default=False,
         help="Display a graph of the unsupported operating systems for OpenShift Virt",
     )
+    parser.add_argument(
+        "--support-matrix",
+        type=str,
+        default=None,
+        help="CSV file of the OS Names, OS Versions and Architectures supported for OpenShift Virt. "
+        "Defaults to every version of the operating systems supported out of the box",
+    )
+    parser.add_argument(
+        "--get-resource-quantiles",
+        action="store_true",
+        default=False,
+        help="Output the median, 90th, 95th and 99th percentile and maximum memory, disk and CPU per VM",
+    )
+    parser.add_argument(
+        "--data-quality",
+        action="store_true",
+        default=False,
+        help="Output the VMs with unparsable memory or disk, an OS no pattern matches or no environment, "
+        "with sample rows of each",
+    )
+    parser.add_argument(
+        "--diff-against",
+        type=str,
+        default=None,
+        help="Earlier snapshot of the inventory, a file or directory, to compare the inventory with. "
+        "Outputs added, removed and resized VMs, OS upgrades, environment moves and the change of the counts",
+    )
+    parser.add_argument(
+        "--diff-key",
+        type=str,
+        default=None,
+        help="Columns identifying a VM in both snapshots with --diff-against, passed as CSV. "
+        "Defaults to the first of VM UUID, VM ID, VM Name and VM found in both",
+    )
+    parser.add_argument(
+        "--plan-capacity",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Node shapes to plan the nodes the VMs with a supported OS need on, per site and environment, "
+        "each as vCPU,memory GiB,disk GiB i.e. --plan-capacity 64,512,4096 96,768,8192",
+    )
+    parser.add_argument(
+        "--plan-waves",
+        type=str,
+        default=None,
+        help="CSV or Parquet file to write the VMs with a supported OS to, partitioned into migration waves "
+        "per site, unless --wave-across-sites, and environment within the --wave-max-vms, --wave-max-memory "
+        "and --wave-max-disk caps",
+    )
+    parser.add_argument(
+        "--wave-across-sites",
+        action="store_true",
+        default=False,
+        help="Plan --plan-waves waves across sites instead of per site",
+    )
+    parser.add_argument(
+        "--wave-max-vms",
+        type=int,
+        default=None,
+        help="Most VMs in a migration wave with --plan-waves",
+    )
+    parser.add_argument(
+        "--wave-max-memory",
+        type=float,
+        default=None,
+        help="Most memory GiB of the VMs in a migration wave with --plan-waves",
+    )
+    parser.add_argument(
+        "--wave-max-disk",
+        type=float,
+        default=None,
+        help="Most disk GiB of the VMs in a migration wave with --plan-waves",
+    )
+    parser.add_argument(
+        "--group-by",
+        type=str,
+        default=None,
+        help="Comma separated columns to output a pivot report of the --measure measures for, "
+        'i.e. --group-by "Site Name,OS Name"',
+    )
+    parser.add_argument(
+        "--measure",
+        type=str,
+        default=None,
+        help="Comma separated measures of the --group-by pivot report, count or sum, mean, min, max "
+        "or a percentile of a column, i.e. --measure count,sum:vmDisk,p95:vmMemory. Defaults to count",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=["pandas", "polars"],
+        default=None,
+        help="Library used to load and aggregate the inventory. polars is optional and must be installed separately. "
+        "Defaults to pandas",
+    )
+    parser.add_argument(
+        "--approximate",
+        action="store_true",
+        default=False,
+        help="Estimate --get-os-counts and --get-resource-quantiles from fixed size sketches built in one pass, "
+        "reading CSV files a chunk at a time. Results are shown with their error bounds",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Rows read at a time with --approximate. Defaults to 100000",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Load and aggregate the inventory in partitions with this many worker processes, "
+        "so inventories larger than memory can be reported on",
+    )
+    parser.add_argument(
+        "--partition-size",
+        type=int,
+        default=None,
+        help="Largest part of a CSV file in MiB each worker loads at a time with --workers. Defaults to 64",
+    )
+    parser.add_argument(
+        "--queue-dir",
+        type=str,
+        default=None,
+        help="Directory of a work queue shared with --worker processes, possibly on other hosts. "
+        "The inventory is split into partitions the workers load and aggregate",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        default=False,
+        help="Load and aggregate partitions from the work queue in --queue-dir until the coordinator finishes",
+    )
+    parser.add_argument(
+        "--save-summary",
+        type=str,
+        default=None,
+        help="Write a summary of the inventory to this file. "
+        "Summaries are much smaller than inventories and can be merged with --summary",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Directory to cache report output in. Repeated runs with the same input files and options "
+        "print the cached output without reading the inventory",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=None,
+        help="Seconds a cached report is used for. Defaults to 3600",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        type=int,
+        default=None,
+        help="Maximum size of the report cache in MiB, least recently used reports are removed first. "
+        "Defaults to 256",
+    )
     parser.add_argument(
         "--generate-yaml",
         action="store_true",
@@ -166,9 +441,19 @@ class Config:
             if any(getattr(config, arg) for arg in vars(config) if arg != "yaml"):
                 _parse_fail("When using --yaml, no other arguments should be provided.")
             config._load_yaml()
-        elif not config.file and not config.generate_yaml and not config.directory:
+        elif (
+            not config.file
+            and not config.generate_yaml
+            and not config.directory
+            and not config.summary
+            and not config.trend
+            and not config.worker
+        ):
             # this is likely never reachable because argparse forces it.
-            _parse_fail("The options --file or --directory is required when --yaml or --generate-yaml are not used.")
+            _parse_fail(
+                "The options --file, --directory, --summary or --trend is required "
+                "when --yaml or --generate-yaml are not used."
+            )
 
         config._validate()
         return config
@@ -217,6 +502,194 @@ class Config:
             )
             exit(1)
 
+        if getattr(self, "backend", None) == "polars" and (
+            getattr(self, "summary", None) or getattr(self, "approximate", False)
+        ):
+            LOGGER.critical("--backend polars can't be combined with --summary or --approximate")
+            exit(1)
+
+        self._validate_partitioned()
+        self._validate_diff()
+        self._validate_trend()
+        self._validate_site()
+        self._validate_capacity()
+        self._validate_waves()
+        self._validate_top_n()
+        self._validate_pivot()
+        self._validate_where()
+        self._validate_data_quality()
+
+        if getattr(self, "adaptive_disk_bins", None) is not None:
+            if self.adaptive_disk_bins < 1:
+                LOGGER.critical("--adaptive-disk-bins must be at least 1")
+                exit(1)
+            if getattr(self, "summary", None) or self.breakdown_by_terabyte or self.over_under_tb:
+                LOGGER.critical(
+                    "--adaptive-disk-bins can't be combined with --summary, --breakdown-by-terabyte or --over-under-tb"
+                )
+                exit(1)
+
+        if getattr(self, "approximate", False):
+            unsupported = [
+                option
+                for option in _APPROXIMATE_UNSUPPORTED_OPTIONS
+                if getattr(self, option.lstrip("-").replace("-", "_"), None)
+            ]
+            if unsupported:
+                LOGGER.critical("--approximate can't be combined with %s", ", ".join(unsupported))
+                exit(1)
+            if self.environment_filter == "both":
+                LOGGER.critical("--approximate can't count OS names per environment category with --sort-by-env both")
+                exit(1)
+
+    def _validate_partitioned(self: t.Self) -> None:
+        """Ensure that the options of partitioned and distributed mode are valid and can be answered from summaries."""
+        workers = getattr(self, "workers", None)
+        queue_dir = getattr(self, "queue_dir", None)
+        if getattr(self, "worker", False) and not queue_dir:
+            LOGGER.critical("--worker needs the --queue-dir of the coordinator")
+            exit(1)
+        if workers is None and queue_dir is None:
+            return
+        if workers is not None and queue_dir is not None:
+            LOGGER.critical("--workers can't be combined with --queue-dir")
+            exit(1)
+
+        partition_size = getattr(self, "partition_size", None)
+        if (workers is not None and workers < 1) or (partition_size is not None and partition_size < 1):
+            LOGGER.critical("--workers and --partition-size must be at least 1")
+            exit(1)
+        unsupported = [
+            option
+            for option in _PARTITIONED_UNSUPPORTED_OPTIONS
+            if getattr(self, option.lstrip("-").replace("-", "_"), None)
+        ]
+        if getattr(self, "backend", None) == "polars":
+            unsupported.append("--backend polars")
+        if unsupported:
+            LOGGER.critical(
+                "%s can't be combined with %s",
+                "--workers" if workers is not None else "--queue-dir",
+                ", ".join(unsupported),
+            )
+            exit(1)
+
+    def _validate_diff(self: t.Self) -> None:
+        """Ensure that snapshots are compared only when the rows of the inventory are loaded."""
+        if not getattr(self, "diff_against", None):
+            if getattr(self, "diff_key", None):
+                LOGGER.critical("--diff-key needs --diff-against")
+                exit(1)
+            return
+        if getattr(self, "summary", None) or getattr(self, "backend", None) == "polars":
+            LOGGER.critical("--diff-against can't be combined with --summary or --backend polars")
+            exit(1)
+
+    def _validate_capacity(self: t.Self) -> None:
+        """Ensure that capacity is planned for valid node shapes, from the rows of the inventory."""
+        shapes = getattr(self, "plan_capacity", None)
+        if not shapes:
+            return
+        if getattr(self, "summary", None) or getattr(self, "backend", None) == "polars":
+            LOGGER.critical("--plan-capacity can't be combined with --summary or --backend polars")
+            exit(1)
+        for shape in shapes:
+            values = shape.split(",")
+            try:
+                valid = len(values) == 3 and all(float(value) > 0 for value in values)
+            except ValueError:
+                valid = False
+            if not valid:
+                LOGGER.critical("Node shape %s is not three positive numbers: vCPU,memory GiB,disk GiB", shape)
+                exit(1)
+
+    def _validate_waves(self: t.Self) -> None:
+        """Ensure that migration waves are planned within positive caps, from the rows of the inventory."""
+        caps = {
+            option: getattr(self, option.lstrip("-").replace("-", "_"), None)
+            for option in ("--wave-max-vms", "--wave-max-memory", "--wave-max-disk")
+        }
+        if not getattr(self, "plan_waves", None):
+            options = [option for option, cap in caps.items() if cap is not None]
+            if getattr(self, "wave_across_sites", False):
+                options.append("--wave-across-sites")
+            if options:
+                LOGGER.critical("%s needs --plan-waves", ", ".join(options))
+                exit(1)
+            return
+        if getattr(self, "summary", None) or getattr(self, "backend", None) == "polars":
+            LOGGER.critical("--plan-waves can't be combined with --summary or --backend polars")
+            exit(1)
+        if Path(self.plan_waves).suffix.lower() not in (".csv", ".parquet"):
+            LOGGER.critical("--plan-waves must be a .csv or .parquet file")
+            exit(1)
+        if all(cap is None for cap in caps.values()) or any(cap is not None and cap <= 0 for cap in caps.values()):
+            LOGGER.critical(
+                "--plan-waves needs at least one of --wave-max-vms, --wave-max-memory and --wave-max-disk, "
+                "each positive"
+            )
+            exit(1)
+
+    def _validate_trend(self: t.Self) -> None:
+        """Ensure that no option trend mode ignores is set with --trend."""
+        if not getattr(self, "trend", None):
+            return
+        unsupported = [
+            option for option in _TREND_UNSUPPORTED_OPTIONS if getattr(self, option.lstrip("-").replace("-", "_"), None)
+        ]
+        if getattr(self, "backend", None) == "polars":
+            unsupported.append("--backend polars")
+        if unsupported:
+            LOGGER.critical("--trend can't be combined with %s", ", ".join(unsupported))
+            exit(1)
+
+    def _validate_site(self: t.Self) -> None:
+        """Ensure that --site isn't combined with a report that can't be restricted to a site."""
+        if getattr(self, "site", None) and getattr(self, "get_resource_quantiles", False):
+            LOGGER.critical("--site can't be combined with --get-resource-quantiles, its sketches cover every site")
+            exit(1)
+
+    def _validate_top_n(self: t.Self) -> None:
+        """Ensure that --top-n keeps at least one entry of the count reports."""
+        if getattr(self, "top_n", None) is not None and self.top_n < 1:
+            LOGGER.critical("--top-n must be at least 1")
+            exit(1)
+
+    def _validate_pivot(self: t.Self) -> None:
+        """Ensure that the pivot report has valid measures and is computed from the rows of the inventory."""
+        measures = getattr(self, "measure", None)
+        if not getattr(self, "group_by", None):
+            if measures:
+                LOGGER.critical("--measure needs --group-by")
+                exit(1)
+            return
+        if getattr(self, "summary", None) or getattr(self, "backend", None) == "polars":
+            LOGGER.critical("--group-by can't be combined with --summary or --backend polars")
+            exit(1)
+        for measure in (measures or "count").split(","):
+            match = re.fullmatch(const.PIVOT_MEASURE_REGEX, measure.strip())
+            if match is None or (match["function"] != "count" and match["column"] is None):
+                LOGGER.critical(
+                    "Measure %s is not count or one of sum, mean, min, max or a percentile like p95, "
+                    "followed by : and a column",
+                    measure,
+                )
+                exit(1)
+
+    def _validate_where(self: t.Self) -> None:
+        """Ensure that --where filters the rows of an inventory."""
+        if getattr(self, "where", None) and getattr(self, "summary", None):
+            LOGGER.critical("--where can't be combined with --summary, summaries have no rows to filter")
+            exit(1)
+
+    def _validate_data_quality(self: t.Self) -> None:
+        """Ensure that --data-quality reports on an inventory normalized by the pandas backend."""
+        if getattr(self, "data_quality", False) and (
+            getattr(self, "summary", None) or getattr(self, "backend", None) == "polars"
+        ):
+            LOGGER.critical("--data-quality can't be combined with --summary or --backend polars")
+            exit(1)
+
     def generate_yaml_from_parser(self: t.Self, file_path: str | None = None) -> None:
         """
         Generate a YAML file containing all arguments from the given ArgumentParser.
@@ -240,6 +713,18 @@ class Config:
         with open(file_path, "w") as f:
             yaml.dump(config_data_attributes, f, indent=2, sort_keys=False)
 
+    def report_options(self: t.Self) -> dict[str, t.Any]:
+        """Options that change the output of the reports, excluding the input and cache options.
+
+        Returns:
+            dict[str, t.Any]: option values by attribute name
+        """
+        return {
+            attr: getattr(self, attr, None)
+            for attr in _get_parser().parse_args(args=()).__dict__.keys()
+            if attr not in _NON_REPORT_OPTIONS
+        }
+
     @cached_property
     def environments(self: t.Self) -> list[str]:
         if self.prod_env_labels:
@@ -1,3 +1,4 @@
+from pathlib import Path
 from types import MappingProxyType
 
 COLUMN_HEADERS = MappingProxyType(
@@ -81,3 +82,92 @@ SUPPORTED_OS_COLORS = MappingProxyType(
 )
 
 SUPPORTED_OSES = frozenset(SUPPORTED_OS_COLORS.keys())
+
+# Default matrix of supported OS Names, versions and architectures, see support.SupportMatrix.
+# It supports every version of SUPPORTED_OSES.
+SUPPORT_MATRIX_FILE = Path(__file__).parent / "support_matrix.csv"
+# Categories of the support status of an OS, see support.SupportMatrix.classify
+SUPPORT_STATUSES = ("Supported", "Unsupported")
+
+# Fixed disk space ranges in GiB used by Analyzer.generate_dynamic_ranges.
+# The last, open-ended range is appended at runtime using the largest disk in the data.
+DISK_SPACE_RANGES = MappingProxyType(
+    {
+        "tb": (
+            (0, 2000),
+            (2001, 10000),
+            (10001, 20000),
+            (20001, 50000),
+            (50001, 100000),
+        ),
+        "gb": (
+            (0, 200),
+            (201, 400),
+            (401, 600),
+            (601, 800),
+            (801, 1000),
+            (1001, 2000),
+            (2001, 3000),
+            (3001, 5000),
+            (5001, 10000),
+            (10001, 20000),
+            (20001, 50000),
+            (50001, 100000),
+        ),
+        "over_under_tb": ((0, 1000),),
+    }
+)
+
+# Lower bounds of the open-ended ranges Analyzer.generate_dynamic_ranges appends for the largest disk.
+DISK_SPACE_OPEN_RANGE_STARTS = (1001, 5001, 10001, 20001, 50000, 50001, 100001)
+
+# Relative error of the quantile sketches kept for memory, disk and CPU
+SKETCH_RELATIVE_ACCURACY = 0.01
+RESOURCE_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+# Columns of VMData.create_site_specific_dataframe, after Site Name: totals, then the split of the VM count
+# by OS support and the distribution of memory, CPU and disk per VM, see Cube.site_statistics
+SITE_USAGE_COLUMNS = ("Site_RAM_Usage", "Site_Disk_Usage", "Site_CPU_Usage", "Site_VM_Count")
+SITE_STATISTICS_COLUMNS = (
+    "Site_Supported_VM_Count",
+    "Site_Unsupported_VM_Count",
+    *(
+        f"Site_{resource}_{statistic}"
+        for resource in ("RAM", "CPU", "Disk")
+        for statistic in ("Mean", "P50", "P95", "Max")
+    ),
+)
+# Summaries hold no inventory rows, so their site medians and 95th percentiles are estimated from quantile
+# sketches, within SKETCH_RELATIVE_ACCURACY of the value of the VM at the quantile's rank, and renamed to these
+SITE_APPROXIMATE_COLUMNS = {
+    column: f"{column}_Approx" for column in SITE_STATISTICS_COLUMNS if column.endswith(("_P50", "_P95"))
+}
+# Column header key of each resource of the site statistics, see VMData.column_headers
+SITE_MEASURE_HEADERS = {"Memory": "vmMemory", "CPU": "vCPU", "Disk": "vmDisk"}
+
+# Number of OS names counted by the approximate analysis, and rows it reads at a time
+SKETCH_TOP_ITEMS_CAPACITY = 64
+DEFAULT_CHUNK_SIZE = 100000
+
+# Largest part of a CSV file a worker loads at a time in partitioned mode
+DEFAULT_PARTITION_SIZE_MIB = 64
+
+# Seconds between checks of the shared work queue, and seconds a worker has to complete a claimed task
+QUEUE_POLL_INTERVAL = 1.0
+QUEUE_CLAIM_TIMEOUT = 600
+
+# Problems counted while normalizing an inventory for --data-quality, and the rows kept as a sample of each
+DATA_QUALITY_CHECKS = ("Unparsable Memory", "Unparsable Disk", "Unmatched OS", "Missing Environment")
+DATA_QUALITY_SAMPLE_ROWS = 5
+
+# Columns identifying a VM across snapshots compared with --diff-against, in order of preference
+VM_IDENTITY_COLUMNS = ("VM UUID", "VM ID", "VM Name", "VM")
+
+# Date in the file name of a snapshot read with --trend, e.g. inventory-2024-05-06.csv or inventory_20240506.xlsx
+SNAPSHOT_DATE_REGEX = r"(?<!\d)(?P<year>\d{4})-?(?P<month>\d{2})-?(?P<day>\d{2})(?!\d)"
+
+# VM sizes within this fraction of a node's capacity are packed as the largest of them by --plan-capacity
+CAPACITY_PLAN_RESOLUTION = 1000
+
+# Measure of a --group-by pivot report: count, or a function of a column, e.g. sum:vmDisk or p95:vmMemory
+PIVOT_MEASURE_REGEX = r"(?P<function>count|sum|mean|min|max|p(?:100|\d{1,2}(?:\.\d+)?))(?::(?P<column>.+))?"
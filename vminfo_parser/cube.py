@@ -0,0 +1,688 @@
+# Std lib imports
+import logging
+import typing as t
+from collections.abc import Iterable
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+from . import const
+from .bitmap import Bitmap, BitmapIndex
+from .sketch import QuantileSketch
+
+if t.TYPE_CHECKING:
+    from .support import SupportMatrix
+
+LOGGER = logging.getLogger(__name__)
+
+# Every lower and upper bound a disk space range can have, apart from the largest disk in the data.
+# A disk size's position relative to both sets identifies an interval no generated range can split.
+DISK_LOWER_BOUNDS = np.array(
+    sorted(
+        {lower for ranges in const.DISK_SPACE_RANGES.values() for lower, _ in ranges}.union(
+            const.DISK_SPACE_OPEN_RANGE_STARTS
+        )
+    )
+)
+DISK_UPPER_BOUNDS = np.array(sorted({upper for ranges in const.DISK_SPACE_RANGES.values() for _, upper in ranges}))
+
+# Quantiles of the resources per VM of each site, by column name suffix, see Cube.site_statistics
+SITE_QUANTILES = {"P50": 0.5, "P95": 0.95}
+
+# Combined group codes are renumbered before growing past this, see group_ids
+_MAX_COMBINED_CODE = 2**62
+# Groups of combined codes up to this size are numbered with a lookup table instead of sorting
+_MAX_DENSE_CODES = 2**22
+
+
+class Cube:
+    """Counts and resource sums of the inventory grouped by every dimension the reports break down by.
+
+    The cube is built with a single pass over the inventory and is small enough (one row per distinct
+    combination of dimensions) that every report can be answered by rolling it up.
+    Quantiles of the SKETCHED measures are kept in QuantileSketches, as they can't be rolled up from sums,
+    for the whole inventory, and for each site in cubes of summaries, which have no rows to compute them from.
+    Cells are selected with bitmap indexes of the dimensions and of the environment category,
+    each built the first time a report filters by it and shared by every later report.
+    """
+
+    DIMENSIONS = ("OS Name", "OS Version", "Architecture", "Environment", "Site Name", "Disk Bin")
+    MEASURES = ("Count", "Memory", "Disk", "CPU", "Disk TiB", "Disk Max", "Disk Top Fraction")
+    SKETCHED = ("Memory", "Disk", "CPU")
+
+    def __init__(
+        self: t.Self,
+        frame: pd.DataFrame,
+        sketches: dict[str, QuantileSketch] | None = None,
+        site_sketches: dict[t.Hashable, dict[str, QuantileSketch]] | None = None,
+    ) -> None:
+        self.frame = frame
+        self.sketches = sketches if sketches is not None else {measure: QuantileSketch() for measure in self.SKETCHED}
+        self.site_sketches = site_sketches if site_sketches is not None else {}
+        self._categorized_frames: dict[tuple[str, ...], tuple[pd.DataFrame, BitmapIndex]] = {}
+        self._indexes: dict[str, BitmapIndex] = {}
+        self._support: dict["SupportMatrix", pd.Categorical] = {}
+
+    @classmethod
+    def from_dataframe(
+        cls: type[t.Self], df: pd.DataFrame, column_headers: dict[str, str], disk_edges: tuple[int, ...] | None = None
+    ) -> t.Self:
+        """Aggregate an inventory DataFrame into a cube.
+
+        Args:
+            df (pd.DataFrame): inventory with one row per VM
+            column_headers (dict[str, str]): mapping of column keys to the headers used in df
+            disk_edges (tuple[int, ...] | None, optional): edges from adaptive_disk_edges to bin disks by,
+              see Cube.assign_adaptive_disk_ranges. Defaults to the intervals of the fixed disk space ranges.
+
+        Returns:
+            Cube: Cube with one row per distinct combination of Cube.DIMENSIONS
+        """
+        disk = to_numeric(df[column_headers["vmDisk"]])
+        data = pd.DataFrame(
+            {
+                "OS Name": column_or_empty(df, "OS Name"),
+                "OS Version": column_or_empty(df, "OS Version"),
+                "Architecture": column_or_empty(df, "Architecture"),
+                "Environment": column_or_empty(df, column_headers["environment"]),
+                "Site Name": column_or_empty(df, "Site Name"),
+                "Disk Bin": disk_bins(disk) if disk_edges is None else adaptive_disk_bins(disk, disk_edges),
+                "Memory": to_numeric(df[column_headers["vmMemory"]]),
+                "Disk": disk,
+                "CPU": to_numeric(df[column_headers["vCPU"]]),
+                "Disk TiB": np.ceil(disk.fillna(0) / 1024).astype(int),
+            },
+            index=df.index,
+        )
+
+        ids, first_rows = group_ids([data[dimension] for dimension in cls.DIMENSIONS], sort=False, dropna=False)
+        frame = data.iloc[first_rows][list(cls.DIMENSIONS)].reset_index(drop=True)
+        frame["Count"] = np.bincount(ids, minlength=len(first_rows))
+        for measure in ("Memory", "Disk", "CPU", "Disk TiB"):
+            frame[measure] = bincount_sum(ids, data[measure], len(first_rows))
+        frame["Disk Max"] = bincount_max(ids, data["Disk"], len(first_rows))
+
+        # Reports drop VMs whose fractional disk size is above the truncated maximum of the data they cover,
+        # so count the VMs that share the integer part of their cell's maximum for that adjustment.
+        cell_max = frame["Disk Max"].to_numpy(dtype=float)[ids]
+        disk_values = disk.to_numpy(dtype=float, na_value=np.nan)
+        top_fraction = (np.floor(disk_values) == np.floor(cell_max)) & (disk_values % 1 != 0)
+        frame["Disk Top Fraction"] = np.bincount(ids, weights=top_fraction, minlength=len(frame)).astype(int)
+
+        sketches = {measure: QuantileSketch().update(data[measure].to_numpy(dtype=float)) for measure in cls.SKETCHED}
+
+        LOGGER.debug("Aggregated %d rows into a cube of %d cells", len(df), len(frame))
+        return cls(frame, sketches)
+
+    @classmethod
+    def merge(cls: type[t.Self], cubes: Iterable["Cube"]) -> t.Self:
+        """Combine cubes of separate inventories into the cube of all of them.
+
+        Args:
+            cubes (Iterable[Cube]): cubes to merge
+
+        Returns:
+            Cube: Cube with one row per distinct combination of Cube.DIMENSIONS across all cubes
+        """
+        cubes = list(cubes)
+        if not cubes:
+            raise ValueError("At least one cube is required to merge")
+        data = pd.concat([cube.frame for cube in cubes], ignore_index=True)
+
+        ids, first_rows = group_ids([data[dimension] for dimension in cls.DIMENSIONS], sort=False, dropna=False)
+        frame = data.iloc[first_rows][list(cls.DIMENSIONS)].reset_index(drop=True)
+        for measure in ("Count", "Memory", "Disk", "CPU", "Disk TiB"):
+            frame[measure] = bincount_sum(ids, data[measure], len(first_rows))
+        frame["Disk Max"] = bincount_max(ids, data["Disk Max"], len(first_rows))
+
+        # VMs sharing the integer part of a merged cell's maximum can only come from cells with the same maximum
+        cell_max = frame["Disk Max"].to_numpy(dtype=float)[ids]
+        same_max = np.floor(data["Disk Max"].to_numpy(dtype=float)) == np.floor(cell_max)
+        top_fraction = np.where(same_max, data["Disk Top Fraction"].to_numpy(), 0)
+        frame["Disk Top Fraction"] = np.bincount(ids, weights=top_fraction, minlength=len(frame)).astype(int)
+
+        sketches = {measure: QuantileSketch() for measure in cls.SKETCHED}
+        site_sketches: dict[t.Hashable, dict[str, QuantileSketch]] = {}
+        for cube in cubes:
+            for measure, sketch in sketches.items():
+                sketch.merge(cube.sketches[measure])
+            for site, measures in cube.site_sketches.items():
+                merged = site_sketches.setdefault(site, {measure: QuantileSketch() for measure in cls.SKETCHED})
+                for measure, sketch in measures.items():
+                    merged[measure].merge(sketch)
+
+        LOGGER.debug("Merged %d cubes into a cube of %d cells", len(cubes), len(frame))
+        return cls(frame, sketches, site_sketches)
+
+    def environment_filtered(
+        self: t.Self, prod_envs: list[str], env_column: str, env_filter: str | None = None
+    ) -> pd.DataFrame:
+        """Create copy of the cube frame, with environment replaced with category, and filtered by requested filter
+
+        Args:
+            prod_envs (list[str]): list of environment labels defined as prod. (all other labels will be non-prod)
+            env_column (str): name to give the environment category column
+            env_filter (str | None, optional): filter to apply to environment column. Defaults to None.
+
+        Returns:
+            pd.DataFrame: cube frame filtered by env_filter with the environment column named env_column
+        """
+        selection = Bitmap.full(len(self.frame))
+        if env_filter and env_filter not in ["all", "both"]:
+            selection = self.environment_index(prod_envs, env_column).get(env_filter)
+
+        return self.select(selection, prod_envs, env_column)
+
+    def select(
+        self: t.Self, selection: Bitmap, prod_envs: list[str] | None = None, env_column: str | None = None
+    ) -> pd.DataFrame:
+        """Create copy of the cells of the cube frame in selection.
+
+        Args:
+            selection (Bitmap): cells to copy, e.g. an AND of bitmaps of Cube.index
+            prod_envs (list[str] | None, optional): environment labels defined as prod, to replace environment
+              with category as in Cube.environment_filtered. Defaults to None, keeping environment.
+            env_column (str | None, optional): name to give the environment category column. Defaults to None.
+
+        Returns:
+            pd.DataFrame: cube rows in selection, in cube order
+        """
+        frame = self.frame if prod_envs is None else self._categorized(prod_envs, env_column)[0]
+        return frame.iloc[selection.rows()]
+
+    def index(self: t.Self, dimension: str) -> BitmapIndex:
+        """Bitmap index of the cells of each value of a dimension, built the first time it is used.
+
+        Args:
+            dimension (str): one of Cube.DIMENSIONS, e.g. OS Name, OS Version or Site Name
+
+        Returns:
+            BitmapIndex: bitmap of the cells of each value of dimension
+        """
+        if dimension not in self._indexes:
+            self._indexes[dimension] = BitmapIndex(self.frame[dimension])
+        return self._indexes[dimension]
+
+    def environment_index(self: t.Self, prod_envs: list[str], env_column: str = "Environment") -> BitmapIndex:
+        """Bitmap index of the cells of each environment category, prod or non-prod.
+
+        Args:
+            prod_envs (list[str]): list of environment labels defined as prod. (all other labels will be non-prod)
+            env_column (str, optional): name of the environment category column of Cube.select.
+              Defaults to "Environment".
+
+        Returns:
+            BitmapIndex: bitmap of the cells of each environment category
+        """
+        return self._categorized(prod_envs, env_column)[1]
+
+    def _categorized(self: t.Self, prod_envs: list[str], env_column: str) -> tuple[pd.DataFrame, BitmapIndex]:
+        """Cube frame with environment replaced with category, and the bitmap index of the categories."""
+        # Reports run in the same invocation share the categorized cube for their prod labels
+        key = tuple(prod_envs)
+        if key not in self._categorized_frames:
+            categorized = self.frame.drop(columns="Environment")
+            # Categorize each distinct environment once rather than once per cell
+            codes, environments = pd.factorize(self.frame["Environment"], use_na_sentinel=False)
+            categories = np.array(
+                [categorize_environment(env, prod_envs=prod_envs) for env in environments], dtype=object
+            )
+            categorized[env_column] = categories[codes]
+            self._categorized_frames[key] = (categorized, BitmapIndex(categorized[env_column]))
+        return self._categorized_frames[key]
+
+    def support(self: t.Self, matrix: "SupportMatrix") -> pd.Categorical:
+        """Support status of every cell, classified once per matrix, see SupportMatrix.classify.
+
+        Args:
+            matrix (SupportMatrix): matrix to classify the cells with
+
+        Returns:
+            pd.Categorical: support status of every cell, in cube order
+        """
+        if matrix not in self._support:
+            self._support[matrix] = matrix.classify(
+                *(column_or_empty(self.frame, column) for column in ("OS Name", "OS Version", "Architecture"))
+            )
+        return self._support[matrix]
+
+    def site_usage(self: t.Self) -> pd.DataFrame:
+        """Roll the cube up by Site Name, with disk summed in TiB rounded up per VM.
+
+        Returns:
+            pd.DataFrame: Site Name, memory, disk, CPU and VM count for each site
+        """
+        return grouped_sum(self.frame, "Site Name", ["Memory", "Disk TiB", "CPU", "Count"]).reset_index()
+
+    def site_statistics(
+        self: t.Self, support_matrix: "SupportMatrix", quantiles: pd.DataFrame | None = None
+    ) -> pd.DataFrame:
+        """Roll the cube up by Site Name into the totals of Cube.site_usage and the distribution of each resource.
+
+        Means are exact, over the VMs with a value for the resource. Maximums are exact. Medians and
+        95th percentiles are taken from quantiles when the inventory rows are at hand, otherwise they are
+        estimated from the site's sketches within const.SKETCH_RELATIVE_ACCURACY of the value of the VM at
+        the quantile's rank. Only cubes of summaries have sketches per site, without them every statistic
+        per VM is NaN.
+
+        Args:
+            support_matrix (SupportMatrix): matrix to count the supported and unsupported OS VMs by
+            quantiles (pd.DataFrame | None, optional): counts, quantiles and maximums of each site from
+              site_quantiles. Defaults to None, estimating them from the sketches.
+
+        Returns:
+            pd.DataFrame: Site Name, the columns of Cube.site_usage, supported and unsupported OS VM counts,
+              and the mean, median, 95th percentile and maximum of memory, CPU and disk per VM of each site
+        """
+        supported = np.asarray(self.support(support_matrix) == const.SUPPORT_STATUSES[0])
+        frame = self.frame.assign(
+            Supported=np.where(supported, self.frame["Count"], 0),
+            Unsupported=np.where(supported, 0, self.frame["Count"]),
+        )
+        statistics = grouped_sum(
+            frame, "Site Name", ["Memory", "Disk TiB", "CPU", "Count", "Supported", "Unsupported", "Disk"]
+        )
+        if quantiles is None:
+            quantiles = self._sketched_site_quantiles(statistics.index)
+        quantiles = quantiles.reindex(statistics.index)
+        for measure in ("Memory", "CPU", "Disk"):
+            counts = quantiles[f"{measure} Count"].fillna(0).to_numpy(dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                statistics[f"{measure} Mean"] = np.where(counts > 0, statistics[measure] / counts, np.nan)
+            for name in SITE_QUANTILES:
+                statistics[f"{measure} {name}"] = quantiles[f"{measure} {name}"]
+            statistics[f"{measure} Max"] = quantiles[f"{measure} Max"]
+        return statistics.drop(columns="Disk").reset_index()
+
+    def _sketched_site_quantiles(self: t.Self, sites: pd.Index) -> pd.DataFrame:
+        """Estimate the quantiles of the SKETCHED measures of the VMs of every site from the sketches per site.
+
+        Args:
+            sites (pd.Index): Site Names, a site without sketches has NaN quantiles and a count of 0
+
+        Returns:
+            pd.DataFrame: the same columns as site_quantiles, indexed by Site Name
+        """
+        empty = {measure: QuantileSketch() for measure in self.SKETCHED}
+        sketches = [self.site_sketches.get(site, empty) for site in sites]
+        columns = {}
+        for measure in self.SKETCHED:
+            measure_sketches = [site_sketches[measure] for site_sketches in sketches]
+            columns[f"{measure} Count"] = [sketch.count for sketch in measure_sketches]
+            for name, q in SITE_QUANTILES.items():
+                columns[f"{measure} {name}"] = [sketch.quantile(q) for sketch in measure_sketches]
+            columns[f"{measure} Max"] = [sketch.max if sketch.count else np.nan for sketch in measure_sketches]
+        return pd.DataFrame(columns, index=sites)
+
+    @staticmethod
+    def assign_disk_ranges(
+        frame: pd.DataFrame, disk_space_ranges: list[tuple[int, int]], max_disk_space: int
+    ) -> pd.DataFrame:
+        """Label cube cells with the disk space range their VMs fall into.
+
+        Ranges are applied in order, so a later range takes precedence where ranges overlap.
+        Cells holding VMs above max_disk_space are split so those VMs are left unlabelled.
+
+        Args:
+            frame (pd.DataFrame): cube frame, or a filtered copy of one
+            disk_space_ranges (list[tuple[int, int]]): ranges from Analyzer.generate_dynamic_ranges
+            max_disk_space (int): the truncated largest disk size used to generate the ranges
+
+        Returns:
+            pd.DataFrame: cube rows with a "Disk Space Range" column, excluding unlabelled VMs
+        """
+        bins = frame["Disk Bin"].to_numpy()
+        lower, upper = np.divmod(bins, len(DISK_UPPER_BOUNDS) + 1)
+        valid = bins >= 0
+        above_max = np.where(
+            np.floor(frame["Disk Max"].to_numpy(dtype=float)) == max_disk_space, frame["Disk Top Fraction"], 0
+        )
+
+        labels = np.full(len(frame), None, dtype=object)
+        above_max_labels = np.full(len(frame), None, dtype=object)
+        for range_start, range_end in disk_space_ranges:
+            in_range = valid & (lower > _bound_index(DISK_LOWER_BOUNDS, range_start))
+            if range_end in DISK_UPPER_BOUNDS:
+                in_range &= upper <= _bound_index(DISK_UPPER_BOUNDS, range_end)
+                labels[in_range] = above_max_labels[in_range] = f"{range_start}-{range_end} GiB"
+            elif range_end == max_disk_space:
+                labels[in_range] = f"{range_start}-{range_end} GiB"
+            else:
+                raise ValueError(f"Disk space range ({range_start}, {range_end}) is not supported by the cube")
+
+        labelled = pd.concat(
+            [
+                frame.assign(Count=frame["Count"] - above_max, **{"Disk Space Range": labels}),
+                frame.assign(Count=above_max, **{"Disk Space Range": above_max_labels}),
+            ],
+            ignore_index=True,
+        )
+        return labelled[(labelled["Count"] > 0) & labelled["Disk Space Range"].notna()]
+
+    @staticmethod
+    def assign_adaptive_disk_ranges(frame: pd.DataFrame, disk_edges: tuple[int, ...]) -> pd.DataFrame:
+        """Label the cells of a cube built with disk_edges with the disk space range of their bin.
+
+        Args:
+            frame (pd.DataFrame): frame of a cube built with disk_edges, or a filtered copy of one
+            disk_edges (tuple[int, ...]): edges the cube was built with
+
+        Returns:
+            pd.DataFrame: cube rows with a "Disk Space Range" column, excluding VMs without disk data
+        """
+        labels = np.array(
+            [
+                f"{lower + 1 if index else lower}-{upper} GiB"
+                for index, (lower, upper) in enumerate(zip(disk_edges[:-1], disk_edges[1:]))
+            ],
+            dtype=object,
+        )
+        frame = frame[frame["Disk Bin"] >= 0]
+        return frame.assign(**{"Disk Space Range": labels[frame["Disk Bin"].to_numpy()]})
+
+
+def group_ids(keys: list[pd.Series], sort: bool = True, dropna: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """Number the groups of rows sharing the same keys, like DataFrame.groupby(...).ngroup().
+
+    Each key is converted to integer codes once, and the codes are combined into a single mixed-radix
+    code per row, so grouping costs a few passes of integer arithmetic instead of hashing row tuples.
+
+    Args:
+        keys (list[pd.Series]): columns to group by, of equal length
+        sort (bool, optional): number groups in sorted key order, otherwise by first appearance. Defaults to True.
+        dropna (bool, optional): leave rows with a missing key out of every group. Defaults to True.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: group of each row, -1 for rows left out, and the first row of each group
+    """
+    return _group_codes([pd.factorize(key, sort=sort, use_na_sentinel=dropna)[0] for key in keys], sort)
+
+
+def grouped_sum(
+    frame: pd.DataFrame, by: str | list[str], columns: str | list[str] = "Count", sort: bool = True
+) -> pd.Series | pd.DataFrame:
+    """Sum columns per group, like frame.groupby(by, sort=sort)[columns].sum(), with np.bincount.
+
+    Args:
+        frame (pd.DataFrame): cube frame, or a filtered copy of one
+        by (str | list[str]): column or columns to group by. Rows with a missing key are left out.
+        columns (str | list[str], optional): column or columns to sum. Defaults to "Count".
+        sort (bool, optional): sort groups by key, otherwise keep the order they first appear in. Defaults to True.
+
+    Returns:
+        pd.Series | pd.DataFrame: sums indexed by the keys, a Series if columns is a single column
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    codes, uniques = zip(*(pd.factorize(frame[key], sort=sort) for key in keys))
+    ids, first_rows = _group_codes(list(codes), sort)
+    # The keys of each group are its first row's codes into the uniques, which become the index levels
+    if isinstance(by, str):
+        index = uniques[0].take(codes[0][first_rows]).rename(by)
+    else:
+        index = pd.MultiIndex(
+            levels=list(uniques),
+            codes=[key_codes[first_rows] for key_codes in codes],
+            names=keys,
+            verify_integrity=False,
+        )
+
+    valid = ids >= 0 if (ids < 0).any() else None
+    sums = {
+        column: bincount_sum(ids, frame[column], len(first_rows), valid)
+        for column in ([columns] if isinstance(columns, str) else columns)
+    }
+    if isinstance(columns, str):
+        return pd.Series(sums[columns], index=index, name=columns)
+    return pd.DataFrame(sums, index=index)
+
+
+def _group_codes(codes: list[np.ndarray], sort: bool) -> tuple[np.ndarray, np.ndarray]:
+    """Number the groups of rows sharing the same codes, see group_ids. Rows with a negative code are left out."""
+    rows = len(codes[0])
+    combined = np.zeros(rows, dtype=np.int64)
+    missing = np.zeros(rows, dtype=bool)
+    radix = 1
+    for key_codes in codes:
+        missing |= key_codes < 0
+        size = int(key_codes.max(initial=0)) + 1
+        if radix * size >= _MAX_COMBINED_CODE:
+            # Renumber the combinations seen so far, which keeps their order, before the code overflows
+            _, combined = np.unique(combined, return_inverse=True)
+            radix = int(combined.max(initial=0)) + 1
+        combined = combined * size + np.maximum(key_codes, 0)
+        radix *= size
+
+    valid = np.flatnonzero(~missing) if missing.any() else np.arange(rows)
+    ids = np.full(rows, -1, dtype=np.int64)
+    ids[valid], first = _number_groups(combined[valid], radix, sort)
+    return ids, valid[first]
+
+
+def _number_groups(combined: np.ndarray, radix: int, sort: bool) -> tuple[np.ndarray, np.ndarray]:
+    """Number the distinct codes of combined, in code order or order of appearance.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: group of each code and the position each group first appears at
+    """
+    if radix > max(len(combined), _MAX_DENSE_CODES):
+        _, first, inverse = np.unique(combined, return_index=True, return_inverse=True)
+    else:
+        # Codes are dense enough to index a table of every possible code, avoiding a sort of the rows
+        first_by_code = np.full(radix, len(combined))
+        # Assigned in reverse, so the first position of each code is written last
+        first_by_code[combined[::-1]] = np.arange(len(combined) - 1, -1, -1)
+        present = np.flatnonzero(first_by_code < len(combined))
+        lookup = np.empty(radix, dtype=np.int64)
+        lookup[present] = np.arange(len(present))
+        first, inverse = first_by_code[present], lookup[combined]
+
+    if not sort:
+        # Groups are numbered in code order, renumber them in order of appearance
+        order = np.argsort(first, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        inverse = rank[inverse]
+        first = first[order]
+    return inverse, first
+
+
+def bincount_sum(ids: np.ndarray, values: pd.Series, groups: int, rows: np.ndarray | None = None) -> np.ndarray:
+    """Sum values per group, skipping missing values and keeping integer columns integer.
+
+    Only the rows selected by the boolean mask rows are summed, if given.
+    """
+    weights = np.nan_to_num(values.to_numpy(dtype=float, na_value=np.nan))
+    if rows is not None:
+        ids, weights = ids[rows], weights[rows]
+    sums = np.bincount(ids, weights=weights, minlength=groups)
+    if values.dtype.kind in "iub":
+        return sums.astype(np.int64)
+    return sums
+
+
+def bincount_max(ids: np.ndarray, values: pd.Series, groups: int) -> np.ndarray:
+    """Maximum of values per group, NaN for groups without values."""
+    maxima = np.full(groups, np.nan)
+    np.fmax.at(maxima, ids, values.to_numpy(dtype=float, na_value=np.nan))
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in "iu":
+        return maxima.astype(values.dtype)
+    return maxima
+
+
+def sketch_sites(sites: pd.Series, measures: dict[str, pd.Series]) -> dict[t.Hashable, dict[str, QuantileSketch]]:
+    """Sketch the measures of the VMs of every site, see QuantileSketch.grouped.
+
+    Args:
+        sites (pd.Series): Site Name of each VM, VMs without a site are left out
+        measures (dict[str, pd.Series]): values of each VM, by measure
+
+    Returns:
+        dict[t.Hashable, dict[str, QuantileSketch]]: sketch of each measure, by site
+    """
+    ids, first_rows = group_ids([sites], sort=False)
+    site_names = sites.iloc[first_rows].tolist()
+    sketches = {
+        measure: QuantileSketch.grouped(ids, values.to_numpy(dtype=float, na_value=np.nan), len(first_rows))
+        for measure, values in measures.items()
+    }
+    return {site: {measure: sketches[measure][group] for measure in measures} for group, site in enumerate(site_names)}
+
+
+def site_quantiles(sites: pd.Series, measures: dict[str, pd.Series]) -> pd.DataFrame:
+    """Compute the exact quantiles of the measures of the VMs of every site, see Cube.site_statistics.
+
+    Args:
+        sites (pd.Series): Site Name of each VM, VMs without a site are left out
+        measures (dict[str, pd.Series]): values of each VM, by measure
+
+    Returns:
+        pd.DataFrame: the number of VMs with a value, the SITE_QUANTILES and the maximum of each measure,
+          named like "Memory Count", "Memory P50" and "Memory Max", indexed by Site Name
+    """
+    values = pd.DataFrame(
+        {measure: values.to_numpy(dtype=float, na_value=np.nan) for measure, values in measures.items()}
+    )
+    grouped = values.groupby(sites.to_numpy(), sort=False)
+    columns = {}
+    for measure in measures:
+        columns[f"{measure} Count"] = grouped[measure].count()
+        for name, q in SITE_QUANTILES.items():
+            columns[f"{measure} {name}"] = grouped[measure].quantile(q)
+        columns[f"{measure} Max"] = grouped[measure].max()
+    return pd.DataFrame(columns).rename_axis("Site Name")
+
+
+def disk_space_range_counts(cubes: list[Cube]) -> pd.DataFrame:
+    """Count the VMs of several cubes in the fixed GiB disk space ranges, e.g. of snapshots of an inventory.
+
+    The open-ended last range ends at the largest disk of any cube rounded up, so every cube is counted
+    in the same ranges and no VM with a fractional disk size is left out.
+
+    Args:
+        cubes (list[Cube]): cubes to count
+
+    Returns:
+        pd.DataFrame: counts with one row per cube and one column per range, no columns if no cube has disk data
+    """
+    disk_max = pd.concat([cube.frame["Disk Max"] for cube in cubes]).max()
+    if pd.isna(disk_max):
+        return pd.DataFrame(index=range(len(cubes)), columns=pd.Index([], name="Disk Space Range"), dtype=int)
+
+    max_disk_space = int(np.ceil(disk_max))
+    disk_space_ranges = list(const.DISK_SPACE_RANGES["gb"]) + [(100001, max_disk_space)]
+    labels = pd.Index([f"{start}-{end} GiB" for start, end in disk_space_ranges], name="Disk Space Range")
+    return pd.DataFrame(
+        [
+            grouped_sum(Cube.assign_disk_ranges(cube.frame, disk_space_ranges, max_disk_space), "Disk Space Range")
+            .reindex(labels, fill_value=0)
+            .to_numpy()
+            for cube in cubes
+        ],
+        columns=labels,
+    )
+
+
+def adaptive_disk_edges(sketch: QuantileSketch, bins: int) -> tuple[int, ...]:
+    """Choose disk space range edges that split the VMs of a disk sketch into bins of similar size.
+
+    Edges are quantiles of the sketch rounded to two significant digits, so ranges are readable
+    and follow the distribution on a log scale. Quantiles that round to the same edge are merged,
+    so there may be fewer than bins ranges.
+
+    Args:
+        sketch (QuantileSketch): sketch of the disk size of every VM
+        bins (int): number of ranges to aim for
+
+    Returns:
+        tuple[int, ...]: increasing edges from 0 to the largest disk rounded up, empty if the sketch is empty
+    """
+    if not sketch.count:
+        return ()
+    largest = max(int(np.ceil(sketch.max)), 1)
+    edges = {0, largest}
+    for q in np.linspace(0, 1, bins + 1)[1:-1]:
+        value = sketch.quantile(q)
+        if value >= 1:
+            digits = 1 - int(np.floor(np.log10(value)))
+            edges.add(min(int(round(value, digits)), largest))
+    return tuple(sorted(edges))
+
+
+def adaptive_disk_bins(disk: pd.Series, disk_edges: tuple[int, ...]) -> np.ndarray:
+    """Assign each disk size the index of its range in disk_edges, see Cube.assign_adaptive_disk_ranges.
+
+    Args:
+        disk (pd.Series): disk sizes in GiB
+        disk_edges (tuple[int, ...]): edges from adaptive_disk_edges
+
+    Returns:
+        np.ndarray: integer codes, -1 where the disk size is missing
+    """
+    values = disk.to_numpy(dtype=float, na_value=np.nan)
+    # Ranges include their upper edge, and sizes beyond the last edge fall in the last range
+    bins = np.searchsorted(np.asarray(disk_edges[1:-1]), values, side="left")
+    bins[np.isnan(values)] = -1
+    return bins
+
+
+def disk_bins(disk: pd.Series) -> np.ndarray:
+    """Assign each disk size the code of the smallest interval no disk space range can split.
+
+    Args:
+        disk (pd.Series): disk sizes in GiB
+
+    Returns:
+        np.ndarray: integer codes, -1 where the disk size is missing
+    """
+    values = disk.to_numpy(dtype=float, na_value=np.nan)
+    lower = np.searchsorted(DISK_LOWER_BOUNDS, values, side="right")
+    upper = np.searchsorted(DISK_UPPER_BOUNDS, values, side="left")
+    bins = lower * (len(DISK_UPPER_BOUNDS) + 1) + upper
+    bins[np.isnan(values)] = -1
+    return bins
+
+
+def _bound_index(bounds: np.ndarray, value: int) -> int:
+    index = int(np.searchsorted(bounds, value))
+    if index >= len(bounds) or bounds[index] != value:
+        raise ValueError(f"Disk space range bound {value} is not supported by the cube")
+    return index
+
+
+def to_numeric(column: pd.Series) -> pd.Series:
+    """Convert a column to numbers, removing thousands separators and coercing invalid values to NaN."""
+    if pd.api.types.is_numeric_dtype(column):
+        return column
+    return pd.to_numeric(column.astype(str).str.replace(",", ""), errors="coerce")
+
+
+def column_or_empty(df: pd.DataFrame, column: str) -> pd.Series:
+    if column in df.columns:
+        return df[column]
+    return pd.Series(np.nan, index=df.index, dtype=object)
+
+
+def categorize_environment(x: str, prod_envs: list[str]) -> str:
+    """Categorize environment value based on configured prod environment labels
+
+    Args:
+        x (str): environment value to compare, passed by pandas when using per row operations
+        prod_envs (list[str]): list of environment labels to define as prod
+
+    Returns:
+        str: environment category, one of ["non-prod", "prod", "all envs"]
+    """
+    if pd.isnull(x):
+        return "non-prod"
+
+    if not prod_envs:
+        return "all envs"
+
+    # Ensure x is a string
+    if isinstance(x, str):
+        for env in prod_envs:
+            if env in x:
+                return "prod"
+
+    return "non-prod"
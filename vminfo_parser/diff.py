@@ -0,0 +1,307 @@
+# Std lib imports
+import logging
+import typing as t
+from collections.abc import Callable
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+from . import const
+from .cube import (
+    Cube,
+    column_or_empty,
+    disk_space_range_counts,
+    group_ids,
+    grouped_sum,
+    to_numeric,
+)
+from .vmdata import VMData
+
+LOGGER = logging.getLogger(__name__)
+
+# Kinds of per-VM change, in the order they are listed
+CHANGES = ("Added", "Removed", "Resized", "OS Upgraded", "Environment Moved")
+
+# Fields of _vm_fields describing the OS and the resources of a VM
+_OS_FIELDS = ["OS Name", "OS Version"]
+_RESOURCE_FIELDS = ["CPU", "Memory", "Disk"]
+
+
+class SnapshotDiff:
+    """Changes between two snapshots of an inventory, per VM and rolled up by OS, disk space range and site.
+
+    VMs are matched by the values of identity key columns, such as a VM UUID, with a hash join:
+    the keys of both snapshots are factorized together, so matching is linear in the number of rows
+    and only the key columns and the compared columns of matched rows are copied.
+    """
+
+    def __init__(
+        self: t.Self,
+        key: list[str],
+        changes: pd.DataFrame,
+        os_counts: pd.DataFrame,
+        disk_space: pd.DataFrame,
+        site_totals: pd.DataFrame | None,
+    ) -> None:
+        self.key = key
+        self.changes = changes
+        self.os_counts = os_counts
+        self.disk_space = disk_space
+        self.site_totals = site_totals
+
+    @classmethod
+    def from_vmdata(cls: type[t.Self], before: VMData, after: VMData, key: list[str] | None = None) -> t.Self:
+        """Compare two normalized snapshots of an inventory.
+
+        Args:
+            before (VMData): earlier snapshot
+            after (VMData): later snapshot
+            key (list[str] | None, optional): columns identifying a VM in both snapshots.
+              Defaults to the first of const.VM_IDENTITY_COLUMNS both snapshots have.
+
+        Returns:
+            SnapshotDiff: per-VM changes and count deltas from before to after
+
+        Raises:
+            ValueError: If a key column is missing from a snapshot.
+        """
+        key = identity_key(before, after, key)
+        changes = _vm_changes(before, after, key)
+        site_totals = None
+        if "Site Name" in before.df.columns and "Site Name" in after.df.columns:
+            site_totals = _site_deltas(before.cube, after.cube)
+        LOGGER.debug("Found %d changes to VMs matched on %s", len(changes), key)
+        return cls(
+            key,
+            changes,
+            _count_deltas(
+                grouped_sum(before.cube.frame, "OS Name", sort=False),
+                grouped_sum(after.cube.frame, "OS Name", sort=False),
+            ),
+            _disk_space_deltas(before.cube, after.cube),
+            site_totals,
+        )
+
+    def change_counts(self: t.Self) -> pd.Series:
+        """Number of VMs with each kind of change.
+
+        Returns:
+            pd.Series: counts indexed by the kinds of CHANGES
+        """
+        return self.changes["Change"].value_counts().reindex(CHANGES, fill_value=0).rename_axis("Change")
+
+
+def identity_key(before: VMData, after: VMData, key: list[str] | None = None) -> list[str]:
+    """Columns identifying a VM in both snapshots.
+
+    Args:
+        before (VMData): earlier snapshot
+        after (VMData): later snapshot
+        key (list[str] | None, optional): requested key columns. Defaults to None.
+
+    Returns:
+        list[str]: key, or the first of const.VM_IDENTITY_COLUMNS both snapshots have
+
+    Raises:
+        ValueError: If a key column is missing from a snapshot, or no identity column is found.
+    """
+    if key is None:
+        for column in const.VM_IDENTITY_COLUMNS:
+            if column in before.df.columns and column in after.df.columns:
+                return [column]
+        raise ValueError(
+            "Neither snapshot has a VM identity column (%s), set the key columns with --diff-key"
+            % ", ".join(const.VM_IDENTITY_COLUMNS)
+        )
+    missing = [column for column in key if column not in before.df.columns or column not in after.df.columns]
+    if missing:
+        raise ValueError(f"Key columns {missing} are missing from a snapshot")
+    return list(key)
+
+
+def _vm_changes(before: VMData, after: VMData, key: list[str]) -> pd.DataFrame:
+    """List the changes of every VM, one row per VM and kind of change.
+
+    Returns:
+        pd.DataFrame: key columns, "Change", and "Before" and "After" descriptions of what changed
+    """
+    before_rows, after_rows, keys = _match_rows(before.df[key], after.df[key])
+    added = np.flatnonzero((before_rows < 0) & (after_rows >= 0))
+    removed = np.flatnonzero((before_rows >= 0) & (after_rows < 0))
+    matched = np.flatnonzero((before_rows >= 0) & (after_rows >= 0))
+
+    old = _vm_fields(before, before_rows[matched])
+    new = _vm_fields(after, after_rows[matched])
+    resized = _differs(old["CPU"], new["CPU"]) | _differs(old["Memory"], new["Memory"])
+    resized |= _differs(old["Disk"], new["Disk"])
+    upgraded = _differs(old["OS Name"], new["OS Name"]) | _differs(old["OS Version"], new["OS Version"])
+    moved = _differs(old["Environment"], new["Environment"])
+
+    added_fields = _vm_fields(after, after_rows[added])
+    removed_fields = _vm_fields(before, before_rows[removed])
+    # Groups are listed by kind of change, in the order of CHANGES
+    parts = [
+        (added, None, _describe(added_fields, _OS_FIELDS, _describe_os)),
+        (removed, _describe(removed_fields, _OS_FIELDS, _describe_os), None),
+        (
+            matched[resized],
+            _describe(_take(old, resized), _RESOURCE_FIELDS, _describe_resources),
+            _describe(_take(new, resized), _RESOURCE_FIELDS, _describe_resources),
+        ),
+        (
+            matched[upgraded],
+            _describe(_take(old, upgraded), _OS_FIELDS, _describe_os),
+            _describe(_take(new, upgraded), _OS_FIELDS, _describe_os),
+        ),
+        (matched[moved], old["Environment"][moved], new["Environment"][moved]),
+    ]
+    frames = [
+        keys.iloc[groups]
+        .reset_index(drop=True)
+        .assign(
+            Change=change,
+            Before=np.full(len(groups), "", dtype=object) if old_values is None else old_values,
+            After=np.full(len(groups), "", dtype=object) if new_values is None else new_values,
+        )
+        for change, (groups, old_values, new_values) in zip(CHANGES, parts)
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _match_rows(before_keys: pd.DataFrame, after_keys: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, pd.DataFrame]:
+    """Hash join the rows of two snapshots on their key columns.
+
+    Args:
+        before_keys (pd.DataFrame): key columns of the earlier snapshot
+        after_keys (pd.DataFrame): key columns of the later snapshot
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, pd.DataFrame]: row of each distinct key in each snapshot, -1 where
+          the snapshot doesn't have the key, and the key values
+    """
+    keys = pd.concat([before_keys, after_keys], ignore_index=True)
+    ids, first_rows = group_ids([keys[column] for column in keys.columns], sort=False)
+    missing = int((ids < 0).sum())
+    if missing:
+        LOGGER.warning("Ignoring %d VMs without a value for every key column %s", missing, list(keys.columns))
+    positions = [
+        _first_rows(ids[: len(before_keys)], len(first_rows)),
+        _first_rows(ids[len(before_keys) :], len(first_rows)),
+    ]
+    return positions[0], positions[1], keys.iloc[first_rows].reset_index(drop=True)
+
+
+def _first_rows(ids: np.ndarray, groups: int) -> np.ndarray:
+    """First row of each group in ids, -1 for groups without a row. Later rows of a group are ignored."""
+    rows = np.flatnonzero(ids >= 0)
+    duplicates = len(rows) - int(np.count_nonzero(np.bincount(ids[rows], minlength=groups)))
+    if duplicates:
+        LOGGER.warning("Ignoring %d VMs with the same key as an earlier VM of the snapshot", duplicates)
+    first_rows = np.full(groups, -1, dtype=np.int64)
+    # Assigned in reverse, so the first row of each group is written last
+    first_rows[ids[rows[::-1]]] = rows[::-1]
+    return first_rows
+
+
+def _vm_fields(vm_data: VMData, rows: np.ndarray) -> dict[str, np.ndarray]:
+    """OS, environment and resources in GiB of the given rows of a snapshot.
+
+    The fields are kept as arrays, as building DataFrames of them would convert every string again.
+    """
+    df = vm_data.df
+    return {
+        "OS Name": column_or_empty(df, "OS Name").to_numpy(dtype=object)[rows],
+        "OS Version": column_or_empty(df, "OS Version").to_numpy(dtype=object)[rows],
+        "Environment": df[vm_data.column_headers["environment"]].to_numpy(dtype=object)[rows],
+        "CPU": to_numeric(df[vm_data.column_headers["vCPU"]]).to_numpy(dtype=float)[rows],
+        "Memory": to_numeric(df[vm_data.column_headers["vmMemory"]]).to_numpy(dtype=float)[rows],
+        "Disk": to_numeric(df[vm_data.column_headers["vmDisk"]]).to_numpy(dtype=float)[rows],
+    }
+
+
+def _take(fields: dict[str, np.ndarray], rows: np.ndarray) -> dict[str, np.ndarray]:
+    return {name: values[rows] for name, values in fields.items()}
+
+
+def _differs(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Whether values differ, treating two missing values as equal."""
+    return (old != new) & ~(pd.isna(old) & pd.isna(new))
+
+
+def _describe(
+    fields: dict[str, np.ndarray], names: list[str], describe: Callable[[dict[str, np.ndarray]], np.ndarray]
+) -> np.ndarray:
+    """Describe the given fields of every row, formatting each distinct combination of values once.
+
+    Args:
+        fields (dict[str, np.ndarray]): rows from _vm_fields
+        names (list[str]): fields the description depends on
+        describe (Callable[[dict[str, np.ndarray]], np.ndarray]): formats the rows of fields
+
+    Returns:
+        np.ndarray: description of every row
+    """
+    ids, first_rows = group_ids([pd.Series(fields[name]) for name in names], sort=False, dropna=False)
+    return describe(_take(fields, first_rows))[ids]
+
+
+def _describe_os(fields: dict[str, np.ndarray]) -> np.ndarray:
+    names = pd.Series(fields["OS Name"], dtype=object).fillna("").astype(str)
+    versions = pd.Series(fields["OS Version"], dtype=object).fillna("").astype(str)
+    return (names + " " + versions).str.strip().to_numpy(dtype=object)
+
+
+def _describe_resources(fields: dict[str, np.ndarray]) -> np.ndarray:
+    return (
+        _format_number(fields["CPU"])
+        + " vCPU, "
+        + _format_number(fields["Memory"])
+        + " GiB memory, "
+        + _format_number(fields["Disk"])
+        + " GiB disk"
+    )
+
+
+def _format_number(values: np.ndarray) -> np.ndarray:
+    """Format numbers without a trailing .0, formatting each distinct number once."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return pd.Series(uniques.astype(str)).str.removesuffix(".0").to_numpy(dtype=object)[codes]
+
+
+def _count_deltas(before: pd.Series, after: pd.Series) -> pd.DataFrame:
+    """Counts of both snapshots side by side, with their difference.
+
+    Returns:
+        pd.DataFrame: "Before", "After" and "Change" columns, in the order keys first appear in before and after
+    """
+    counts = pd.concat([before, after], axis=1, keys=["Before", "After"], sort=False).fillna(0).astype(int)
+    counts["Change"] = counts["After"] - counts["Before"]
+    return counts
+
+
+def _disk_space_deltas(before: Cube, after: Cube) -> pd.DataFrame:
+    """VM counts per disk space range of both snapshots, see disk_space_range_counts.
+
+    Returns:
+        pd.DataFrame: see _count_deltas, indexed by disk space range, without ranges empty in both snapshots
+    """
+    counts = disk_space_range_counts([before, after])
+    if counts.columns.empty:
+        LOGGER.warning("No disk space data in either snapshot")
+    deltas = _count_deltas(counts.iloc[0], counts.iloc[1])
+    return deltas[(deltas["Before"] > 0) | (deltas["After"] > 0)]
+
+
+def _site_deltas(before: Cube, after: Cube) -> pd.DataFrame:
+    """Change of the resource totals of every site, see Cube.site_usage.
+
+    Returns:
+        pd.DataFrame: VM count, memory, CPU and disk change indexed by Site Name
+    """
+    before_usage, after_usage = (cube.site_usage().set_index("Site Name") for cube in (before, after))
+    deltas = after_usage.sub(before_usage, fill_value=0)
+    deltas[["Count", "Disk TiB"]] = deltas[["Count", "Disk TiB"]].astype(int)
+    return deltas.rename(columns={"Count": "VM Count", "Disk TiB": "Disk (TiB)", "Memory": "Memory (GiB)"})[
+        ["VM Count", "Memory (GiB)", "CPU", "Disk (TiB)"]
+    ]
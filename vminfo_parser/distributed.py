@@ -0,0 +1,269 @@
+# Std lib imports
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import typing as t
+import uuid
+from collections.abc import Iterable
+from pathlib import Path
+
+from . import const
+from .partition import Partition, plan_partitions, summarize_partition
+from .summary import Summary
+
+LOGGER = logging.getLogger(__name__)
+
+_RUNS = "runs"
+_CURRENT = "current"
+_TASKS = "tasks"
+_CLAIMED = "claimed"
+_RESULTS = "results"
+_CLOSED = "closed"
+
+
+class WorkQueue:
+    """Queue of inventory partitions in a directory shared by a coordinator and its workers.
+
+    Each submitted run has its own directory of tasks, named by a run id, and the current file holds
+    the id of the latest run. Each partition is a task file. A worker claims a task by renaming it into
+    the claimed directory, which only one worker can do, and completes it by writing the Summary of the
+    partition into the results directory. Everything is written to a temporary file and renamed into place,
+    so the queue can live on shared storage mounted by workers on several hosts.
+
+    Task names are the run id and the task file, so a worker still busy with a task of an earlier run
+    can never complete a task of the current one.
+    """
+
+    def __init__(self: t.Self, directory: Path) -> None:
+        self.directory = Path(directory)
+
+    @property
+    def run_id(self: t.Self) -> str | None:
+        """Id of the latest run, None if nothing was ever submitted."""
+        try:
+            return (self.directory / _CURRENT).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def submit(self: t.Self, partitions: Iterable[Partition]) -> list[str]:
+        """Start a new run with a task for each partition, removing the tasks and results of earlier runs.
+
+        Args:
+            partitions (Iterable[Partition]): partitions from plan_partitions
+
+        Returns:
+            list[str]: names of the tasks, in partition order
+        """
+        run_id = uuid.uuid4().hex
+        for subdirectory in (_TASKS, _CLAIMED, _RESULTS):
+            (self.directory / _RUNS / run_id / subdirectory).mkdir(parents=True)
+
+        names = []
+        for index, partition in enumerate(partitions):
+            name = f"{run_id}/{index:06d}.json"
+            task = {**partition._asdict(), "path": str(Path(partition.path).absolute())}
+            _write_atomic(self._path(_TASKS, name), json.dumps(task))
+            names.append(name)
+        _write_atomic(self.directory / _CURRENT, run_id)
+        for stale in (self.directory / _RUNS).iterdir():
+            if stale.name != run_id:
+                shutil.rmtree(stale, ignore_errors=True)
+        LOGGER.debug("Submitted %d tasks to %s in run %s", len(names), self.directory, run_id)
+        return names
+
+    def claim(self: t.Self) -> tuple[str, Partition] | None:
+        """Claim the first task of the current run no other worker has claimed.
+
+        Returns:
+            tuple[str, Partition] | None: name and partition of the claimed task, or None if there is none
+        """
+        run_id = self.run_id
+        if run_id is None:
+            return None
+        try:
+            files = sorted(
+                file for file in os.listdir(self.directory / _RUNS / run_id / _TASKS) if not file.startswith(".")
+            )
+        except FileNotFoundError:
+            return None
+        for file in files:
+            name = f"{run_id}/{file}"
+            claimed = self._path(_CLAIMED, name)
+            try:
+                os.rename(self._path(_TASKS, name), claimed)
+            except FileNotFoundError:
+                # Claimed by another worker first, or the run was replaced
+                continue
+            # The claim's age is measured from its modification time, see WorkQueue.requeue_stale
+            os.utime(claimed)
+            with open(claimed, "r") as task_file:
+                task = json.load(task_file)
+            return name, Partition(**{**task, "path": Path(task["path"])})
+        return None
+
+    def complete(self: t.Self, name: str, summary: Summary) -> None:
+        """Store the result of a claimed task, unless the task was requeued or its run replaced meanwhile.
+
+        Args:
+            name (str): name of the task from WorkQueue.claim
+            summary (Summary): summary of the task's partition
+        """
+        claimed = self._path(_CLAIMED, name)
+        try:
+            if not claimed.exists():
+                raise FileNotFoundError(claimed)
+            fd, tmp_path = tempfile.mkstemp(dir=self._path(_RESULTS, name).parent, prefix=".tmp")
+        except FileNotFoundError:
+            LOGGER.warning("Dropped the result of task %s, it is no longer claimed", name)
+            return
+        os.close(fd)
+        try:
+            summary.to_file(tmp_path)
+            os.replace(tmp_path, self._path(_RESULTS, name))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        claimed.unlink(missing_ok=True)
+
+    def requeue_stale(self: t.Self, timeout: float) -> int:
+        """Return tasks claimed more than timeout seconds ago to the queue, e.g. of workers that stopped.
+
+        Args:
+            timeout (float): seconds a worker has to complete a task
+
+        Returns:
+            int: number of tasks returned to the queue
+        """
+        requeued = 0
+        run_id = self.run_id
+        if run_id is None:
+            return 0
+        for claimed in (self.directory / _RUNS / run_id / _CLAIMED).iterdir():
+            try:
+                if time.time() - claimed.stat().st_mtime > timeout:
+                    os.rename(claimed, self.directory / _RUNS / run_id / _TASKS / claimed.name)
+                    requeued += 1
+            except FileNotFoundError:
+                # Completed in the meantime
+                continue
+        if requeued:
+            LOGGER.warning("Requeued %d tasks claimed more than %s seconds ago", requeued, timeout)
+        return requeued
+
+    def results(self: t.Self, names: list[str]) -> list[Summary] | None:
+        """Read the results of tasks, if every task is complete.
+
+        Args:
+            names (list[str]): names of the tasks from WorkQueue.submit
+
+        Returns:
+            list[Summary] | None: summaries in the order of names, or None if a task isn't complete
+        """
+        paths = [self._path(_RESULTS, name) for name in names]
+        if not all(path.exists() for path in paths):
+            return None
+        return [Summary.from_file(path) for path in paths]
+
+    def close(self: t.Self) -> None:
+        """Mark the current run as finished, stopping its workers."""
+        (self.directory / _RUNS / self.run_id / _CLOSED).touch()
+
+    @property
+    def closed(self: t.Self) -> bool:
+        """Whether the current run is finished, False if nothing was ever submitted."""
+        return self.is_closed(self.run_id)
+
+    def is_closed(self: t.Self, run_id: str | None) -> bool:
+        """Whether the run is finished, False for None."""
+        return run_id is not None and (self.directory / _RUNS / run_id / _CLOSED).exists()
+
+    def _path(self: t.Self, state: str, name: str) -> Path:
+        """Path of the task file of name in the tasks, claimed or results directory of its run."""
+        run_id, file = name.split("/")
+        return self.directory / _RUNS / run_id / state / file
+
+
+def coordinate(
+    filepath: Path,
+    queue_directory: Path,
+    partition_size: int = const.DEFAULT_PARTITION_SIZE_MIB * 1024 * 1024,
+    poll_interval: float = const.QUEUE_POLL_INTERVAL,
+    claim_timeout: float = const.QUEUE_CLAIM_TIMEOUT,
+) -> Summary:
+    """Summarize an inventory file or directory with the workers of a shared work queue.
+
+    The coordinator works through the queue as well, so the summary is complete even if no worker is running.
+    The merged summary has the same cube as Summary.from_vmdata(VMData.from_file(filepath)).
+
+    Args:
+        filepath (Path): The path to the file or directory, which the workers must be able to read at the same path.
+        queue_directory (Path): directory of the work queue, shared with the workers
+        partition_size (int, optional): largest number of bytes of a CSV file to load in one partition.
+          Defaults to const.DEFAULT_PARTITION_SIZE_MIB MiB.
+        poll_interval (float, optional): seconds to wait for workers between checks.
+          Defaults to const.QUEUE_POLL_INTERVAL.
+        claim_timeout (float, optional): seconds after which a claimed task is returned to the queue.
+          Defaults to const.QUEUE_CLAIM_TIMEOUT.
+
+    Returns:
+        Summary: summary of the whole inventory
+    """
+    queue = WorkQueue(queue_directory)
+    names = queue.submit(plan_partitions(filepath, partition_size))
+    while (summaries := queue.results(names)) is None:
+        if not _work(queue):
+            queue.requeue_stale(claim_timeout)
+            time.sleep(poll_interval)
+    queue.close()
+    return Summary.merge(summaries)
+
+
+def run_worker(queue_directory: Path, poll_interval: float = const.QUEUE_POLL_INTERVAL) -> int:
+    """Complete tasks of a shared work queue until the coordinator closes its run.
+
+    A worker started after a run finished, e.g. before the coordinator of the next run, waits for the next run.
+
+    Args:
+        queue_directory (Path): directory of the work queue, shared with the coordinator
+        poll_interval (float, optional): seconds to wait for tasks between checks.
+          Defaults to const.QUEUE_POLL_INTERVAL.
+
+    Returns:
+        int: number of tasks completed
+    """
+    queue = WorkQueue(queue_directory)
+    run_id = queue.run_id
+    finished_run = run_id if queue.is_closed(run_id) else None
+    completed = 0
+    while not ((run_id := queue.run_id) != finished_run and queue.is_closed(run_id)):
+        if _work(queue):
+            completed += 1
+        else:
+            time.sleep(poll_interval)
+    LOGGER.info("Completed %d tasks of %s", completed, queue_directory)
+    return completed
+
+
+def _work(queue: WorkQueue) -> bool:
+    """Claim and complete one task, returning whether there was a task to claim."""
+    task = queue.claim()
+    if task is None:
+        return False
+    name, partition = task
+    queue.complete(name, summarize_partition(partition))
+    return True
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Write a file atomically, so workers never read a partial task, see ReportCache._write."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as tmp_file:
+            tmp_file.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
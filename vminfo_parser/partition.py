@@ -0,0 +1,146 @@
+# Std lib imports
+import glob
+import io
+import logging
+import os
+import typing as t
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# 3rd party imports
+import pandas as pd
+
+from . import const
+from .summary import Summary
+from .vmdata import VMData
+
+LOGGER = logging.getLogger(__name__)
+
+# Same order as VMData._compile_df_from_directory, as reports keep the order OS names first appear in
+_DIRECTORY_FILE_EXTENSIONS = (".xls", ".xlsx", ".csv")
+
+
+class Partition(t.NamedTuple):
+    """Part of an inventory loaded by one worker: a whole file, or a byte range of the rows of a CSV file."""
+
+    path: Path
+    start: int = 0
+    end: int | None = None
+    encoding: str | None = None
+    delimiter: str | None = None
+
+
+def plan_partitions(filepath: Path, partition_size: int) -> list[Partition]:
+    """Split an inventory file or directory into partitions of about partition_size bytes.
+
+    Every file is a partition of its own, and CSV files larger than partition_size are split into
+    byte ranges aligned to line boundaries. Excel files can't be read in parts, so they are loaded whole.
+
+    Args:
+        filepath (Path): The path to the file or directory.
+        partition_size (int): largest number of bytes of a CSV file to load in one partition
+
+    Returns:
+        list[Partition]: partitions in the order of the rows of VMData.from_file(filepath)
+    """
+    if os.path.isdir(filepath):
+        files = [Path(file) for ext in _DIRECTORY_FILE_EXTENSIONS for file in glob.glob(f"{filepath}/*" + ext)]
+        if not files:
+            LOGGER.critical("Directory included neither CSV or Excel files")
+            exit()
+    else:
+        files = [Path(filepath)]
+
+    partitions = []
+    for file in files:
+        size = os.stat(file).st_size
+        if size <= partition_size or not _is_csv(file):
+            partitions.append(Partition(file))
+            continue
+        encoding = VMData._detect_encoding(file)
+        if encoding is None or encoding.lower().startswith(("utf-16", "utf-32")):
+            # Line boundaries can only be found in the bytes of ASCII compatible encodings
+            partitions.append(Partition(file))
+            continue
+        delimiter = VMData._detect_delimiter(file, encoding)
+        partitions.extend(
+            Partition(file, start, min(start + partition_size, size), encoding, delimiter)
+            for start in range(0, size, partition_size)
+        )
+    LOGGER.debug("Split %s into %d partitions", filepath, len(partitions))
+    return partitions
+
+
+def read_partition(partition: Partition) -> VMData:
+    """Load and normalize the rows of a partition.
+
+    A byte range holds the rows starting inside it, read with the header row of its file.
+    Quoted values spanning several lines are not supported in split files.
+
+    Args:
+        partition (Partition): partition from plan_partitions
+
+    Returns:
+        VMData: normalized inventory of the partition
+    """
+    if partition.end is None:
+        return VMData.from_file(partition.path)
+
+    with open(partition.path, "rb") as csv_file:
+        header = csv_file.readline()
+        if partition.start > len(header):
+            # Skip the line the range starts in, unless the range starts at the beginning of a line
+            csv_file.seek(partition.start - 1)
+            csv_file.readline()
+        position = csv_file.tell()
+        rows = csv_file.read(max(partition.end - position, 0))
+        if rows and not rows.endswith(b"\n"):
+            # The last line starting in the range ends in the next one
+            rows += csv_file.readline()
+
+    df = pd.read_csv(io.BytesIO(header + rows), delimiter=partition.delimiter, encoding=partition.encoding)
+    return VMData(df)
+
+
+def summarize_partition(partition: Partition) -> Summary:
+    """Load a partition and aggregate it into a Summary, run in the worker processes.
+
+    Args:
+        partition (Partition): partition from plan_partitions
+
+    Returns:
+        Summary: summary of the rows of the partition
+    """
+    summary = Summary.from_vmdata(read_partition(partition))
+    LOGGER.debug("Summarized %s bytes %s-%s", partition.path, partition.start, partition.end)
+    return summary
+
+
+def summarize_partitioned(
+    filepath: Path, workers: int, partition_size: int = const.DEFAULT_PARTITION_SIZE_MIB * 1024 * 1024
+) -> Summary:
+    """Summarize an inventory file or directory with a pool of worker processes.
+
+    Each partition is loaded, normalized and aggregated into a cube by a worker, so only the rows
+    of one partition per worker are held in memory, and the driver merges the summaries.
+    The merged summary has the same cube as Summary.from_vmdata(VMData.from_file(filepath)).
+
+    Args:
+        filepath (Path): The path to the file or directory.
+        workers (int): number of worker processes
+        partition_size (int, optional): largest number of bytes of a CSV file to load in one partition.
+          Defaults to const.DEFAULT_PARTITION_SIZE_MIB MiB.
+
+    Returns:
+        Summary: summary of the whole inventory
+    """
+    partitions = plan_partitions(filepath, partition_size)
+    if workers == 1 or len(partitions) == 1:
+        return Summary.merge(summarize_partition(partition) for partition in partitions)
+    with ProcessPoolExecutor(max_workers=min(workers, len(partitions))) as executor:
+        # map returns the summaries in partition order, which Cube.merge keeps cells in
+        return Summary.merge(executor.map(summarize_partition, partitions))
+
+
+def _is_csv(filepath: Path) -> bool:
+    return filepath.suffix.lower() == ".csv" or VMData.get_file_type(filepath) == const.MIME["csv"]
@@ -0,0 +1,167 @@
+# Std lib imports
+import logging
+import re
+import typing as t
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+from . import const
+from .capacity import categorize_environments
+from .cube import bincount_max, bincount_sum, column_or_empty, group_ids, to_numeric
+from .vmdata import VMData
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Measure(t.NamedTuple):
+    """Aggregate of a pivot report: a function and the column it aggregates, None for a count of VMs."""
+
+    function: str
+    column: str | None = None
+
+    @classmethod
+    def parse(cls: type[t.Self], text: str) -> t.Self:
+        """Parse a measure written as count, or function:column, e.g. "sum:vmDisk" or "p95:vmMemory".
+
+        Args:
+            text (str): measure, see const.PIVOT_MEASURE_REGEX
+
+        Returns:
+            Measure: parsed measure
+
+        Raises:
+            ValueError: If text isn't a measure, or a function other than count has no column.
+        """
+        match = re.fullmatch(const.PIVOT_MEASURE_REGEX, text.strip())
+        if match is None or (match["function"] != "count" and match["column"] is None):
+            raise ValueError(
+                f"Measure {text!r} is not count or one of sum, mean, min, max or a percentile like p95, "
+                "followed by : and a column"
+            )
+        return cls(match["function"], match["column"])
+
+    @property
+    def label(self: t.Self) -> str:
+        return f"{self.function}:{self.column}" if self.column else self.function
+
+
+def parse_measures(text: str) -> list[Measure]:
+    """Parse comma separated measures, see Measure.parse."""
+    return [Measure.parse(measure) for measure in text.split(",")]
+
+
+def pivot(
+    vm_data: VMData,
+    group_by: list[str],
+    measures: list[Measure],
+    prod_envs: list[str],
+    env_filter: str = "all",
+    site: str | None = None,
+) -> pd.DataFrame:
+    """Aggregate measures of the VMs per group of the group_by columns, in a single grouped aggregation.
+
+    Columns are named by a key of VMData.column_headers, e.g. vmDisk, or by a column of the normalized
+    inventory, e.g. Site Name or OS Name. Rows are numbered into groups once, then every measure is
+    computed from the group numbers with np.bincount, or for percentiles with one sort of the values by group.
+    Rows with a missing group_by value are left out, as are missing values of a measure's column.
+
+    Args:
+        vm_data (VMData): normalized inventory
+        group_by (list[str]): columns to group by
+        measures (list[Measure]): measures to compute per group
+        prod_envs (list[str]): environment labels defined as prod, see Cube.environment_filtered
+        env_filter (str, optional): environment category to report on, every VM if "all" or "both".
+          Defaults to "all".
+        site (str | None, optional): Site Name to report on, every site if None. Defaults to None.
+
+    Returns:
+        pd.DataFrame: group_by values and one column per measure, named by its label, in group_by order
+
+    Raises:
+        ValueError: If a column isn't in the inventory.
+    """
+    df = vm_data.df
+    selected = np.ones(len(df), dtype=bool)
+    if site:
+        selected &= (column_or_empty(df, "Site Name") == site).to_numpy()
+    if env_filter not in ("all", "both"):
+        environments = column_or_empty(df, vm_data.column_headers["environment"])
+        selected &= categorize_environments(environments, prod_envs) == env_filter
+    rows = np.flatnonzero(selected) if not selected.all() else None
+
+    def column(name: str) -> pd.Series:
+        resolved = vm_data.column_headers.get(name, name)
+        if resolved not in df.columns:
+            raise ValueError(f"Column {name!r} is not in the inventory")
+        values = df[resolved]
+        return values if rows is None else values.iloc[rows].reset_index(drop=True)
+
+    keys = [column(name) for name in group_by]
+    ids, first_rows = group_ids(keys)
+    groups = len(first_rows)
+    table = pd.DataFrame({name: key.to_numpy()[first_rows] for name, key in zip(group_by, keys)})
+
+    valid = ids >= 0
+    sorted_values: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+    for measure in measures:
+        if measure.column is None:
+            table[measure.label] = np.bincount(ids[valid], minlength=groups)
+        else:
+            values = to_numeric(column(measure.column))
+            present = valid & values.notna().to_numpy()
+            table[measure.label] = _aggregate(measure, ids, groups, values, present, sorted_values)
+
+    LOGGER.debug("Aggregated %d VMs into %d groups of %s", len(ids), groups, ", ".join(group_by))
+    return table
+
+
+def _aggregate(
+    measure: Measure,
+    ids: np.ndarray,
+    groups: int,
+    values: pd.Series,
+    present: np.ndarray,
+    sorted_values: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]],
+) -> np.ndarray:
+    """Aggregate the present values of measure's column per group, sorting them once for all its percentiles."""
+    counts = np.bincount(ids[present], minlength=groups)
+    if measure.function == "count":
+        return counts
+    if measure.function == "sum":
+        return bincount_sum(ids, values, groups, present)
+    if measure.function == "mean":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return bincount_sum(ids, values, groups, present) / counts
+    if measure.function == "max":
+        return bincount_max(ids[present], values[present], groups)
+    if measure.function == "min":
+        return -bincount_max(ids[present], -values[present], groups)
+    if measure.column not in sorted_values:
+        sorted_values[measure.column] = _sort_by_group(ids[present], values[present], counts)
+    return _grouped_quantile(*sorted_values[measure.column], float(measure.function[1:]) / 100)
+
+
+def _sort_by_group(ids: np.ndarray, values: pd.Series, counts: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Values sorted by group, then by value, with the position each group starts at and its number of values."""
+    values = values.to_numpy(dtype=float)
+    # Sorting by one integer code of group and rank of value is a few times faster than np.lexsort
+    rank = np.empty(len(values), dtype=np.int64)
+    rank[np.argsort(values)] = np.arange(len(values))
+    order = np.argsort(ids * len(values) + rank)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return values[order], starts, counts
+
+
+def _grouped_quantile(values: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """Quantile of every group of values sorted by _sort_by_group, interpolated linearly like Series.quantile."""
+    quantiles = np.full(len(counts), np.nan)
+    present = counts > 0
+    position = q * (counts[present] - 1)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    lower_values = values[starts[present] + lower]
+    upper_values = values[starts[present] + upper]
+    quantiles[present] = lower_values + (upper_values - lower_values) * (position - lower)
+    return quantiles
@@ -0,0 +1,321 @@
+# Std lib imports
+import glob
+import logging
+import os
+import typing as t
+from pathlib import Path
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from . import const
+from .cube import (
+    DISK_LOWER_BOUNDS,
+    DISK_UPPER_BOUNDS,
+    Cube,
+    site_quantiles,
+    sketch_sites,
+)
+from .sketch import QuantileSketch
+from .support import SupportMatrix, load_support_matrix
+from .vmdata import VMData
+from .where import Comparison, Logical, Node, Not, Where, string_number
+
+LOGGER = logging.getLogger(__name__)
+
+_CSV_ENCODINGS = ("utf-8", "ascii")
+_WHERE_COMPARISONS: dict[str, t.Callable[[pl.Expr, t.Any], pl.Expr]] = {
+    "==": pl.Expr.eq,
+    "!=": pl.Expr.ne,
+    "<": pl.Expr.lt,
+    "<=": pl.Expr.le,
+    ">": pl.Expr.gt,
+    ">=": pl.Expr.ge,
+}
+_DIRECTORY_FILE_EXTENSIONS = (".xls", ".xlsx", ".csv")
+
+
+class PolarsVMData:
+    """Inventory loaded and aggregated with Polars, used in place of VMData by Analyzer and the report functions.
+
+    The inventory is scanned lazily, and normalization and aggregation into the cube run as a single
+    Polars query, so only the columns the reports use are read and the work is spread over every core.
+    The cube is converted to the same pandas frame Cube.from_dataframe builds, so every report output is unchanged.
+    """
+
+    # The lazy frame is never modified, see VMData.data_version
+    data_version = 0
+
+    def __init__(self: t.Self, lazy_frame: pl.LazyFrame, where: Where | None = None) -> None:
+        self.lazy_frame = lazy_frame
+        self._cube: Cube | None = None
+        self._adaptive_cubes: dict[tuple[int, ...], Cube] = {}
+        self._normalize()
+        if where is not None:
+            # Polars pushes the filter down into the scan, so rows left out are dropped while the files are read
+            schema = self.lazy_frame.collect_schema()
+            self.lazy_frame = self.lazy_frame.filter(_where_expression(where.tree, self.column_headers, schema))
+
+    @classmethod
+    def from_file(cls: type[t.Self], filepath: Path, where: Where | None = None) -> t.Self:
+        """Scan a CSV or Excel file, or a directory containing a mix of these file types.
+
+        Args:
+            filepath (Path): The path to the file or directory.
+            where (Where | None, optional): filter expression of the rows to keep. Defaults to None.
+
+        Returns:
+            PolarsVMData: inventory of the file or directory
+        """
+        if os.path.isdir(filepath):
+            # Same order as VMData._compile_df_from_directory, as reports keep the order OS names first appear in
+            files = [Path(file) for ext in _DIRECTORY_FILE_EXTENSIONS for file in glob.glob(f"{filepath}/*" + ext)]
+            if not files:
+                LOGGER.critical("Directory included neither CSV or Excel files")
+                exit()
+            return cls(pl.concat([cls._scan(file) for file in files], how="diagonal_relaxed"), where)
+        return cls(cls._scan(Path(filepath)), where)
+
+    @staticmethod
+    def _scan(filepath: Path) -> pl.LazyFrame:
+        """Scan one CSV or Excel file, detecting the encoding and delimiter of CSV files like VMData.from_file."""
+        file_type = VMData.get_file_type(filepath)
+        if file_type == const.MIME["csv"] or filepath.suffix.lower() == ".csv":
+            if os.stat(filepath).st_size == 0:
+                LOGGER.critical("File passed in was neither a CSV nor an Excel file")
+                exit()
+            encoding = VMData._detect_encoding(filepath)
+            delimiter = VMData._detect_delimiter(filepath, encoding)
+            if encoding.lower() in _CSV_ENCODINGS:
+                return pl.scan_csv(filepath, separator=delimiter, infer_schema_length=None)
+            # Polars only scans UTF-8, other encodings are decoded while reading
+            return pl.read_csv(filepath, separator=delimiter, encoding=encoding, infer_schema_length=None).lazy()
+        if file_type in const.MIME["excel"]:
+            return pl.read_excel(filepath, engine="openpyxl", infer_schema_length=None).lazy()
+        LOGGER.critical("File passed in was neither a CSV nor an Excel file")
+        exit()
+
+    def _normalize(self: t.Self) -> None:
+        """Add the normalization steps of VMData to the lazy frame: column headings, OS columns and GiB."""
+        columns = self.lazy_frame.collect_schema().names()
+        # VMData works out the header version from the column names alone
+        headers = VMData(pd.DataFrame(columns=columns), normalize=False)
+        headers._set_column_headings()
+        self.column_headers = headers.column_headers
+        self.unit_type = headers.unit_type
+        if self.column_headers["environment"] not in columns:
+            self.lazy_frame = self.lazy_frame.with_columns(pl.lit("").alias(self.column_headers["environment"]))
+
+        if not all(column in columns for column in const.EXTRA_COLUMNS_DEST):
+            self.lazy_frame = self.lazy_frame.with_columns(*self._os_columns())
+
+        if self.unit_type == "MiB":
+            self.lazy_frame = self.lazy_frame.with_columns(
+                (
+                    pl.col(self.column_headers[column])
+                    .cast(pl.String)
+                    .str.replace_all(r"\s+", "")
+                    .cast(pl.Float64, strict=False)
+                    / 1024
+                )
+                .ceil()
+                .cast(pl.Int64)
+                for column in ("vmMemory", "vmDisk")
+            )
+            self.unit_type = "GiB"
+
+    def _os_columns(self: t.Self) -> list[pl.Expr]:
+        """Expressions for the OS Name, OS Version and Architecture columns, see VMData._set_os_columns.
+
+        Polars regexes have no lookaheads, so the non Windows regex is only applied to names without
+        "Microsoft", and the Windows desktop regex is applied without its lookahead, which can never
+        change its matches as no version starts with "Server".
+        """
+        combined_os = pl.coalesce(
+            pl.col(self.column_headers["operatingSystemFromVMTools"]),
+            pl.col(self.column_headers["operatingSystemFromVMConfig"]),
+        ).cast(pl.String)
+        non_windows = (
+            pl.when(~combined_os.str.contains("Microsoft"))
+            .then(
+                combined_os.str.extract_groups(const.EXTRA_COLUMNS_NON_WINDOWS_REGEX.removeprefix(r"^(?!.*Microsoft)"))
+            )
+            .otherwise(None)
+        )
+        windows_server = combined_os.str.extract_groups(const.EXTRA_COLUMNS_WINDOWS_SERVER_REGEX)
+        windows_desktop = combined_os.str.extract_groups(
+            "(?i)" + const.EXTRA_COLUMNS_WINDOWS_DESKTOP_REGEX.replace("(?!Server)", "")
+        )
+
+        columns = []
+        for destination, group in zip(const.EXTRA_COLUMNS_DEST, ["OS_Name", "OS_Version", "Architecture"]):
+            values = [regex.struct.field(group) for regex in (non_windows, windows_server, windows_desktop)]
+            # If No OS Name after regex,  set original value as OS Name
+            if destination == "OS Name":
+                values.append(combined_os)
+            columns.append(pl.coalesce(values).alias(destination))
+        return columns
+
+    @property
+    def cube(self: t.Self) -> Cube:
+        """Aggregation cube of the inventory, built on first use.
+
+        Returns:
+            Cube: Cube with the same frame and sketches as Cube.from_dataframe of the normalized inventory
+        """
+        if self._cube is None:
+            self._cube = self._aggregate(None)
+        return self._cube
+
+    def adaptive_cube(self: t.Self, disk_edges: tuple[int, ...]) -> Cube:
+        """See VMData.adaptive_cube."""
+        if disk_edges not in self._adaptive_cubes:
+            self._adaptive_cubes[disk_edges] = self._aggregate(disk_edges)
+        return self._adaptive_cubes[disk_edges]
+
+    def _aggregate(self: t.Self, disk_edges: tuple[int, ...] | None) -> Cube:
+        """Aggregate the lazy frame into a cube in one query, see Cube.from_dataframe."""
+        schema = self.lazy_frame.collect_schema()
+        columns = schema.names()
+        disk = _numeric(self.column_headers["vmDisk"], schema)
+        if disk_edges is None:
+            # Same codes as cube.disk_bins, from the number of bounds below each disk size
+            lower = pl.sum_horizontal([disk >= bound for bound in DISK_LOWER_BOUNDS.tolist()])
+            upper = pl.sum_horizontal([disk > bound for bound in DISK_UPPER_BOUNDS.tolist()])
+            disk_bin = lower * (len(DISK_UPPER_BOUNDS) + 1) + upper
+        else:
+            disk_bin = pl.sum_horizontal([disk > edge for edge in disk_edges[1:-1]])
+
+        rows = self.lazy_frame.select(
+            _column_or_null("OS Name", columns).alias("OS Name"),
+            _column_or_null("OS Version", columns).alias("OS Version"),
+            _column_or_null("Architecture", columns).alias("Architecture"),
+            _column_or_null(self.column_headers["environment"], columns).alias("Environment"),
+            _column_or_null("Site Name", columns).alias("Site Name"),
+            pl.when(disk.is_null()).then(-1).otherwise(disk_bin).cast(pl.Int64).alias("Disk Bin"),
+            _numeric(self.column_headers["vmMemory"], schema).alias("Memory"),
+            disk.alias("Disk"),
+            _numeric(self.column_headers["vCPU"], schema).alias("CPU"),
+        ).collect()
+        # pandas stores numbers with missing values as floats
+        rows = rows.with_columns(
+            pl.col(measure).cast(pl.Float64) for measure in ("Memory", "Disk", "CPU") if rows[measure].null_count()
+        )
+
+        dimensions = list(Cube.DIMENSIONS)
+        cell_max = pl.col("Disk").max().over(dimensions)
+        top_fraction = (pl.col("Disk").floor() == cell_max.floor()) & (pl.col("Disk") % 1 != 0)
+        cells = (
+            rows.group_by(dimensions, maintain_order=True)
+            .agg(
+                pl.len().alias("Count"),
+                pl.col("Memory").sum(),
+                pl.col("Disk").sum(),
+                pl.col("CPU").sum(),
+                (pl.col("Disk").fill_null(0) / 1024).ceil().cast(pl.Int64).sum().alias("Disk TiB"),
+                pl.col("Disk").max().alias("Disk Max"),
+            )
+            .join(
+                rows.select(*dimensions, top_fraction.fill_null(False).alias("Disk Top Fraction"))
+                .group_by(dimensions, maintain_order=True)
+                .agg(pl.col("Disk Top Fraction").sum()),
+                on=dimensions,
+                how="left",
+                nulls_equal=True,
+                maintain_order="left",
+            )
+        )
+        # Converted column by column, as DataFrame.to_pandas needs pyarrow
+        frame = pd.DataFrame({column: cells[column].to_numpy() for column in cells.columns})
+        frame[dimensions[:-1]] = frame[dimensions[:-1]].astype(object).where(frame[dimensions[:-1]].notna(), np.nan)
+        frame["Count"] = frame["Count"].astype(int)
+        frame["Disk Top Fraction"] = frame["Disk Top Fraction"].astype(int)
+
+        sketches = {
+            measure: QuantileSketch().update(rows[measure].cast(pl.Float64).to_numpy()) for measure in Cube.SKETCHED
+        }
+        LOGGER.debug("Aggregated %d rows into a cube of %d cells with polars", rows.height, len(frame))
+        return Cube(frame, sketches)
+
+    def create_environment_filtered_cube(
+        self: t.Self, prod_envs: list[str], env_filter: str | None = None
+    ) -> pd.DataFrame:
+        """See VMData.create_environment_filtered_cube."""
+        return self.cube.environment_filtered(prod_envs, self.column_headers["environment"], env_filter)
+
+    def create_site_specific_dataframe(self: t.Self, support_matrix: SupportMatrix | None = None) -> pd.DataFrame:
+        """See VMData.create_site_specific_dataframe."""
+        if "Site Name" not in self.lazy_frame.collect_schema().names():
+            raise ValueError('\n\n\n-------> Error: The "Site Name" column does not exist in the DataFrame. <------')
+
+        quantiles = site_quantiles(*self._site_rows())
+        site_usage = self.cube.site_statistics(support_matrix or load_support_matrix(), quantiles)
+        site_usage.columns = ["Site Name", *const.SITE_USAGE_COLUMNS, *const.SITE_STATISTICS_COLUMNS]
+        return site_usage
+
+    def sketch_sites(self: t.Self) -> dict[t.Hashable, dict[str, QuantileSketch]]:
+        """See VMData.sketch_sites."""
+        return sketch_sites(*self._site_rows())
+
+    def _site_rows(self: t.Self) -> tuple[pd.Series, dict[str, pd.Series]]:
+        """Site Name of each VM, and its memory, CPU and disk as numbers by measure, see VMData._site_measures."""
+        schema = self.lazy_frame.collect_schema()
+        rows = self.lazy_frame.select(
+            _column_or_null("Site Name", schema.names()).alias("Site Name"),
+            *(
+                _numeric(self.column_headers[header], schema).cast(pl.Float64).alias(measure)
+                for measure, header in const.SITE_MEASURE_HEADERS.items()
+            ),
+        ).collect()
+        return pd.Series(rows["Site Name"].to_numpy()), {
+            measure: pd.Series(rows[measure].to_numpy()) for measure in const.SITE_MEASURE_HEADERS
+        }
+
+    def save_to_csv(self: t.Self, path: str) -> None:
+        """Write the normalized inventory, streaming it from the input files."""
+        self.lazy_frame.sink_csv(path)
+
+
+def _numeric(column: str, schema: pl.Schema) -> pl.Expr:
+    """Convert a column to numbers, removing thousands separators and coercing invalid values to null."""
+    if schema[column].is_numeric():
+        return pl.col(column)
+    return pl.col(column).cast(pl.String).str.replace_all(",", "").cast(pl.Float64, strict=False)
+
+
+def _column_or_null(column: str, columns: list[str]) -> pl.Expr:
+    if column in columns:
+        return pl.col(column)
+    return pl.lit(None, dtype=pl.String)
+
+
+def _where_expression(node: Node, column_headers: dict[str, str], schema: pl.Schema) -> pl.Expr:
+    """Polars expression of a Where expression, matching the same rows as Where.mask."""
+    if isinstance(node, Logical):
+        operands = [_where_expression(operand, column_headers, schema) for operand in node.operands]
+        return pl.all_horizontal(operands) if node.operator == "and" else pl.any_horizontal(operands)
+    if isinstance(node, Not):
+        return ~_where_expression(node.operand, column_headers, schema)
+
+    column = column_headers.get(node.column, node.column)
+    if column not in schema:
+        raise ValueError(f"Column {node.column!r} of the --where expression is not in the inventory")
+    text = pl.col(column).cast(pl.String)
+    # Strings that are numbers are compared as numbers with numeric columns, like in Where.mask
+    numeric = schema[column].is_numeric()
+    if isinstance(node, Comparison):
+        number = string_number(node.value) if isinstance(node.value, str) and numeric else None
+        value = node.value if number is None else number
+        values = text if isinstance(value, str) else _numeric(column, schema)
+        # Missing values only match !=, like NaN in Where.mask
+        return _WHERE_COMPARISONS[node.operator](values, value).fill_null(node.operator == "!=")
+    strings = [value for value in node.values if isinstance(value, str)]
+    numbers = [value for value in node.values if not isinstance(value, str)]
+    if numeric:
+        numbers.extend(number for number in map(string_number, strings) if number is not None)
+    matches = text.is_in(strings).fill_null(False)
+    if numbers:
+        matches = matches | _numeric(column, schema).cast(pl.Float64).is_in(numbers).fill_null(False)
+    return ~matches if node.negated else matches
@@ -0,0 +1,76 @@
+# Std lib imports
+import typing as t
+from collections.abc import Iterable
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+from . import const
+
+UNPARSABLE_MEMORY, UNPARSABLE_DISK, UNMATCHED_OS, MISSING_ENVIRONMENT = const.DATA_QUALITY_CHECKS
+
+
+class DataQuality:
+    """Counts and sample rows of the problems found while normalizing an inventory, see const.DATA_QUALITY_CHECKS.
+
+    Each check is recorded by the normalization step that already computes its mask, such as the numbers
+    pd.to_numeric coerced to NaN, so the findings cost a count and a few sample rows rather than another
+    pass over the inventory.
+    """
+
+    def __init__(self: t.Self, rows: int = 0) -> None:
+        self.rows = rows
+        self.counts = dict.fromkeys(const.DATA_QUALITY_CHECKS, 0)
+        self.samples: dict[str, pd.DataFrame] = {}
+
+    def record(self: t.Self, check: str, mask: pd.Series | np.ndarray, df: pd.DataFrame, columns: list[str]) -> None:
+        """Add the rows of df where mask is set to the findings of check.
+
+        Args:
+            check (str): one of const.DATA_QUALITY_CHECKS
+            mask (pd.Series | np.ndarray): rows of df with the problem
+            df (pd.DataFrame): rows the mask was computed from, before normalization changes the columns
+            columns (list[str]): columns of df with the problem, shown in the sample rows after the VM identity
+        """
+        rows = np.flatnonzero(np.asarray(mask, dtype=bool))
+        self.counts[check] += len(rows)
+        if len(rows) and len(self.samples.get(check, ())) < const.DATA_QUALITY_SAMPLE_ROWS:
+            identity = [column for column in const.VM_IDENTITY_COLUMNS if column in df.columns][:1]
+            sample = df.iloc[rows[: const.DATA_QUALITY_SAMPLE_ROWS]]
+            self._add_sample(check, sample[list(dict.fromkeys(identity + columns))])
+
+    def _add_sample(self: t.Self, check: str, sample: pd.DataFrame) -> None:
+        """Keep the first const.DATA_QUALITY_SAMPLE_ROWS rows of the samples of check."""
+        if check in self.samples:
+            sample = pd.concat([self.samples[check], sample])
+        self.samples[check] = sample.iloc[: const.DATA_QUALITY_SAMPLE_ROWS]
+
+    @classmethod
+    def merge(cls: type[t.Self], qualities: Iterable["DataQuality"]) -> t.Self:
+        """Combine the findings of parts of an inventory, such as the chunks of a CSV file.
+
+        Args:
+            qualities (Iterable[DataQuality]): findings of each part, in inventory order
+
+        Returns:
+            DataQuality: summed counts, with the first sample rows of the parts
+        """
+        merged = cls()
+        for quality in qualities:
+            merged.rows += quality.rows
+            for check, count in quality.counts.items():
+                merged.counts[check] += count
+            for check, sample in quality.samples.items():
+                merged._add_sample(check, sample)
+        return merged
+
+    def to_frame(self: t.Self) -> pd.DataFrame:
+        """Number and percentage of the rows with each problem.
+
+        Returns:
+            pd.DataFrame: VMs and Percent of every check, indexed by Check
+        """
+        counts = pd.Series(self.counts, name="VMs").rename_axis("Check")
+        percent = (counts / self.rows * 100).round(2) if self.rows else counts * 0.0
+        return pd.DataFrame({"VMs": counts, "Percent": percent})
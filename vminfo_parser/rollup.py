@@ -0,0 +1,71 @@
+# Std lib imports
+import typing as t
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+# Label of the entry counts below the minimum or outside the top are added up as
+OTHER_LABEL = "Other"
+
+CountsT = t.TypeVar("CountsT", pd.Series, pd.DataFrame)
+
+
+def roll_up_counts(
+    counts: CountsT,
+    minimum: int | None = None,
+    top: int | None = None,
+    by: str | None = None,
+    other: str | None = OTHER_LABEL,
+) -> CountsT:
+    """Keep the largest counts of any dimension, by descending count, and add up the rest as one entry.
+
+    A count is kept if it is at least minimum and among the top largest, with ties kept in the order of counts.
+    The kept entries are chosen with a partial selection, so only they are sorted rather than every entry.
+    The rest are added up as an entry labelled other, unless there is only one of them, which is kept as it is,
+    or dropped if other is None.
+
+    Args:
+        counts (pd.Series | pd.DataFrame): counts indexed by the dimension, e.g. per OS Name, Site Name or
+          disk space range, or a DataFrame of counts per column, e.g. per environment category
+        minimum (int | None, optional): smallest count kept, every count if None. Defaults to None.
+        top (int | None, optional): number of the largest counts kept, every count if None. Defaults to None.
+        by (str | None, optional): column of a DataFrame to rank by, the sum of its columns if None.
+          Defaults to None.
+        other (str | None, optional): label of the entry the rest are added up as, or None to drop them.
+          Defaults to OTHER_LABEL.
+
+    Returns:
+        pd.Series | pd.DataFrame: kept counts by descending count, followed by the other entry if any
+    """
+    if isinstance(counts, pd.DataFrame):
+        sizes = (counts[by] if by is not None else counts.sum(axis=1)).to_numpy(dtype=float)
+    else:
+        sizes = counts.to_numpy(dtype=float)
+
+    kept = np.ones(len(sizes), dtype=bool) if minimum is None else sizes >= minimum
+    if top is not None and kept.sum() > top:
+        candidates = np.flatnonzero(kept)
+        # The top-th largest count, every larger count is kept and ties with it in order of counts
+        threshold = -np.partition(-sizes[candidates], top - 1)[top - 1] if top else np.inf
+        larger = candidates[sizes[candidates] > threshold]
+        tied = candidates[sizes[candidates] == threshold][: top - len(larger)]
+        kept = np.zeros(len(sizes), dtype=bool)
+        kept[larger] = kept[tied] = True
+
+    rest = np.flatnonzero(~kept)
+    if other is not None and len(rest) == 1:
+        # Rolling a single entry up would only rename it
+        kept[rest] = True
+        rest = rest[:0]
+    positions = np.flatnonzero(kept)
+    positions = positions[np.argsort(-sizes[positions], kind="stable")]
+
+    rolled_up = counts.iloc[positions]
+    if other is None or not len(rest):
+        return rolled_up
+    if isinstance(counts, pd.DataFrame):
+        other_counts = counts.iloc[rest].sum().to_frame(other).T
+    else:
+        other_counts = pd.Series([counts.iloc[rest].sum()], index=[other], name=counts.name)
+    return pd.concat([rolled_up, other_counts.rename_axis(counts.index.name)])
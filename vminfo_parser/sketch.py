@@ -0,0 +1,282 @@
+# Std lib imports
+import math
+import typing as t
+
+# 3rd party imports
+import numpy as np
+
+from . import const
+
+# Group and bucket codes up to this many are counted with np.bincount instead of sorting, see QuantileSketch.grouped
+_MAX_DENSE_CODES = 2**22
+
+
+class QuantileSketch:
+    """Mergeable sketch of a distribution of non-negative values, answering quantiles within a relative error.
+
+    Values are counted in logarithmically sized buckets, as in DDSketch, so every quantile is within
+    relative_accuracy of a value in the data, and sketches of separate data merge exactly by adding
+    bucket counts. Values at or below zero are counted as zero.
+    """
+
+    def __init__(self: t.Self, relative_accuracy: float = const.SKETCH_RELATIVE_ACCURACY) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"Relative accuracy must be between 0 and 1, got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self: t.Self, values: np.ndarray) -> t.Self:
+        """Add values to the sketch, ignoring missing values.
+
+        Args:
+            values (np.ndarray): values to add
+
+        Returns:
+            QuantileSketch: this sketch
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return self
+
+        positive = values[values > 0]
+        keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(int), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += int(values.size - positive.size)
+        self.count += int(values.size)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self
+
+    @classmethod
+    def grouped(
+        cls: type[t.Self],
+        ids: np.ndarray,
+        values: np.ndarray,
+        groups: int,
+        relative_accuracy: float = const.SKETCH_RELATIVE_ACCURACY,
+    ) -> list[t.Self]:
+        """Sketch the values of every group in one pass, like QuantileSketch().update(values[ids == group]).
+
+        Args:
+            ids (np.ndarray): group of each value, values with a negative group are ignored
+            values (np.ndarray): values to add, missing values are ignored
+            groups (int): number of groups
+            relative_accuracy (float, optional): see QuantileSketch. Defaults to const.SKETCH_RELATIVE_ACCURACY.
+
+        Returns:
+            list[QuantileSketch]: sketch of each group
+        """
+        sketches = [cls(relative_accuracy) for _ in range(groups)]
+        values = np.asarray(values, dtype=float)
+        valid = (ids >= 0) & ~np.isnan(values)
+        ids, values = ids[valid], values[valid]
+        if not values.size:
+            return sketches
+
+        counts = np.bincount(ids, minlength=groups)
+        positive = values > 0
+        zero_counts = counts - np.bincount(ids[positive], minlength=groups)
+        minima, maxima = np.full(groups, math.inf), np.full(groups, -math.inf)
+        np.fmin.at(minima, ids, values)
+        np.fmax.at(maxima, ids, values)
+
+        # Count the buckets of every group at once, combining group and bucket into one code
+        keys = np.ceil(np.log(values[positive]) / sketches[0]._log_gamma).astype(np.int64)
+        if keys.size:
+            offset = int(keys.min())
+            span = int(keys.max()) - offset + 1
+            codes = ids[positive] * span + (keys - offset)
+            if groups * span <= max(codes.size, _MAX_DENSE_CODES):
+                code_counts = np.bincount(codes)
+                codes = np.flatnonzero(code_counts)
+                code_counts = code_counts[codes]
+            else:
+                codes, code_counts = np.unique(codes, return_counts=True)
+            for code, count in zip(codes.tolist(), code_counts.tolist()):
+                group, key = divmod(code, span)
+                sketches[group].buckets[key + offset] = count
+
+        for sketch, count, zero_count, minimum, maximum in zip(
+            sketches, counts.tolist(), zero_counts.tolist(), minima.tolist(), maxima.tolist()
+        ):
+            sketch.count, sketch.zero_count, sketch.min, sketch.max = count, zero_count, minimum, maximum
+        return sketches
+
+    def merge(self: t.Self, other: "QuantileSketch") -> t.Self:
+        """Add the counts of another sketch with the same relative accuracy to this sketch.
+
+        Args:
+            other (QuantileSketch): sketch to merge
+
+        Returns:
+            QuantileSketch: this sketch
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self: t.Self, q: float) -> float:
+        """Estimate the q quantile of the values added to the sketch.
+
+        Args:
+            q (float): quantile between 0 and 1
+
+        Returns:
+            float: estimated quantile, NaN if the sketch is empty
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f"Quantile must be between 0 and 1, got {q}")
+        if not self.count:
+            return math.nan
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return max(self.min, 0.0)
+        cumulative = self.zero_count
+        for key in sorted(self.buckets):
+            cumulative += self.buckets[key]
+            if cumulative > rank:
+                # The value with the same relative distance to both ends of the bucket
+                estimate = 2 * self._gamma**key / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def to_dict(self: t.Self) -> dict[str, t.Any]:
+        """Convert the sketch to a JSON serializable dict.
+
+        Returns:
+            dict[str, t.Any]: sketch state, see QuantileSketch.from_dict
+        """
+        keys = sorted(self.buckets)
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "count": self.count,
+            "zero_count": self.zero_count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "keys": keys,
+            "counts": [self.buckets[key] for key in keys],
+        }
+
+    @classmethod
+    def from_dict(cls: type[t.Self], data: dict[str, t.Any]) -> t.Self:
+        """Create a sketch from the output of QuantileSketch.to_dict.
+
+        Args:
+            data (dict[str, t.Any]): sketch state
+
+        Returns:
+            QuantileSketch: restored sketch
+        """
+        sketch = cls(data["relative_accuracy"])
+        sketch.buckets = dict(zip(data["keys"], data["counts"]))
+        sketch.count = data["count"]
+        sketch.zero_count = data["zero_count"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+
+class SpaceSaving:
+    """Mergeable sketch of the most frequent items in a stream, using the Space-Saving algorithm.
+
+    At most capacity items are counted. An item that is not counted replaces the item with the smallest
+    count, inheriting that count as its error, so every count is an upper bound that is at most
+    its error above the true count.
+    """
+
+    def __init__(self: t.Self, capacity: int = const.SKETCH_TOP_ITEMS_CAPACITY) -> None:
+        if capacity < 1:
+            raise ValueError(f"Capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.counts: dict[t.Hashable, int] = {}
+        self.errors: dict[t.Hashable, int] = {}
+        self.total = 0
+
+    def update(self: t.Self, items: t.Iterable[tuple[t.Hashable, int]]) -> t.Self:
+        """Count items, given as pairs of item and the number of times it occurred.
+
+        Args:
+            items (t.Iterable[tuple[t.Hashable, int]]): items and their counts, e.g. from value_counts().items()
+
+        Returns:
+            SpaceSaving: this sketch
+        """
+        for item, count in items:
+            count = int(count)
+            self.total += count
+            if item in self.counts:
+                self.counts[item] += count
+            elif len(self.counts) < self.capacity:
+                self.counts[item] = count
+                self.errors[item] = 0
+            else:
+                smallest = min(self.counts, key=self.counts.__getitem__)
+                min_count = self.counts.pop(smallest)
+                del self.errors[smallest]
+                self.counts[item] = min_count + count
+                self.errors[item] = min_count
+        return self
+
+    def merge(self: t.Self, other: "SpaceSaving") -> t.Self:
+        """Add the counts of another sketch to this sketch.
+
+        An item missing from one of the sketches may have occurred up to that sketch's smallest count times,
+        so that count is added to both its count and its error before the largest counts are kept.
+
+        Args:
+            other (SpaceSaving): sketch to merge
+
+        Returns:
+            SpaceSaving: this sketch
+        """
+        self_min = self.min_count()
+        other_min = other.min_count()
+        counts: dict[t.Hashable, int] = {}
+        errors: dict[t.Hashable, int] = {}
+        for item in self.counts.keys() | other.counts.keys():
+            counts[item] = self.counts.get(item, self_min) + other.counts.get(item, other_min)
+            errors[item] = self.errors.get(item, self_min) + other.errors.get(item, other_min)
+
+        kept = sorted(counts, key=counts.__getitem__, reverse=True)[: self.capacity]
+        self.counts = {item: counts[item] for item in kept}
+        self.errors = {item: errors[item] for item in kept}
+        self.total += other.total
+        return self
+
+    def min_count(self: t.Self) -> int:
+        """Largest number of times an item that isn't counted may have occurred.
+
+        Returns:
+            int: smallest count if the sketch is full, otherwise 0
+        """
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def top(self: t.Self, n: int | None = None) -> list[tuple[t.Hashable, int, int]]:
+        """List the most frequent items.
+
+        Args:
+            n (int | None, optional): number of items to list. Defaults to every counted item.
+
+        Returns:
+            list[tuple[t.Hashable, int, int]]: item, count and error, by descending count
+        """
+        items = sorted(self.counts, key=self.counts.__getitem__, reverse=True)[:n]
+        return [(item, self.counts[item], self.errors[item]) for item in items]
@@ -0,0 +1,174 @@
+# Std lib imports
+import json
+import logging
+import typing as t
+from collections.abc import Iterable
+from pathlib import Path
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+from . import const
+from .cube import Cube
+from .sketch import QuantileSketch
+from .support import SupportMatrix, load_support_matrix
+from .vmdata import VMData
+
+LOGGER = logging.getLogger(__name__)
+
+FORMAT_VERSION = 3
+
+_INTEGER_MEASURES = ("Count", "Disk TiB", "Disk Top Fraction")
+
+
+class Summary:
+    """Serializable, mergeable summary of an inventory, holding its cube without the inventory rows.
+
+    A Summary can be used in place of VMData by Analyzer and the report functions, so summaries
+    of several inventories can be merged and reported on without the original spreadsheets.
+    """
+
+    # A summary never changes, see VMData.data_version
+    data_version = 0
+
+    def __init__(self: t.Self, cube: Cube, column_headers: dict[str, str]) -> None:
+        self.cube = cube
+        self.column_headers = column_headers
+
+    @classmethod
+    def from_vmdata(cls: type[t.Self], vm_data: VMData) -> t.Self:
+        """Summarize a normalized inventory.
+
+        Args:
+            vm_data (VMData): inventory to summarize
+
+        Returns:
+            Summary: summary of vm_data
+        """
+        cube = vm_data.cube
+        # Without the rows, the quantiles of each site can only be estimated from sketches of each site
+        return cls(Cube(cube.frame, cube.sketches, vm_data.sketch_sites()), dict(vm_data.column_headers))
+
+    @classmethod
+    def merge(cls: type[t.Self], summaries: Iterable["Summary"]) -> t.Self:
+        """Combine summaries of separate inventories into the summary of all of them.
+
+        The column headers of the first summary are used for output.
+
+        Args:
+            summaries (Iterable[Summary]): summaries to merge
+
+        Returns:
+            Summary: merged summary
+        """
+        summaries = list(summaries)
+        if not summaries:
+            raise ValueError("At least one summary is required to merge")
+        if len(summaries) == 1:
+            return summaries[0]
+        return cls(Cube.merge(summary.cube for summary in summaries), summaries[0].column_headers)
+
+    @classmethod
+    def from_file(cls: type[t.Self], path: Path) -> t.Self:
+        """Read a summary written by Summary.to_file.
+
+        Args:
+            path (Path): summary file
+
+        Returns:
+            Summary: summary read from path
+
+        Raises:
+            ValueError: If the file was written by an incompatible version.
+        """
+        with open(path, "r") as summary_file:
+            return cls.from_json(summary_file.read(), source=str(path))
+
+    @classmethod
+    def from_json(cls: type[t.Self], text: str, source: str = "summary") -> t.Self:
+        """Read a summary serialized by Summary.to_json.
+
+        Args:
+            text (str): JSON document
+            source (str, optional): where text was read from, for messages. Defaults to "summary".
+
+        Returns:
+            Summary: summary read from text
+
+        Raises:
+            ValueError: If the summary was written by an incompatible version.
+        """
+        data = json.loads(text)
+        if data.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{source} is not a summary file of format version {FORMAT_VERSION}")
+
+        frame = pd.DataFrame(data["cube"]["data"], columns=data["cube"]["columns"])
+        dimensions = list(Cube.DIMENSIONS)
+        frame[dimensions] = frame[dimensions].astype(object).where(frame[dimensions].notna(), np.nan)
+        frame["Disk Bin"] = frame["Disk Bin"].astype(int)
+        for measure in Cube.MEASURES:
+            frame[measure] = frame[measure].astype(int if measure in _INTEGER_MEASURES else float)
+
+        sketches = {measure: QuantileSketch.from_dict(sketch) for measure, sketch in data["sketches"].items()}
+        site_sketches = {
+            site: {measure: QuantileSketch.from_dict(sketch) for measure, sketch in measures.items()}
+            for site, measures in data["site_sketches"]
+        }
+        LOGGER.debug("Read summary of %d VMs from %s", frame["Count"].sum(), source)
+        return cls(Cube(frame, sketches, site_sketches), data["column_headers"])
+
+    def to_file(self: t.Self, path: Path) -> None:
+        """Write the summary as JSON.
+
+        Args:
+            path (Path): file to write
+        """
+        with open(path, "w") as summary_file:
+            summary_file.write(self.to_json())
+
+    def to_json(self: t.Self) -> str:
+        """Serialize the summary as a JSON document, see Summary.from_json.
+
+        Returns:
+            str: JSON document
+        """
+        frame = self.cube.frame.astype(object).where(self.cube.frame.notna(), None)
+        data = {
+            "format": FORMAT_VERSION,
+            "column_headers": self.column_headers,
+            "cube": {"columns": list(frame.columns), "data": frame.to_numpy().tolist()},
+            "sketches": {measure: sketch.to_dict() for measure, sketch in self.cube.sketches.items()},
+            # Pairs rather than an object, as sites needn't be strings
+            "site_sketches": [
+                [site, {measure: sketch.to_dict() for measure, sketch in measures.items()}]
+                for site, measures in self.cube.site_sketches.items()
+            ],
+        }
+        return json.dumps(data, default=_json_default)
+
+    def adaptive_cube(self: t.Self, disk_edges: tuple[int, ...]) -> Cube:
+        """See VMData.adaptive_cube. Summaries hold no disk sizes to bin."""
+        raise ValueError("Adaptive disk bins can't be computed from a summary, they need the inventory rows.")
+
+    def create_environment_filtered_cube(
+        self: t.Self, prod_envs: list[str], env_filter: str | None = None
+    ) -> pd.DataFrame:
+        """See VMData.create_environment_filtered_cube."""
+        return self.cube.environment_filtered(prod_envs, self.column_headers["environment"], env_filter)
+
+    def create_site_specific_dataframe(self: t.Self, support_matrix: SupportMatrix | None = None) -> pd.DataFrame:
+        """See VMData.create_site_specific_dataframe, with the estimated columns of const.SITE_APPROXIMATE_COLUMNS."""
+        if self.cube.frame["Site Name"].isna().all():
+            raise ValueError("The summarized inventories have no Site Name column.")
+
+        site_usage = self.cube.site_statistics(support_matrix or load_support_matrix())
+        site_usage.columns = ["Site Name", *const.SITE_USAGE_COLUMNS, *const.SITE_STATISTICS_COLUMNS]
+        # Without the inventory rows the medians and 95th percentiles are estimated from the sketches
+        return site_usage.rename(columns=const.SITE_APPROXIMATE_COLUMNS)
+
+
+def _json_default(value: t.Any) -> t.Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,141 @@
+# Std lib imports
+import functools
+import logging
+import math
+import re
+import typing as t
+from pathlib import Path
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+from . import const
+from .cube import group_ids
+
+LOGGER = logging.getLogger(__name__)
+
+SUPPORTED, UNSUPPORTED = const.SUPPORT_STATUSES
+
+_MATRIX_COLUMNS = ["OS Name", "Min Version", "Max Version", "Architecture", "Supported"]
+_VERSION_REGEX = re.compile(r"\s*(\d+(?:\.\d+)?)")
+
+
+class SupportRule(t.NamedTuple):
+    """Whether an OS Name is supported, optionally only between two versions and for one architecture."""
+
+    os_name: str
+    supported: bool
+    min_version: float = -math.inf
+    max_version: float = math.inf
+    architecture: str | None = None
+
+    def matches(self: t.Self, os_name: str, version: float | None, architecture: str | None) -> bool:
+        """Whether the rule applies to an OS, a missing version only matching a rule without version bounds."""
+        if os_name != self.os_name or (self.architecture is not None and architecture != self.architecture):
+            return False
+        if version is None:
+            return self.min_version == -math.inf and self.max_version == math.inf
+        return self.min_version <= version <= self.max_version
+
+
+class SupportMatrix(t.NamedTuple):
+    """Support of operating systems by OS Name, OS Version and Architecture, as rules read from a CSV file.
+
+    The first rule matching an OS decides whether it is supported, an OS no rule matches is unsupported.
+    Versions are compared by their leading number, e.g. 2008 for "2008 R2", so rules such as
+    "Red Hat Enterprise Linux 8 and later are supported" are a rule with a Min Version of 8.
+    """
+
+    rules: tuple[SupportRule, ...]
+
+    @classmethod
+    def from_file(cls: type[t.Self], path: Path | str) -> t.Self:
+        """Read a matrix with the columns OS Name, Min Version, Max Version, Architecture and Supported.
+
+        Min Version, Max Version and Architecture may be left empty to match every version or architecture.
+
+        Args:
+            path (Path | str): CSV file to read
+
+        Returns:
+            SupportMatrix: matrix of the rules of the file, in file order
+
+        Raises:
+            ValueError: If the file is missing a column or has an invalid value.
+        """
+        matrix = pd.read_csv(path, dtype=str, keep_default_na=False, skipinitialspace=True)
+        missing = [column for column in _MATRIX_COLUMNS if column not in matrix.columns]
+        if missing:
+            raise ValueError(f"Support matrix {path} is missing the columns {', '.join(missing)}")
+
+        rules = []
+        for line, row in enumerate(matrix[_MATRIX_COLUMNS].itertuples(index=False, name=None), start=2):
+            os_name, min_version, max_version, architecture, supported = (value.strip() for value in row)
+            if not os_name or supported.lower() not in ("true", "false", "yes", "no"):
+                raise ValueError(f"Line {line} of support matrix {path} needs an OS Name and Supported true or false")
+            try:
+                bounds = (float(min_version or -math.inf), float(max_version or math.inf))
+            except ValueError:
+                raise ValueError(f"Line {line} of support matrix {path} has a version that isn't a number") from None
+            rules.append(SupportRule(os_name, supported.lower() in ("true", "yes"), *bounds, architecture or None))
+
+        LOGGER.debug("Read %d support rules from %s", len(rules), path)
+        return cls(tuple(rules))
+
+    @property
+    def os_names(self: t.Self) -> frozenset[str]:
+        """OS Names with a supported version, every other OS Name is unsupported."""
+        return frozenset(rule.os_name for rule in self.rules if rule.supported)
+
+    def is_supported(self: t.Self, os_name: t.Any, os_version: t.Any = None, architecture: t.Any = None) -> bool:
+        """Whether the first rule matching an OS supports it, False if no rule matches.
+
+        Args:
+            os_name (t.Any): OS Name
+            os_version (t.Any, optional): OS Version, compared by its leading number. Defaults to None.
+            architecture (t.Any, optional): Architecture, e.g. 64-bit. Defaults to None.
+
+        Returns:
+            bool: whether the OS is supported
+        """
+        if pd.isna(os_name):
+            return False
+        match = None if pd.isna(os_version) else _VERSION_REGEX.match(str(os_version))
+        version = float(match[1]) if match else None
+        architecture = None if pd.isna(architecture) else str(architecture).strip()
+        for rule in self.rules:
+            if rule.matches(os_name, version, architecture):
+                return rule.supported
+        return False
+
+    def classify(self: t.Self, os_names: pd.Series, os_versions: pd.Series, architectures: pd.Series) -> pd.Categorical:
+        """Support status of every row, classifying each distinct OS Name, OS Version and Architecture once.
+
+        Args:
+            os_names (pd.Series): OS Name of every row
+            os_versions (pd.Series): OS Version of every row
+            architectures (pd.Series): Architecture of every row
+
+        Returns:
+            pd.Categorical: SUPPORTED or UNSUPPORTED for every row, with the categories const.SUPPORT_STATUSES
+        """
+        ids, first_rows = group_ids([os_names, os_versions, architectures], sort=False, dropna=False)
+        triples = zip(*(values.to_numpy()[first_rows] for values in (os_names, os_versions, architectures)))
+        # Code 0 is SUPPORTED and 1 UNSUPPORTED
+        codes = np.array([not self.is_supported(*triple) for triple in triples], dtype=np.int8)
+        return pd.Categorical.from_codes(codes[ids], categories=const.SUPPORT_STATUSES)
+
+
+@functools.cache
+def load_support_matrix(path: str | None = None) -> SupportMatrix:
+    """Read a support matrix once per file, see SupportMatrix.from_file.
+
+    Args:
+        path (str | None, optional): CSV file to read. Defaults to const.SUPPORT_MATRIX_FILE, which supports
+          every version of the OS Names of const.SUPPORTED_OSES.
+
+    Returns:
+        SupportMatrix: matrix of the file
+    """
+    return SupportMatrix.from_file(path or const.SUPPORT_MATRIX_FILE)
@@ -0,0 +1,144 @@
+# Std lib imports
+import glob
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import typing as t
+from pathlib import Path
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+from . import const
+from .cube import Cube, disk_space_range_counts, grouped_sum
+from .summary import Summary
+from .support import SupportMatrix, load_support_matrix
+from .vmdata import VMData
+
+LOGGER = logging.getLogger(__name__)
+
+# Spreadsheets of a snapshot directory, see VMData._compile_df_from_directory
+_SNAPSHOT_FILE_EXTENSIONS = (".xls", ".xlsx", ".csv")
+# Summaries are cached in this subdirectory of the snapshot directory unless --cache-dir is set
+SUMMARY_CACHE_DIRECTORY = ".vminfo_parser"
+
+
+def find_snapshots(directory: Path) -> list[tuple[pd.Timestamp, Path]]:
+    """Find the snapshots of an inventory in a directory, one spreadsheet per date.
+
+    The date of a snapshot is taken from its file name, see const.SNAPSHOT_DATE_REGEX.
+    Spreadsheets without a date in their name are ignored.
+
+    Args:
+        directory (Path): directory of snapshot files
+
+    Returns:
+        list[tuple[pd.Timestamp, Path]]: date and path of every snapshot, oldest first
+    """
+    snapshots = []
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix.lower() not in _SNAPSHOT_FILE_EXTENSIONS:
+            continue
+        match = re.search(const.SNAPSHOT_DATE_REGEX, path.name)
+        if match is None:
+            LOGGER.warning("Ignoring %s, its name doesn't contain a date", path)
+            continue
+        snapshots.append((pd.Timestamp(**{part: int(value) for part, value in match.groupdict().items()}), path))
+    return sorted(snapshots, key=lambda snapshot: snapshot[0])
+
+
+class SnapshotSummaries:
+    """Summaries of snapshot files, cached in a directory so each snapshot is only loaded once.
+
+    A cached summary is used while the size and modification time of its snapshot are unchanged.
+    """
+
+    def __init__(self: t.Self, directory: Path) -> None:
+        self.directory = Path(directory)
+
+    def get(self: t.Self, snapshot: Path) -> Summary:
+        """Load the cached summary of a snapshot, summarizing and caching the snapshot if needed.
+
+        Args:
+            snapshot (Path): snapshot file
+
+        Returns:
+            Summary: summary of the snapshot
+        """
+        path = self.directory / f"{snapshot.name}.{self._stamp(snapshot)}.json"
+        try:
+            return Summary.from_file(path)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            LOGGER.warning("Ignoring unreadable summary %s: %s", path, e)
+
+        summary = Summary.from_vmdata(VMData.from_file(snapshot))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for stale in self.directory.glob(f"{glob.escape(snapshot.name)}.*.json"):
+            stale.unlink(missing_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp")
+        os.close(fd)
+        try:
+            summary.to_file(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        LOGGER.debug("Cached the summary of %s in %s", snapshot, path)
+        return summary
+
+    @staticmethod
+    def _stamp(snapshot: Path) -> str:
+        stat = os.stat(snapshot)
+        return hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+
+
+def compute_trends(
+    snapshots: list[tuple[pd.Timestamp, Summary]], support_matrix: SupportMatrix | None = None
+) -> dict[str, pd.DataFrame]:
+    """Roll the summary of every snapshot up into trends over time.
+
+    Args:
+        snapshots (list[tuple[pd.Timestamp, Summary]]): date and summary of every snapshot, oldest first
+        support_matrix (SupportMatrix | None, optional): matrix to count supported and unsupported OS VMs by.
+          Defaults to the matrix of const.SUPPORT_MATRIX_FILE.
+
+    Returns:
+        dict[str, pd.DataFrame]: VM counts per OS, supported and unsupported OS, site and disk space range,
+          each with one row per snapshot date. Sites are left out if the snapshots have no Site Name column.
+    """
+    dates = pd.DatetimeIndex([date for date, _ in snapshots], name="Snapshot")
+    cubes = [summary.cube for _, summary in snapshots]
+
+    os_counts = _counts_over_time([grouped_sum(cube.frame, "OS Name", sort=False) for cube in cubes], dates)
+    support_matrix = support_matrix or load_support_matrix()
+    support = pd.DataFrame(
+        [_support_counts(cube, support_matrix) for cube in cubes], index=dates, columns=list(const.SUPPORT_STATUSES)
+    )
+    disk_space = disk_space_range_counts(cubes).set_axis(dates)
+
+    trends = {
+        "OS Counts": os_counts,
+        "Supported OS Counts": support,
+        "Disk Space Ranges": disk_space.loc[:, (disk_space > 0).any()],
+    }
+    site_counts = _counts_over_time([grouped_sum(cube.frame, "Site Name", sort=False) for cube in cubes], dates)
+    if not site_counts.columns.empty:
+        trends["Site VM Counts"] = site_counts
+    return trends
+
+
+def _support_counts(cube: Cube, support_matrix: SupportMatrix) -> np.ndarray:
+    """VMs of each support status in a cube, leaving out VMs without an OS Name like the OS counts."""
+    known = cube.frame["OS Name"].notna().to_numpy()
+    codes = cube.support(support_matrix).codes[known]
+    return np.bincount(codes, weights=cube.frame["Count"].to_numpy()[known], minlength=2).astype(int)
+
+
+def _counts_over_time(counts: list[pd.Series], dates: pd.DatetimeIndex) -> pd.DataFrame:
+    """Counts of every snapshot as rows, zero where a snapshot doesn't have a key."""
+    return pd.DataFrame(counts, index=dates).fillna(0).astype(int)
@@ -222,6 +222,26 @@ class Visualizer:
         plt.xticks(rotation=0)
         ax.set_yticklabels(dataFrame["OS Version"])
 
+    @plotter
+    def visualize_trend(
+        self: t.Self,
+        trend: pd.DataFrame,
+        title: str,
+    ) -> None:
+        """Create line chart of counts over the snapshots of an inventory.
+
+        Args:
+            trend (pd.DataFrame): counts with one row per snapshot date and one column per line
+            title (str): name of the counts for title
+        """
+        trend.plot(kind="line", marker="o", figsize=(12, 8))
+
+        plt.title(f"{title} Over Time")
+        plt.xlabel("Snapshot")
+        plt.ylabel("Number of VMs")
+        plt.legend(loc="upper left", bbox_to_anchor=(1, 1))
+        plt.tight_layout()
+
 
 def _get_colors(os_names: list[str]) -> list[ColorType]:
     """Generate Colors for OS names of mixed support status.
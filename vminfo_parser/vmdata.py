@@ -4,6 +4,7 @@ import logging
 import os
 import re
 import typing as t
+from collections.abc import Iterator
 from pathlib import Path
 
 import chardet
@@ -12,6 +13,27 @@ import numpy as np
 import pandas as pd
 
 from . import const
+from .bitmap import RowIndex
+from .cube import (
+    Cube,
+    categorize_environment,
+    column_or_empty,
+    site_quantiles,
+    sketch_sites,
+    to_numeric,
+)
+from .quality import (
+    MISSING_ENVIRONMENT,
+    UNMATCHED_OS,
+    UNPARSABLE_DISK,
+    UNPARSABLE_MEMORY,
+    DataQuality,
+)
+from .support import SupportMatrix, load_support_matrix
+
+if t.TYPE_CHECKING:
+    from .sketch import QuantileSketch
+    from .where import Where
 
 LOGGER = logging.getLogger(__name__)
 
@@ -21,10 +43,20 @@ class VMData:
     column_headers: dict[str, str]
     unit_type: str
     normalized: bool
+    data_quality: DataQuality
 
     def __init__(self: t.Self, df: pd.DataFrame, normalize: bool = True) -> None:
         self.df = df
         self.normalized = False
+        self.data_quality = DataQuality()
+        self._cube: Cube | None = None
+        self._cube_version: int | None = None
+        self._adaptive_cubes: dict[tuple[int, ...], Cube] = {}
+        self._adaptive_cubes_version: int | None = None
+        self._os_index: RowIndex | None = None
+        self._os_index_version: int | None = None
+        self._data_version = 0
+        self._versioned_df: pd.DataFrame | None = df
 
         if normalize:
             self._normalize()
@@ -135,15 +167,19 @@ class VMData:
         return pd.concat((excel_list + csv_list), ignore_index=True)
 
     @classmethod
-    def from_file(cls: type[t.Self], filepath: Path, normalize: bool = True) -> t.Self:
+    def from_file(cls: type[t.Self], filepath: Path, normalize: bool = True, where: "Where | None" = None) -> t.Self:
         """Create a VMData instance from a file or directory.
 
         Reads data from a CSV, Excel file, or a directory containing a mix of these file types.
         Handles file encoding and delimiter detection for CSV files.
 
+        With where, only the rows matching it are kept. CSV files are read, normalized and filtered
+        const.DEFAULT_CHUNK_SIZE rows at a time, so the rows left out are never held all at once.
+
         Args:
             filepath (Path): The path to the file or directory.
-            normalize (bool, optional): Whether to normalize the data. Defaults to True.
+            normalize (bool, optional): Whether to normalize the data, needed by where. Defaults to True.
+            where (Where | None, optional): filter expression of the rows to keep. Defaults to None.
 
         Returns:
             t.Self: A VMData instance.
@@ -162,6 +198,8 @@ class VMData:
                 if os.stat(filepath).st_size != 0:
                     encoding = cls._detect_encoding(filepath)
                     delimiter = cls._detect_delimiter(filepath, encoding)
+                    if where is not None:
+                        return cls._read_csv_filtered(filepath, delimiter, encoding, where)
                     df = pd.read_csv(filepath, delimiter=delimiter, encoding=encoding)
                 else:
                     LOGGER.critical("File passed in was neither a CSV nor an Excel file")
@@ -171,7 +209,60 @@ class VMData:
             else:
                 LOGGER.critical("File passed in was neither a CSV nor an Excel file")
                 exit()
-        return cls(df, normalize)
+        vm_data = cls(df, normalize)
+        if where is not None:
+            vm_data.df = vm_data.df[where.mask(vm_data.df, vm_data.column_headers)].reset_index(drop=True)
+        return vm_data
+
+    @classmethod
+    def _read_csv_filtered(cls: type[t.Self], filepath: Path, delimiter: str, encoding: str, where: "Where") -> t.Self:
+        """Read the rows of a CSV file matching where, normalizing and filtering one chunk at a time."""
+        frames = []
+        qualities = []
+        with pd.read_csv(
+            filepath, delimiter=delimiter, encoding=encoding, chunksize=const.DEFAULT_CHUNK_SIZE
+        ) as reader:
+            for chunk in reader:
+                chunk_data = cls(chunk)
+                frames.append(chunk_data.df[where.mask(chunk_data.df, chunk_data.column_headers)])
+                qualities.append(chunk_data.data_quality)
+        # The chunks are normalized already, so the combined rows must not be converted to GiB again
+        vm_data = cls(pd.concat(frames, ignore_index=True), normalize=False)
+        vm_data.column_headers = chunk_data.column_headers
+        vm_data.unit_type = chunk_data.unit_type
+        vm_data.normalized = True
+        # The findings cover every row read, like those of an inventory filtered after it is normalized
+        vm_data.data_quality = DataQuality.merge(qualities)
+        LOGGER.debug("Kept %d rows of %s matching --where %s", len(vm_data.df), filepath, where.text)
+        return vm_data
+
+    @classmethod
+    def from_file_chunks(cls: type[t.Self], filepath: Path, chunksize: int) -> Iterator[t.Self]:
+        """Create normalized VMData instances of at most chunksize rows from a CSV file.
+
+        Excel files and directories can't be read in chunks, so they are read whole with VMData.from_file.
+
+        Args:
+            filepath (Path): The path to the file or directory.
+            chunksize (int): The number of rows read at a time from a CSV file.
+
+        Yields:
+            VMData: normalized VMData of each chunk
+        """
+        _, file_extension = os.path.splitext(filepath)
+        if (
+            os.path.isdir(filepath)
+            or os.stat(filepath).st_size == 0
+            or (cls.get_file_type(filepath) != const.MIME["csv"] and file_extension.lower() != ".csv")
+        ):
+            yield cls.from_file(filepath)
+            return
+
+        encoding = cls._detect_encoding(filepath)
+        delimiter = cls._detect_delimiter(filepath, encoding)
+        with pd.read_csv(filepath, delimiter=delimiter, encoding=encoding, chunksize=chunksize) as reader:
+            for chunk in reader:
+                yield cls(chunk)
 
     def _set_column_headings(self: t.Self) -> None:
         """
@@ -233,10 +324,11 @@ class VMData:
         primary_os_column = self.column_headers.get("operatingSystemFromVMTools")
         secondary_os_column = self.column_headers.get("operatingSystemFromVMConfig")
 
-        combined_os: pd.Series = self.df[primary_os_column].fillna(self.df[secondary_os_column])
+        # A chunk of a CSV file without any OS values is read as floats
+        combined_os: pd.Series = self.df[primary_os_column].fillna(self.df[secondary_os_column]).astype(object)
 
         # Set "OS Name", "OS Version", "Architecture" with regex match of combined_os
-        self.df[const.EXTRA_COLUMNS_DEST] = (
+        extracted = (
             # Parse as None Windows OS
             combined_os.str.extract(const.EXTRA_COLUMNS_NON_WINDOWS_REGEX)
             # If no match, parse as Windows Server
@@ -244,6 +336,13 @@ class VMData:
             # If no match, parse as Windows Desktop
             .fillna(combined_os.str.extract(const.EXTRA_COLUMNS_WINDOWS_DESKTOP_REGEX, flags=re.IGNORECASE))
         )
+        self.data_quality.record(
+            UNMATCHED_OS,
+            extracted.iloc[:, 0].isna() & combined_os.notna(),
+            self.df,
+            [primary_os_column, secondary_os_column],
+        )
+        self.df[const.EXTRA_COLUMNS_DEST] = extracted
 
         # if No OS Name after regex,  set original value as OS Name
         self.df[const.EXTRA_COLUMNS_DEST[0]] = self.df[const.EXTRA_COLUMNS_DEST[0]].fillna(combined_os)
@@ -266,18 +365,46 @@ class VMData:
             # If the disk and ram are in GiB, convert to GiB
             # In addition, some columns may have numbers like '123 456'
             # get rid of that white space
-            cleaned_memory_column = pd.to_numeric(
-                self.df[memory_col].astype(str).str.replace(r"\s+", "", regex=True), errors="coerce"
-            )
-            cleaned_disk_column = pd.to_numeric(
-                self.df[disk_col].astype(str).str.replace(r"\s+", "", regex=True), errors="coerce"
-            )
-            self.df[memory_col] = np.ceil(cleaned_memory_column / 1024).astype(int)
-            self.df[disk_col] = np.ceil(cleaned_disk_column / 1024).astype(int)
+            cleaned_memory_column = self._parse_numbers(UNPARSABLE_MEMORY, memory_col, r"\s+")
+            cleaned_disk_column = self._parse_numbers(UNPARSABLE_DISK, disk_col, r"\s+")
+            self.df[memory_col] = _mib_to_gib(cleaned_memory_column)
+            self.df[disk_col] = _mib_to_gib(cleaned_disk_column)
             self.unit_type = "GiB"
-        elif unit_type != "GiB":
+        elif unit_type == "GiB":
+            # The values are kept as they are and converted like this when the cube is built
+            for check, column in [(UNPARSABLE_MEMORY, memory_col), (UNPARSABLE_DISK, disk_col)]:
+                if not pd.api.types.is_numeric_dtype(self.df[column]):
+                    self._parse_numbers(check, column, ",")
+        else:
             raise ValueError(f"Unexpected unit type: {unit_type}")
 
+    def _parse_numbers(self: t.Self, check: str, column: str, separator: str) -> pd.Series:
+        """Convert a column to numbers, recording the values that aren't blank but can't be parsed as check.
+
+        Args:
+            check (str): data quality check of the column, see DataQuality
+            column (str): column to convert
+            separator (str): regex of the thousands separators to remove
+
+        Returns:
+            pd.Series: numbers of the column, NaN where a value is blank or can't be parsed
+        """
+        values = self.df[column]
+        cleaned = values.astype(str).str.replace(separator, "", regex=True)
+        numbers = pd.to_numeric(cleaned, errors="coerce")
+        self.data_quality.record(check, numbers.isna() & values.notna() & cleaned.ne(""), self.df, [column])
+        return numbers
+
+    def _check_environments(self: t.Self) -> None:
+        """Record the rows without an environment as a data quality finding."""
+        environments = self.df[self.column_headers["environment"]]
+        self.data_quality.record(
+            MISSING_ENVIRONMENT,
+            environments.isna().to_numpy() | (environments == "").to_numpy(),
+            self.df,
+            [self.column_headers["environment"]],
+        )
+
     def _normalize(self: t.Self) -> None:
         """Set instance vars and format data to match expectations.
 
@@ -285,50 +412,143 @@ class VMData:
             self (t.Self): _description_
         """
 
+        self.data_quality = DataQuality(len(self.df))
         self._set_column_headings()
+        self._check_environments()
         self._set_os_columns()
         self._normalize_to_GiB()
         self.normalized = True
 
-    def create_site_specific_dataframe(self: t.Self) -> pd.DataFrame:
+    def create_site_specific_dataframe(self: t.Self, support_matrix: SupportMatrix | None = None) -> pd.DataFrame:
         """
         Adds site-specific columns to the DataFrame by aggregating resource usage metrics.
-        This function groups the data by site name and calculates the total memory, disk, and CPU usage for each site.
+        This function rolls the aggregation cube up by site name to get the total memory, disk, and CPU usage for each site,
+        the VM counts of supported and unsupported OS and the mean, median, 95th percentile and maximum per VM,
+        see Cube.site_statistics. The medians and 95th percentiles are exact, computed from the inventory rows.
 
         Args:
-            None: This method does not take any arguments.
+            support_matrix (SupportMatrix | None, optional): matrix to count supported and unsupported OS VMs by.
+              Defaults to the matrix of const.SUPPORT_MATRIX_FILE.
 
         Returns:
             pd.DataFrame: A DataFrame containing the aggregated resource usage for each site, with renamed
-                          columns for clarity.
+                          columns for clarity, see const.SITE_USAGE_COLUMNS and const.SITE_STATISTICS_COLUMNS.
 
         Examples:
             site_usage_df = create_site_specific_dataframe()
         """
-        site_columns = ["Site_RAM_Usage", "Site_Disk_Usage", "Site_CPU_Usage", "Site_VM_Count"]
-        new_site_df = self.df.copy()
-        if "Site Name" not in new_site_df.columns:
+        site_columns = list(const.SITE_USAGE_COLUMNS)
+        if "Site Name" not in self.df.columns:
             raise ValueError('\n\n\n-------> Error: The "Site Name" column does not exist in the DataFrame. <------')
         # Check if all site-specific columns already exist
-        if all(col in new_site_df.columns for col in site_columns):
+        if all(col in self.df.columns for col in site_columns):
             raise ValueError("Site-specific columns already exist in the DataFrame.")
 
-        # Get the column names from the column_headers dictionary
-        memory_col = self.column_headers["vmMemory"]
-        disk_col = self.column_headers["vmDisk"]
-        cpu_col = self.column_headers["vCPU"]
-
-        new_site_df[disk_col] = np.ceil(new_site_df[disk_col] / 1024).astype(int)
-
-        # Group by Site Name and calculate sums
-        site_usage = new_site_df.groupby("Site Name")[[memory_col, disk_col, cpu_col]].sum().reset_index()
-        site_usage["Site_VM_Count"] = new_site_df.groupby("Site Name")["Site Name"].count().values
+        quantiles = site_quantiles(self.df["Site Name"], self._site_measures())
+        site_usage = self.cube.site_statistics(support_matrix or load_support_matrix(), quantiles)
 
         # Rename columns to match the desired output
-        site_usage.columns = ["Site Name"] + site_columns
+        site_usage.columns = ["Site Name", *site_columns, *const.SITE_STATISTICS_COLUMNS]
 
         return site_usage
 
+    def sketch_sites(self: t.Self) -> dict[t.Hashable, dict[str, "QuantileSketch"]]:
+        """Sketch the memory, CPU and disk of the VMs of every site, for summaries, which keep no rows.
+
+        Reports on the inventory compute the quantiles of each site from the rows instead, see
+        create_site_specific_dataframe, so the cube has no sketches per site.
+
+        Returns:
+            dict[t.Hashable, dict[str, QuantileSketch]]: sketch of each measure, by site, see cube.sketch_sites
+        """
+        return sketch_sites(column_or_empty(self.df, "Site Name"), self._site_measures())
+
+    def _site_measures(self: t.Self) -> dict[str, pd.Series]:
+        """Memory, CPU and disk of each VM as numbers, by measure, see const.SITE_MEASURE_HEADERS."""
+        return {
+            measure: to_numeric(self.df[self.column_headers[header]])
+            for measure, header in const.SITE_MEASURE_HEADERS.items()
+        }
+
+    @property
+    def data_version(self: t.Self) -> int:
+        """Stamp of the inventory data, changed whenever the DataFrame is replaced or invalidate is called.
+
+        Returns:
+            int: current data version
+        """
+        if self._versioned_df is not self.df:
+            self._versioned_df = self.df
+            self._data_version += 1
+        return self._data_version
+
+    def invalidate(self: t.Self) -> None:
+        """Mark the inventory as changed after self.df was modified in place.
+
+        Changes the data version and drops data derived from the DataFrame, such as the cube.
+        """
+        self._data_version += 1
+        self._cube = None
+        self._adaptive_cubes = {}
+        self._os_index = None
+
+    @property
+    def cube(self: t.Self) -> Cube:
+        """Aggregation cube of the inventory, built on first use and rebuilt when the data version changes.
+
+        Returns:
+            Cube: Cube aggregated from self.df
+        """
+        if self._cube is None or self._cube_version != self.data_version:
+            self._cube = Cube.from_dataframe(self.df, self.column_headers)
+            self._cube_version = self.data_version
+        return self._cube
+
+    @property
+    def os_index(self: t.Self) -> RowIndex:
+        """Rows of each OS Name, built on first use and rebuilt when the data version changes.
+
+        The rows of an OS are a slice of the index, so per OS selections don't compare every row's OS Name.
+        Reports that never select rows by OS don't pay for the sort of the index.
+
+        Returns:
+            RowIndex: positions in self.df of the rows of each OS Name
+        """
+        if self._os_index is None or self._os_index_version != self.data_version:
+            self._os_index = RowIndex(column_or_empty(self.df, "OS Name"))
+            self._os_index_version = self.data_version
+        return self._os_index
+
+    def adaptive_cube(self: t.Self, disk_edges: tuple[int, ...]) -> Cube:
+        """Aggregation cube of the inventory with disks binned by disk_edges, built once per set of edges.
+
+        Args:
+            disk_edges (tuple[int, ...]): edges from adaptive_disk_edges
+
+        Returns:
+            Cube: Cube aggregated from self.df, see Cube.assign_adaptive_disk_ranges
+        """
+        if self._adaptive_cubes_version != self.data_version:
+            self._adaptive_cubes = {}
+            self._adaptive_cubes_version = self.data_version
+        if disk_edges not in self._adaptive_cubes:
+            self._adaptive_cubes[disk_edges] = Cube.from_dataframe(self.df, self.column_headers, disk_edges)
+        return self._adaptive_cubes[disk_edges]
+
+    def create_environment_filtered_cube(
+        self: t.Self, prod_envs: list[str], env_filter: str | None = None
+    ) -> pd.DataFrame:
+        """Create copy of the cube frame, with environment replaced with category, and filtered by requested filter
+
+        Args:
+            prod_envs (list[str]): list of environment labels defined as prod. (all other labels will be non-prod)
+            env_filter (str | None, optional): filter to apply to environment column. Defaults to None.
+
+        Returns:
+            pd.DataFrame: cube frame filtered by env_filter with the environment column named as in the inventory
+        """
+        return self.cube.environment_filtered(prod_envs, self.column_headers["environment"], env_filter)
+
     def create_environment_filtered_dataframe(
         self: t.Self, prod_envs: list[str], env_filter: str | None = None
     ) -> pd.DataFrame:
@@ -343,7 +563,7 @@ class VMData:
         """
         data_cp = self.df.copy()
         data_cp[self.column_headers["environment"]] = self.df[self.column_headers["environment"]].apply(
-            _categorize_environment, prod_envs=prod_envs
+            categorize_environment, prod_envs=prod_envs
         )
 
         if env_filter and env_filter not in ["all", "both"]:
@@ -355,26 +575,7 @@ class VMData:
         self.df.to_csv(path, index=False)
 
 
-def _categorize_environment(x: str, prod_envs: list[str]) -> str:
-    """Categorize environment value based on configured prod environment labels
-
-    Args:
-        x (str): environment value to compare, passed by pandas when using per row operations
-        prod_envs (list[str]): list of environment labels to define as prod
-
-    Returns:
-        str: environment category, one of ["non-prod", "prod", "all envs"]
-    """
-    if pd.isnull(x):
-        return "non-prod"
-
-    if not prod_envs:
-        return "all envs"
-
-    # Ensure x is a string
-    if isinstance(x, str):
-        for env in prod_envs:
-            if env in x:
-                return "prod"
-
-    return "non-prod"
+def _mib_to_gib(numbers: pd.Series) -> pd.Series:
+    """Round MiB up to whole GiB, as integers unless a value is missing, which has no integer."""
+    gib = np.ceil(numbers / 1024)
+    return gib if gib.isna().any() else gib.astype(int)
@@ -0,0 +1,171 @@
+# Std lib imports
+import heapq
+import logging
+import math
+import typing as t
+from pathlib import Path
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+from .capacity import select_supported, split_groups
+from .support import SupportMatrix
+from .vmdata import VMData
+
+LOGGER = logging.getLogger(__name__)
+
+# File formats the planned waves can be written in, by suffix
+WAVE_FILE_SUFFIXES = (".csv", ".parquet")
+
+
+class WavePlan(t.NamedTuple):
+    """Migration waves of the VMs with a supported OS, see plan_waves."""
+
+    # Inventory rows of the planned VMs with their wave in the first column, in wave order
+    vms: pd.DataFrame
+    # VMs, vCPU, memory and disk of each wave
+    waves: pd.DataFrame
+
+    def to_file(self: t.Self, path: Path) -> None:
+        """Write the planned VMs to a CSV or Parquet file, depending on the suffix of path.
+
+        Args:
+            path (Path): file to write, ending in one of WAVE_FILE_SUFFIXES
+
+        Raises:
+            ValueError: If path doesn't end in one of WAVE_FILE_SUFFIXES.
+            ImportError: If path is a Parquet file and pyarrow isn't installed.
+        """
+        suffix = Path(path).suffix.lower()
+        if suffix == ".csv":
+            self.vms.to_csv(path, index=False)
+        elif suffix == ".parquet":
+            # Inventory columns can mix numbers and text, which Parquet can't store in one column
+            text_columns = [column for column in self.vms.columns if self.vms[column].dtype == object]
+            self.vms.astype(dict.fromkeys(text_columns, "string")).to_parquet(path, index=False)
+        else:
+            raise ValueError(f"Can't write waves to {path}, its suffix isn't one of {', '.join(WAVE_FILE_SUFFIXES)}")
+        LOGGER.debug("Wrote %d VMs in %d waves to %s", len(self.vms), len(self.waves), path)
+
+
+def assign_waves(
+    memory: np.ndarray,
+    disk: np.ndarray,
+    max_vms: float = math.inf,
+    max_memory: float = math.inf,
+    max_disk: float = math.inf,
+) -> np.ndarray:
+    """Assign VMs to waves no larger than the caps, in as few waves of as even a size as a sorted greedy finds.
+
+    The waves the caps need at least are opened first. VMs are taken in order of their largest share
+    of a wave, and each is added to the wave with the smallest largest share, kept on a heap, or to a new
+    wave if it doesn't fit in that one. VMs larger than a wave on their own get a wave each.
+
+    Args:
+        memory (np.ndarray): memory of each VM
+        disk (np.ndarray): disk of each VM
+        max_vms (float, optional): most VMs in a wave. Defaults to no limit.
+        max_memory (float, optional): most memory of the VMs in a wave. Defaults to no limit.
+        max_disk (float, optional): most disk of the VMs in a wave. Defaults to no limit.
+
+    Returns:
+        np.ndarray: wave of each VM, numbered from 0 in the order the waves are opened
+    """
+    shares = np.column_stack([np.full(len(memory), 1 / max_vms), memory / max_memory, disk / max_disk])
+    largest = shares.max(axis=1)
+    fits = largest <= 1
+    # Fewest waves the VMs that fit in a wave fill
+    opened = math.ceil(shares[fits].sum(axis=0).max().round(9)) if fits.any() else 0
+    counts, memory_loads, disk_loads = [0] * opened, [0.0] * opened, [0.0] * opened
+    heap = [(0.0, wave) for wave in range(opened)]
+
+    waves = np.empty(len(memory), dtype=np.int64)
+    order = np.argsort(-largest, kind="stable")
+    for vm, vm_memory, vm_disk, vm_fits in zip(
+        order.tolist(), memory[order].tolist(), disk[order].tolist(), fits[order].tolist()
+    ):
+        if vm_fits:
+            wave = heap[0][1]
+            count, wave_memory, wave_disk = counts[wave] + 1, memory_loads[wave] + vm_memory, disk_loads[wave] + vm_disk
+            if count <= max_vms and wave_memory <= max_memory and wave_disk <= max_disk:
+                counts[wave], memory_loads[wave], disk_loads[wave] = count, wave_memory, wave_disk
+                heapq.heapreplace(heap, (max(count / max_vms, wave_memory / max_memory, wave_disk / max_disk), wave))
+                waves[vm] = wave
+                continue
+        wave = len(counts)
+        counts.append(1)
+        memory_loads.append(vm_memory)
+        disk_loads.append(vm_disk)
+        if vm_fits:
+            heapq.heappush(heap, (max(1 / max_vms, vm_memory / max_memory, vm_disk / max_disk), wave))
+        waves[vm] = wave
+    return waves
+
+
+def plan_waves(
+    vm_data: VMData,
+    prod_envs: list[str],
+    env_filter: str = "all",
+    site: str | None = None,
+    max_vms: int | None = None,
+    max_memory: float | None = None,
+    max_disk: float | None = None,
+    support_matrix: SupportMatrix | None = None,
+    across_sites: bool = False,
+) -> WavePlan:
+    """Partition the VMs with a supported OS into migration waves, per site and environment category.
+
+    Waves are assigned with assign_waves and numbered from 1 across the groups. VMs without a value
+    for memory or disk are planned as if they didn't use it. A VM larger than a wave on its own
+    gets a wave of its own, as it can't be split.
+
+    Args:
+        vm_data (VMData): normalized inventory
+        prod_envs (list[str]): environment labels defined as prod, see Cube.environment_filtered
+        env_filter (str, optional): environment category to plan, "both" for separate waves per category,
+          or "all" for waves across categories. Defaults to "all".
+        site (str | None, optional): Site Name to plan, every site if None. Defaults to None.
+        max_vms (int | None, optional): most VMs in a wave, no limit if None. Defaults to None.
+        max_memory (float | None, optional): most memory GiB in a wave, no limit if None. Defaults to None.
+        max_disk (float | None, optional): most disk GiB in a wave, no limit if None. Defaults to None.
+        support_matrix (SupportMatrix | None, optional): matrix of the supported OSes.
+          Defaults to the matrix of const.SUPPORT_MATRIX_FILE.
+        across_sites (bool, optional): plan waves that mix the VMs of different sites. Defaults to False.
+
+    Returns:
+        WavePlan: planned VMs and the size of every wave
+    """
+    positions, keys, resources = select_supported(vm_data, prod_envs, env_filter, site, support_matrix)
+    if across_sites:
+        keys.pop("Site Name", None)
+    first_rows, groups = split_groups(keys, len(positions))
+    caps = {
+        "max_vms": max_vms or math.inf,
+        "max_memory": max_memory or math.inf,
+        "max_disk": max_disk or math.inf,
+    }
+
+    waves = np.empty(len(positions), dtype=np.int64)
+    group_of_wave = []
+    for group, rows_of_group in enumerate(groups):
+        group_waves = assign_waves(resources[rows_of_group, 1], resources[rows_of_group, 2], **caps)
+        waves[rows_of_group] = group_waves + len(group_of_wave)
+        group_of_wave.extend([group] * (int(group_waves.max()) + 1 if len(group_waves) else 0))
+    oversized = int(((resources[:, 1] > caps["max_memory"]) | (resources[:, 2] > caps["max_disk"])).sum())
+    if oversized:
+        LOGGER.warning("%d VMs are larger than a wave on their own and get a wave each", oversized)
+
+    wave_count = len(group_of_wave)
+    summary = pd.DataFrame({"Wave": np.arange(1, wave_count + 1)})
+    for column, values in keys.items():
+        summary[column] = values.to_numpy()[first_rows[group_of_wave]] if wave_count else values.iloc[:0]
+    summary["VMs"] = np.bincount(waves, minlength=wave_count)
+    for column, resource in zip(("vCPU", "Memory GiB", "Disk GiB"), resources.T):
+        summary[column] = np.bincount(waves, weights=resource, minlength=wave_count)
+
+    order = np.argsort(waves, kind="stable")
+    vms = vm_data.df.iloc[positions[order]].reset_index(drop=True)
+    vms.insert(0, "Wave", waves[order] + 1)
+    LOGGER.debug("Planned %d VMs in %d groups into %d waves", len(positions), len(groups), wave_count)
+    return WavePlan(vms, summary)
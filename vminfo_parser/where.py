@@ -0,0 +1,310 @@
+# Std lib imports
+import operator
+import re
+import typing as t
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+from .cube import to_numeric
+
+try:
+    import numexpr
+except ImportError:  # numexpr is optional, masks are combined with numpy without it
+    numexpr = None
+
+# Tokens of a --where expression: numbers, quoted strings, `quoted columns`, operators and words
+_TOKEN_REGEX = re.compile(
+    r"""\s*(?:
+    (?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)(?![^\s()\[\],])
+    |(?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    |`(?P<column>[^`]+)`
+    |(?P<operator>==|!=|<=|>=|<|>|\(|\)|\[|\]|,)
+    |(?P<word>[^\s'"`=!<>()\[\],]+)
+    )""",
+    re.VERBOSE,
+)
+_KEYWORDS = ("and", "or", "not", "in")
+_COMPARISONS: dict[str, t.Callable[[t.Any, t.Any], t.Any]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class Comparison(t.NamedTuple):
+    """A column compared with a number, or with a string for == and !=."""
+
+    column: str
+    operator: str
+    value: float | str
+
+
+class Membership(t.NamedTuple):
+    """A column whose value is, or with negated isn't, one of the values."""
+
+    column: str
+    values: tuple[float | str, ...]
+    negated: bool = False
+
+
+class Not(t.NamedTuple):
+    operand: "Node"
+
+
+class Logical(t.NamedTuple):
+    """Operands combined with "and" or "or"."""
+
+    operator: str
+    operands: tuple["Node", ...]
+
+
+Node = Comparison | Membership | Not | Logical
+
+
+def string_number(value: str) -> float | None:
+    """Number of a string compared with a numeric column, e.g. 7 for OS Version == '7', or None if it isn't one."""
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class Where:
+    """Filter expression of --where, e.g. "OS Name == 'CentOS' and vmDisk > 2048 and Site Name in ['DC1','DC2']".
+
+    Comparisons of a column with a number or string are combined with and, or, not and parentheses.
+    Columns are named by a key of VMData.column_headers, e.g. vmDisk, or by a column of the normalized
+    inventory, e.g. Site Name, and can be quoted in backticks. Numbers are compared with the column
+    converted to numbers, as are strings holding a number with numeric columns. Missing values only
+    match != and not in.
+    """
+
+    def __init__(self: t.Self, text: str) -> None:
+        """Parse an expression.
+
+        Args:
+            text (str): expression to parse
+
+        Raises:
+            ValueError: If text isn't a valid expression.
+        """
+        self.text = text
+        self._tokens = self._tokenize(text)
+        self._position = 0
+        self.tree: Node = self._parse_or()
+        if self._position < len(self._tokens):
+            raise ValueError(f"Unexpected {self._tokens[self._position][1]!r} in --where expression {text!r}")
+        del self._tokens
+
+    @property
+    def columns(self: t.Self) -> set[str]:
+        """Columns the expression compares."""
+        columns = set()
+        nodes = [self.tree]
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, (Comparison, Membership)):
+                columns.add(node.column)
+            elif isinstance(node, Not):
+                nodes.append(node.operand)
+            else:
+                nodes.extend(node.operands)
+        return columns
+
+    def mask(self: t.Self, df: pd.DataFrame, column_headers: dict[str, str]) -> np.ndarray:
+        """Evaluate the expression on every row of df at once.
+
+        Comparisons with numbers and the and, or and not of the expression are evaluated in a single
+        numexpr expression if numexpr is installed, and with numpy otherwise.
+
+        Args:
+            df (pd.DataFrame): normalized inventory
+            column_headers (dict[str, str]): column names by key, see VMData.column_headers
+
+        Returns:
+            np.ndarray: boolean mask of the rows matching the expression
+
+        Raises:
+            ValueError: If a column isn't in df.
+        """
+        evaluation = _Evaluation(df, column_headers)
+        if numexpr is not None:
+            return numexpr.evaluate(evaluation.compile(self.tree), local_dict=evaluation.variables)
+        return evaluation.evaluate(self.tree)
+
+    @staticmethod
+    def _tokenize(text: str) -> list[tuple[str, str]]:
+        tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _TOKEN_REGEX.match(text, position)
+            if match is None:
+                raise ValueError(f"Unexpected {text[position:]!r} in --where expression {text!r}")
+            kind = match.lastgroup
+            value = match[kind]
+            if kind == "word" and value.lower() in _KEYWORDS:
+                kind, value = "keyword", value.lower()
+            tokens.append((kind, value))
+            position = match.end()
+        return tokens
+
+    def _peek(self: t.Self) -> tuple[str, str] | None:
+        return self._tokens[self._position] if self._position < len(self._tokens) else None
+
+    def _next(self: t.Self, expected: str) -> tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"Expected {expected} at the end of --where expression {self.text!r}")
+        self._position += 1
+        return token
+
+    def _expect(self: t.Self, value: str) -> None:
+        kind, token = self._next(repr(value))
+        if token != value or kind not in ("operator", "keyword"):
+            raise ValueError(f"Expected {value!r} instead of {token!r} in --where expression {self.text!r}")
+
+    def _parse_or(self: t.Self) -> Node:
+        operands = [self._parse_and()]
+        while self._peek() == ("keyword", "or"):
+            self._position += 1
+            operands.append(self._parse_and())
+        return operands[0] if len(operands) == 1 else Logical("or", tuple(operands))
+
+    def _parse_and(self: t.Self) -> Node:
+        operands = [self._parse_not()]
+        while self._peek() == ("keyword", "and"):
+            self._position += 1
+            operands.append(self._parse_not())
+        return operands[0] if len(operands) == 1 else Logical("and", tuple(operands))
+
+    def _parse_not(self: t.Self) -> Node:
+        if self._peek() == ("keyword", "not"):
+            self._position += 1
+            return Not(self._parse_not())
+        if self._peek() == ("operator", "("):
+            self._position += 1
+            node = self._parse_or()
+            self._expect(")")
+            return node
+        return self._parse_comparison()
+
+    def _parse_comparison(self: t.Self) -> Node:
+        column = self._parse_column()
+        kind, token = self._next("a comparison")
+        if (kind, token) == ("keyword", "not"):
+            self._expect("in")
+            return Membership(column, self._parse_list(), negated=True)
+        if (kind, token) == ("keyword", "in"):
+            return Membership(column, self._parse_list())
+        if token not in _COMPARISONS or kind != "operator":
+            raise ValueError(f"Expected a comparison instead of {token!r} in --where expression {self.text!r}")
+        value = self._parse_value()
+        if isinstance(value, str) and token not in ("==", "!="):
+            raise ValueError(f"{column} {token} {value!r} compares with a string, only == and != can")
+        return Comparison(column, token, value)
+
+    def _parse_column(self: t.Self) -> str:
+        kind, token = self._next("a column")
+        if kind == "column":
+            return token
+        if kind != "word":
+            raise ValueError(f"Expected a column instead of {token!r} in --where expression {self.text!r}")
+        # Column names may contain spaces, e.g. Site Name, so consecutive words are one column
+        words = [token]
+        while (following := self._peek()) is not None and following[0] == "word":
+            words.append(following[1])
+            self._position += 1
+        return " ".join(words)
+
+    def _parse_value(self: t.Self) -> float | str:
+        kind, token = self._next("a number or string")
+        if kind == "number":
+            return float(token)
+        if kind == "string":
+            return re.sub(r"\\(.)", r"\1", token[1:-1])
+        raise ValueError(f"Expected a number or string instead of {token!r} in --where expression {self.text!r}")
+
+    def _parse_list(self: t.Self) -> tuple[float | str, ...]:
+        self._expect("[")
+        values = [self._parse_value()]
+        while self._peek() == ("operator", ","):
+            self._position += 1
+            values.append(self._parse_value())
+        self._expect("]")
+        return tuple(values)
+
+
+class _Evaluation:
+    """Columns and masks of one evaluation of a Where expression on an inventory, see Where.mask."""
+
+    def __init__(self: t.Self, df: pd.DataFrame, column_headers: dict[str, str]) -> None:
+        self.df = df
+        self.column_headers = column_headers
+        # Arrays of the numexpr expression by name: numeric columns and the masks of the other comparisons
+        self.variables: dict[str, np.ndarray] = {}
+        self._numeric_variables: dict[str, str] = {}
+
+    def column(self: t.Self, name: str) -> pd.Series:
+        resolved = self.column_headers.get(name, name)
+        if resolved not in self.df.columns:
+            raise ValueError(f"Column {name!r} of the --where expression is not in the inventory")
+        return self.df[resolved]
+
+    def numeric(self: t.Self, name: str) -> str:
+        """Name of the variable of a column converted to numbers, converting each column once."""
+        if name not in self._numeric_variables:
+            variable = self._numeric_variables[name] = f"n{len(self._numeric_variables)}"
+            self.variables[variable] = to_numeric(self.column(name)).to_numpy(dtype=float, na_value=np.nan)
+        return self._numeric_variables[name]
+
+    def compile(self: t.Self, node: Node) -> str:
+        """numexpr expression of node."""
+        if isinstance(node, Logical):
+            return "(" + f" {'&' if node.operator == 'and' else '|'} ".join(map(self.compile, node.operands)) + ")"
+        if isinstance(node, Not):
+            return f"(~{self.compile(node.operand)})"
+        if isinstance(node, Comparison) and not isinstance(node.value, str):
+            return f"({self.numeric(node.column)} {node.operator} {node.value!r})"
+        variable = f"m{len(self.variables)}"
+        self.variables[variable] = self.leaf(node)
+        return variable
+
+    def evaluate(self: t.Self, node: Node) -> np.ndarray:
+        """Mask of node, evaluated with numpy."""
+        if isinstance(node, Logical):
+            operands = [self.evaluate(operand) for operand in node.operands]
+            return np.logical_and.reduce(operands) if node.operator == "and" else np.logical_or.reduce(operands)
+        if isinstance(node, Not):
+            return ~self.evaluate(node.operand)
+        if isinstance(node, Comparison) and not isinstance(node.value, str):
+            with np.errstate(invalid="ignore"):
+                return _COMPARISONS[node.operator](self.variables[self.numeric(node.column)], node.value)
+        return self.leaf(node)
+
+    def leaf(self: t.Self, node: Comparison | Membership) -> np.ndarray:
+        """Mask of a comparison with a string, or of a membership test."""
+        values = self.column(node.column)
+        numeric = pd.api.types.is_numeric_dtype(values)
+        # Strings are compared with the text of numeric columns, e.g. OS Version == '7' in a column read as numbers,
+        # and as numbers if they are numbers, as a column of floats has the text '7.0'
+        text = values.astype("string") if numeric else values
+        if isinstance(node, Comparison):
+            number = string_number(node.value) if numeric else None
+            if number is not None:
+                with np.errstate(invalid="ignore"):
+                    return _COMPARISONS[node.operator](self.variables[self.numeric(node.column)], number)
+            return _COMPARISONS[node.operator](text, node.value).to_numpy(dtype=bool, na_value=node.operator == "!=")
+        strings = [value for value in node.values if isinstance(value, str)]
+        numbers = [value for value in node.values if not isinstance(value, str)]
+        if numeric:
+            numbers.extend(number for number in map(string_number, strings) if number is not None)
+        mask = text.isin(strings).to_numpy(dtype=bool, na_value=False)
+        if numbers:
+            mask = mask | to_numeric(values).isin(numbers).to_numpy()
+        return ~mask if node.negated else mask